@@ -1,5 +1,7 @@
 """SQLAlchemy models and database setup for MSMEMate."""
 
+import hashlib
+import json
 import os
 from datetime import datetime
 from pathlib import Path
@@ -12,10 +14,15 @@ from sqlalchemy import (
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    cast,
     create_engine,
+    func,
+    literal,
+    text,
 )
 from sqlalchemy.orm import DeclarativeBase, Session, relationship, sessionmaker
 
@@ -227,12 +234,46 @@ class MatchResult(Base):
     explainer_en = Column(Text)
     explainer_hi = Column(Text)
     model_version = Column(String(50), default="indicbert-v1")
+    # The run that produced this row; only the MSE's current run keeps rows
+    run_id = Column(Integer, ForeignKey("match_runs.id"), index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     mse = relationship("MSE", back_populates="matches")
     snp = relationship("SNP", back_populates="matches")
 
 
+class MatchRun(Base):
+    """One scoring of an MSE against the registry, keyed by what determines
+    its result: (mse_id, classification_id, profile_hash, registry_version,
+    model_version). profile_hash covers the MSE columns the scorer and the
+    explainer read (name, state, district, language).
+
+    A repeat of the current run is served from its stored match_results rows
+    with no writes; a new run replaces those rows. Runs themselves are kept
+    as the compact audit history (ranking only, no explainer text).
+    """
+
+    __tablename__ = "match_runs"
+    __table_args__ = (
+        # at most one current run per MSE
+        Index("ix_match_runs_current", "mse_id", unique=True,
+              postgresql_where=text("is_current"), sqlite_where=text("is_current")),
+    )
+
+    id = Column(Integer, primary_key=True)
+    mse_id = Column(Integer, ForeignKey("mses.id"), nullable=False)
+    classification_id = Column(Integer, ForeignKey("classification_results.id"))
+    profile_hash = Column(String(16), nullable=False)
+    registry_version = Column(String(20), nullable=False)
+    model_version = Column(String(50), nullable=False)
+    top_k = Column(Integer, nullable=False)
+    top_snp_id = Column(Integer, ForeignKey("snps.id"))
+    top_score = Column(Float)
+    ranking = Column(Text)  # JSON [[snp_id, composite], ...], best first
+    is_current = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 # ── Audit Trail ───────────────────────────────────────────────────────
 
 class AuditLog(Base):
@@ -331,3 +372,23 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ── Change detection ──────────────────────────────────────────────────
+
+def content_fingerprint(db: Session, columns: list, order_by) -> tuple:
+    """(row count, digest of the columns' values in order_by order) — moves
+    on any insert, delete or edit, same-length edits included. Computed in
+    the database on Postgres (one row back); other backends hash the same
+    values here. NULL gets its own marker, so NULL → '' is a change too."""
+    values = [func.coalesce(cast(col, String), "\\N") for col in columns]
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+        row = db.query(
+            func.count(),
+            func.md5(func.string_agg(func.concat_ws("|", *values), aggregate_order_by(literal(","), order_by))),
+        ).select_from(order_by.table).one()
+        return tuple(row)
+    rows = db.query(*values).order_by(order_by).all()
+    return len(rows), hashlib.md5(json.dumps([tuple(r) for r in rows]).encode("utf-8")).hexdigest()
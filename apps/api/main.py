@@ -22,8 +22,9 @@ from routes.claims import router as claims_router
 from routes.model_health import router as model_health_router
 from routes.reviews import router as reviews_router
 from routes.notifications import router as notifications_router
+from services import engine_pool, http_pool
 from services.auth import get_current_user, require_admin
-from services.classifier import init_classifier
+from services.classifier import init_classifier, start_taxonomy_watcher, stop_taxonomy_watcher
 from services.ratelimit import rate_limit_middleware
 
 
@@ -31,7 +32,12 @@ from services.ratelimit import rate_limit_middleware
 async def lifespan(app: FastAPI):
     """Startup / shutdown lifecycle."""
     init_classifier()
+    await http_pool.start()
+    start_taxonomy_watcher()
     yield
+    stop_taxonomy_watcher()
+    await http_pool.aclose()
+    engine_pool.shutdown()
 
 
 app = FastAPI(
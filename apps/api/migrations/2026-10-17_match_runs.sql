@@ -0,0 +1,67 @@
+-- Match runs: deduplicated match_results persistence — 2026-10-17
+--
+-- Why: the match page calls POST /match on every visit, and every call
+-- inserted a fresh top-k set into match_results — identical rows, explainer
+-- text included, for as long as nothing about the MSE, its classification or
+-- the SNP registry changed. The table grew with page views rather than with
+-- information, and "the MSE's recommendation" meant picking through repeats.
+--
+-- A run is now keyed by what determines its result: (mse_id, latest
+-- classification, profile_hash of the scored MSE fields, SNP registry
+-- version, model version). A repeat of the current run is served from its
+-- stored rows with no writes; a new run replaces the MSE's match_results rows
+-- and retires the previous run, which stays here as compact history (ranking
+-- only, no explainer text).
+--
+-- Existing match_results rows keep run_id NULL; they are replaced on the
+-- MSE's next run.
+--
+-- Safe to re-run: IF NOT EXISTS throughout.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS match_runs (
+    id                 SERIAL PRIMARY KEY,
+    mse_id             INTEGER     NOT NULL REFERENCES mses (id),
+    classification_id  INTEGER     REFERENCES classification_results (id),
+    profile_hash       VARCHAR(16) NOT NULL,
+    registry_version   VARCHAR(20) NOT NULL,
+    model_version      VARCHAR(50) NOT NULL,
+    top_k              INTEGER     NOT NULL,
+    top_snp_id         INTEGER     REFERENCES snps (id),
+    top_score          DOUBLE PRECISION,
+    ranking            TEXT,
+    is_current         BOOLEAN     NOT NULL DEFAULT TRUE,
+    created_at         TIMESTAMP   DEFAULT NOW()
+);
+
+COMMENT ON TABLE match_runs IS
+    'One scoring of an MSE against the SNP registry. Only the current run '
+    'per MSE keeps its match_results rows; earlier runs are history.';
+COMMENT ON COLUMN match_runs.profile_hash IS
+    'Digest of the MSE fields the scorer and explainer read (name, state, '
+    'district, language) — an edit to any of them starts a new run.';
+COMMENT ON COLUMN match_runs.ranking IS
+    'JSON [[snp_id, composite], ...], best first.';
+
+ALTER TABLE match_results
+    ADD COLUMN IF NOT EXISTS run_id INTEGER REFERENCES match_runs (id);
+
+-- At most one current run per MSE; also the lookup every /match starts with.
+CREATE UNIQUE INDEX IF NOT EXISTS ix_match_runs_current
+    ON match_runs (mse_id)
+    WHERE is_current;
+
+-- Run history for one enterprise, newest first.
+CREATE INDEX IF NOT EXISTS ix_match_runs_mse_created
+    ON match_runs (mse_id, created_at DESC);
+
+-- A reused run's rows are loaded by run_id.
+CREATE INDEX IF NOT EXISTS ix_match_results_run_id
+    ON match_results (run_id);
+
+-- RLS deny-all to match every other table; the backend owner connection
+-- bypasses it.
+ALTER TABLE match_runs ENABLE ROW LEVEL SECURITY;
+
+COMMIT;
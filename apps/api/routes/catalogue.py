@@ -36,6 +36,7 @@ BASE_COLUMNS = [
     ("stock_qty", "Available quantity (number)", True),
     ("uom", "Unit of measure — see Reference sheet", False),
     ("hsn_code", "HSN code (4-8 digits)", False),
+    ("category_code", "ONDC leaf code, e.g. RET10-001 (blank = auto-detect)", False),
     ("sku_id", "Your internal product code", False),
     ("image_url", "Link to a product photo", False),
 ]
@@ -166,6 +167,8 @@ class CatalogueItem(BaseModel):
     product_name: str
     price_inr: float | None = None
     category_domain: str | None = None
+    category_code: str | None = None
+    attributes: dict[str, str] = {}  # inferred from name + description, not given in the row
     issues: list[str] = []
 
 
@@ -220,7 +223,8 @@ async def upload_catalogue(
 ):
     """Validate a filled catalogue, categorise products, enrich the MSE
     profile for matching, and generate the ONDC Beckn catalog payload."""
-    from services.classifier import _classify_with_keywords
+    from services import attribute_extractor
+    from services.classifier import _classify_with_keywords_many, category_index
 
     mse = db.query(MSE).get(mse_id)
     if not mse:
@@ -232,10 +236,19 @@ async def upload_catalogue(
     items: list[CatalogueItem] = []
     beckn_items: list[dict] = []
     names: list[str] = []
-
-    for rec in rows[:500]:
+    index = category_index()
+
+    rows = rows[:500]
+    row_names = [str(rec.get("product_name") or rec.get("Product name") or "").strip()
+                 for rec in rows]
+    # One keyword-engine pass over every named row up front
+    keyword_preds = iter(_classify_with_keywords_many([
+        f"{name} {rec.get('description') or ''}"
+        for name, rec in zip(row_names, rows) if name
+    ]))
+
+    for rec, name in zip(rows, row_names):
         row_no = int(rec.get("_row", 0))
-        name = str(rec.get("product_name") or rec.get("Product name") or "").strip()
         issues: list[str] = []
         if not name:
             issues.append("product_name missing")
@@ -253,15 +266,37 @@ async def upload_catalogue(
             issues.append("stock_qty missing")
 
         domain = None
+        leaf_code = None
+        attributes: dict[str, str] = {}
+        given: dict[str, str] = {}
+        given_code = str(rec.get("category_code") or "").strip()
+        if given_code:
+            leaf = index.lookup(given_code)
+            if leaf is None:
+                issues.append(f"category_code {given_code} is not an ONDC leaf category")
+            else:
+                leaf_code, domain = leaf.code, leaf.domain
         if name:
-            preds = _classify_with_keywords(f"{name} {rec.get('description') or ''}")
-            if preds and preds[0]["confidence"] > 0:
+            preds = next(keyword_preds)
+            if domain is None and preds and preds[0]["confidence"] > 0:
                 domain = preds[0]["domain"]
+            if leaf_code is None and domain is not None:
+                leaf_code = index.resolve(name, domain)
+            given = {
+                col: str(rec[col]).strip() for col, _hint, _req in DOMAIN_COLUMNS.get(domain, [])
+                if str(rec.get(col) or "").strip()
+            }
+            attributes = {
+                k: v for k, v in attribute_extractor.extract(
+                    f"{name} {rec.get('description') or ''}", domain,
+                ).items() if k not in given
+            }
             names.append(name)
 
         items.append(CatalogueItem(
             row=row_no, product_name=name or f"(row {row_no})",
-            price_inr=price, category_domain=domain, issues=issues,
+            price_inr=price, category_domain=domain, category_code=leaf_code,
+            attributes=attributes, issues=issues,
         ))
 
         if name and not issues:
@@ -270,10 +305,13 @@ async def upload_catalogue(
                 "descriptor": {"name": name,
                                "short_desc": str(rec.get("description") or "")[:120]},
                 "price": {"currency": "INR", "value": f"{price:.2f}"},
-                "category_id": domain or "RET10",
+                "category_id": leaf_code or domain or "RET10",
                 "quantity": {"available": {"count": str(qty)}},
                 "@ondc/org/returnable": True,
                 "@ondc/org/available_on_cod": True,
+                "tags": [{"code": "attribute", "list": [
+                    {"code": k, "value": v} for k, v in {**attributes, **given}.items()
+                ]}],
             })
 
     valid = sum(1 for it in items if not it.issues)
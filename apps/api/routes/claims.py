@@ -25,7 +25,9 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session, joinedload
 
 from database import AuditLog, ClassificationResult, SNPClaim, get_db
+from services import snp_registry
 from services.auth import User, require_admin
+from services.geo import serves_state
 
 router = APIRouter()
 
@@ -58,9 +60,13 @@ def verify_claim(
     claim: SNPClaim,
     mse_claim_counts: dict[int, int],
     classified_ids: set[int],
+    registry: Optional[snp_registry.RegistrySnapshot] = None,
 ) -> dict:
-    """Run the documented NSIC checklist on one stored claim."""
-    m, s = claim.mse, claim.snp
+    """Run the documented NSIC checklist on one stored claim. The SNP side
+    comes from the registry snapshot when given (the row is loaded only for
+    an SNP newer than the snapshot)."""
+    m = claim.mse
+    s = (registry.get(claim.snp_id) if registry is not None else None) or claim.snp
     checks: list[RuleCheck] = []
 
     udyam_ok = bool(m.udyam_number and UDYAM_RE.match(m.udyam_number))
@@ -120,9 +126,12 @@ def verify_claim(
         anomalies.append("Catalogue not observable on the network")
     if not amt_ok:
         anomalies.append("Over-billing beyond the scheme cap")
-    if s.geo_coverage and m.state and "pan india" not in s.geo_coverage.lower() \
-            and m.state.lower() not in s.geo_coverage.lower():
-        anomalies.append("MSE state outside SNP's declared coverage")
+    if s.geo_coverage and s.geo_coverage.strip() and m.state:
+        served = registry.serves_state(claim.snp_id, m.state) if registry is not None else None
+        if served is None:
+            served = serves_state(s.geo_coverage, m.state)
+        if not served:
+            anomalies.append("MSE state outside SNP's declared coverage")
 
     failed = sum(1 for c in checks if not c.passed)
     risk = min(1.0, failed * 0.22 + len(anomalies) * 0.12)
@@ -159,7 +168,7 @@ def verify_claim(
 def claim_queue(db: Session = Depends(get_db), user: User = Depends(require_admin)):
     rows = (
         db.query(SNPClaim)
-        .options(joinedload(SNPClaim.mse), joinedload(SNPClaim.snp))
+        .options(joinedload(SNPClaim.mse))
         .order_by(SNPClaim.submitted_at.desc())
         .limit(200)
         .all()
@@ -184,7 +193,8 @@ def claim_queue(db: Session = Depends(get_db), user: User = Depends(require_admi
         .all()
     }
 
-    claims = [verify_claim(r, counts, classified_ids) for r in rows]
+    registry = snp_registry.current(db)
+    claims = [verify_claim(r, counts, classified_ids, registry) for r in rows]
     claims.sort(key=lambda c: (c["decision"] is not None, -c["risk_score"]))
 
     pending = [c for c in claims if not c["decision"]]
@@ -6,13 +6,18 @@ from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from database import (MSE, AuditLog, ClassificationResult, OndcCategory,
-                      OndcDomain, User, get_db)
+                      OndcDomain, SessionLocal, User, get_db)
 from services.auth import authorize_mse_access, get_current_user, require_admin
-from services.classifier import classify_mse_description_async, get_compliance_checklist
+from services.classifier import (category_index, classify_batch_async,
+                                 classify_mse_description_async,
+                                 classify_mse_description_stream,
+                                 get_compliance_checklist)
 from services.notifications import classification_complete, safe_notify
 
 router = APIRouter()
@@ -52,6 +57,18 @@ class ClassifyTextRequest(BaseModel):
     language: str = "en"
 
 
+# Hundreds per call keeps one request well inside the gateway timeout even
+# when most items need the LLM; a 5K backfill is a short loop of these.
+BATCH_MAX_ITEMS = 500
+
+
+class ClassifyBatchRequest(BaseModel):
+    # Either raw texts (nothing persisted) or MSE ids (rows written), not both.
+    descriptions: list[ClassifyTextRequest] = Field(default_factory=list)
+    mse_ids: list[int] = Field(default_factory=list)
+    concurrency: Optional[int] = Field(default=None, ge=1, le=32)
+
+
 class PredictionItem(BaseModel):
     domain: str
     confidence: float
@@ -83,6 +100,28 @@ class ClassifyResponse(BaseModel):
     demand: Optional[dict] = None
 
 
+class ClassifyBatchItem(BaseModel):
+    index: int
+    mse_id: Optional[int] = None
+    result_id: Optional[int] = None
+    top3: list[PredictionItem] = []
+    selected_domain: Optional[str] = None
+    confidence: Optional[float] = None
+    selected_category: Optional[str] = None
+    selected_category_name: Optional[str] = None
+    engine: Optional[str] = None
+    attributes: dict[str, str] = {}
+    error: Optional[str] = None
+
+
+class ClassifyBatchResponse(BaseModel):
+    total: int
+    classified: int
+    persisted: int
+    engines: dict[str, int]
+    items: list[ClassifyBatchItem]
+
+
 class ClassificationHistoryItem(BaseModel):
     id: int
     predicted_domain: str
@@ -92,6 +131,68 @@ class ClassificationHistoryItem(BaseModel):
     created_at: datetime
 
 
+def _classify_response(
+    mse_id: int, predictions: list, engine: str, attributes: dict,
+    has_gst: bool = False, has_pan: bool = False,
+) -> ClassifyResponse:
+    top_pred = predictions[0]
+    return ClassifyResponse(
+        mse_id=mse_id,
+        top3=[PredictionItem(**p) for p in predictions[:3]],
+        selected_domain=top_pred["domain"],
+        confidence=top_pred["confidence"],
+        selected_category=top_pred.get("category"),
+        selected_category_name=top_pred.get("category_name"),
+        explanation=top_pred.get("explanation"),
+        engine=engine,
+        attributes=attributes,
+        compliance=[
+            ComplianceItem(**c)
+            for c in get_compliance_checklist(top_pred["domain"], has_gst=has_gst, has_pan=has_pan)
+        ],
+        demand=_demand_for(top_pred["domain"]),
+    )
+
+
+def _record_outcome(db: Session, mse: MSE, predictions: list, engine: str) -> None:
+    """Audit entry + owner notification for a finished classification."""
+    top_pred = predictions[0]
+    db.add(AuditLog(
+        action="mse_classified",
+        entity_type="mse",
+        entity_id=mse.id,
+        details=f"Predicted {top_pred['domain']} ({top_pred['confidence']:.2f}) via {engine}",
+        performed_by=engine,
+    ))
+
+    # Tell the owner in their own words. The notification carries the domain's
+    # display name and a qualitative band — never the raw score, matching what
+    # the UI is allowed to show an MSE user.
+    conf = top_pred["confidence"]
+    band = "green" if conf >= 0.85 else "yellow" if conf >= 0.60 else "red"
+    domain_row = (
+        db.query(OndcDomain).filter(OndcDomain.code == top_pred["domain"]).first()
+    )
+    event, body_en, body_hi = classification_complete(
+        domain_row.name if domain_row else top_pred["domain"], band)
+    safe_notify(db, mse.id, event, body_en=body_en, body_hi=body_hi)
+
+
+def _result_columns(predictions: list, engine: str) -> dict:
+    top_pred = predictions[0]
+    return {
+        "predicted_domain": top_pred["domain"],
+        "predicted_category": top_pred.get("category"),
+        "confidence": top_pred["confidence"],
+        "top3_predictions": json.dumps([dict(p) for p in predictions[:3]]),
+        "model_version": engine,
+    }
+
+
+def _ndjson(event: str, body: dict) -> bytes:
+    return (json.dumps({"event": event, **body}, default=str, ensure_ascii=False) + "\n").encode("utf-8")
+
+
 # ── Routes ───────────────────────────────────────────────────────────
 
 
@@ -116,59 +217,72 @@ async def classify(
         mse.description, mse.language
     )
 
-    top_pred = predictions[0]
+    db.add(ClassificationResult(mse_id=mse.id, **_result_columns(predictions, engine)))
+    _record_outcome(db, mse, predictions, engine)
+    db.commit()
 
-    result = ClassificationResult(
-        mse_id=mse.id,
-        predicted_domain=top_pred["domain"],
-        predicted_category=top_pred.get("category"),
-        confidence=top_pred["confidence"],
-        top3_predictions=json.dumps([dict(p) for p in predictions[:3]]),
-        model_version=engine,
+    return _classify_response(
+        mse.id, predictions, engine, attributes,
+        has_gst=bool(mse.gst_number), has_pan=bool(mse.pan_number),
     )
-    db.add(result)
-    db.add(AuditLog(
-        action="mse_classified",
-        entity_type="mse",
-        entity_id=mse.id,
-        details=f"Predicted {top_pred['domain']} ({top_pred['confidence']:.2f}) via {engine}",
-        performed_by=engine,
-    ))
 
-    # Tell the owner in their own words. The notification carries the domain's
-    # display name and a qualitative band — never the raw score, matching what
-    # the UI is allowed to show an MSE user.
-    conf = top_pred["confidence"]
-    band = "green" if conf >= 0.85 else "yellow" if conf >= 0.60 else "red"
-    domain_row = (
-        db.query(OndcDomain).filter(OndcDomain.code == top_pred["domain"]).first()
-    )
-    event, body_en, body_hi = classification_complete(
-        domain_row.name if domain_row else top_pred["domain"], band)
-    safe_notify(db, mse.id, event, body_en=body_en, body_hi=body_hi)
 
-    db.commit()
+@router.post("/stream")
+async def classify_stream(
+    payload: ClassifyRequest,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """POST / as a stream of NDJSON events — the trained model's answer first.
+
+    When the TF-IDF model is confident, a "provisional" event (its top-3, no
+    leaf category yet) is sent within milliseconds and the
+    ClassificationResult row is written; the "final" event follows once
+    Sarvam has resolved category, explanation and attributes, and updates
+    that same row. Otherwise only "final" is sent. Each event carries the
+    ClassifyResponse fields plus `event` and `result_id`. The audit entry and
+    owner notification are written once, with the final answer.
+    """
+    authorize_mse_access(user, payload.mse_id)
 
-    return ClassifyResponse(
-        mse_id=mse.id,
-        top3=[PredictionItem(**p) for p in predictions[:3]],
-        selected_domain=top_pred["domain"],
-        confidence=top_pred["confidence"],
-        selected_category=top_pred.get("category"),
-        selected_category_name=top_pred.get("category_name"),
-        explanation=top_pred.get("explanation"),
-        engine=engine,
-        attributes=attributes,
-        compliance=[
-            ComplianceItem(**c)
-            for c in get_compliance_checklist(
-                top_pred["domain"],
-                has_gst=bool(mse.gst_number),
-                has_pan=bool(mse.pan_number),
-            )
-        ],
-        demand=_demand_for(top_pred["domain"]),
-    )
+    mse = db.query(MSE).get(payload.mse_id)
+    if not mse:
+        raise HTTPException(status_code=404, detail="MSE not found")
+
+    # The body iterates after get_db's teardown has closed `db`: take plain
+    # values now, and write through a session the stream owns. Nothing reads
+    # an expired attribute after a commit, so no transaction stays open
+    # across the wait for Sarvam.
+    mse_id, description, language = mse.id, mse.description, mse.language
+    has_gst, has_pan = bool(mse.gst_number), bool(mse.pan_number)
+
+    async def events():
+        stream_db = SessionLocal()
+        try:
+            row_id: Optional[int] = None
+            async for stage, (predictions, engine, attributes) in classify_mse_description_stream(
+                description, language
+            ):
+                columns = _result_columns(predictions, engine)
+                if row_id is None:
+                    row = ClassificationResult(mse_id=mse_id, **columns)
+                    stream_db.add(row)
+                    stream_db.flush()
+                    row_id = row.id
+                else:
+                    stream_db.query(ClassificationResult).filter(
+                        ClassificationResult.id == row_id).update(columns, synchronize_session=False)
+                if stage == "final":
+                    _record_outcome(stream_db, stream_db.get(MSE, mse_id), predictions, engine)
+                stream_db.commit()
+                body = _classify_response(
+                    mse_id, predictions, engine, attributes, has_gst=has_gst, has_pan=has_pan,
+                ).model_dump()
+                yield _ndjson(stage, {"result_id": row_id, **body})
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
 
 
 @router.post("/text", response_model=ClassifyResponse)
@@ -180,24 +294,120 @@ async def classify_text(payload: ClassifyTextRequest):
     predictions, engine, attributes = await classify_mse_description_async(
         payload.description, payload.language
     )
+    return _classify_response(0, predictions, engine, attributes)
 
-    top_pred = predictions[0]
 
-    return ClassifyResponse(
-        mse_id=0,
-        top3=[PredictionItem(**p) for p in predictions[:3]],
-        selected_domain=top_pred["domain"],
-        confidence=top_pred["confidence"],
-        selected_category=top_pred.get("category"),
-        selected_category_name=top_pred.get("category_name"),
-        explanation=top_pred.get("explanation"),
-        engine=engine,
-        attributes=attributes,
-        compliance=[
-            ComplianceItem(**c)
-            for c in get_compliance_checklist(top_pred["domain"])
-        ],
-        demand=_demand_for(top_pred["domain"]),
+@router.post("/text/stream")
+async def classify_text_stream(payload: ClassifyTextRequest):
+    """POST /text as NDJSON events ("provisional" then "final", see /stream)."""
+    if not payload.description.strip():
+        raise HTTPException(status_code=400, detail="Description cannot be empty")
+
+    async def events():
+        async for stage, (predictions, engine, attributes) in classify_mse_description_stream(
+            payload.description, payload.language
+        ):
+            yield _ndjson(stage, _classify_response(0, predictions, engine, attributes).model_dump())
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@router.post("/batch", response_model=ClassifyBatchResponse)
+async def classify_batch(
+    payload: ClassifyBatchRequest,
+    db: Session = Depends(get_db),
+    user: User = Depends(require_admin),
+):
+    """Classify many descriptions or MSEs in one call (NSIC admin only).
+
+    For backfills and re-scoring after a model upgrade: the TF-IDF model
+    scores the whole batch at once and only the items that need it go to
+    Sarvam, under a concurrency cap. Results come back in input order. For
+    mse_ids, every new ClassificationResult is written in one bulk INSERT with
+    a single audit entry; owners are not notified — a backfill is not news
+    to the enterprise.
+    """
+    if payload.descriptions and payload.mse_ids:
+        raise HTTPException(
+            status_code=422, detail="Send descriptions or mse_ids, not both")
+    n = len(payload.descriptions) or len(payload.mse_ids)
+    if n == 0:
+        raise HTTPException(status_code=422, detail="Batch is empty")
+    if n > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=422, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+
+    items: list[ClassifyBatchItem] = [ClassifyBatchItem(index=i) for i in range(n)]
+    work: list[tuple[int, str, str]] = []  # (index, description, language)
+    mses: dict[int, MSE] = {}
+
+    if payload.mse_ids:
+        mses = {
+            m.id: m
+            for m in db.query(MSE).filter(MSE.id.in_(set(payload.mse_ids))).all()
+        }
+        for i, mse_id in enumerate(payload.mse_ids):
+            items[i].mse_id = mse_id
+            mse = mses.get(mse_id)
+            if mse is None:
+                items[i].error = "MSE not found"
+            elif not (mse.description or "").strip():
+                items[i].error = "MSE has no description"
+            else:
+                work.append((i, mse.description, mse.language or "en"))
+    else:
+        for i, d in enumerate(payload.descriptions):
+            if not d.description.strip():
+                items[i].error = "Description cannot be empty"
+            else:
+                work.append((i, d.description, d.language))
+
+    results = await classify_batch_async(
+        [(desc, lang) for _, desc, lang in work], concurrency=payload.concurrency)
+
+    rows: list[dict] = []
+    engines: dict[str, int] = {}
+    for (i, _, _), (predictions, engine, attributes) in zip(work, results):
+        top_pred = predictions[0]
+        item = items[i]
+        item.top3 = [PredictionItem(**p) for p in predictions[:3]]
+        item.selected_domain = top_pred["domain"]
+        item.confidence = top_pred["confidence"]
+        item.selected_category = top_pred.get("category")
+        item.selected_category_name = top_pred.get("category_name")
+        item.engine = engine
+        item.attributes = attributes
+        engines[engine] = engines.get(engine, 0) + 1
+        if item.mse_id is not None:
+            rows.append({"mse_id": item.mse_id, **_result_columns(predictions, engine)})
+
+    if rows:
+        inserted = db.execute(
+            insert(ClassificationResult).returning(
+                ClassificationResult.id, ClassificationResult.mse_id,
+                sort_by_parameter_order=True,
+            ),
+            rows,
+        ).all()
+        by_position = iter(inserted)
+        for item in items:
+            if item.mse_id is not None and item.error is None:
+                item.result_id = next(by_position).id
+        db.add(AuditLog(
+            action="mse_batch_classified",
+            entity_type="mse",
+            details=(f"Batch classified {len(rows)} MSEs: "
+                     + ", ".join(f"{e}={c}" for e, c in sorted(engines.items()))),
+            performed_by=user.username,
+        ))
+        db.commit()
+
+    return ClassifyBatchResponse(
+        total=n,
+        classified=len(results),
+        persisted=len(rows),
+        engines=engines,
+        items=items,
     )
 
 
@@ -304,21 +514,29 @@ def verify_classification(
         officer_domain = domain.code
         officer_category = None
         if payload.category:
-            category = (
-                db.query(OndcCategory)
-                .filter(OndcCategory.code == payload.category)
-                .first()
-            )
-            if not category:
-                raise HTTPException(
-                    status_code=422,
-                    detail=f"Unknown ONDC category code: {payload.category}")
-            if category.domain_id != domain.id:
+            # Taxonomy snapshot index first; the DB covers a leaf added since
+            # the snapshot was built.
+            leaf = category_index().lookup(payload.category)
+            if leaf is not None:
+                category_code, category_domain = leaf.code, leaf.domain
+            else:
+                category = (
+                    db.query(OndcCategory)
+                    .filter(OndcCategory.code == payload.category)
+                    .first()
+                )
+                if not category:
+                    raise HTTPException(
+                        status_code=422,
+                        detail=f"Unknown ONDC category code: {payload.category}")
+                category_code = category.code
+                category_domain = domain.code if category.domain_id == domain.id else None
+            if category_domain != domain.code:
                 raise HTTPException(
                     status_code=422,
-                    detail=(f"Category {category.code} does not belong to "
+                    detail=(f"Category {category_code} does not belong to "
                             f"domain {domain.code}"))
-            officer_category = category.code
+            officer_category = category_code
 
     result.officer_verdict = payload.verdict
     result.officer_domain = officer_domain
@@ -1,16 +1,30 @@
-"""Match route – IndicBERT-based MSE-to-SNP matching with multi-factor scoring."""
+"""Match route – IndicBERT-based MSE-to-SNP matching with multi-factor scoring.
 
+Persistence is per run: a run is keyed by what determines its result —
+(mse_id, latest classification, scored profile fields, SNP registry
+version, MODEL_VERSION). The
+page calls /match on every visit; while the key is unchanged the stored
+current set is served and nothing is written. A new key replaces the MSE's
+match_results rows, and each run stays in match_runs as compact history.
+"""
+
+import hashlib
+import json
 from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from database import (MSE, SNP, AuditLog, ClassificationResult, MatchResult,
+from database import (MSE, AuditLog, ClassificationResult, MatchResult, MatchRun,
                       Notification, User, get_db)
-from services.auth import authorize_mse_access, get_current_user
-from services.matcher import compute_match_scores, readiness_nudges
+from services import snp_registry
+from services.auth import authorize_mse_access, get_current_user, require_admin
+from services.matcher import (compute_match_scores, compute_match_scores_batch, readiness_nudges,
+                              stored_match)
 from services.explainer import generate_explainer
 from services.notifications import action_needed, safe_notify
 
@@ -54,6 +68,38 @@ class MatchResponse(BaseModel):
     matches: list[MatchItem]
     # Capability-gap suggestions that improve onboarding odds.
     nudges: list[str] = []
+    run_id: Optional[int] = None
+    # True when the stored result of an identical run was served
+    reused: bool = False
+
+
+# A day's review queue in one call; larger backfills loop over chunks.
+BATCH_MAX_ITEMS = 300
+
+
+class BatchMatchRequest(BaseModel):
+    mse_ids: list[int] = Field(default_factory=list)
+    top_k: int = Field(default=5, ge=1, le=20)
+
+
+class BatchMatchItem(BaseModel):
+    index: int
+    mse_id: int
+    mse_name: Optional[str] = None
+    predicted_domain: Optional[str] = None
+    matches: list[MatchItem] = []
+    run_id: Optional[int] = None
+    reused: bool = False
+    error: Optional[str] = None
+
+
+class BatchMatchResponse(BaseModel):
+    total: int
+    matched: int
+    reused: int
+    persisted: int
+    registry_version: str
+    items: list[BatchMatchItem]
 
 
 @router.post("/", response_model=MatchResponse, response_model_exclude_none=True)
@@ -82,70 +128,45 @@ def match_mse_to_snps(
     )
 
     predicted_domain = classification.predicted_domain if classification else None
+    classification_id = classification.id if classification else None
 
-    # Fetch candidate SNPs
-    snps = db.query(SNP).all()
-    if not snps:
+    # Candidate SNPs: the in-memory registry snapshot, already compiled for scoring
+    registry = snp_registry.current(db)
+    if not registry:
         raise HTTPException(status_code=404, detail="No SNPs available in the system")
 
-    # Compute match scores
-    scored = compute_match_scores(mse, snps, predicted_domain)
-    top_matches = sorted(scored, key=lambda s: s["composite"], reverse=True)[: payload.top_k]
+    run = (
+        db.query(MatchRun)
+        .filter(MatchRun.mse_id == mse.id, MatchRun.is_current.is_(True))
+        .first()
+    )
+    items, run_id = None, None
+    if _same_run(run, mse, classification_id, registry.version, payload.top_k):
+        stored = _stored_rows(db, [run.id])[run.id]
+        items = _stored_items(mse, stored, payload.top_k, registry, user.role == "admin")
+        run_id = run.id
+    reused = items is not None
 
-    items: list[MatchItem] = []
-    for m in top_matches:
-        snp = m["snp"]
-        band = _confidence_band(m["composite"])
-        explainer = generate_explainer(mse, snp, m, band)
+    if not reused:
+        # Compute match scores (all SNPs vectorised; reasons only for the top_k)
+        top_matches = compute_match_scores(mse, registry.features, predicted_domain, top_k=payload.top_k)
+        items, rows = [], []
+        for m in top_matches:
+            columns, item = _match_row(mse, m, user.role == "admin")
+            rows.append(columns)
+            items.append(item)
+        run_id = _replace_runs(db, [(mse, classification_id, payload.top_k, top_matches, rows)],
+                               registry.version, retire=[run.id] if run else [])[0]
 
-        result = MatchResult(
-            mse_id=mse.id,
-            snp_id=snp.id,
-            composite_score=m["composite"],
-            domain_score=m["domain"],
-            geo_score=m["geo"],
-            commission_score=m["commission"],
-            history_score=m["history"],
-            sentiment_score=m["sentiment"],
-            confidence_band=band,
-            explainer_en=explainer["en"],
-            explainer_hi=explainer["hi"],
-            model_version=MODEL_VERSION,
-        )
-        db.add(result)
-
-        items.append(MatchItem(
-            snp_id=snp.id,
-            snp_name=snp.name,
-            composite_score=round(m["composite"], 4),
-            confidence_band=band,
-            factor_bands={
-                "domain": _factor_band(m["domain"]),
-                "geo": _factor_band(m["geo"]),
-                "commission": _factor_band(m["commission"]),
-                "history": _factor_band(m["history"]),
-                "sentiment": _factor_band(m["sentiment"]),
-            },
-            fit_reasons=m.get("fit_reasons", []),
-            factors=FactorBreakdown(
-                domain_score=round(m["domain"], 4),
-                geo_score=round(m["geo"], 4),
-                commission_score=round(m["commission"], 4),
-                history_score=round(m["history"], 4),
-                sentiment_score=round(m["sentiment"], 4),
-            ) if user.role == "admin" else None,
-            explainer_en=explainer["en"],
-            explainer_hi=explainer["hi"],
+        db.add(AuditLog(
+            action="mse_matched",
+            entity_type="mse",
+            entity_id=mse.id,
+            details=(f"Matched to {len(items)} SNPs, top={items[0].snp_name if items else 'none'} "
+                     f"(run {run_id}, registry {registry.version}, {MODEL_VERSION})"),
+            performed_by=user.username,
         ))
 
-    db.add(AuditLog(
-        action="mse_matched",
-        entity_type="mse",
-        entity_id=mse.id,
-        details=f"Matched to {len(items)} SNPs, top={items[0].snp_name if items else 'none'} ({MODEL_VERSION})",
-        performed_by=user.username,
-    ))
-
     # Readiness nudges are recomputed on every /match call, which the page runs
     # on each visit. Emitting one notification per call would bury the events
     # that actually matter, so keep at most a single OPEN nudge per enterprise
@@ -179,7 +200,286 @@ def match_mse_to_snps(
         predicted_domain=predicted_domain,
         matches=items,
         nudges=nudges,
+        run_id=run_id,
+        reused=reused,
+    )
+
+
+@router.post("/batch", response_model=BatchMatchResponse, response_model_exclude_none=True)
+def match_batch(
+    payload: BatchMatchRequest,
+    db: Session = Depends(get_db),
+    user: User = Depends(require_admin),
+):
+    """Match many MSEs in one call (NSIC admin only) — pre-scoring the
+    officer review queue.
+
+    One query loads the MSEs, one their latest classifications, and the
+    whole batch is scored against the registry snapshot in one vectorised
+    pass (identical to POST /match per MSE). Every MatchResult is written
+    in one bulk INSERT with a single audit entry. Items come back in input
+    order; unknown or repeated ids carry an error. Owners get no readiness
+    nudge — officer pre-scoring is not news to the enterprise.
+    """
+    n = len(payload.mse_ids)
+    if n == 0:
+        raise HTTPException(status_code=422, detail="Batch is empty")
+    if n > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+
+    registry = snp_registry.current(db)
+    if not registry:
+        raise HTTPException(status_code=404, detail="No SNPs available in the system")
+
+    ids = set(payload.mse_ids)
+    mses = {m.id: m for m in db.query(MSE).filter(MSE.id.in_(ids)).all()}
+    ranked = (
+        db.query(
+            ClassificationResult.mse_id,
+            ClassificationResult.id,
+            ClassificationResult.predicted_domain,
+            func.row_number().over(
+                partition_by=ClassificationResult.mse_id,
+                order_by=(ClassificationResult.created_at.desc(), ClassificationResult.id.desc()),
+            ).label("rank"),
+        )
+        .filter(ClassificationResult.mse_id.in_(ids))
+        .subquery()
+    )
+    latest = {
+        r.mse_id: (r.id, r.predicted_domain)
+        for r in db.query(ranked.c.mse_id, ranked.c.id, ranked.c.predicted_domain)
+        .filter(ranked.c.rank == 1).all()
+    }
+    runs = {
+        r.mse_id: r
+        for r in db.query(MatchRun).filter(MatchRun.mse_id.in_(ids), MatchRun.is_current.is_(True)).all()
+    }
+
+    items = [BatchMatchItem(index=i, mse_id=mse_id) for i, mse_id in enumerate(payload.mse_ids)]
+    work: list[BatchMatchItem] = []
+    seen: set[int] = set()
+    for item in items:
+        mse = mses.get(item.mse_id)
+        if mse is None:
+            item.error = "MSE not found"
+        elif item.mse_id in seen:
+            item.error = "Duplicate mse_id"
+        else:
+            seen.add(item.mse_id)
+            item.mse_name = mse.name
+            item.predicted_domain = latest.get(mse.id, (None, None))[1]
+            work.append(item)
+
+    # Serve unchanged runs from their stored rows; score only the rest
+    same = {
+        it.mse_id: runs[it.mse_id].id for it in work
+        if _same_run(runs.get(it.mse_id), mses[it.mse_id], latest.get(it.mse_id, (None,))[0],
+                     registry.version, payload.top_k)
+    }
+    stored = _stored_rows(db, list(same.values()))
+    fresh: list[BatchMatchItem] = []
+    for item in work:
+        matches = None
+        if item.mse_id in same:
+            run_id = same[item.mse_id]
+            matches = _stored_items(mses[item.mse_id], stored[run_id], payload.top_k, registry, True)
+        if matches is None:
+            fresh.append(item)
+        else:
+            item.matches, item.run_id, item.reused = matches, run_id, True
+
+    scored = compute_match_scores_batch(
+        [mses[it.mse_id] for it in fresh], registry.features,
+        [it.predicted_domain for it in fresh], top_k=payload.top_k,
+    )
+    rows: list[dict] = []
+    new_runs = []
+    for item, top_matches in zip(fresh, scored):
+        mse = mses[item.mse_id]
+        run_rows = []
+        for m in top_matches:
+            columns, match_item = _match_row(mse, m, True)
+            run_rows.append(columns)
+            item.matches.append(match_item)
+        rows.extend(run_rows)
+        new_runs.append((mse, latest.get(mse.id, (None,))[0], payload.top_k, top_matches, run_rows))
+
+    if new_runs:
+        retire = [runs[it.mse_id].id for it in fresh if it.mse_id in runs]
+        for item, run_id in zip(fresh, _replace_runs(db, new_runs, registry.version, retire)):
+            item.run_id = run_id
+        db.add(AuditLog(
+            action="mse_batch_matched",
+            entity_type="mse",
+            details=(f"Batch matched {len(fresh)} MSEs ({len(work) - len(fresh)} unchanged), "
+                     f"top_k={payload.top_k} (registry {registry.version}, {MODEL_VERSION})"),
+            performed_by=user.username,
+        ))
+        db.commit()
+
+    return BatchMatchResponse(
+        total=n,
+        matched=len(work),
+        reused=len(work) - len(fresh),
+        persisted=len(rows),
+        registry_version=registry.version,
+        items=items,
+    )
+
+
+def _profile_hash(mse: MSE) -> str:
+    """Digest of the MSE columns the scorer and the explainer read."""
+    profile = json.dumps([mse.name, mse.state, mse.district, mse.language])
+    return hashlib.sha256(profile.encode("utf-8")).hexdigest()[:16]
+
+
+def _same_run(run: Optional[MatchRun], mse: MSE, classification_id: Optional[int],
+              registry_version: str, top_k: int) -> bool:
+    """Whether the current run already answers this request: same key, and
+    it stored at least top_k matches."""
+    return (
+        run is not None
+        and run.classification_id == classification_id
+        and run.profile_hash == _profile_hash(mse)
+        and run.registry_version == registry_version
+        and run.model_version == MODEL_VERSION
+        and run.top_k >= top_k
+    )
+
+
+def _stored_rows(db: Session, run_ids: list[int]) -> dict[int, list[MatchResult]]:
+    """The stored match_results of each run, best first (one query)."""
+    stored: dict[int, list[MatchResult]] = {run_id: [] for run_id in run_ids}
+    if run_ids:
+        for row in (
+            db.query(MatchResult)
+            .filter(MatchResult.run_id.in_(run_ids))
+            .order_by(MatchResult.composite_score.desc(), MatchResult.id)
+            .all()
+        ):
+            stored[row.run_id].append(row)
+    return stored
+
+
+def _stored_items(mse: MSE, stored: list[MatchResult], top_k: int, registry,
+                  include_factors: bool) -> Optional[list[MatchItem]]:
+    """The top_k response items rebuilt from a run's stored rows, or None
+    when the rows no longer cover the request (rows removed, SNP gone from
+    the registry)."""
+    stored = stored[:top_k]
+    if len(stored) < min(top_k, len(registry)):
+        return None
+    items = []
+    for row in stored:
+        snp = registry.get(row.snp_id)
+        if snp is None:
+            return None
+        m = stored_match(mse, snp, row.domain_score, row.geo_score, row.commission_score,
+                         row.history_score, row.sentiment_score, row.composite_score)
+        items.append(_match_row(mse, m, include_factors,
+                                explainer={"en": row.explainer_en, "hi": row.explainer_hi})[1])
+    return items
+
+
+def _replace_runs(db: Session, runs: list[tuple], registry_version: str,
+                  retire: list[int]) -> list[int]:
+    """Make each (mse, classification_id, top_k, top_matches, rows) the MSE's
+    current run: retire the runs this request read as current (`retire`),
+    replace the MSE's match_results with the new rows. Returns the new run
+    ids, in order. Bulk statements — one each, whatever the number of runs.
+
+    Two requests for one MSE can both read the same current run (or none)
+    and both install a new one; ix_match_runs_current rejects the second.
+    The loser's writes roll back to a savepoint and it retries once,
+    retiring whatever run is current by then — last writer wins, no 500.
+    """
+    mse_ids = [mse.id for mse, *_ in runs]
+    try:
+        return _write_runs(db, runs, registry_version, mse_ids, retire)
+    except IntegrityError:
+        retire = [
+            run_id for (run_id,) in
+            db.query(MatchRun.id).filter(MatchRun.mse_id.in_(mse_ids), MatchRun.is_current.is_(True))
+        ]
+        return _write_runs(db, runs, registry_version, mse_ids, retire)
+
+
+def _write_runs(db: Session, runs: list[tuple], registry_version: str,
+                mse_ids: list[int], retire: list[int]) -> list[int]:
+    with db.begin_nested():
+        if retire:
+            db.query(MatchRun).filter(MatchRun.id.in_(retire)).update(
+                {MatchRun.is_current: False}, synchronize_session=False)
+        db.query(MatchResult).filter(MatchResult.mse_id.in_(mse_ids)).delete(synchronize_session=False)
+        run_ids = db.execute(
+            insert(MatchRun).returning(MatchRun.id, sort_by_parameter_order=True),
+            [dict(
+                mse_id=mse.id,
+                classification_id=classification_id,
+                profile_hash=_profile_hash(mse),
+                registry_version=registry_version,
+                model_version=MODEL_VERSION,
+                top_k=top_k,
+                top_snp_id=top_matches[0]["snp"].id if top_matches else None,
+                top_score=top_matches[0]["composite"] if top_matches else None,
+                ranking=json.dumps([[m["snp"].id, round(m["composite"], 6)] for m in top_matches]),
+            ) for mse, classification_id, top_k, top_matches, _ in runs],
+        ).scalars().all()
+        rows = [{**columns, "run_id": run_id}
+                for run_id, (*_, run_rows) in zip(run_ids, runs) for columns in run_rows]
+        if rows:
+            db.execute(insert(MatchResult), rows)
+    return run_ids
+
+
+def _match_row(mse: MSE, m: dict, include_factors: bool,
+               explainer: Optional[dict] = None) -> tuple[dict, MatchItem]:
+    """The MatchResult columns and the response item for one scored SNP
+    (explainer: the stored text of a reused run). Raw factor scores go only
+    to NSIC admins."""
+    snp = m["snp"]
+    band = _confidence_band(m["composite"])
+    if explainer is None:
+        explainer = generate_explainer(mse, snp, m, band)
+    columns = dict(
+        mse_id=mse.id,
+        snp_id=snp.id,
+        composite_score=m["composite"],
+        domain_score=m["domain"],
+        geo_score=m["geo"],
+        commission_score=m["commission"],
+        history_score=m["history"],
+        sentiment_score=m["sentiment"],
+        confidence_band=band,
+        explainer_en=explainer["en"],
+        explainer_hi=explainer["hi"],
+        model_version=MODEL_VERSION,
+    )
+    item = MatchItem(
+        snp_id=snp.id,
+        snp_name=snp.name,
+        composite_score=round(m["composite"], 4),
+        confidence_band=band,
+        factor_bands={
+            "domain": _factor_band(m["domain"]),
+            "geo": _factor_band(m["geo"]),
+            "commission": _factor_band(m["commission"]),
+            "history": _factor_band(m["history"]),
+            "sentiment": _factor_band(m["sentiment"]),
+        },
+        fit_reasons=m.get("fit_reasons", []),
+        factors=FactorBreakdown(
+            domain_score=round(m["domain"], 4),
+            geo_score=round(m["geo"], 4),
+            commission_score=round(m["commission"], 4),
+            history_score=round(m["history"], 4),
+            sentiment_score=round(m["sentiment"], 4),
+        ) if include_factors else None,
+        explainer_en=explainer["en"],
+        explainer_hi=explainer["hi"],
     )
+    return columns, item
 
 
 def _confidence_band(score: float) -> str:
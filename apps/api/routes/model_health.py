@@ -3,7 +3,13 @@
 Every classification already stores its confidence, engine stamp and
 timestamp (classification_results), and every officer decision is audited
 (mses / audit trail). This router aggregates those existing records into
-drift signals — no new data collection, no writes. Mounted admin-only.
+drift signals — no new data collection. The write-side actions are
+POST /taxonomy/reload, which swaps the classifier's taxonomy snapshot on
+every worker, POST /snp-registry/reload (the matcher's SNP registry
+snapshot, services/snp_registry.py), and the /registry/* model hot-swap (stage a TF-IDF artifact,
+shadow-score it, promote or roll back — services/model_swap.py). GET
+/metrics exports the live chain instrumentation for Prometheus. Mounted
+admin-only.
 
 Signals:
   1. Weekly confidence trend (avg + 25th percentile)
@@ -20,11 +26,18 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from database import MSE, ClassificationResult, MatchResult, OndcDomain, get_db
+from services import (
+    classify_cache, engine_pool, http_pool, metrics, micro_batch, model_swap, resilience, single_flight,
+    snp_registry,
+)
+from services import classifier as vargbot
+from services.classifier import DEADLINE_SUFFIX
 
 router = APIRouter()
 
@@ -75,8 +88,20 @@ ENGINE_FAMILY_LABELS = {
 }
 
 
+def _stage_of(version: str, serving, swap: dict) -> str:
+    """Registry stage of a trained version ("v2") from what this worker serves."""
+    suffix = f"-{version}"
+    if serving is not None and serving.engine.endswith(suffix):
+        return "production"
+    candidate = swap.get("candidate") or {}
+    if (candidate.get("engine") or "").endswith(suffix):
+        return "staging"
+    return "archived"
+
+
 def _family(model_version: Optional[str]) -> str:
-    v = (model_version or "").lower()
+    # "<engine>+deadline" is that engine's answer returned on the latency budget
+    v = (model_version or "").lower().removesuffix(DEADLINE_SUFFIX)
     if v.startswith("vargbot-tfidf"):
         return "trained"
     if v == "sarvam-llm":
@@ -119,6 +144,9 @@ def model_health(
     fallback_share = family_counts["fallback"] / total if total else 0.0
     trained_share = family_counts["trained"] / total if total else 0.0
     llm_share = family_counts["llm"] / total if total else 0.0
+    deadline_count = sum(
+        cnt for eng, cnt in engine_counts.items() if eng.endswith(DEADLINE_SUFFIX)
+    )
 
     # ── Weekly trend (calendar weeks, Monday start; empty weeks omitted) ──
     cutoff = now - timedelta(weeks=weeks)
@@ -262,25 +290,53 @@ def model_health(
         status = "green"
 
     # ── Model registry (MLflow-style): what serves now + version history ──
-    import services.classifier as clf
-    serving_loaded = clf._tfidf_model is not None
-    versions = [_version_entry(_BASELINE, "v2", "production")]
+    serving = vargbot.serving_tfidf()
+    swap = model_swap.stats()
+    versions = [_version_entry(_BASELINE, "v2", _stage_of("v2", serving, swap))]
     if _V1_EVAL:
-        versions.append(_version_entry(_V1_EVAL, "v1", "archived"))
+        versions.append(_version_entry(_V1_EVAL, "v1", _stage_of("v1", serving, swap)))
     registry = {
         "model_name": "VargBot domain classifier",
         "serving": {
-            "engine": clf._tfidf_engine if serving_loaded else None,
-            "loaded": serving_loaded,
-            "gate": clf.TFIDF_MIN_CONF,
-            "domains": len(clf._tfidf_model.classes_) if serving_loaded else 0,
+            "engine": serving.engine if serving else None,
+            "artifact": serving.variant if serving else None,
+            "loaded": serving is not None,
+            "path": serving.path if serving else None,
+            "fingerprint": serving.fingerprint if serving else None,
+            "gate": vargbot.TFIDF_MIN_CONF,
+            "domains": len(serving.classes) if serving else 0,
+            # "torch" (PeftModel, fp32) or "onnx-int8" (services/muril_runtime.py)
+            "muril_backend": vargbot._muril_backend if vargbot._use_muril else None,
         },
+        # Staged candidate, its shadow scores vs the serving model, promotions
+        # and rollbacks on this worker (services/model_swap.py)
+        "swap": swap,
         "versions": versions,
     }
 
     baseline_meta = _BASELINE.get("meta") or {}
     return {
         "registry": registry,
+        # Per-worker classification cache counters (services/classify_cache.py)
+        "classify_cache": classify_cache.stats(),
+        # Stage latency, engine outcomes and Sarvam token cost (services/metrics.py)
+        "chain_metrics": metrics.stats(),
+        # Outbound connection reuse to Sarvam / fallback engines (services/http_pool.py)
+        "http_pool": http_pool.stats(),
+        # Circuit breakers, AIMD concurrency limits and retries per upstream (services/resilience.py)
+        "resilience": resilience.stats(),
+        # CPU engine pools: queue depth, queue wait and run time (services/engine_pool.py)
+        "engine_pool": engine_pool.stats(),
+        # Transformer micro-batching: batch sizes and queue delay (services/micro_batch.py)
+        "micro_batch": micro_batch.stats(),
+        # Identical concurrent Sarvam calls coalesced into one (services/single_flight.py)
+        "single_flight": single_flight.stats(),
+        # Leaves resolved without the LLM, and the calibrated threshold (services/leaf_resolver.py)
+        "leaf_resolver": vargbot.leaf_resolver_stats(),
+        # Taxonomy snapshot this worker classifies against
+        "taxonomy": _taxonomy_summary(),
+        # SNP registry snapshot the matcher, clusters and claims read (services/snp_registry.py)
+        "snp_registry": snp_registry.stats(),
         "generated_at": now.isoformat(),
         "status": status,
         "alerts": alerts,
@@ -307,12 +363,16 @@ def model_health(
                 for fam in ("trained", "llm", "fallback", "other")
             ],
             "engines": [
-                {"engine": eng, "count": cnt}
+                # "live": this worker's latency / token cost for the engine
+                # since start (services/metrics.py); None if it has not served it
+                {"engine": eng, "count": cnt, "live": metrics.engine_summary(eng)}
                 for eng, cnt in engine_counts.most_common()
             ],
             "trained_share": round(trained_share, 4),
             "llm_share": round(llm_share, 4),
             "fallback_share": round(fallback_share, 4),
+            # answered from a local engine because the latency budget ran out
+            "deadline_share": round(deadline_count / total, 4) if total else 0.0,
         },
         "confidence_trend": trend,
         "oversight": {
@@ -335,6 +395,47 @@ def model_health(
     }
 
 
+def _taxonomy_summary() -> dict:
+    snap = vargbot._taxonomy()
+    return {
+        "version": snap.version,
+        "source": snap.source,
+        "domains": len(snap.domain_names),
+        "categories": len(snap.category_name_to_code),
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """This worker's chain instrumentation in the Prometheus text format
+    (stage and request latency histograms, engine and token counters,
+    cache lookups, micro-batch sizes)."""
+    return PlainTextResponse(
+        metrics.render_prometheus(classify_cache.stats(), micro_batch.batchers()),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@router.post("/taxonomy/reload")
+def reload_taxonomy():
+    """Rebuild the taxonomy snapshot after an ONDC taxonomy edit and tell
+    the other workers to do the same (they otherwise pick it up at their
+    next VARGBOT_TAXONOMY_POLL_S check)."""
+    changed = vargbot.refresh_taxonomy(force=True)
+    broadcast = vargbot.publish_taxonomy_change()
+    return {**_taxonomy_summary(), "changed": changed, "broadcast": broadcast}
+
+
+@router.post("/snp-registry/reload")
+def reload_snp_registry():
+    """Rebuild the SNP registry snapshot after an `snps` or
+    snp_capacity.json edit and tell the other workers to do the same (they
+    otherwise pick it up at their next SNP_REGISTRY_POLL_S check)."""
+    changed = snp_registry.refresh(force=True)
+    broadcast = snp_registry.publish_change()
+    return {**snp_registry.stats(), "changed": changed, "broadcast": broadcast}
+
+
 @router.get("/feedback-export")
 def feedback_export(
     limit: int = Query(default=1000, ge=1, le=5000),
@@ -442,3 +543,55 @@ def feedback_export(
         },
         "samples": samples,
     }
+
+
+@router.post("/registry/stage")
+def stage_model(
+    path: Optional[str] = Query(None, description="artifact in the models directory (default: the configured one)"),
+):
+    """Load a TF-IDF artifact next to the serving one, on every worker, and
+    start shadow-scoring live traffic with it. Returns immediately; poll
+    GET / (registry.swap) for the load result and shadow numbers."""
+    try:
+        target = model_swap.resolve_path(path)
+    except model_swap.SwapError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not model_swap.stage(target):
+        raise HTTPException(status_code=409, detail="a candidate is already loading")
+    broadcast = model_swap.publish("stage", path=str(target))
+    return {**model_swap.stats(), "broadcast": broadcast}
+
+
+@router.post("/registry/promote")
+def promote_model(force: bool = Query(False, description="promote before enough shadow samples")):
+    """Atomically make the staged candidate the serving model on every worker."""
+    try:
+        promoted = model_swap.promote(force=force)
+    except model_swap.SwapError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    broadcast = model_swap.publish("promote", path=promoted["path"], fingerprint=promoted["fingerprint"])
+    return {"serving": promoted, "broadcast": broadcast}
+
+
+@router.post("/registry/rollback")
+def rollback_model():
+    """Reinstall the model the last promotion replaced, on every worker."""
+    replaced = vargbot.serving_tfidf()
+    try:
+        restored = model_swap.rollback()
+    except model_swap.SwapError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    broadcast = model_swap.publish(
+        "rollback", from_fingerprint=replaced.fingerprint if replaced else None,
+    )
+    return {"serving": restored, "broadcast": broadcast}
+
+
+@router.post("/registry/discard")
+def discard_candidate():
+    """Drop the staged candidate without promoting it, on every worker."""
+    try:
+        model_swap.discard()
+    except model_swap.SwapError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**model_swap.stats(), "broadcast": model_swap.publish("discard")}
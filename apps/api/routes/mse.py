@@ -9,7 +9,7 @@ from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from database import MSE, AuditLog, ClassificationResult, MatchResult, User, get_db
+from database import MSE, AuditLog, ClassificationResult, MatchResult, MatchRun, User, get_db
 from services.auth import get_current_user, get_optional_user, require_admin
 from services.notifications import registration_reviewed, safe_notify, snp_allocated
 
@@ -450,7 +450,7 @@ def mse_clusters(
     geographic insight for the MSE (PS2: clustering & capability assessment)."""
     from sqlalchemy import func
 
-    from database import SNP
+    from services import snp_registry
     from services.geo import state_centroid
 
     mse = db.query(MSE).get(mse_id)
@@ -515,14 +515,8 @@ def mse_clusters(
         for (d, s), c in sorted(district_counts.items(), key=lambda x: -x[1])[:8]
     ]
 
-    # SNP coverage of the MSE's own state
-    snp_cover = 0
-    if mse.state:
-        state_l = mse.state.lower()
-        for (geo,) in db.query(SNP.geo_coverage).all():
-            g = (geo or "").lower()
-            if state_l in g or "pan" in g or "all" in g:
-                snp_cover += 1
+    # SNP coverage of the MSE's own state (named or pan-India; index lookup)
+    snp_cover = len(snp_registry.current(db).serving_state(mse.state)) if mse.state else 0
 
     insights: list[str] = []
     own_district_count = next(
@@ -585,8 +579,10 @@ def erase_mse(
     if not mse:
         raise HTTPException(status_code=404, detail="MSE not found")
 
-    db.query(ClassificationResult).filter(ClassificationResult.mse_id == mse_id).delete()
+    # Children first: match rows reference their run, runs their classification
     db.query(MatchResult).filter(MatchResult.mse_id == mse_id).delete()
+    db.query(MatchRun).filter(MatchRun.mse_id == mse_id).delete()
+    db.query(ClassificationResult).filter(ClassificationResult.mse_id == mse_id).delete()
     # Unlink any account pointing at this enterprise (keeps the login itself)
     db.query(User).filter(User.mse_id == mse_id).update({User.mse_id: None})
     db.delete(mse)
@@ -0,0 +1,229 @@
+"""Local sectoral attribute extraction (material, fabric, colour, craft...).
+
+Attributes used to come only from the Sarvam JSON, so a response answered
+by a local engine (leaf resolver, MuRIL, TF-IDF, keywords) had none. This
+module extracts the same flat {attribute: value} dict with a compiled
+gazetteer — one case-insensitive regex per domain — in well under a
+millisecond, cheap enough for every catalogue row.
+
+Vocabulary, merged at first use:
+  - routes/catalogue.REFERENCE_VALUES   (colour, fabric, size, veg_nonveg)
+  - routes/catalogue.DOMAIN_COLUMNS     which attributes a domain has, and the
+                                        "a / b / c" value lists in their hints
+  - data/attribute_gazetteer.json       ONDC attribute enums (fabric, pattern,
+                                        material, occasion...), built by
+                                        scripts/build_attribute_gazetteer.py
+  - _CRAFT_TERMS                        craft_type (handloom, block print, ...)
+Net weight / quantity ("500 g", "60 capsules") are matched by pattern for
+domains whose catalogue has that column.
+
+Short gazetteer words also occur outside their attribute sense — "net
+weight", "net profit", "gold plated", "silver jewellery" (the metal, not a
+colour). _STOP_CONTEXTS drops a hit by what follows it; since local values
+win over the LLM's, a false positive here would replace a correct answer.
+
+Local values win; merge() lets the LLM fill only the attributes the
+gazetteer did not find.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTRIBUTES = 6       # same cap as the LLM prompt
+MAX_VALUES_PER_FIELD = 3
+_GAZETTEER_PATH = Path(__file__).resolve().parent.parent / "data" / "attribute_gazetteer.json"
+
+# Attributes looked for beyond a domain's catalogue columns
+_EXTRA_FIELDS: dict[str, tuple[str, ...]] = {
+    "RET12": ("ornamentation", "occasion", "jewellery_type"),
+    "RET13": ("formulation",),
+    "RET16": ("occasion",),
+    "RET18": ("formulation",),
+}
+_GENERIC_FIELDS = ("craft_type",)
+
+_CRAFT_TERMS: dict[str, str] = {
+    "handmade": "handmade", "hand made": "handmade", "hand-made": "handmade",
+    "handcrafted": "handcrafted", "hand crafted": "handcrafted", "hand-crafted": "handcrafted",
+    "handloom": "handloom", "handwoven": "handwoven", "hand woven": "handwoven",
+    "hand block printed": "block print", "block print": "block print", "block printed": "block print",
+    "hand painted": "hand painted", "hand-painted": "hand painted",
+    "hand embroidered": "hand embroidered", "kalamkari": "kalamkari", "madhubani": "madhubani",
+    "warli": "warli", "pattachitra": "pattachitra", "dhokra": "dhokra", "bidri": "bidri",
+    "blue pottery": "blue pottery", "channapatna": "channapatna", "terracotta": "terracotta",
+}
+
+_QUANTITY = (
+    r"\d+(?:\.\d+)?\s?(?:kg|kgs|g|gm|gms|grams?|mg|ml|l|ltr|litres?|liters?|"
+    r"capsules?|tablets?|pcs|pieces)"
+)
+_QUANTITY_FIELDS = ("net_weight", "net_quantity")
+_METALS = frozenset({"gold", "silver", "rose gold", "copper", "bronze", "brass", "platinum"})
+# (field or None for any, canonical values, what follows the hit)
+_STOP_CONTEXTS: tuple[tuple[Optional[str], frozenset[str], re.Pattern], ...] = (
+    (None, frozenset({"net"}), re.compile(
+        r"[\s.:-]*(?:(?:weight|wt|quantity|qty|contents?|volume|vol|profit|income|worth|margin|"
+        r"sales|revenue|price|amount|banking)\b|\d)", re.IGNORECASE)),
+    (None, _METALS, re.compile(
+        r"[\s-]*(?:plated|plating|polish|polished|tone|toned|finish|coated|dipped)\b", re.IGNORECASE)),
+    ("colour", _METALS, re.compile(
+        r"\s+(?:jewell?e?ry|jewelries|ornaments?|earrings?|necklaces?|bangles?|rings?|anklets?|"
+        r"chains?|coins?|idols?|utensils?)\b", re.IGNORECASE)),
+)
+_HINT_LIST = re.compile(r"^(?:e\.g\.\s*)?([^/]+(?:/[^/]+)+?)(?:\s*\.\.\.)?$")
+
+
+class _Matcher:
+    __slots__ = ("pattern", "phrase_field", "fields")
+
+    def __init__(self, pattern: re.Pattern, phrase_field: dict[str, tuple[str, str]], fields: tuple[str, ...]):
+        self.pattern = pattern
+        self.phrase_field = phrase_field   # lower phrase -> (field, canonical value)
+        self.fields = fields               # output priority
+
+
+_vocab: Optional[dict[str, dict[str, dict[str, str]]]] = None  # domain -> field -> phrase -> value
+_matchers: dict[str, _Matcher] = {}
+VERSION = "unloaded"
+
+
+def _hint_values(hint: str) -> list[str]:
+    m = _HINT_LIST.match(hint.strip())
+    if not m:
+        return []
+    values = [v.strip() for v in m.group(1).split("/")]
+    if {v.lower() for v in values} <= {"yes", "no"}:
+        return []
+    return [v for v in values if v]
+
+
+def _load_vocab() -> dict[str, dict[str, dict[str, str]]]:
+    """domain -> ordered {field: {phrase: value}}; "*" holds the fallback set."""
+    global VERSION
+    from routes.catalogue import DOMAIN_COLUMNS, REFERENCE_VALUES
+
+    enums: dict[str, list[str]] = {}
+    try:
+        enums = json.loads(_GAZETTEER_PATH.read_text(encoding="utf-8"))["fields"]
+    except Exception as e:
+        logger.warning(f"Attribute gazetteer unavailable ({e}) — catalogue vocabularies only")
+
+    def field_vocab(field: str, hint: str = "") -> dict[str, str]:
+        out: dict[str, str] = {}
+        if field == "craft_type":
+            return dict(_CRAFT_TERMS)
+        for v in list(REFERENCE_VALUES.get(field, [])) + _hint_values(hint) + enums.get(field, []):
+            if field == "size" and len(v) < 2:
+                continue  # single-letter sizes read as ordinary letters
+            out.setdefault(v.lower(), v if field == "size" else v.lower())
+        return out
+
+    vocab: dict[str, dict[str, dict[str, str]]] = {}
+    for domain, columns in DOMAIN_COLUMNS.items():
+        fields: dict[str, dict[str, str]] = {}
+        for name, hint, _required in columns:
+            if name in _QUANTITY_FIELDS:
+                fields[name] = {}
+                continue
+            words = field_vocab(name, hint)
+            if words:
+                fields[name] = words
+        for name in _EXTRA_FIELDS.get(domain, ()) + _GENERIC_FIELDS:
+            words = field_vocab(name)
+            if words and name not in fields:
+                fields[name] = words
+        vocab[domain] = fields
+    vocab["*"] = {name: field_vocab(name) for name in ("material", "colour") + _GENERIC_FIELDS}
+
+    stops = [[field, sorted(values), p.pattern] for field, values, p in _STOP_CONTEXTS]
+    VERSION = hashlib.sha256(
+        json.dumps([vocab, stops], sort_keys=True).encode("utf-8")
+    ).hexdigest()[:10]
+    return vocab
+
+
+def _phrase_regex(phrase: str) -> str:
+    return r"\s+".join(re.escape(w) for w in phrase.split())
+
+
+def _stopped(field: str, value: str, text: str, end: int) -> bool:
+    """Whether the words after a hit say it is not `field` ("net weight")."""
+    for stop_field, values, following in _STOP_CONTEXTS:
+        if (stop_field is None or stop_field == field) and value in values \
+                and following.match(text, end):
+            return True
+    return False
+
+
+def _matcher(domain: Optional[str]) -> _Matcher:
+    global _vocab
+    if _vocab is None:
+        _vocab = _load_vocab()
+    key = domain if domain in _vocab else "*"
+    m = _matchers.get(key)
+    if m is None:
+        phrase_field: dict[str, tuple[str, str]] = {}
+        alternatives = []
+        for field, words in _vocab[key].items():
+            for phrase, value in words.items():
+                if phrase not in phrase_field:  # earlier (catalogue) fields win shared words
+                    phrase_field[phrase] = (field, value)
+        for phrase in sorted(phrase_field, key=len, reverse=True):
+            alternatives.append(_phrase_regex(phrase))
+        if any(f in _vocab[key] for f in _QUANTITY_FIELDS):
+            alternatives.insert(0, f"(?P<qty>{_QUANTITY})")
+        body = "|".join(alternatives) or r"(?!x)x"
+        pattern = re.compile(rf"(?<![\w-])(?:{body})(?:e?s)?(?![\w-])", re.IGNORECASE)
+        m = _Matcher(pattern, phrase_field, tuple(_vocab[key]))
+        _matchers[key] = m
+    return m
+
+
+def extract(text: str, domain: Optional[str] = None) -> dict[str, str]:
+    """Flat attribute dict for `text` under `domain` (catalogue-column order,
+    at most MAX_ATTRIBUTES keys, up to MAX_VALUES_PER_FIELD values each)."""
+    if not text:
+        return {}
+    m = _matcher(domain)
+    found: dict[str, list[str]] = {}
+    qty_field = next((f for f in _QUANTITY_FIELDS if f in m.fields), None)
+    for hit in m.pattern.finditer(text):
+        if qty_field and hit.group("qty"):
+            field, value = qty_field, re.sub(r"\s+", " ", hit.group("qty").lower())
+        else:
+            raw = re.sub(r"\s+", " ", hit.group(0).lower())
+            # plural suffix: "sarees" -> "saree", "dresses" -> "dress"
+            entry = m.phrase_field.get(raw) or m.phrase_field.get(raw[:-1]) \
+                or m.phrase_field.get(raw[:-2])
+            if entry is None:
+                continue
+            field, value = entry
+            if _stopped(field, value, text, hit.end()):
+                continue
+        values = found.setdefault(field, [])
+        if value not in values and len(values) < MAX_VALUES_PER_FIELD:
+            values.append(value)
+    ordered = [f for f in m.fields if f in found]
+    return {f: ", ".join(found[f]) for f in ordered[:MAX_ATTRIBUTES]}
+
+
+def merge(local: dict, llm: dict) -> dict:
+    """Local attributes first; LLM values only for attributes not found locally."""
+    out = dict(local)
+    for k, v in (llm or {}).items():
+        if len(out) >= MAX_ATTRIBUTES:
+            break
+        out.setdefault(k, v)
+    return out
+
+
+def version() -> str:
+    """Vocabulary fingerprint — part of the classifier's engine version."""
+    _matcher(None)
+    return VERSION
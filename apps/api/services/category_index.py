@@ -0,0 +1,168 @@
+"""Indexed lookup over the ONDC leaf categories (400+ leaves, 14 domains).
+
+Three consumers need to turn a category reference into an official leaf:
+
+  - the classifier, mapping a Sarvam-returned category NAME to its code
+    (the LLM paraphrases: "Spices & Masala" for "Masala & Spices"),
+  - the officer verify endpoint, validating a submitted leaf CODE, and
+  - the catalogue upload, validating or auto-detecting a product's leaf.
+
+A linear scan over every "domain|name" key with substring tests did this
+before. The index is built once per taxonomy snapshot and answers from
+per-domain structures:
+
+  1. exact map            normalised name -> leaf
+  2. token inverted index token -> leaves containing it
+  3. trigram inverted index  character trigram -> leaves containing it
+
+Fuzzy scoring only touches leaves that share a token or trigram with the
+query, and the overlap counts come straight from the postings, so no leaf
+name is split or compared on the request path.
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Iterable, NamedTuple, Optional
+
+# Minimum score for resolve() to accept a fuzzy match. Below it the caller
+# keeps category=None rather than storing a wrong leaf.
+MIN_SCORE = 0.45
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_STOPWORDS = frozenset({"and", "of", "the", "for", "with", "other", "others", "misc"})
+
+
+class Leaf(NamedTuple):
+    code: str
+    name: str
+    domain: str
+
+
+class CategoryMatch(NamedTuple):
+    code: str
+    name: str
+    domain: str
+    score: float
+
+
+def normalize(name: str) -> str:
+    text = unicodedata.normalize("NFKC", name or "").lower().replace("&", " and ")
+    return " ".join(_TOKEN_RE.findall(text))
+
+
+def _tokens(norm: str) -> set[str]:
+    return {t for t in norm.split() if t not in _STOPWORDS} or set(norm.split())
+
+
+def _trigrams(norm: str) -> set[str]:
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _DomainIndex:
+    __slots__ = ("exact", "by_token", "by_trigram", "token_counts", "trigram_counts")
+
+    def __init__(self) -> None:
+        self.exact: dict[str, int] = {}
+        self.by_token: dict[str, list[int]] = defaultdict(list)
+        self.by_trigram: dict[str, list[int]] = defaultdict(list)
+        self.token_counts: dict[int, int] = {}
+        self.trigram_counts: dict[int, int] = {}
+
+
+class CategoryIndex:
+    """Immutable once built; safe to share across requests and threads."""
+
+    def __init__(self, leaves: dict[str, Iterable[tuple[str, str]]]):
+        self._leaves: list[Leaf] = []
+        self._norms: list[str] = []
+        self._by_code: dict[str, int] = {}
+        self._domains: dict[str, _DomainIndex] = {}
+        for domain, pairs in leaves.items():
+            dix = self._domains.setdefault(domain, _DomainIndex())
+            for code, name in pairs:
+                i = len(self._leaves)
+                norm = normalize(name)
+                self._leaves.append(Leaf(code, name.strip(), domain))
+                self._norms.append(norm)
+                self._by_code[code] = i
+                dix.exact.setdefault(norm, i)
+                toks, grams = _tokens(norm), _trigrams(norm)
+                for t in toks:
+                    dix.by_token[t].append(i)
+                for g in grams:
+                    dix.by_trigram[g].append(i)
+                dix.token_counts[i] = len(toks)
+                dix.trigram_counts[i] = len(grams)
+        for dix in self._domains.values():
+            dix.by_token = dict(dix.by_token)
+            dix.by_trigram = dict(dix.by_trigram)
+
+    def __len__(self) -> int:
+        return len(self._leaves)
+
+    def lookup(self, code: str) -> Optional[Leaf]:
+        """The leaf for an official code, or None if the code is unknown."""
+        i = self._by_code.get((code or "").strip())
+        return self._leaves[i] if i is not None else None
+
+    def candidates(
+        self, name: str, domain: Optional[str] = None, limit: int = 5,
+    ) -> list[CategoryMatch]:
+        """Leaves ranked by similarity to `name`, best first.
+
+        Score is the mean of token overlap (share of the query's content
+        words found in the leaf) and trigram Jaccard (spelling and word-order
+        tolerance), lifted to at least 0.9 when one name contains the other.
+        An exact normalised match scores 1.0. `domain=None` searches all.
+        """
+        norm = normalize(name)
+        if not norm:
+            return []
+        domains = [domain] if domain is not None else list(self._domains)
+        q_tokens, q_grams = _tokens(norm), _trigrams(norm)
+        scored: list[CategoryMatch] = []
+        for d in domains:
+            dix = self._domains.get(d)
+            if dix is None:
+                continue
+            exact = dix.exact.get(norm)
+            if exact is not None:
+                leaf = self._leaves[exact]
+                scored.append(CategoryMatch(leaf.code, leaf.name, leaf.domain, 1.0))
+
+            tok_hits: dict[int, int] = defaultdict(int)
+            for t in q_tokens:
+                for i in dix.by_token.get(t, ()):
+                    tok_hits[i] += 1
+            gram_hits: dict[int, int] = defaultdict(int)
+            for g in q_grams:
+                for i in dix.by_trigram.get(g, ()):
+                    gram_hits[i] += 1
+
+            for i, shared in gram_hits.items():
+                if i == exact:
+                    continue
+                jaccard = shared / (len(q_grams) + dix.trigram_counts[i] - shared)
+                overlap = tok_hits.get(i, 0) / len(q_tokens)
+                score = (jaccard + overlap) / 2
+                leaf_norm = self._norms[i]
+                if norm in leaf_norm or leaf_norm in norm:
+                    score = max(score, 0.9)
+                leaf = self._leaves[i]
+                scored.append(CategoryMatch(leaf.code, leaf.name, leaf.domain, round(score, 4)))
+
+        scored.sort(key=lambda m: (-m.score, m.code))
+        return scored[:limit]
+
+    def resolve(
+        self, name: Optional[str], domain: Optional[str] = None, min_score: float = MIN_SCORE,
+    ) -> Optional[str]:
+        """Best leaf code for a category name, or None below min_score."""
+        if not name:
+            return None
+        best = self.candidates(name, domain, limit=1)
+        if best and best[0].score >= min_score:
+            return best[0].code
+        return None
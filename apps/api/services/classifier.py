@@ -7,20 +7,32 @@ Sovereign classification chain:
      within the predicted domain.
   2. Sarvam-30B zero-shot over the full 14-domain taxonomy (Indic-language
      text and domains outside the training corpus).
-  3. MuRIL + LoRA if VARGBOT_MODEL_DIR points to a valid adapter.
+  3. MuRIL + LoRA if VARGBOT_MODEL_DIR points to a valid adapter (served
+     from its merged int8 ONNX export when one is present).
   4. TF-IDF below the confidence gate, then keyword fallback, as last resorts.
 """
 
 import asyncio
+import hashlib
 import json
 import logging
 import os
 import re
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import TypedDict, Optional
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Awaitable, Callable, Mapping, TypedDict, Optional
 
 from dotenv import load_dotenv
-import httpx
+
+from services import (
+    attribute_extractor, classify_cache, engine_pool, http_pool, metrics, micro_batch, model_swap,
+    resilience, single_flight, snp_registry,
+)
+from services.category_index import CategoryIndex
+from services.leaf_resolver import ENGINE_SUFFIX as LEAF_SUFFIX, GoldLabel, LeafResolver, load_gold
 
 # Ensure .env is loaded before reading keys
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
@@ -30,7 +42,7 @@ logger = logging.getLogger(__name__)
 # ── API keys ─────────────────────────────────────────────────────────
 
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY", "")
-SARVAM_BASE_URL = "https://api.sarvam.ai/v1"
+SARVAM_BASE_URL = os.getenv("SARVAM_BASE_URL", "https://api.sarvam.ai/v1")  # chat API; overridable for local stand-ins
 SARVAM_CHAT_MODEL = os.getenv("SARVAM_CHAT_MODEL", "sarvam-30b")
 
 _engines = []
@@ -86,69 +98,420 @@ LABEL2ID = {
 }
 ID2LABEL = {v: k for k, v in LABEL2ID.items()}
 
-# ── Full taxonomy (loaded from DB at first use) ──────────────────────
+# ── Full taxonomy (immutable, versioned snapshot) ────────────────────
+#
+# The chain classifies against a TaxonomySnapshot: domain names, the leaf
+# name→code map, and the Sarvam system prompts, all prebuilt once per
+# taxonomy version. Nothing on the request path assembles prompt text.
+# A new snapshot is built off the request path and swapped in with a single
+# assignment, so a request sees either the old taxonomy or the new one,
+# never a mix. Workers converge through a Redis pub/sub notice
+# (publish_taxonomy_change) and, as a backstop for edits made straight in
+# the DB (seed scripts, Supabase console), a content-fingerprint poll every
+# VARGBOT_TAXONOMY_POLL_S. The same watcher thread runs the SNP registry
+# (SNP_REGISTRY_POLL_S) and TF-IDF artifact (VARGBOT_MODEL_WATCH_POLL_S)
+# checks on their own intervals, so disabling one poll leaves the others on.
+
+TAXONOMY_CHANNEL = "vargbot:taxonomy"
+TAXONOMY_POLL_S = int(os.getenv("VARGBOT_TAXONOMY_POLL_S", "300"))
+_PROMPT_LEAVES_PER_DOMAIN = 30  # cap for the full-taxonomy prompt; hinted prompts list every leaf
+
+
+@dataclass(frozen=True)
+class TaxonomySnapshot:
+    version: str                                 # content hash — part of the cache key
+    source: str                                  # "db" | "poc"
+    fingerprint: Optional[tuple]                 # DB-side change marker (None for poc)
+    domain_names: Mapping[str, str]              # code -> name
+    leaves: Mapping[str, tuple[tuple[str, str], ...]]  # domain -> ((code, name), ...)
+    category_name_to_code: Mapping[str, str]     # "domain|lower name" -> code
+    index: CategoryIndex                         # exact / token / trigram leaf resolver
+    system_prompt: str                           # full-taxonomy Sarvam prompt
+    hint_prompts: Mapping[str, str]              # domain -> prompt scoped to that domain
+
+    @property
+    def valid_domains(self) -> frozenset[str]:
+        return frozenset(self.domain_names)
+
+
+_snapshot: Optional[TaxonomySnapshot] = None
+_snapshot_lock = threading.Lock()
+_watcher_stop: Optional[threading.Event] = None
+
+
+def _taxonomy_fingerprint(db) -> tuple:
+    """Content digest of both taxonomy tables: moves on any insert, delete,
+    re-code or rename, same-length renames included."""
+    from database import OndcCategory, OndcDomain, content_fingerprint
+
+    return (
+        content_fingerprint(db, [OndcCategory.id, OndcCategory.code, OndcCategory.name,
+                                 OndcCategory.domain_id], OndcCategory.id)
+        + content_fingerprint(db, [OndcDomain.id, OndcDomain.code, OndcDomain.name], OndcDomain.id)
+    )
 
-_taxonomy_prompt: Optional[str] = None
-_valid_domains_full: set[str] = set()
-_domain_names_full: dict[str, str] = {}
-_category_name_to_code: dict[str, str] = {}   # "domain|lower name" -> code
 
+def _make_snapshot(
+    source: str,
+    fingerprint: Optional[tuple],
+    domain_names: dict[str, str],
+    leaves: dict[str, list[tuple[str, str]]],
+    taxonomy_block: Optional[str] = None,
+) -> TaxonomySnapshot:
+    name_to_code = {
+        f"{d}|{name.strip().lower()}": code
+        for d, pairs in leaves.items() for code, name in pairs
+    }
+    fragments = {}
+    hint_prompts = {}
+    for d in sorted(domain_names):
+        names = [name.strip() for _, name in leaves.get(d, [])]
+        fragments[d] = (
+            f"{d} — {domain_names[d]}: "
+            + ("; ".join(names[:_PROMPT_LEAVES_PER_DOMAIN]) or "(general)")
+        )
+        hint_prompts[d] = _render_classify_prompt(
+            f"ONDC Retail Taxonomy — domain {d}:\n\n"
+            f"{d} — {domain_names[d]}: {'; '.join(names) or '(general)'}"
+        ) + _BREVITY_SUFFIX
+    if taxonomy_block is None:
+        taxonomy_block = "\n".join(
+            [f"ONDC Retail Taxonomy ({len(domain_names)} domains):", ""]
+            + [fragments[d] for d in sorted(domain_names)]
+        )
+    system_prompt = _render_classify_prompt(taxonomy_block) + _BREVITY_SUFFIX
+
+    # Content-addressed: any edit to a domain or leaf changes the version,
+    # which in turn invalidates every cached classification keyed on it.
+    digest = hashlib.sha256(taxonomy_block.encode("utf-8"))
+    for k in sorted(name_to_code):
+        digest.update(f"{k}={name_to_code[k]};".encode("utf-8"))
+
+    return TaxonomySnapshot(
+        version=digest.hexdigest()[:12] if source == "db" else "poc",
+        source=source,
+        fingerprint=fingerprint,
+        domain_names=MappingProxyType(dict(domain_names)),
+        leaves=MappingProxyType({d: tuple(v) for d, v in leaves.items()}),
+        category_name_to_code=MappingProxyType(name_to_code),
+        index=CategoryIndex(leaves),
+        system_prompt=system_prompt,
+        hint_prompts=MappingProxyType(hint_prompts),
+    )
 
-def _load_taxonomy() -> None:
-    """Build the classification prompt from the live DB taxonomy
-    (14 domains, 400+ leaf categories) instead of the hardcoded PoC subset."""
-    global _taxonomy_prompt, _valid_domains_full, _domain_names_full, _category_name_to_code
-    if _taxonomy_prompt is not None:
-        return
+
+def _poc_snapshot() -> TaxonomySnapshot:
+    leaves: dict[str, list[tuple[str, str]]] = {}
+    for m in re.finditer(r"^\s*- (RET\d\w*)-(\d+): ([^(\n]+)", ONDC_TAXONOMY_PROMPT, re.M):
+        leaves.setdefault(m.group(1), []).append((f"{m.group(1)}-{m.group(2)}", m.group(3).strip()))
+    return _make_snapshot("poc", None, dict(DOMAIN_NAMES), leaves, ONDC_TAXONOMY_PROMPT)
+
+
+def _build_snapshot() -> TaxonomySnapshot:
+    """Read the live DB taxonomy (14 domains, 400+ leaf categories) into a
+    new snapshot, falling back to the hardcoded PoC subset."""
     try:
         from database import OndcCategory, OndcDomain, SessionLocal
         db = SessionLocal()
         try:
+            fingerprint = _taxonomy_fingerprint(db)
             domains = db.query(OndcDomain).order_by(OndcDomain.code).all()
             cats = db.query(OndcCategory).all()
         finally:
             db.close()
+        if not domains:
+            raise ValueError("ondc_domains is empty")
 
-        by_domain: dict[int, list] = {}
+        id_to_code = {d.id: d.code for d in domains}
+        leaves: dict[str, list[tuple[str, str]]] = {d.code: [] for d in domains}
         for c in cats:
-            by_domain.setdefault(c.domain_id, []).append(c)
-
-        lines = [f"ONDC Retail Taxonomy ({len(domains)} domains):", ""]
-        for d in domains:
-            _valid_domains_full.add(d.code)
-            _domain_names_full[d.code] = d.name
-            leaf_names = []
-            for c in by_domain.get(d.id, []):
-                _category_name_to_code[f"{d.code}|{c.name.strip().lower()}"] = c.code
-                leaf_names.append(c.name.strip())
-            # Cap the prompt size; the resolver still knows every leaf.
-            shown = "; ".join(leaf_names[:30]) or "(general)"
-            lines.append(f"{d.code} — {d.name}: {shown}")
-        _taxonomy_prompt = "\n".join(lines)
+            if c.domain_id in id_to_code:
+                leaves[id_to_code[c.domain_id]].append((c.code, c.name.strip()))
+        snap = _make_snapshot("db", fingerprint, {d.code: d.name for d in domains}, leaves)
         logger.info(
-            f"VargBot taxonomy loaded: {len(domains)} domains, {len(cats)} categories"
+            f"VargBot taxonomy loaded: {len(domains)} domains, {len(cats)} categories "
+            f"(version {snap.version})"
         )
+        return snap
     except Exception as e:
         logger.warning(f"Taxonomy load failed ({e}) — using PoC subset")
-        _taxonomy_prompt = ONDC_TAXONOMY_PROMPT
-        _valid_domains_full = set(LABEL2ID.keys())
-        _domain_names_full = dict(DOMAIN_NAMES)
+        return _poc_snapshot()
+
+
+def _taxonomy() -> TaxonomySnapshot:
+    """The current snapshot, built on first use."""
+    global _snapshot
+    snap = _snapshot
+    if snap is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = _build_snapshot()
+            snap = _snapshot
+    return snap
+
+
+def refresh_taxonomy(force: bool = False) -> bool:
+    """Rebuild and swap the snapshot if the DB taxonomy changed (or always,
+    with force). Returns True when a new version was installed."""
+    global _snapshot
+    current = _snapshot
+    if not force and current is not None and current.source == "db":
+        try:
+            from database import SessionLocal
+            db = SessionLocal()
+            try:
+                if _taxonomy_fingerprint(db) == current.fingerprint:
+                    return False
+            finally:
+                db.close()
+        except Exception as e:
+            logger.warning(f"Taxonomy fingerprint check failed: {e}")
+            return False
+    fresh = _build_snapshot()
+    if current is not None and fresh.version == current.version:
+        return False
+    with _snapshot_lock:
+        _snapshot = fresh
+    logger.info(
+        f"VargBot taxonomy swapped: {current.version if current else None} → {fresh.version}"
+    )
+    return True
+
+
+def publish_taxonomy_change() -> bool:
+    """Tell every worker to reload now instead of at its next poll."""
+    from redis_client import get_redis
+    r = get_redis()
+    if r is None:
+        return False
+    try:
+        r.publish(TAXONOMY_CHANNEL, _taxonomy().version)
+        return True
+    except Exception as e:
+        logger.warning(f"Taxonomy change publish failed: {e}")
+        return False
+
+
+def _watch_jobs() -> list[tuple[str, int, Callable[[bool], Any]]]:
+    """(name, poll interval s, job(forced)) for each periodic check the
+    watcher thread runs. Each has its own interval; <= 0 disables only that
+    poll — its pub/sub notices are still followed."""
+    def taxonomy(forced: bool) -> None:
+        refresh_taxonomy(force=forced)
+        refresh_leaf_resolver()  # new officer labels, or leaves of a new taxonomy
+
+    return [
+        ("taxonomy", TAXONOMY_POLL_S, taxonomy),
+        ("TF-IDF artifact", model_swap.MODEL_WATCH_POLL_S if model_swap.MODEL_WATCH else 0,
+         lambda forced: model_swap.watch_artifact()),
+        ("SNP registry", snp_registry.POLL_S,  # backstop for registry edits made straight in the DB
+         lambda forced: snp_registry.refresh()),
+    ]
+
+
+def _watch_taxonomy(stop: threading.Event) -> None:
+    """Background thread: follow pub/sub notices and run each periodic check
+    when it falls due. Runs outside the event loop — the DB and Redis
+    clients here are synchronous. Besides the taxonomy (and the leaf
+    resolver's gold labels) it follows model hot-swap broadcasts and checks
+    the TF-IDF artifact on disk (services/model_swap.py), and keeps the SNP
+    registry snapshot current (services/snp_registry.py) — each on its own
+    interval (_watch_jobs)."""
+    from redis_client import get_redis
+    pubsub = None
+    try:
+        refresh_leaf_resolver()
+    except Exception as e:
+        logger.error(f"Leaf resolver build failed: {e}")
+    jobs = _watch_jobs()
+    due = {name: time.monotonic() + interval for name, interval, _ in jobs if interval > 0}
+    while not stop.is_set():
+        if pubsub is None:
+            r = get_redis()
+            if r is not None:
+                try:
+                    pubsub = r.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(TAXONOMY_CHANNEL, model_swap.MODEL_CHANNEL,
+                                     snp_registry.REGISTRY_CHANNEL)
+                except Exception as e:
+                    logger.warning(f"Taxonomy pub/sub unavailable ({e}) — polling only")
+                    pubsub = None
+
+        notified = False
+        deadline = min(due.values(), default=time.monotonic() + 60.0)
+        while not stop.is_set() and time.monotonic() < deadline:
+            if pubsub is None:
+                stop.wait(min(5.0, max(0.0, deadline - time.monotonic())))
+                continue
+            try:
+                msg = pubsub.get_message(timeout=1.0)
+                if msg:
+                    channel = msg["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode("utf-8")
+                    if channel == model_swap.MODEL_CHANNEL:
+                        model_swap.handle_message(msg["data"])
+                    elif channel == snp_registry.REGISTRY_CHANNEL:
+                        snp_registry.handle_message(msg["data"])
+                    else:
+                        notified = True
+                        break
+            except Exception as e:
+                logger.warning(f"Taxonomy pub/sub dropped ({e}) — will resubscribe")
+                pubsub = None
+        if stop.is_set():
+            break
+        now = time.monotonic()
+        for name, interval, job in jobs:
+            forced = notified and name == "taxonomy"
+            if not forced and not (name in due and now >= due[name]):
+                continue
+            try:
+                job(forced)
+            except Exception as e:
+                logger.error(f"{name} refresh failed: {e}")
+            if name in due:
+                due[name] = time.monotonic() + interval
+    if pubsub is not None:
+        try:
+            pubsub.close()
+        except Exception:
+            pass
+
+
+def start_taxonomy_watcher() -> None:
+    """Start the watcher thread. It always runs — pub/sub notices (taxonomy,
+    model hot-swap, SNP registry) need it even when every poll is disabled."""
+    global _watcher_stop
+    if _watcher_stop is not None:
+        return
+    for name, interval, _ in _watch_jobs():
+        if interval <= 0:
+            logger.warning(f"{name} polling disabled — only pub/sub notices and explicit reloads apply")
+    _watcher_stop = threading.Event()
+    threading.Thread(
+        target=_watch_taxonomy, args=(_watcher_stop,),
+        name="vargbot-taxonomy-watcher", daemon=True,
+    ).start()
+
+
+def stop_taxonomy_watcher() -> None:
+    global _watcher_stop
+    if _watcher_stop is not None:
+        _watcher_stop.set()
+        _watcher_stop = None
+
+
+def category_index() -> CategoryIndex:
+    """Leaf-category index of the current taxonomy snapshot (shared with the
+    officer verify endpoint and catalogue upload)."""
+    return _taxonomy().index
 
 
 def _resolve_category(domain: str, category_name: Optional[str]) -> Optional[str]:
     """Map an LLM-returned category NAME back to its official code."""
-    if not category_name:
-        return None
-    key = f"{domain}|{category_name.strip().lower()}"
-    if key in _category_name_to_code:
-        return _category_name_to_code[key]
-    # Loose contains-match within the same domain
-    needle = category_name.strip().lower()
-    for k, code in _category_name_to_code.items():
-        d, name = k.split("|", 1)
-        if d == domain and (needle in name or name in needle):
-            return code
-    return None
+    return category_index().resolve(category_name, domain)
+
+
+def _validated_category(domain: str, code: Optional[str], category_name: Optional[str]) -> Optional[str]:
+    """Keep an LLM-returned leaf code only if it is a real leaf of `domain`;
+    otherwise resolve from the name."""
+    if code:
+        leaf = category_index().lookup(code)
+        if leaf is not None and leaf.domain == domain:
+            return leaf.code
+    return _resolve_category(domain, category_name)
+
+
+# ── Local leaf resolution (services/leaf_resolver.py) ────────────────
+#
+# Under a confident TF-IDF domain the leaf is resolved locally when the
+# resolver's calibrated score clears its threshold; Sarvam is only asked
+# for the rest. Building a resolver (leave-one-out calibration over every
+# gold label) and reading the gold labels both happen off the request path:
+# in the taxonomy watcher thread, or in a one-off build thread when a
+# request sees a new taxonomy version. Requests keep the previous resolver
+# until the new one is installed, and defer to Sarvam before the first.
+
+LEAF_LOCAL = os.getenv("VARGBOT_LEAF_LOCAL", "true").lower() == "true"
+_leaf_gold: tuple[GoldLabel, ...] = ()
+_leaf_state: Optional[tuple[str, LeafResolver]] = None  # (taxonomy version, resolver)
+_leaf_counts = {"resolved": 0, "deferred": 0}
+_leaf_building = threading.Lock()
+
+
+def leaf_resolver() -> Optional[LeafResolver]:
+    """The installed resolver — never built here. When the taxonomy version
+    has moved, a rebuild starts in the background and the previous resolver
+    keeps serving; None until the first build has finished."""
+    state = _leaf_state
+    if state is None or state[0] != _taxonomy().version:
+        _rebuild_leaf_resolver_async()
+    return state[1] if state else None
+
+
+def _install_leaf_resolver(gold: tuple[GoldLabel, ...]) -> None:
+    global _leaf_gold, _leaf_state
+    snap = _taxonomy()
+    resolver = LeafResolver(snap.leaves, gold)
+    _leaf_gold, _leaf_state = gold, (snap.version, resolver)
+    stats = resolver.stats()
+    logger.info(
+        f"Leaf resolver built: {stats['leaves']} leaves, {stats['gold_labels']} gold labels, "
+        f"threshold {stats['threshold']} (calibrated={stats['calibrated']})"
+    )
+
+
+def _rebuild_leaf_resolver_async() -> None:
+    """Start one background build over the current taxonomy and the loaded
+    gold labels (no-op while a build is already running)."""
+    if not _leaf_building.acquire(blocking=False):
+        return
+
+    def build():
+        try:
+            _install_leaf_resolver(_leaf_gold)
+        except Exception as e:
+            logger.error(f"Leaf resolver build failed: {e}")
+        finally:
+            _leaf_building.release()
+
+    threading.Thread(target=build, name="vargbot-leaf-resolver", daemon=True).start()
+
+
+def refresh_leaf_resolver() -> bool:
+    """Reload officer gold labels and rebuild the resolver if they or the
+    taxonomy changed. Blocking DB read and build — call off the event loop
+    (the taxonomy watcher). Returns True on a rebuild."""
+    try:
+        from database import SessionLocal
+        db = SessionLocal()
+        try:
+            gold = tuple(load_gold(db))
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning(f"Leaf gold labels unavailable ({e}) — keeping {len(_leaf_gold)} loaded")
+        gold = _leaf_gold
+    with _leaf_building:
+        state = _leaf_state
+        if state is not None and state[0] == _taxonomy().version and gold == _leaf_gold:
+            return False
+        _install_leaf_resolver(gold)
+    return True
+
+
+def leaf_resolver_stats() -> dict:
+    """Resolver build info plus this worker's resolved/deferred counts."""
+    total = _leaf_counts["resolved"] + _leaf_counts["deferred"]
+    resolver = leaf_resolver()
+    return {
+        "enabled": LEAF_LOCAL,
+        "built": resolver is not None,
+        **(resolver.stats() if resolver else {}),
+        **_leaf_counts,
+        "local_rate": round(_leaf_counts["resolved"] / total, 4) if total else None,
+    }
 
 
 # ── Compliance readiness (per-domain advisory, PS2 "compliance validation") ──
@@ -216,13 +579,14 @@ Domain RET18 — Health & Wellness:
   - RET18-003: Yoga & Wellness Accessories (yoga mats, meditation cushions, wellness kits)
 """
 
-def _build_classify_prompt() -> str:
-    _load_taxonomy()
+def _render_classify_prompt(taxonomy_block: str) -> str:
+    """Sarvam system prompt around a taxonomy listing. Rendered only when a
+    snapshot is built — use _taxonomy().system_prompt on the request path."""
     return f"""You are VargBot, an AI classification engine for India's ONDC (Open Network for Digital Commerce).
 
 Your task: Given a business description (in any Indian language — Hindi, English, Tamil, Telugu, Bengali, Marathi, Gujarati, Kannada, Konkani, or code-mixed), classify it into the correct ONDC retail domain and leaf category, and extract sectoral product attributes.
 
-{_taxonomy_prompt}
+{taxonomy_block}
 
 Return ONLY a valid JSON object with exactly this structure:
 {{
@@ -275,47 +639,210 @@ class ClassificationPrediction(TypedDict):
 
 _muril_model = None
 _muril_tokenizer = None
+_muril_onnx = None   # services/muril_runtime.OnnxMuril when the ONNX export is served
+_muril_backend = "none"
 _use_muril = False
 
 # ── TF-IDF domain classifier state (populated at startup) ────────────
 
-_tfidf_model = None
-_tfidf_engine = "vargbot-tfidf"  # honest stamp; version read from artifact name
+@dataclass(frozen=True)
+class TfidfArtifact:
+    """One loaded TF-IDF domain model. The serving artifact is replaced as a
+    whole (services/model_swap.py), and each request scores and stamps with
+    the artifact it started with."""
+    engine: str          # honest stamp; version read from artifact name ("vargbot-tfidf-v2")
+    variant: str         # "joblib" | "mmap-k<keep>"
+    model: object        # predict_proba + classes_
+    lean: object = None  # services/tfidf_runtime.LeanTfidf for single-item calls
+    path: str = ""
+    fingerprint: str = ""  # size + mtime of the files it was loaded from
+
+    @property
+    def classes(self) -> list[str]:
+        return list(self.model.classes_)
+
+
+_tfidf: Optional[TfidfArtifact] = None
 # Below this top-1 probability the trained model defers to the LLM chain
 # (Indic-script input and unusual text land there by design). v2 calibration:
 # 0.55 gives 97.6% coverage at 99.3% val precision (template-inflated — see
 # gate_calibration + honesty_note in ml/reports/vargbot_tfidf_v2_eval.json).
 TFIDF_MIN_CONF = float(os.getenv("VARGBOT_TFIDF_MIN_CONF", "0.55"))
-
-
-def init_classifier():
-    """Initialize the classifier — load MuRIL if adapter is available."""
-    global _muril_model, _muril_tokenizer, _use_muril, _tfidf_model, _tfidf_engine
-
-    tfidf_path = Path(os.getenv(
+# Max concurrent Sarvam calls from one classify_batch_async run. Interactive
+# /classify traffic shares the same upstream quota, so keep this modest.
+BATCH_LLM_CONCURRENCY = int(os.getenv("VARGBOT_BATCH_LLM_CONCURRENCY", "8"))
+# Latency budget for one interactive classification (0 = wait for Sarvam as
+# long as its own timeout allows). When it runs out, the best local answer
+# is returned with DEADLINE_SUFFIX on the engine stamp.
+CLASSIFY_BUDGET_S = float(os.getenv("VARGBOT_CLASSIFY_BUDGET_S", "20"))
+# TF-IDF artifact to serve: "auto" prefers <model>.mmap/ over the joblib,
+# "mmap" / "joblib" force one.
+TFIDF_FORMAT = os.getenv("VARGBOT_TFIDF_FORMAT", "auto").lower()
+# MuRIL backend under VARGBOT_MODEL_DIR: "auto" prefers the int8 ONNX export
+# (onnx/) over the torch + LoRA adapter, "onnx" / "torch" force one.
+MURIL_BACKEND = os.getenv("VARGBOT_MURIL_BACKEND", "auto").lower()
+# ONNX Runtime intra-op threads per MuRIL call (0 = runtime default).
+MURIL_THREADS = int(os.getenv("VARGBOT_MURIL_THREADS", "0"))
+# Concurrent MuRIL calls are coalesced into one padded forward pass of up to
+# MURIL_MAX_BATCH inputs, waiting at most MURIL_MAX_DELAY_MS for company.
+MURIL_MAX_BATCH = int(os.getenv("VARGBOT_MURIL_MAX_BATCH", "16"))
+MURIL_MAX_DELAY_MS = float(os.getenv("VARGBOT_MURIL_MAX_DELAY_MS", "10"))
+DEADLINE_SUFFIX = "+deadline"
+
+
+def tfidf_artifact_path() -> Path:
+    """The TF-IDF artifact this deployment is configured to serve."""
+    return Path(os.getenv(
         "VARGBOT_TFIDF_PATH",
         str(Path(__file__).resolve().parent.parent / "models" / "vargbot_tfidf_v2.joblib"),
     ))
-    if tfidf_path.exists():
+
+
+def tfidf_fingerprint(tfidf_path: Path) -> str:
+    """Size + mtime of the joblib, lean export and mmap files behind
+    `tfidf_path` ("" if none exist) — changes when any is replaced in place."""
+    from services.tfidf_runtime import lean_path_for, mmap_path_for
+
+    mmap_path = mmap_path_for(tfidf_path)
+    files = [tfidf_path, lean_path_for(tfidf_path)]
+    if mmap_path.is_dir():
+        files += sorted(mmap_path.iterdir())
+    parts = []
+    for f in files:
         try:
-            import joblib
-            _tfidf_model = joblib.load(tfidf_path)
-            # "vargbot_tfidf_v2.joblib" -> "vargbot-tfidf-v2"
-            _tfidf_engine = tfidf_path.stem.replace("_", "-")
-            logger.info(
-                f"VargBot TF-IDF domain model loaded ({tfidf_path.name}, "
-                f"{len(_tfidf_model.classes_)} domains, gate={TFIDF_MIN_CONF})"
-            )
-        except Exception as e:
-            logger.warning(f"Failed to load TF-IDF model: {e}")
-            _tfidf_model = None
-    else:
+            st = f.stat()
+        except OSError:
+            continue
+        parts.append(f"{f.name}:{st.st_size}:{st.st_mtime_ns}")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:10] if parts else ""
+
+
+def _load_tfidf_mmap(tfidf_path: Path) -> Optional[TfidfArtifact]:
+    """Serve from the memory-mapped artifact (<model>.mmap/, written by
+    ml/train_vargbot_tfidf_v2.py) when shipped: no joblib.load, the arrays
+    are shared read-only across workers. Returns None to fall back to joblib."""
+    from services.tfidf_runtime import MmapTfidf, mmap_path_for
+
+    mmap_path = mmap_path_for(tfidf_path)
+    if not mmap_path.is_dir():
+        if TFIDF_FORMAT == "mmap":
+            logger.warning(f"VARGBOT_TFIDF_FORMAT=mmap but {mmap_path} is missing")
+        return None
+    try:
+        model = MmapTfidf(mmap_path)
+    except Exception as e:
+        logger.warning(f"Failed to map TF-IDF artifact {mmap_path.name}: {e}")
+        return None
+    logger.info(
+        f"VargBot TF-IDF domain model mapped ({mmap_path.name}, {len(model.classes_)} domains, "
+        f"{model.meta['n_kept']}/{model.meta['n_features']} features, gate={TFIDF_MIN_CONF})"
+    )
+    return TfidfArtifact(
+        engine=tfidf_path.stem.replace("_", "-"),
+        # Part of the cache key: a differently pruned artifact may answer differently
+        variant=f"mmap-k{model.meta['keep']}",
+        model=model, lean=model,
+        path=str(tfidf_path), fingerprint=tfidf_fingerprint(tfidf_path),
+    )
+
+
+def _load_tfidf_lean(tfidf_path: Path, model):
+    """Lean single-item scorer exported from the same model, if shipped
+    (ml/export_vargbot_tfidf_lean.py). A missing or stale export only costs
+    speed — the joblib pipeline answers instead."""
+    from services.tfidf_runtime import LeanTfidf, lean_path_for
+
+    lean_path = lean_path_for(tfidf_path)
+    if not lean_path.exists():
+        return None
+    try:
+        lean = LeanTfidf(lean_path)
+        if list(lean.classes_) != list(model.classes_):
+            raise ValueError("classes differ from the joblib model")
+        logger.info(f"VargBot TF-IDF lean runtime loaded ({lean_path.name})")
+        return lean
+    except Exception as e:
+        logger.warning(f"Ignoring lean TF-IDF export {lean_path.name}: {e}")
+        return None
+
+
+def _load_muril_onnx(model_dir: str) -> bool:
+    """Serve MuRIL from <model_dir>/onnx (merged LoRA, int8). False when the
+    export is absent, unloadable, or was trained on a different label set."""
+    global _muril_onnx, _muril_backend, _use_muril
+    from services.muril_runtime import load_onnx
+
+    try:
+        model = load_onnx(model_dir, threads=MURIL_THREADS)
+        if model is None:
+            if MURIL_BACKEND == "onnx":
+                logger.warning(f"VARGBOT_MURIL_BACKEND=onnx but {model_dir}/onnx has no export")
+            return False
+        if model.labels != [ID2LABEL[i] for i in range(len(ID2LABEL))]:
+            raise ValueError(f"label order {model.labels} differs from LABEL2ID")
+    except Exception as e:
+        logger.warning(f"Failed to load MuRIL ONNX export: {e}")
+        return False
+    _muril_onnx, _muril_backend, _use_muril = model, model.variant, True
+    logger.info(f"MuRIL {model.variant} loaded ({model.meta['model']}, base {model.meta.get('base_model')})")
+    return True
+
+
+def load_tfidf_artifact(tfidf_path: Path) -> Optional[TfidfArtifact]:
+    """Load the artifact at `tfidf_path` (mmap export preferred, see
+    VARGBOT_TFIDF_FORMAT) without installing it. None if absent or broken."""
+    if TFIDF_FORMAT != "joblib":
+        art = _load_tfidf_mmap(tfidf_path)
+        if art is not None:
+            return art
+    if not tfidf_path.exists():
         logger.info(f"No TF-IDF artifact at {tfidf_path} — LLM chain only")
+        return None
+    fingerprint = tfidf_fingerprint(tfidf_path)
+    try:
+        import joblib
+        model = joblib.load(tfidf_path)
+        logger.info(
+            f"VargBot TF-IDF domain model loaded ({tfidf_path.name}, "
+            f"{len(model.classes_)} domains, gate={TFIDF_MIN_CONF})"
+        )
+    except Exception as e:
+        logger.warning(f"Failed to load TF-IDF model: {e}")
+        return None
+    return TfidfArtifact(
+        # "vargbot_tfidf_v2.joblib" -> "vargbot-tfidf-v2"
+        engine=tfidf_path.stem.replace("_", "-"), variant="joblib",
+        model=model, lean=_load_tfidf_lean(tfidf_path, model),
+        path=str(tfidf_path), fingerprint=fingerprint,
+    )
+
+
+def serving_tfidf() -> Optional[TfidfArtifact]:
+    """The TF-IDF artifact new requests score with (None: LLM chain only)."""
+    return _tfidf
+
+
+def install_tfidf(art: Optional[TfidfArtifact]) -> Optional[TfidfArtifact]:
+    """Atomically make `art` the serving artifact; returns the one it replaced.
+    Requests already past their TF-IDF stage finish on the artifact they
+    started with."""
+    global _tfidf
+    previous, _tfidf = _tfidf, art
+    return previous
+
+
+def init_classifier():
+    """Initialize the classifier — load MuRIL if adapter is available."""
+    global _muril_model, _muril_tokenizer, _use_muril, _muril_backend
+
+    install_tfidf(load_tfidf_artifact(tfidf_artifact_path()))
 
     model_dir = os.getenv("VARGBOT_MODEL_DIR", "")
     adapter_path = Path(model_dir) / "adapter" if model_dir else None
 
-    if adapter_path and adapter_path.exists() and (adapter_path / "adapter_config.json").exists():
+    if model_dir and MURIL_BACKEND != "torch" and _load_muril_onnx(model_dir):
+        pass
+    elif adapter_path and adapter_path.exists() and (adapter_path / "adapter_config.json").exists():
         try:
             from peft import PeftModel
             from transformers import AutoModelForSequenceClassification, AutoTokenizer
@@ -339,6 +866,7 @@ def init_classifier():
             )
             _muril_model = PeftModel.from_pretrained(base_model, str(adapter_path))
             _muril_model.eval()
+            _muril_backend = "torch"
             _use_muril = True
             logger.info("MuRIL + LoRA loaded successfully")
         except Exception as e:
@@ -354,8 +882,8 @@ def init_classifier():
 VALID_DOMAINS = set(LABEL2ID.keys())
 
 
-def _valid_domains() -> set[str]:
-    return _valid_domains_full or VALID_DOMAINS
+def _valid_domains() -> frozenset[str]:
+    return _taxonomy().valid_domains or VALID_DOMAINS
 
 
 def _parse_classification_json(raw: str) -> Optional[tuple[list[ClassificationPrediction], dict]]:
@@ -409,7 +937,7 @@ def _parse_classification_json(raw: str) -> Optional[tuple[list[ClassificationPr
         results.append(ClassificationPrediction(
             domain=domain,
             confidence=round(float(p.get("confidence", 0.0)), 4),
-            category=p.get("category") or _resolve_category(domain, cat_name),
+            category=_validated_category(domain, p.get("category"), cat_name),
             category_name=cat_name,
             explanation=p.get("explanation"),
         ))
@@ -460,9 +988,30 @@ async def _classify_with_sarvam(
     With domain_hint=(code, name), the trained model has already fixed the
     domain — the LLM only resolves the leaf category and attributes in it.
     """
-    if not SARVAM_API_KEY:
+    if not SARVAM_API_KEY or resilience.is_open("classify"):
         return None
 
+    # Identical concurrent requests (same normalised text, hint, taxonomy and
+    # model) share one upstream call — see services/single_flight.py.
+    key = single_flight.flight_key(
+        "clf",
+        classify_cache.normalize_description(description),
+        domain_hint[0] if domain_hint else "",
+        _taxonomy().version,
+        SARVAM_CHAT_MODEL,
+    )
+    return await single_flight.do(
+        key,
+        lambda: _sarvam_classify_call(description, domain_hint),
+        decode=lambda v: tuple(v) if v is not None else None,
+    )
+
+
+async def _sarvam_classify_call(
+    description: str,
+    domain_hint: Optional[tuple[str, str]],
+) -> Optional[tuple[list[ClassificationPrediction], dict]]:
+    """One Sarvam chat completion for _classify_with_sarvam."""
     user_msg = f"Classify this business:\n\n{description}"
     if domain_hint:
         code, name = domain_hint
@@ -473,36 +1022,43 @@ async def _classify_with_sarvam(
             f"{code}, and focus on accurate sectoral attributes."
         )
 
+    snap = _taxonomy()
+    system_prompt = (
+        snap.hint_prompts.get(domain_hint[0], snap.system_prompt)
+        if domain_hint else snap.system_prompt
+    )
+
     try:
-        async with httpx.AsyncClient(timeout=40.0) as client:
-            resp = await client.post(
-                f"{SARVAM_BASE_URL}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {SARVAM_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": SARVAM_CHAT_MODEL,
-                    "temperature": 0.1,
-                    "max_tokens": 4096,
-                    "messages": [
-                        {"role": "system", "content": _build_classify_prompt() + _BREVITY_SUFFIX},
-                        {"role": "user", "content": user_msg},
-                    ],
-                },
+        resp = await http_pool.post(
+            "classify",
+            f"{SARVAM_BASE_URL}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {SARVAM_API_KEY}",
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": SARVAM_CHAT_MODEL,
+                "temperature": 0.1,
+                "max_tokens": 4096,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_msg},
+                ],
+            },
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        metrics.record_usage("classify", SARVAM_CHAT_MODEL, data.get("usage"))
+        content = data["choices"][0]["message"].get("content") or ""
+        parsed = _parse_classification_json(content)
+        if parsed:
+            preds, attrs = parsed
+            logger.info(
+                f"VargBot {SARVAM_CHAT_MODEL}: {preds[0]['domain']} @ {preds[0]['confidence']}"
+                f" | attrs={list(attrs)}"
             )
-            resp.raise_for_status()
-            data = resp.json()
-            content = data["choices"][0]["message"].get("content") or ""
-            parsed = _parse_classification_json(content)
-            if parsed:
-                preds, attrs = parsed
-                logger.info(
-                    f"VargBot {SARVAM_CHAT_MODEL}: {preds[0]['domain']} @ {preds[0]['confidence']}"
-                    f" | attrs={list(attrs)}"
-                )
-                return preds, attrs
-            logger.warning(f"VargBot {SARVAM_CHAT_MODEL}: unparseable JSON response")
+            return preds, attrs
+        logger.warning(f"VargBot {SARVAM_CHAT_MODEL}: unparseable JSON response")
     except Exception as e:
         logger.error(f"VargBot {SARVAM_CHAT_MODEL} error: {e}")
 
@@ -511,34 +1067,44 @@ async def _classify_with_sarvam(
 
 # ── MuRIL inference ───────────────────────────────────────────────────
 
-def _classify_with_muril(description: str) -> list[ClassificationPrediction]:
-    """Run MuRIL inference and return top-3 predictions."""
-    import torch
-
-    inputs = _muril_tokenizer(
-        description,
-        truncation=True,
-        padding="max_length",
-        max_length=128,
-        return_tensors="pt",
-    )
-
-    with torch.no_grad():
-        outputs = _muril_model(**inputs)
+def _classify_with_muril_many(descriptions: list[str]) -> list[list[ClassificationPrediction]]:
+    """Top-3 predictions per description from ONE forward pass, padded to the
+    longest input in the batch (never to a fixed 128 tokens)."""
+    if _muril_onnx is not None:
+        rows = _muril_onnx.predict_proba(descriptions).tolist()
+    else:
+        import torch
+
+        inputs = _muril_tokenizer(
+            descriptions,
+            truncation=True,
+            max_length=128,
+            padding="longest" if len(descriptions) > 1 else False,
+            return_tensors="pt",
+        )
+        with torch.no_grad():
+            outputs = _muril_model(**inputs)
+        rows = torch.nn.functional.softmax(outputs.logits, dim=-1).tolist()
+
+    results = []
+    for probs in rows:
+        top3_indices = sorted(range(len(probs)), key=probs.__getitem__, reverse=True)[:3]
+        results.append([
+            ClassificationPrediction(
+                domain=ID2LABEL[idx],
+                confidence=round(probs[idx], 4),
+                category=None,
+                category_name=None,
+                explanation=None,
+            )
+            for idx in top3_indices
+        ])
+    return results
 
-    probs = torch.nn.functional.softmax(outputs.logits, dim=-1)[0]
-    top3_indices = torch.argsort(probs, descending=True)[:3]
 
-    return [
-        ClassificationPrediction(
-            domain=ID2LABEL[idx.item()],
-            confidence=round(probs[idx].item(), 4),
-            category=None,
-            category_name=None,
-            explanation=None,
-        )
-        for idx in top3_indices
-    ]
+def _classify_with_muril(description: str) -> list[ClassificationPrediction]:
+    """Run MuRIL inference and return top-3 predictions."""
+    return _classify_with_muril_many([description])[0]
 
 
 # ── TF-IDF inference ─────────────────────────────────────────────────
@@ -546,37 +1112,131 @@ def _classify_with_muril(description: str) -> list[ClassificationPrediction]:
 def _classify_with_tfidf(description: str) -> Optional[list[ClassificationPrediction]]:
     """Top-3 domain predictions from the trained TF-IDF + LogisticRegression
     model (vargbot-tfidf-v1). Probabilities come straight from the model."""
-    if _tfidf_model is None:
-        return None
+    return _classify_with_tfidf_many([description])[0]
+
+
+def _classify_with_tfidf_many(
+    descriptions: list[str],
+    art: Optional[TfidfArtifact] = None,
+) -> list[Optional[list[ClassificationPrediction]]]:
+    """Vectorised form of _classify_with_tfidf: one predict_proba over the
+    whole batch instead of one sparse transform + dispatch per description.
+    Scores with `art` (default: the serving artifact)."""
+    art = art or _tfidf
+    if art is None or not descriptions:
+        return [None] * len(descriptions)
     try:
-        probs = _tfidf_model.predict_proba([description])[0]
-        classes = list(_tfidf_model.classes_)
-        order = sorted(range(len(classes)), key=lambda i: probs[i], reverse=True)[:3]
+        import numpy as np
+
+        if len(descriptions) == 1 and art.lean is not None:
+            # Batch size 1 (every live /classify): skip sklearn dispatch
+            probs = art.lean.predict_proba_one(descriptions[0])[None, :]
+        else:
+            probs = art.model.predict_proba(list(descriptions))
+        classes = art.classes
+        # Stable sort keeps the single-item tie order (Python's sorted).
+        top3 = np.argsort(-probs, axis=1, kind="stable")[:, :3]
         return [
-            ClassificationPrediction(
-                domain=classes[i],
-                confidence=round(float(probs[i]), 4),
-                category=None,
-                category_name=None,
-                explanation=None,
-            )
-            for i in order
+            [
+                ClassificationPrediction(
+                    domain=classes[i],
+                    confidence=round(float(row[i]), 4),
+                    category=None,
+                    category_name=None,
+                    explanation=None,
+                )
+                for i in order
+            ]
+            for row, order in zip(probs, top3)
         ]
     except Exception as e:
         logger.warning(f"TF-IDF inference failed: {e}")
-        return None
+        return [None] * len(descriptions)
 
 
-# ── Keyword fallback ─────────────────────────────────────────────────
+async def _tfidf_off_loop(
+    descriptions: list[str], art: Optional[TfidfArtifact] = None,
+) -> list[Optional[list[ClassificationPrediction]]]:
+    """_classify_with_tfidf_many on the TF-IDF engine pool. A saturated pool
+    degrades to "no TF-IDF answer" — the chain then continues without it."""
+    art = art or _tfidf
+    if art is None:
+        return [None] * len(descriptions)
+    try:
+        return await engine_pool.run("tfidf", _classify_with_tfidf_many, descriptions, art)
+    except engine_pool.EngineSaturated as e:
+        logger.warning(f"TF-IDF skipped: {e}")
+        return [None] * len(descriptions)
 
-def _classify_with_keywords(description: str) -> list[ClassificationPrediction]:
-    """Keyword frequency scoring (fallback classifier)."""
-    text = description.lower()
-    scores: dict[str, float] = {}
 
-    for domain, keywords in ONDC_DOMAINS.items():
-        hits = sum(1 for kw in keywords if re.search(rf"\b{kw}", text))
-        scores[domain] = hits / len(keywords) if keywords else 0.0
+_muril_batcher = micro_batch.MicroBatcher(
+    "muril", _classify_with_muril_many, max_batch=MURIL_MAX_BATCH, max_delay_ms=MURIL_MAX_DELAY_MS,
+)
+
+
+async def _muril_off_loop(description: str) -> Optional[list[ClassificationPrediction]]:
+    """MuRIL via the micro-batcher on the MuRIL engine pool (None when
+    saturated or failed)."""
+    try:
+        with metrics.stage("muril"):
+            return await _muril_batcher.submit(description)
+    except engine_pool.EngineSaturated as e:
+        logger.warning(f"MuRIL skipped: {e}")
+    except Exception as e:
+        logger.warning(f"MuRIL inference failed: {e}")
+    return None
+
+
+# ── Keyword fallback ─────────────────────────────────────────────────
+#
+# One compiled alternation over every keyword in ONDC_DOMAINS, scanned once
+# per text, instead of a re.search per keyword per domain (~80 lookups in
+# re's bounded cache). Matching keeps the original semantics — a keyword hits
+# when a word STARTS with it ("ayurved" hits "ayurvedic"), and each keyword
+# counts once. Alternatives are ordered longest first, so at any position the
+# regex reports the longest keyword; every shorter keyword that is a prefix of
+# it also matched there and is credited through _KeywordEngine.credits.
+
+
+class _KeywordEngine:
+    def __init__(self, domains: dict[str, list[str]]):
+        self.domains = list(domains)
+        self.sizes = [len(kws) for kws in domains.values()]
+        # keyword -> [(domain slot, occurrences in that domain's list)]
+        weights: dict[str, dict[int, int]] = {}
+        for slot, kws in enumerate(domains.values()):
+            for kw in kws:
+                weights.setdefault(kw, {}).setdefault(slot, 0)
+                weights[kw][slot] += 1
+        ordered = sorted(weights, key=lambda k: (-len(k), k))
+        self.pattern = re.compile(r"\b(?:" + "|".join(re.escape(k) for k in ordered) + ")")
+        # matched keyword -> every keyword that is a prefix of it (itself included)
+        self.credits: dict[str, tuple[str, ...]] = {
+            kw: tuple(k for k in ordered if kw.startswith(k)) for kw in ordered
+        }
+        self.weights = {kw: tuple(w.items()) for kw, w in weights.items()}
+
+    def hit_counts(self, text: str) -> list[int]:
+        """Per-domain count of keyword-list entries hit in already-lowercased text."""
+        matched: set[str] = set()
+        for m in self.pattern.finditer(text):
+            matched.update(self.credits[m.group(0)])
+        counts = [0] * len(self.domains)
+        for kw in matched:
+            for slot, n in self.weights[kw]:
+                counts[slot] += n
+        return counts
+
+
+_keyword_engine = _KeywordEngine(ONDC_DOMAINS)
+
+
+def _keyword_predictions(text: str) -> list[ClassificationPrediction]:
+    eng = _keyword_engine
+    counts = eng.hit_counts(text.lower())
+    scores = {
+        d: (c / size if size else 0.0) for d, c, size in zip(eng.domains, counts, eng.sizes)
+    }
 
     total = sum(scores.values()) or 1.0
     normalised = {d: s / total for d, s in scores.items()}
@@ -599,53 +1259,341 @@ def _classify_with_keywords(description: str) -> list[ClassificationPrediction]:
     ]
 
 
+def _classify_with_keywords(description: str) -> list[ClassificationPrediction]:
+    """Keyword frequency scoring (fallback classifier)."""
+    return _keyword_predictions(description)
+
+
+def _classify_with_keywords_many(descriptions: list[str]) -> list[list[ClassificationPrediction]]:
+    """Keyword scoring for a list of texts (catalogue rows, batch fallback)."""
+    return [_keyword_predictions(d) for d in descriptions]
+
+
 # ── Main classification functions ─────────────────────────────────────
 
+def _tfidf_engine(art: Optional[TfidfArtifact] = None) -> str:
+    """Engine stamp for answers from `art` (default: the serving artifact)."""
+    art = art or _tfidf
+    return art.engine if art is not None else "vargbot-tfidf"
+
+
+def _engine_version(art: Optional[TfidfArtifact] = None) -> str:
+    """Identity of the chain that would answer right now — part of the cache
+    key, so a model upgrade or an LLM swap never serves an old answer."""
+    art = art or _tfidf
+    return "|".join((
+        f"{art.engine}:{art.variant}:{art.fingerprint}" if art is not None else "no-tfidf",
+        SARVAM_CHAT_MODEL if SARVAM_API_KEY else "no-llm",
+        f"muril-lora:{_muril_backend}" if _use_muril else "no-muril",
+        f"gate={TFIDF_MIN_CONF}",
+        "leaf-local" if LEAF_LOCAL else "no-leaf-local",
+        f"attrs={attribute_extractor.version()}",
+    ))
+
+
+def _is_cacheable(engine: str) -> bool:
+    """Only cache answers from the chain's intended path. When Sarvam is
+    configured but failed, the result is a degraded fallback — caching it
+    would pin the outage answer for a full TTL after Sarvam recovers. The
+    same goes for answers cut short by the latency budget. A locally resolved
+    leaf is the intended path, not a fallback."""
+    if engine.endswith(DEADLINE_SUFFIX):
+        return False
+    if not SARVAM_API_KEY:
+        return True  # local-only chain: deterministic, always the full answer
+    return "sarvam" in engine or engine.endswith(LEAF_SUFFIX)
+
+
+def _with_local_attributes(
+    description: str, result: tuple[list[ClassificationPrediction], str, dict],
+) -> tuple[list[ClassificationPrediction], str, dict]:
+    """Gazetteer attributes for the top domain, with the engine's own (LLM)
+    attributes filling only what the gazetteer did not find."""
+    preds, engine, attrs = result
+    if not preds:
+        return result
+    local = attribute_extractor.extract(description, preds[0]["domain"])
+    return preds, engine, attribute_extractor.merge(local, attrs)
+
+
+_late_tasks: set[asyncio.Task] = set()
+
+
 async def classify_mse_description_async(
-    description: str, language: str = "en"
+    description: str, language: str = "en", budget_s: Optional[float] = None,
 ) -> tuple[list[ClassificationPrediction], str, dict]:
     """Return (top-3 predictions, engine_name, sectoral attributes).
 
     Chain: TF-IDF (confidence-gated, LLM resolves leaf category) →
     Sarvam-30B zero-shot → MuRIL (if loaded) → TF-IDF low-conf → keywords.
+    Results are served from the content-addressed cache when the same
+    normalised description was classified under the same taxonomy + engines.
+
+    budget_s (default CLASSIFY_BUDGET_S) bounds the whole call: MuRIL runs
+    alongside Sarvam, and if Sarvam has not answered when the budget runs
+    out the best local answer is returned, stamped "<engine>+deadline". The
+    Sarvam call keeps running and its answer is cached for the next request.
+    """
+    result = None
+    async for _stage, result in classify_mse_description_stream(description, language, budget_s):
+        pass
+    return result
+
+
+async def classify_mse_description_stream(
+    description: str, language: str = "en", budget_s: Optional[float] = None,
+) -> AsyncIterator[tuple[str, tuple[list[ClassificationPrediction], str, dict]]]:
+    """classify_mse_description_async, answering in up to two stages.
+
+    Yields ("provisional", (tfidf_top3, engine, gazetteer attributes)) as soon
+    as a confident TF-IDF prediction has fixed the domain — milliseconds, before Sarvam is
+    asked for the leaf category — then always ("final", result) with the
+    same result classify_mse_description_async returns. A cache hit, or a
+    description the trained model is not confident about, yields only the
+    final stage.
     """
-    _load_taxonomy()
-    tfidf_preds = _classify_with_tfidf(description)
+    loop = asyncio.get_running_loop()
+    budget = CLASSIFY_BUDGET_S if budget_s is None else budget_s
+    deadline = loop.time() + budget if budget > 0 else None
+    t0 = time.perf_counter()
+    req, token = metrics.start_request()
+    engine, cached = None, False
+    art = _tfidf  # this request scores and stamps with one artifact, even across a hot swap
+    try:
+        taxonomy_version = _taxonomy().version
+        key = classify_cache.cache_key(description, language, taxonomy_version, _engine_version(art))
+        with metrics.stage("cache"):
+            hit = await classify_cache.get(key)
+        if hit is not None:
+            engine, cached = hit[1], True
+            yield "final", hit
+            return
+
+        async def _cache_late(result):
+            if _is_cacheable(result[1]):
+                await classify_cache.put(key, *result)
+
+        with metrics.stage("tfidf"):
+            tfidf_preds = (await _tfidf_off_loop([description], art))[0]
+        model_swap.shadow(description)
+        if tfidf_preds and tfidf_preds[0]["confidence"] >= TFIDF_MIN_CONF:
+            yield "provisional", _with_local_attributes(
+                description,
+                ([ClassificationPrediction(**p) for p in tfidf_preds], _tfidf_engine(art), {}),
+            )
 
-    # 1. Confident trained-model prediction — the domain is decided;
-    #    Sarvam only resolves the leaf category + attributes within it.
+        predictions, engine, attributes = await _classify_chain(
+            description, tfidf_preds, deadline=deadline, on_late=_cache_late, tfidf=art,
+        )
+        if _is_cacheable(engine):
+            await classify_cache.put(key, predictions, engine, attributes)
+        yield "final", (predictions, engine, attributes)
+    finally:
+        metrics.finish_request(req, token, engine, (time.perf_counter() - t0) * 1000, cached)
+
+
+async def classify_batch_async(
+    items: list[tuple[str, str]],
+    concurrency: Optional[int] = None,
+    budget_s: Optional[float] = None,
+) -> list[tuple[list[ClassificationPrediction], str, dict]]:
+    """Classify many (description, language) pairs; results in input order.
+
+    Same chain and cache as classify_mse_description_async, but shaped for
+    backfills and re-scoring: cache lookups run together, duplicates inside
+    the batch are classified once, the TF-IDF model scores every miss in a
+    single predict_proba call, and only the items that need Sarvam go to it —
+    at most `concurrency` at a time so a 5K backfill cannot exhaust quota or
+    trip upstream rate limits. Backfills favour the full answer, so there is
+    no latency budget unless budget_s is given (applied per item, from when
+    its chain starts).
+    """
+    taxonomy_version = _taxonomy().version
+    art = _tfidf
+    engine_version = _engine_version(art)
+    keys = [
+        classify_cache.cache_key(desc, lang, taxonomy_version, engine_version)
+        for desc, lang in items
+    ]
+
+    unique: dict[str, str] = {}  # key -> description, first occurrence wins
+    for key, (desc, _lang) in zip(keys, items):
+        unique.setdefault(key, desc)
+
+    cached = await asyncio.gather(*(classify_cache.get(k) for k in unique))
+    resolved: dict[str, tuple[list[ClassificationPrediction], str, dict]] = {
+        k: hit for k, hit in zip(unique, cached) if hit is not None
+    }
+
+    missing = [k for k in unique if k not in resolved]
+    if missing:
+        tfidf_all = await _tfidf_off_loop([unique[k] for k in missing], art)
+        sem = asyncio.Semaphore(max(1, concurrency or BATCH_LLM_CONCURRENCY))
+        loop = asyncio.get_running_loop()
+
+        async def _one(key: str, tfidf_preds):
+            async with sem:
+                t0 = time.perf_counter()
+                req, token = metrics.start_request()  # this task's own context
+                result = None
+                try:
+                    deadline = loop.time() + budget_s if budget_s else None
+                    result = await _classify_chain(unique[key], tfidf_preds, deadline=deadline, tfidf=art)
+                finally:
+                    metrics.finish_request(
+                        req, token, result[1] if result else None, (time.perf_counter() - t0) * 1000,
+                    )
+            if _is_cacheable(result[1]):
+                await classify_cache.put(key, *result)
+            resolved[key] = result
+
+        await asyncio.gather(*(_one(k, t) for k, t in zip(missing, tfidf_all)))
+
+    # Fresh copies per position: duplicate inputs must not share dicts.
+    out = []
+    for key in keys:
+        preds, engine, attrs = resolved[key]
+        out.append(([ClassificationPrediction(**p) for p in preds], engine, dict(attrs)))
+    return out
+
+
+async def _llm_stage(
+    description: str,
+    tfidf_preds: Optional[list[ClassificationPrediction]],
+    tfidf: Optional[TfidfArtifact] = None,
+) -> Optional[tuple[list[ClassificationPrediction], str, dict]]:
+    """The Sarvam leg of the chain, or None when Sarvam has no answer.
+
+    A confident TF-IDF prediction fixes the domain and Sarvam only resolves
+    the leaf category + attributes within it — unless the local leaf resolver
+    is sure enough on its own; otherwise Sarvam classifies zero-shot over
+    the full taxonomy (Indic text, out-of-corpus domains).
+    """
     if tfidf_preds and tfidf_preds[0]["confidence"] >= TFIDF_MIN_CONF:
         top = tfidf_preds[0]
-        hint = (top["domain"], _domain_names_full.get(top["domain"], top["domain"]))
-        parsed = await _classify_with_sarvam(description, domain_hint=hint)
+        if LEAF_LOCAL:
+            with metrics.stage("leaf_resolver"):
+                resolver = leaf_resolver()
+                leaf = resolver.resolve(description, top["domain"]) if resolver else None
+            if leaf is not None:
+                _leaf_counts["resolved"] += 1
+                preds = [ClassificationPrediction(**p) for p in tfidf_preds]
+                preds[0]["category"] = leaf.code
+                preds[0]["category_name"] = leaf.name
+                preds[0]["explanation"] = (
+                    f"Leaf '{leaf.name}' matched locally from {leaf.source} "
+                    f"(score {leaf.score:.2f})"
+                )
+                return _with_local_attributes(description, (preds, f"{_tfidf_engine(tfidf)}{LEAF_SUFFIX}", {}))
+            _leaf_counts["deferred"] += 1
+        hint = (top["domain"], _taxonomy().domain_names.get(top["domain"], top["domain"]))
+        with metrics.stage("sarvam_leaf"):
+            parsed = await _classify_with_sarvam(description, domain_hint=hint)
         if parsed:
             llm_preds, attrs = parsed
             llm_top = next((p for p in llm_preds if p["domain"] == top["domain"]), None)
             if llm_top:
-                top["category"] = llm_top.get("category")
-                top["category_name"] = llm_top.get("category_name")
-                top["explanation"] = llm_top.get("explanation")
-                return tfidf_preds, f"{_tfidf_engine}+sarvam-30b", attrs
-        return tfidf_preds, _tfidf_engine, {}
-
-    # 2. Sarvam zero-shot over the full taxonomy (Indic text, out-of-corpus domains)
-    parsed = await _classify_with_sarvam(description)
+                # Copy: the caller may already have returned tfidf_preds on a deadline
+                preds = [ClassificationPrediction(**p) for p in tfidf_preds]
+                preds[0]["category"] = llm_top.get("category")
+                preds[0]["category_name"] = llm_top.get("category_name")
+                preds[0]["explanation"] = llm_top.get("explanation")
+                return _with_local_attributes(description, (preds, f"{_tfidf_engine(tfidf)}+sarvam-30b", attrs))
+        return None
+
+    with metrics.stage("sarvam_zero_shot"):
+        parsed = await _classify_with_sarvam(description)
     if parsed:
         preds, attrs = parsed
-        return preds, "sarvam-llm", attrs
+        return _with_local_attributes(description, (preds, "sarvam-llm", attrs))
+    return None
 
-    # 3. MuRIL if loaded
-    if _use_muril:
-        return _classify_with_muril(description), "muril-lora", {}
 
-    # 4. Trained model even below the gate — still better than keywords
-    if tfidf_preds:
-        logger.info("Sarvam unavailable, using TF-IDF below confidence gate")
-        return tfidf_preds, _tfidf_engine, {}
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    if deadline is None:
+        return None
+    return max(0.0, deadline - asyncio.get_running_loop().time())
+
+
+async def _classify_chain(
+    description: str,
+    tfidf_preds: Optional[list[ClassificationPrediction]],
+    deadline: Optional[float] = None,
+    on_late: Optional[Callable[[tuple], Awaitable[None]]] = None,
+    tfidf: Optional[TfidfArtifact] = None,
+) -> tuple[list[ClassificationPrediction], str, dict]:
+    """The uncached engine chain behind classify_mse_description_async.
+
+    Sarvam and (when loaded, and TF-IDF is not already confident) MuRIL start
+    together. Without a deadline this answers exactly like the sequential
+    chain; with one (loop.time() value) the best local answer is returned
+    when it passes, and on_late receives Sarvam's answer if it lands after.
+    `tfidf` is the artifact that scored tfidf_preds (default: the serving one).
+    """
+    confident = bool(tfidf_preds and tfidf_preds[0]["confidence"] >= TFIDF_MIN_CONF)
+    llm = asyncio.ensure_future(_llm_stage(description, tfidf_preds, tfidf))
+    muril = (
+        asyncio.ensure_future(_muril_off_loop(description))
+        if _use_muril and not confident else None
+    )
+
+    handed_off = False
+    try:
+        # 1–2. Sarvam (leaf resolution under a confident TF-IDF, else zero-shot)
+        timed_out = False
+        try:
+            result = await asyncio.wait_for(asyncio.shield(llm), _remaining(deadline))
+        except asyncio.TimeoutError:
+            timed_out, result = True, None
+        if result is not None:
+            return result
+        if timed_out and on_late is not None:
+            _hand_off_late(llm, on_late)
+            handed_off = True
+
+        # 3. MuRIL if loaded
+        muril_preds = None
+        if muril is not None:
+            try:
+                muril_preds = await asyncio.wait_for(asyncio.shield(muril), _remaining(deadline))
+            except asyncio.TimeoutError:
+                timed_out = True
+        suffix = DEADLINE_SUFFIX if timed_out else ""
+        if muril_preds:
+            return _with_local_attributes(description, (muril_preds, f"muril-lora{suffix}", {}))
+
+        # 4. Trained model (confident, or even below the gate — still better than keywords)
+        if tfidf_preds:
+            if not confident:
+                logger.info("Sarvam unavailable, using TF-IDF below confidence gate")
+            return _with_local_attributes(description, (tfidf_preds, f"{_tfidf_engine(tfidf)}{suffix}", {}))
+
+        # 5. Keyword fallback
+        logger.info("Sarvam unavailable, using keyword fallback")
+        with metrics.stage("keyword"):
+            keyword_preds = _classify_with_keywords(description)
+        return _with_local_attributes(description, (keyword_preds, f"keyword-fallback{suffix}", {}))
+    finally:
+        if not llm.done() and not handed_off:
+            llm.cancel()
+        if muril is not None and not muril.done():
+            muril.cancel()
+
+
+def _hand_off_late(llm: asyncio.Future, on_late: Callable[[tuple], Awaitable[None]]) -> None:
+    """Let a Sarvam call that missed the deadline finish in the background
+    and pass its answer to on_late (e.g. the result cache)."""
+    async def _finish():
+        try:
+            result = await llm
+            if result is not None:
+                await on_late(result)
+        except Exception as e:
+            logger.warning(f"Late Sarvam result dropped: {e}")
 
-    # 5. Keyword fallback
-    logger.info("Sarvam unavailable, using keyword fallback")
-    return _classify_with_keywords(description), "keyword-fallback", {}
+    task = asyncio.ensure_future(_finish())
+    _late_tasks.add(task)
+    task.add_done_callback(_late_tasks.discard)
 
 
 def classify_mse_description(description: str, language: str = "en") -> list[Prediction]:
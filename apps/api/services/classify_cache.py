@@ -0,0 +1,188 @@
+"""Content-addressed result cache for the VargBot classification chain.
+
+Repeat classifications of the same profile (page reloads, officer + owner
+opening the same record, client retries) are the bulk of /classify traffic,
+and every miss costs a Sarvam-30B round trip (5–40 s plus quota). Results are
+cached in two tiers:
+
+  1. In-process LRU with TTL — free, per uvicorn worker.
+  2. Shared Redis (redis_client.get_redis) — survives restarts and is shared
+     across workers / pods. Fails soft: no Redis means local tier only.
+
+The key is a hash of the NORMALISED description (case, Unicode form and
+whitespace folded, so trivially re-spaced text hits), the language, the
+taxonomy version and the engine version. A taxonomy edit or a model upgrade
+therefore changes the key instead of serving stale answers.
+
+Values are stored as JSON so a hit always hands the caller a fresh copy —
+routes mutate prediction dicts, and a shared cached object must never change
+under another request.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_S = int(os.getenv("VARGBOT_CACHE_TTL_S", "86400"))       # 24 h
+CACHE_MAX_ENTRIES = int(os.getenv("VARGBOT_CACHE_MAX_ENTRIES", "2048"))
+CACHE_ENABLED = os.getenv("VARGBOT_CACHE", "true").lower() == "true"
+_REDIS_PREFIX = "vargbot:clf:"
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_description(description: str) -> str:
+    """Fold the variations that never change the answer: Unicode form, case,
+    and runs of whitespace (STT output and form paste differ only in these)."""
+    text = unicodedata.normalize("NFKC", description or "")
+    return _WS_RE.sub(" ", text).strip().lower()
+
+
+def cache_key(description: str, language: str, taxonomy_version: str, engine_version: str) -> str:
+    raw = "\x1f".join((
+        normalize_description(description),
+        (language or "en").strip().lower(),
+        taxonomy_version,
+        engine_version,
+    ))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _LRU:
+    """Bounded, TTL-aware LRU of JSON strings (thread-safe: the sync wrapper
+    and executor threads may touch it too)."""
+
+    def __init__(self, max_entries: int, ttl_s: int):
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._max = max_entries
+        self._ttl = ttl_s
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_local = _LRU(CACHE_MAX_ENTRIES, CACHE_TTL_S)
+_stats = {"hits_local": 0, "hits_redis": 0, "misses": 0, "stores": 0, "redis_errors": 0}
+
+
+def _redis_get(key: str) -> Optional[str]:
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        return r.get(_REDIS_PREFIX + key)
+    except Exception as e:
+        _stats["redis_errors"] += 1
+        logger.warning(f"Classify cache Redis GET failed: {e}")
+        return None
+
+
+def _redis_set(key: str, value: str) -> None:
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        r.set(_REDIS_PREFIX + key, value, ex=CACHE_TTL_S)
+    except Exception as e:
+        _stats["redis_errors"] += 1
+        logger.warning(f"Classify cache Redis SET failed: {e}")
+
+
+def _decode(raw: str) -> Optional[tuple[list, str, dict]]:
+    try:
+        data = json.loads(raw)
+        return data["predictions"], data["engine"], data.get("attributes") or {}
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return None
+
+
+async def get(key: str) -> Optional[tuple[list, str, dict]]:
+    """(predictions, engine, attributes) for a key, or None on a miss."""
+    if not CACHE_ENABLED:
+        return None
+    raw = _local.get(key)
+    if raw is not None:
+        _stats["hits_local"] += 1
+        return _decode(raw)
+
+    # The Redis client is synchronous — keep its socket wait off the loop.
+    raw = await asyncio.to_thread(_redis_get, key)
+    if raw is not None:
+        decoded = _decode(raw)
+        if decoded is not None:
+            _stats["hits_redis"] += 1
+            _local.put(key, raw)
+            return decoded
+
+    _stats["misses"] += 1
+    return None
+
+
+async def put(key: str, predictions: list, engine: str, attributes: dict) -> None:
+    if not CACHE_ENABLED:
+        return
+    raw = json.dumps(
+        {"predictions": [dict(p) for p in predictions], "engine": engine, "attributes": attributes},
+        ensure_ascii=False,
+    )
+    _local.put(key, raw)
+    _stats["stores"] += 1
+    await asyncio.to_thread(_redis_set, key, raw)
+
+
+def stats() -> dict:
+    """Hit/miss counters for this worker (surfaced on /model-health)."""
+    hits = _stats["hits_local"] + _stats["hits_redis"]
+    lookups = hits + _stats["misses"]
+    return {
+        "enabled": CACHE_ENABLED,
+        **_stats,
+        "hit_ratio": round(hits / lookups, 4) if lookups else None,
+        "local_entries": len(_local),
+        "local_evictions": _local.evictions,
+        "max_entries": CACHE_MAX_ENTRIES,
+        "ttl_s": CACHE_TTL_S,
+    }
+
+
+def clear() -> None:
+    """Drop the local tier (Redis entries expire by TTL / key version)."""
+    _local.clear()
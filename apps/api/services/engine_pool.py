@@ -0,0 +1,178 @@
+"""Off-event-loop execution for the CPU-bound VargBot engines.
+
+TF-IDF (sparse vectorise + predict_proba) and MuRIL (a torch forward pass)
+are synchronous. Called straight from an async route they hold the uvicorn
+event loop for their whole run, stalling every other coroutine in the worker,
+unrelated STT/TTS requests included. Each engine now runs on its own small
+thread pool:
+
+  - per-engine concurrency — the pool size (MuRIL defaults to 1, so a burst
+    cannot multiply its memory and thread use)
+  - bounded queue — beyond ENGINE_QUEUE_MAX waiting jobs a call fails fast
+    with EngineSaturated and the chain moves on to its next engine instead
+    of queueing without limit
+  - queue-wait metrics — submit→start delay and run time per engine,
+    surfaced on /model-health
+
+Threads rather than processes: sklearn's sparse kernels and torch both
+release the GIL in native code. A process pool would also need its own copy
+of the ~900 MB MuRIL model in every worker process.
+
+Env:
+  VARGBOT_TFIDF_WORKERS     TF-IDF pool size (default 2)
+  VARGBOT_MURIL_WORKERS     MuRIL pool size (default 1)
+  VARGBOT_ENGINE_QUEUE_MAX  waiting jobs per engine before fast-fail (default 64)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+ENGINE_WORKERS = {
+    "tfidf": int(os.getenv("VARGBOT_TFIDF_WORKERS", "2")),
+    "muril": int(os.getenv("VARGBOT_MURIL_WORKERS", "1")),
+}
+ENGINE_QUEUE_MAX = int(os.getenv("VARGBOT_ENGINE_QUEUE_MAX", "64"))
+_SAMPLES = 512  # recent timings kept per engine for percentiles
+
+
+class EngineSaturated(RuntimeError):
+    """The engine's queue is full — use the next engine in the chain."""
+
+
+class _Engine:
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.lock = threading.Lock()
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.errors = 0
+        self.wait_ms: deque[float] = deque(maxlen=_SAMPLES)
+        self.run_ms: deque[float] = deque(maxlen=_SAMPLES)
+
+    def pool(self) -> ThreadPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=f"vargbot-{self.name}"
+                )
+            return self.executor
+
+
+_engines: dict[str, _Engine] = {}
+
+
+def _engine(name: str) -> _Engine:
+    eng = _engines.get(name)
+    if eng is None:
+        eng = _engines.setdefault(name, _Engine(name, ENGINE_WORKERS.get(name, 1)))
+    return eng
+
+
+async def run(name: str, fn: Callable[..., T], *args) -> T:
+    """Run fn(*args) on the named engine's pool and await the result.
+
+    Raises EngineSaturated without queueing when ENGINE_QUEUE_MAX jobs are
+    already waiting for that engine.
+    """
+    eng = _engine(name)
+    with eng.lock:
+        if eng.waiting >= ENGINE_QUEUE_MAX:
+            eng.rejected += 1
+            raise EngineSaturated(f"{name} queue full ({eng.waiting} waiting)")
+        eng.waiting += 1
+    submitted = time.perf_counter()
+    # Whichever happens first under the lock leaves the queue: the job
+    # starting, or the caller being cancelled while the job is still queued
+    # (asyncio then cancels the pool future, and _job never runs).
+    state = {"dequeued": False}
+
+    def _job():
+        started = time.perf_counter()
+        with eng.lock:
+            if state["dequeued"]:  # caller already gone — skip the work
+                return None
+            state["dequeued"] = True
+            eng.waiting -= 1
+            eng.running += 1
+        eng.wait_ms.append((started - submitted) * 1000)
+        try:
+            return fn(*args)
+        finally:
+            with eng.lock:
+                eng.running -= 1
+            eng.run_ms.append((time.perf_counter() - started) * 1000)
+
+    loop = asyncio.get_running_loop()
+    try:
+        fut = loop.run_in_executor(eng.pool(), _job)
+    except RuntimeError:
+        # Executor already shut down (app teardown) — the job never queued.
+        with eng.lock:
+            eng.waiting -= 1
+        raise
+    try:
+        result = await fut
+    except asyncio.CancelledError:
+        with eng.lock:
+            if not state["dequeued"]:
+                state["dequeued"] = True
+                eng.waiting -= 1
+        raise
+    except Exception:
+        eng.errors += 1
+        raise
+    eng.completed += 1
+    return result
+
+
+def shutdown() -> None:
+    """Stop every engine pool (main.lifespan shutdown)."""
+    for eng in _engines.values():
+        with eng.lock:
+            executor, eng.executor = eng.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _percentile(samples: deque, q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+def stats() -> dict:
+    """Per-engine queue depth and timing for this worker (surfaced on /model-health)."""
+    return {
+        "queue_max": ENGINE_QUEUE_MAX,
+        "engines": {
+            name: {
+                "workers": eng.workers,
+                "waiting": eng.waiting,
+                "running": eng.running,
+                "completed": eng.completed,
+                "rejected": eng.rejected,
+                "errors": eng.errors,
+                "queue_wait_ms_p50": _percentile(eng.wait_ms, 0.50),
+                "queue_wait_ms_p95": _percentile(eng.wait_ms, 0.95),
+                "queue_wait_ms_max": round(max(eng.wait_ms), 3) if eng.wait_ms else None,
+                "run_ms_p50": _percentile(eng.run_ms, 0.50),
+                "run_ms_p95": _percentile(eng.run_ms, 0.95),
+            }
+            for name, eng in sorted(_engines.items())
+        },
+    }
@@ -1,9 +1,24 @@
-"""Geographic centroids for cluster visualisation (state-level bubbles).
+"""Geographic centroids for cluster visualisation (state-level bubbles),
+and SNP coverage parsing for serviceability lookups.
 
 Approximate centroids are sufficient at national zoom; district detail is
 served as a ranked list rather than pinpoints.
+
+SNP geo_coverage is free text from the registry ("Pan India", "Delhi NCR",
+"Bangalore|Mysore", "GUJARAT|HARYANA|UP"). coverage_tokens() parses it into
+canonical tokens — one per declared state, district/city or pan-India — so
+"does this SNP serve Goa" compares tokens instead of substrings (a substring
+test finds the state Goa inside the Assam district Goalpara, and the
+district Dhar inside Dharwad). CoverageIndex inverts the tokens of a whole
+registry into token -> SNP positions, built once per registry snapshot
+(services/snp_registry.py, services/matcher.py).
 """
 
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Optional, Sequence
+
 STATE_CENTROIDS: dict[str, tuple[float, float]] = {
     "Andhra Pradesh": (15.91, 79.74),
     "Arunachal Pradesh": (28.21, 94.72),
@@ -55,3 +70,154 @@ def state_centroid(state: str | None) -> tuple[float, float] | None:
         if name.lower() in s.lower() or s.lower() in name.lower():
             return coords
     return None
+
+
+# ── Coverage tokens ───────────────────────────────────────────────────
+
+PAN_INDIA = "pan"
+# Whole-value phrases only: "All districts of Kerala" or "National Capital
+# Region" mention "all"/"national" without declaring nationwide coverage.
+_PAN_INDIA_RE = re.compile(r"(?:pan[\s-]?india|all[\s-]?india|all over india|india|nationwide|all states)")
+_SPLIT_RE = re.compile(r"[,|;/\n]+")
+
+
+def _norm(text: str) -> str:
+    """Lower-case, '&' spelled out, dots dropped, whitespace collapsed."""
+    return " ".join(text.lower().replace("&", " and ").replace(".", " ").split())
+
+
+_STATE_ALIASES: dict[str, str] = {_norm(name): _norm(name) for name in STATE_CENTROIDS}
+_STATE_ALIASES.update({
+    "andaman and nicobar islands": "andaman and nicobar",
+    "the dadra and nagar haveli and daman and diu": "dadra and nagar haveli",
+    "dadra and nagar haveli and daman and diu": "dadra and nagar haveli",
+    "daman and diu": "dadra and nagar haveli",
+    "nct of delhi": "delhi",
+    "delhi ncr": "delhi",
+    "ncr": "delhi",
+    "orissa": "odisha",
+    "pondicherry": "puducherry",
+    "uttaranchal": "uttarakhand",
+    "j and k": "jammu and kashmir",
+    "up": "uttar pradesh",
+    "mp": "madhya pradesh",
+    "ap": "andhra pradesh",
+    "tn": "tamil nadu",
+    "wb": "west bengal",
+    "hp": "himachal pradesh",
+})
+# States/UTs whose name is also the district an MSE reports
+_CITY_STATES = {"delhi", "chandigarh", "puducherry"}
+
+# Spelling variants and old names seen in the registry and in MSE profiles
+_DISTRICT_ALIASES: dict[str, str] = {
+    "bangalore": "bengaluru", "banglore": "bengaluru", "bengaluru urban": "bengaluru",
+    "gurgaon": "gurugram",
+    "mysore": "mysuru",
+    "trivandrum": "thiruvananthapuram", "trivandram": "thiruvananthapuram",
+    "vishakhapatnam": "visakhapatnam", "vishakapatnam": "visakhapatnam", "vizag": "visakhapatnam",
+    "vijaywada": "vijayawada",
+    "calicut": "kozhikode",
+    "cochin": "ernakulam", "kochi": "ernakulam",
+    "bombay": "mumbai", "calcutta": "kolkata", "madras": "chennai",
+    "allahabad": "prayagraj",
+    "noida": "gautam buddha nagar",
+    "k v rangareddy": "rangareddy", "ranga reddy": "rangareddy",
+    "ahmed nagar": "ahmednagar",
+    "belgaum": "belagavi",
+    "mangalore": "mangaluru",
+}
+# Districts that declare their state as well
+_DISTRICT_STATES = {"new delhi": "delhi"}
+
+
+def state_token(state: Optional[str]) -> Optional[str]:
+    part = _norm(state or "")
+    return f"state:{_STATE_ALIASES.get(part, part)}" if part else None
+
+
+def district_token(district: Optional[str]) -> Optional[str]:
+    part = _norm(district or "")
+    return f"district:{_DISTRICT_ALIASES.get(part, part)}" if part else None
+
+
+def _classify(part: str, tokens: set[str]) -> None:
+    if _PAN_INDIA_RE.fullmatch(part):
+        tokens.add(PAN_INDIA)
+        return
+    state = _STATE_ALIASES.get(part)
+    if state is not None:
+        tokens.add(f"state:{state}")
+        if state in _CITY_STATES:
+            tokens.add(f"district:{state}")
+        return
+    if " and " in part:  # "Bengaluru & Mysore"
+        for sub in part.split(" and "):
+            if sub.strip():
+                _classify(sub.strip(), tokens)
+        return
+    district = _DISTRICT_ALIASES.get(part, part)
+    tokens.add(f"district:{district}")
+    if district in _DISTRICT_STATES:
+        tokens.add(f"state:{_DISTRICT_STATES[district]}")
+
+
+@lru_cache(maxsize=4096)
+def coverage_tokens(coverage: Optional[str]) -> frozenset[str]:
+    """Canonical tokens of a free-text coverage declaration: "state:<name>",
+    "district:<name>" and PAN_INDIA. Empty for undisclosed coverage."""
+    tokens: set[str] = set()
+    for raw in _SPLIT_RE.split(coverage or ""):
+        part = _norm(raw)
+        if part:
+            _classify(part, tokens)
+    return frozenset(tokens)
+
+
+def serves_state(coverage: Optional[str], state: Optional[str]) -> bool:
+    """Declared coverage includes the state, or all of India."""
+    tokens = coverage_tokens(coverage)
+    return PAN_INDIA in tokens or state_token(state) in tokens
+
+
+_NOBODY: frozenset[int] = frozenset()
+
+
+class CoverageIndex:
+    """Coverage token -> positions of the SNPs that declare it, for a
+    registry in a fixed order, so "which SNPs serve district X" is a set
+    lookup instead of a scan."""
+
+    __slots__ = ("_postings", "undisclosed", "size")
+
+    def __init__(self, coverages: Sequence[Optional[str]]):
+        postings: dict[str, set[int]] = defaultdict(set)
+        undisclosed = set()
+        for pos, coverage in enumerate(coverages):
+            if not coverage or not coverage.strip():
+                undisclosed.add(pos)
+                continue
+            for token in coverage_tokens(coverage):
+                postings[token].add(pos)
+        self._postings = {token: frozenset(p) for token, p in postings.items()}
+        self.undisclosed = frozenset(undisclosed)
+        self.size = len(coverages)
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    @property
+    def pan_india(self) -> frozenset[int]:
+        return self._postings.get(PAN_INDIA, _NOBODY)
+
+    def district(self, district: Optional[str]) -> frozenset[int]:
+        """SNPs that name the district (or city) itself."""
+        return self._postings.get(district_token(district), _NOBODY)
+
+    def state(self, state: Optional[str]) -> frozenset[int]:
+        """SNPs that name the state itself."""
+        return self._postings.get(state_token(state), _NOBODY)
+
+    def serving_state(self, state: Optional[str]) -> frozenset[int]:
+        """SNPs whose declared coverage includes the state (named, or pan-India)."""
+        return self.state(state) | self.pan_india
@@ -0,0 +1,181 @@
+"""Shared, lifespan-managed HTTP client for outbound AI services.
+
+Every Sarvam call (classifier, NER, STT, TTS) and the OCR/STT fallback
+engines used to open a fresh httpx.AsyncClient, so each request paid DNS +
+TCP + TLS setup to the upstream. A voice turn is STT + NER + TTS back to
+back, and that handshake overhead was a visible slice of turn latency.
+
+One pooled client now lives for the life of the worker (started and closed
+in main.lifespan). Connections are kept alive and reused across services.
+Per-service read timeouts are preserved (the LLM needs far longer than TTS),
+and reuse is measured from httpx's trace hook: a request that had to open a
+TCP connection counts as a new connection, anything else was reused. Every
+request passes through services/resilience.py (circuit breaker, adaptive
+concurrency, retries) on its way out.
+
+Env:
+  HTTP_POOL_MAX_CONNECTIONS   total sockets per worker (default 50)
+  HTTP_POOL_MAX_KEEPALIVE     idle sockets kept warm (default 20)
+  HTTP_POOL_KEEPALIVE_S       idle expiry in seconds (default 60)
+  HTTP_POOL_HTTP2             "true" to negotiate HTTP/2 (needs the h2 package)
+  HTTP_TIMEOUT_<SERVICE>      read timeout override, e.g. HTTP_TIMEOUT_CLASSIFY=30
+"""
+
+import asyncio
+import logging
+import os
+from typing import Optional
+
+import httpx
+
+from services import resilience
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "50"))
+MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY_S = float(os.getenv("HTTP_POOL_KEEPALIVE_S", "60"))
+CONNECT_TIMEOUT_S = 5.0
+HTTP2 = os.getenv("HTTP_POOL_HTTP2", "false").lower() == "true"
+
+# Read timeouts per calling service — the values each integration used
+# before pooling, so behaviour under a slow upstream is unchanged.
+_DEFAULT_TIMEOUTS = {
+    "classify": 40.0,
+    "ner": 30.0,
+    "stt": 30.0,
+    "stt_fallback": 45.0,
+    "tts": 30.0,
+    "ocr": 30.0,
+    "ocr_fallback": 90.0,
+}
+SERVICE_TIMEOUTS: dict[str, float] = {
+    svc: float(os.getenv(f"HTTP_TIMEOUT_{svc.upper()}", str(default)))
+    for svc, default in _DEFAULT_TIMEOUTS.items()
+}
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_http2_active = False
+_stats: dict[str, dict[str, int]] = {}
+
+
+def _service_stats(service: str) -> dict[str, int]:
+    return _stats.setdefault(service, {"requests": 0, "new_connections": 0, "errors": 0})
+
+
+def _build_client() -> httpx.AsyncClient:
+    global _http2_active
+    _http2_active = False
+    if HTTP2:
+        try:
+            import h2  # noqa: F401  (httpx only needs it importable)
+            _http2_active = True
+        except ImportError:
+            logger.warning("HTTP_POOL_HTTP2=true but the h2 package is missing — using HTTP/1.1")
+    return httpx.AsyncClient(
+        http2=_http2_active,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY_S,
+        ),
+        timeout=httpx.Timeout(30.0, connect=CONNECT_TIMEOUT_S),
+    )
+
+
+async def start() -> None:
+    """Create the pooled client (main.lifespan startup)."""
+    global _client, _client_loop
+    if _client is None:
+        _client = _build_client()
+        _client_loop = asyncio.get_running_loop()
+        logger.info(
+            f"HTTP pool ready (max={MAX_CONNECTIONS}, keepalive={MAX_KEEPALIVE}, "
+            f"http2={_http2_active})"
+        )
+
+
+async def aclose() -> None:
+    """Close pooled sockets (main.lifespan shutdown)."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """The pooled client, created lazily for callers outside the app lifespan
+    (scripts, evaluation harnesses). Connections are bound to the event loop
+    that opened them, so a different loop gets its own client."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = _build_client()
+        _client_loop = loop
+    return _client
+
+
+async def request(service: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """Send one request through the shared pool, tagged with its service.
+
+    Goes through the service's circuit breaker, concurrency limit and retry
+    policy (services/resilience.py); raises resilience.UpstreamUnavailable
+    without touching the network while the upstream is known to be down.
+    """
+    stats = _service_stats(service)
+
+    async def _trace(event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            stats["new_connections"] += 1
+
+    read = kwargs.pop("timeout", None) or SERVICE_TIMEOUTS.get(service, 30.0)
+    extensions = dict(kwargs.pop("extensions", None) or {})
+    extensions["trace"] = _trace
+
+    async def _send() -> httpx.Response:
+        stats["requests"] += 1
+        try:
+            return await _get_client().request(
+                method, url,
+                timeout=httpx.Timeout(read, connect=CONNECT_TIMEOUT_S),
+                extensions=extensions,
+                **kwargs,
+            )
+        except Exception:
+            stats["errors"] += 1
+            raise
+
+    return await resilience.call(service, _send)
+
+
+async def post(service: str, url: str, **kwargs) -> httpx.Response:
+    return await request(service, "POST", url, **kwargs)
+
+
+async def get(service: str, url: str, **kwargs) -> httpx.Response:
+    return await request(service, "GET", url, **kwargs)
+
+
+def stats() -> dict:
+    """Connection-reuse counters for this worker (surfaced on /model-health)."""
+    services = {}
+    total_req = total_new = 0
+    for svc, s in sorted(_stats.items()):
+        total_req += s["requests"]
+        total_new += s["new_connections"]
+        services[svc] = {
+            **s,
+            "reuse_ratio": round(1 - s["new_connections"] / s["requests"], 4) if s["requests"] else None,
+        }
+    return {
+        "started": _client is not None,
+        "http2": _http2_active,
+        "max_connections": MAX_CONNECTIONS,
+        "max_keepalive": MAX_KEEPALIVE,
+        "requests": total_req,
+        "new_connections": total_new,
+        "reuse_ratio": round(1 - total_new / total_req, 4) if total_req else None,
+        "services": services,
+    }
@@ -0,0 +1,334 @@
+"""Local leaf-category resolver for descriptions whose domain is already known.
+
+When the TF-IDF model is confident about the domain, the chain used to call
+Sarvam only to pick the leaf category inside it — an LLM round trip for
+what is mostly a retrieval problem. LeafResolver answers it locally from two
+sources of evidence, per domain:
+
+  1. Leaf names (OndcCategory) — a name like "Sarees & Traditional Wear"
+     lists alternatives, so each "&"/","-separated part is scored on its own:
+     the weighted share of its words found in the description (idf over the
+     domain's leaf names, so a word shared by many leaves counts for less).
+  2. Officer gold labels — descriptions an NSIC officer verified with a leaf
+     (classification_results.officer_category, the "gold" rows of
+     /model-health/feedback-export). The description is compared with each
+     gold exemplar of the domain (cosine over idf-weighted word sets) and
+     the nearest GOLD_NEIGHBOURS vote: a leaf scores its best similarity
+     times its share of the neighbours' similarity.
+
+A leaf's raw score is the larger of the two; the top leaf's raw score is
+then discounted by half the runner-up's, so near-ties defer to the LLM.
+
+Calibration: with at least MIN_GOLD_FOR_CALIBRATION gold rows, every gold
+row is resolved leave-one-out and an isotonic fit (pool-adjacent-violators)
+maps raw score to observed precision. The accept threshold is the lowest raw
+score whose calibrated precision reaches TARGET_PRECISION. With fewer gold
+rows there is no calibrated score to gate on, so every leaf defers to the
+LLM. The resolver is rebuilt as gold labels accumulate, so local resolution
+switches on — and its threshold tightens or relaxes — with evidence instead
+of a constant.
+
+Env:
+  VARGBOT_LEAF_TARGET_PRECISION   precision the calibrated threshold targets (default 0.9)
+"""
+
+import bisect
+import math
+import os
+import re
+from collections import defaultdict
+from typing import Iterable, Mapping, NamedTuple, Optional
+
+from services.category_index import normalize
+
+ENGINE_SUFFIX = "+leaf-index"
+TARGET_PRECISION = float(os.getenv("VARGBOT_LEAF_TARGET_PRECISION", "0.9"))
+MIN_GOLD_FOR_CALIBRATION = 30
+GOLD_NEIGHBOURS = 5
+MIN_ACCEPTED_FOR_THRESHOLD = 10  # gold rows the threshold must be supported by
+
+_STOPWORDS = frozenset({
+    "and", "of", "the", "for", "with", "other", "others", "misc", "we", "our", "in",
+    "a", "an", "to", "sell", "selling", "make", "making", "shop", "store", "products",
+    "items", "business", "hum", "hai", "hain", "aur", "ka", "ki", "ke",
+})
+
+_NAME_PARTS = re.compile(r"\s*(?:&|,|/|\band\b)\s*", re.I)
+
+
+class GoldLabel(NamedTuple):
+    text: str
+    domain: str
+    code: str
+
+
+class LeafMatch(NamedTuple):
+    code: str
+    name: str
+    domain: str
+    score: float      # calibrated precision estimate (raw score until calibrated)
+    raw: float
+    source: str       # "name" | "gold"
+
+
+def _stem(token: str) -> str:
+    if len(token) > 4 and token.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def terms(text: str) -> set[str]:
+    return {_stem(t) for t in normalize(text).split() if t not in _STOPWORDS}
+
+
+class _Domain:
+    __slots__ = ("codes", "names", "parts", "part_leaf", "name_idf", "by_term",
+                 "gold_vecs", "gold_codes", "gold_by_term", "idf")
+
+    def __init__(self) -> None:
+        self.codes: list[str] = []
+        self.names: list[str] = []
+        self.parts: list[dict[str, float]] = []   # name part -> term weights
+        self.part_leaf: list[int] = []            # name part -> leaf index
+        self.name_idf: dict[str, float] = {}
+        self.by_term: dict[str, list[int]] = defaultdict(list)
+        self.gold_vecs: list[dict[str, float]] = []
+        self.gold_codes: list[str] = []
+        self.gold_by_term: dict[str, list[int]] = defaultdict(list)
+        self.idf: dict[str, float] = {}
+
+
+def _isotonic(xs: list[float], ys: list[float]) -> tuple[list[float], list[float]]:
+    """Pool-adjacent-violators: non-decreasing fit of ys over xs.
+    Returns the lower x bound of each fitted block and its fitted value."""
+    blocks: list[list[float]] = []  # [sum_y, count, min_x]
+    for x, y in sorted(zip(xs, ys)):
+        blocks.append([y, 1, x])
+        while len(blocks) > 1 and blocks[-2][0] / blocks[-2][1] > blocks[-1][0] / blocks[-1][1]:
+            s, n, _ = blocks.pop()
+            blocks[-1][0] += s
+            blocks[-1][1] += n
+    return [b[2] for b in blocks], [b[0] / b[1] for b in blocks]
+
+
+class LeafResolver:
+    """Immutable once built; safe to share across requests and threads."""
+
+    def __init__(
+        self,
+        leaves: Mapping[str, Iterable[tuple[str, str]]],
+        gold: Iterable[GoldLabel] = (),
+        target_precision: float = TARGET_PRECISION,
+    ):
+        self._domains: dict[str, _Domain] = {}
+        self._leaf_names: dict[str, str] = {}
+        self._leaf_domain: dict[str, str] = {}
+        for domain, pairs in leaves.items():
+            dom = self._domains.setdefault(domain, _Domain())
+            for code, name in pairs:
+                dom.codes.append(code)
+                dom.names.append(name.strip())
+                self._leaf_names[code] = name.strip()
+                self._leaf_domain[code] = domain
+
+        gold = [g for g in gold if self._leaf_domain.get(g.code) == g.domain and g.text.strip()]
+        gold_terms = [terms(g.text) for g in gold]
+
+        for domain, dom in self._domains.items():
+            name_sets = [terms(n) for n in dom.names]
+            df: dict[str, int] = defaultdict(int)
+            for ts in name_sets:
+                for t in ts:
+                    df[t] += 1
+            n = max(1, len(name_sets))
+            dom.name_idf = {t: math.log(1 + n / c) for t, c in df.items()}
+            for i, name in enumerate(dom.names):
+                for part in _NAME_PARTS.split(name):
+                    ts = terms(part)
+                    if not ts:
+                        continue
+                    k = len(dom.parts)
+                    dom.parts.append({t: dom.name_idf[t] for t in ts})
+                    dom.part_leaf.append(i)
+                    for t in ts:
+                        dom.by_term[t].append(k)
+            dom.by_term = dict(dom.by_term)
+
+            # Gold exemplars share one idf over the domain's leaf names + gold texts
+            mine = [ts for g, ts in zip(gold, gold_terms) if g.domain == domain]
+            codes = [g.code for g in gold if g.domain == domain]
+            docs = name_sets + mine
+            gdf: dict[str, int] = defaultdict(int)
+            for ts in docs:
+                for t in ts:
+                    gdf[t] += 1
+            dom.idf = {t: math.log(1 + len(docs) / c) for t, c in gdf.items()}
+            for ts, code in zip(mine, codes):
+                vec = self._vector(dom, ts)
+                if not vec:
+                    continue
+                j = len(dom.gold_vecs)
+                dom.gold_vecs.append(vec)
+                dom.gold_codes.append(code)
+                for t in vec:
+                    dom.gold_by_term[t].append(j)
+            dom.gold_by_term = dict(dom.gold_by_term)
+
+        self.n_gold = sum(len(d.gold_vecs) for d in self._domains.values())
+        self.target_precision = target_precision
+        self.calibrated = False
+        self.threshold = 1.01  # until calibrated: always defer to the LLM
+        self._cal_x: list[float] = []
+        self._cal_y: list[float] = []
+        self.loo_accuracy: Optional[float] = None
+        if self.n_gold >= MIN_GOLD_FOR_CALIBRATION:
+            self._calibrate(gold, gold_terms)
+
+    @staticmethod
+    def _vector(dom: _Domain, ts: set[str]) -> dict[str, float]:
+        vec = {t: dom.idf.get(t, 0.0) for t in ts}
+        vec = {t: w for t, w in vec.items() if w > 0}
+        norm = math.sqrt(sum(w * w for w in vec.values()))
+        return {t: w / norm for t, w in vec.items()} if norm else {}
+
+    def __len__(self) -> int:
+        return len(self._leaf_names)
+
+    # ── scoring ──
+
+    def _scores(self, ts: set[str], domain: str, exclude_gold: int = -1) -> dict[str, tuple[float, str]]:
+        dom = self._domains.get(domain)
+        if dom is None or not ts:
+            return {}
+        out: dict[str, tuple[float, str]] = {}
+
+        hits: dict[int, float] = defaultdict(float)
+        for t in ts:
+            for k in dom.by_term.get(t, ()):
+                hits[k] += dom.parts[k][t]
+        for k, got in hits.items():
+            code = dom.codes[dom.part_leaf[k]]
+            score = got / sum(dom.parts[k].values())
+            if score > out.get(code, (0.0, ""))[0]:
+                out[code] = (score, "name")
+
+        if dom.gold_vecs:
+            q = self._vector(dom, ts)
+            sims: dict[int, float] = defaultdict(float)
+            for t, w in q.items():
+                for j in dom.gold_by_term.get(t, ()):
+                    sims[j] += w * dom.gold_vecs[j][t]
+            sims.pop(exclude_gold, None)
+            # Weighted vote of the nearest exemplars: a leaf scores its best
+            # similarity times its share of the neighbours' similarity mass,
+            # so one look-alike outvoted by its neighbours does not win.
+            nearest = sorted(sims.items(), key=lambda kv: -kv[1])[:GOLD_NEIGHBOURS]
+            mass = sum(sim for _, sim in nearest)
+            votes: dict[str, list[float]] = defaultdict(list)
+            for j, sim in nearest:
+                votes[dom.gold_codes[j]].append(sim)
+            for code, got in votes.items():
+                score = max(got) * sum(got) / mass if mass else 0.0
+                if score > out.get(code, (0.0, ""))[0]:
+                    out[code] = (score, "gold")
+        return out
+
+    def _best(self, ts: set[str], domain: str, exclude_gold: int = -1) -> Optional[tuple[str, float, str]]:
+        scores = self._scores(ts, domain, exclude_gold)
+        if not scores:
+            return None
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1][0], kv[0]))
+        code, (s1, source) = ranked[0]
+        s2 = ranked[1][1][0] if len(ranked) > 1 else 0.0
+        return code, round(max(0.0, s1 - s2 / 2), 4), source
+
+    def calibrated_score(self, raw: float) -> float:
+        if not self.calibrated:
+            return raw
+        i = max(0, bisect.bisect_right(self._cal_x, raw) - 1)
+        return round(self._cal_y[i], 4)
+
+    def _calibrate(self, gold: list[GoldLabel], gold_terms: list[set[str]]) -> None:
+        offsets: dict[str, int] = defaultdict(int)
+        raws, correct = [], []
+        for g, ts in zip(gold, gold_terms):
+            dom = self._domains[g.domain]
+            j = offsets[g.domain]
+            # gold_vecs skips empty vectors; keep the index aligned with them
+            if self._vector(dom, ts):
+                offsets[g.domain] += 1
+            else:
+                j = -1
+            best = self._best(ts, g.domain, exclude_gold=j)
+            raws.append(best[1] if best else 0.0)
+            correct.append(1.0 if best and best[0] == g.code else 0.0)
+
+        self._cal_x, self._cal_y = _isotonic(raws, correct)
+        self.calibrated = True
+        self.loo_accuracy = round(sum(correct) / len(correct), 4)
+        # Lowest block start whose calibrated precision meets the target and
+        # that at least MIN_ACCEPTED_FOR_THRESHOLD gold rows clear.
+        ordered = sorted(raws)
+        self.threshold = 1.01  # nothing reaches the target: always defer to the LLM
+        for x, y in zip(self._cal_x, self._cal_y):
+            supported = len(ordered) - bisect.bisect_left(ordered, x)
+            if y >= self.target_precision and supported >= MIN_ACCEPTED_FOR_THRESHOLD:
+                self.threshold = x
+                break
+
+    # ── public ──
+
+    def rank(self, text: str, domain: str, limit: int = 3) -> list[tuple[str, float, str]]:
+        """(code, raw score, source) for the best leaves of `domain`, best first."""
+        scores = self._scores(terms(text), domain)
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1][0], kv[0]))
+        return [(code, round(s, 4), src) for code, (s, src) in ranked[:limit]]
+
+    def match(self, text: str, domain: str) -> Optional[LeafMatch]:
+        """The best leaf of `domain` and its scores, whatever the threshold."""
+        best = self._best(terms(text), domain)
+        if best is None:
+            return None
+        code, raw, source = best
+        return LeafMatch(code, self._leaf_names[code], domain,
+                         self.calibrated_score(raw), raw, source)
+
+    def resolve(self, text: str, domain: str) -> Optional[LeafMatch]:
+        """The leaf to use without asking the LLM, or None to defer to it
+        (always None until calibrated)."""
+        leaf = self.match(text, domain)
+        if leaf is None or leaf.raw < self.threshold:
+            return None
+        return leaf
+
+    def stats(self) -> dict:
+        return {
+            "leaves": len(self._leaf_names),
+            "gold_labels": self.n_gold,
+            "calibrated": self.calibrated,
+            "threshold": None if self.threshold > 1 else round(self.threshold, 4),
+            "target_precision": self.target_precision,
+            "loo_accuracy": self.loo_accuracy,
+        }
+
+
+def load_gold(db) -> list[GoldLabel]:
+    """Officer-verified leaf labels (the gold rows of the feedback export)."""
+    from database import MSE, ClassificationResult
+
+    rows = (
+        db.query(MSE.description, MSE.products,
+                 ClassificationResult.officer_domain, ClassificationResult.officer_category)
+        .join(ClassificationResult, ClassificationResult.mse_id == MSE.id)
+        .filter(ClassificationResult.officer_verdict.isnot(None),
+                ClassificationResult.officer_category.isnot(None))
+        .all()
+    )
+    out = []
+    for r in rows:
+        products = r.products.replace("|", ", ") if isinstance(r.products, str) else ""
+        text = f"{r.description or ''} Products: {products}" if products else (r.description or "")
+        out.append(GoldLabel(text, r.officer_domain, r.officer_category))
+    return out
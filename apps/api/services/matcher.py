@@ -15,15 +15,29 @@ Where:
 v2 fixes real-registry data handling: "RET-MULTI" multi-category SNPs,
 empty domain lists (101 of 281 registry entries), and "Pan India" coverage
 spelling. Capacity/onboarding-days come from apps/api/data/snp_capacity.json
-(capacity is synthetic-disclosed pending TEAM-portal integration).
+(capacity is synthetic-disclosed pending TEAM-portal integration), re-read
+when the file changes.
 Weights are server-side only — never expose them in API responses or UI.
+
+Scoring is vectorised: the per-SNP inputs of every factor are compiled once
+into a SnpFeatures matrix (domain and language token bitmasks, the
+multi-category / undisclosed flags, precomputed commission and history
+scores, support level, and an inverted geo-coverage index), and a
+request scores all SNPs in a handful of NumPy operations. The scalar
+factor functions below remain the definition: the matrix reproduces them
+exactly (tests/test_services/test_matcher.py, ml/evaluation/bench_matcher.py).
 """
 
 import json
 import re
+import threading
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
+from services.geo import PAN_INDIA, CoverageIndex, coverage_tokens, district_token, state_token
+
 
 # ── Weight constants ──────────────────────────────────────────────────
 
@@ -40,44 +54,255 @@ RATING_PRIOR = 4.0
 RATING_OBS_WEIGHT = 0.75  # weight of the SNP's own rating vs the prior
 
 _CAPACITY_PATH = Path(__file__).resolve().parent.parent / "data" / "snp_capacity.json"
-_capacity_cache: dict | None = None
+_capacity_cache: tuple[tuple, dict] | None = None
 
 
-def _capacity_data() -> dict:
-    """subscriber_id -> [capacity_score 0-1, avg_onboarding_days]."""
+def capacity_file() -> tuple[tuple, dict]:
+    """(stamp, subscriber_id -> [capacity_score 0-1, avg_onboarding_days]).
+
+    The stamp is the file's (mtime, size); the mapping is re-read when it
+    moves, so an updated capacity file is picked up without a restart.
+    """
     global _capacity_cache
-    if _capacity_cache is None:
-        try:
-            _capacity_cache = json.loads(_CAPACITY_PATH.read_text(encoding="utf-8"))
-        except Exception:
-            _capacity_cache = {}
+    try:
+        st = _CAPACITY_PATH.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = ()
+    cached = _capacity_cache
+    if cached is not None and cached[0] == stamp:
+        return cached
+    try:
+        data = json.loads(_CAPACITY_PATH.read_text(encoding="utf-8")) if stamp else {}
+    except Exception:
+        data = {}
+    _capacity_cache = (stamp, data)
     return _capacity_cache
 
 
-def compute_match_scores(mse: Any, snps: list[Any], predicted_domain: str | None) -> list[dict]:
-    """Score every SNP against the given MSE and return factor breakdowns."""
+def _capacity_data() -> dict:
+    """subscriber_id -> [capacity_score 0-1, avg_onboarding_days]."""
+    return capacity_file()[1]
+
+
+_SUPPORT = {"full": 1.0, "partial": 0.5, "none": 0.1}
+
+
+class SnpFeatures:
+    """The SNP registry compiled for vectorised scoring (one row per SNP,
+    in input order)."""
+
+    __slots__ = ("snps", "domain_vocab", "domain_bits", "domain_empty", "multi",
+                 "commission", "history", "support", "lang_vocab", "lang_bits",
+                 "has_langs", "coverage", "geo_base")
+
+    def __init__(self, snps: list[Any], capacity: dict | None = None):
+        n = len(snps)
+        self.snps = list(snps)
+        domain_sets, lang_sets = [], []
+        for snp in self.snps:
+            raw = snp.domain_codes
+            domain_sets.append(
+                {d.strip().lower() for d in re.split(r"[,|]", raw) if d.strip()}
+                if raw and raw.strip() else set()
+            )
+            langs = snp.languages_supported
+            lang_sets.append({l.strip().lower() for l in re.split(r"[,|]", langs)} if langs else set())
+
+        self.domain_vocab = {t: i for i, t in enumerate(sorted(set().union(*domain_sets)))}
+        self.domain_bits = np.zeros((n, max(1, len(self.domain_vocab))), dtype=bool)
+        for row, tokens in enumerate(domain_sets):
+            self.domain_bits[row, [self.domain_vocab[t] for t in tokens]] = True
+        self.domain_empty = np.array([not (s.domain_codes and s.domain_codes.strip()) for s in self.snps],
+                                     dtype=bool)
+        self.multi = np.array([bool(t & _MULTI_TOKENS) for t in domain_sets], dtype=bool)
+
+        self.commission = np.array([_commission_score(s.commission_pct) for s in self.snps], dtype=float)
+        self.history = np.array([_history_score(s, capacity) for s in self.snps], dtype=float)
+        self.support = np.array([_SUPPORT.get(s.onboarding_support or "none", 0.1) for s in self.snps],
+                                dtype=float)
+
+        self.lang_vocab = {t: i for i, t in enumerate(sorted(set().union(*lang_sets)))}
+        self.lang_bits = np.zeros((n, max(1, len(self.lang_vocab))), dtype=bool)
+        for row, tokens in enumerate(lang_sets):
+            self.lang_bits[row, [self.lang_vocab[t] for t in tokens]] = True
+        self.has_langs = np.array([bool(s.languages_supported) for s in self.snps], dtype=bool)
+
+        # Coverage parsed once into canonical tokens -> SNP rows; a request
+        # only raises the rows that name its state or district.
+        self.coverage = CoverageIndex([s.geo_coverage for s in self.snps])
+        self.geo_base = np.full(n, 0.2)
+        self.geo_base[_rows(self.coverage.pan_india)] = 0.4
+        self.geo_base[_rows(self.coverage.undisclosed)] = 0.3
+
+    def __len__(self) -> int:
+        return len(self.snps)
+
+    def rebind(self, snps: list[Any]) -> "SnpFeatures":
+        """The same compiled arrays over equal rows loaded as new objects
+        (every request re-reads the registry), so results carry the caller's rows."""
+        twin = object.__new__(SnpFeatures)
+        for name in self.__slots__:
+            setattr(twin, name, getattr(self, name))
+        twin.snps = list(snps)
+        return twin
+
+    def domain(self, predicted_domain: str | None) -> np.ndarray:
+        n = len(self.snps)
+        if not predicted_domain:
+            return np.zeros(n)
+        col = self.domain_vocab.get(predicted_domain.lower())
+        exact = self.domain_bits[:, col] if col is not None else np.zeros(n, dtype=bool)
+        return np.where(self.domain_empty, 0.3, np.where(exact, 1.0, np.where(self.multi, 0.85, 0.15)))
+
+    def geo(self, state: str | None, district: str | None) -> np.ndarray:
+        g = self.geo_base.copy()
+        if state:
+            g[_rows(self.coverage.state(state))] = 0.6
+        if district:
+            g[_rows(self.coverage.district(district))] = 1.0
+        return g
+
+    def sentiment(self, mse_lang: str | None) -> np.ndarray:
+        if mse_lang:
+            col = self.lang_vocab.get(mse_lang.lower())
+            spoken = self.lang_bits[:, col] if col is not None else np.zeros(len(self.snps), dtype=bool)
+            lang_match = np.where(self.has_langs, np.where(spoken, 1.0, 0.3), 0.5)
+        else:
+            lang_match = np.full(len(self.snps), 0.5)
+        return 0.6 * self.support + 0.4 * lang_match
+
+
+def _rows(positions: frozenset[int]) -> np.ndarray:
+    return np.fromiter(positions, dtype=np.intp, count=len(positions))
+
+
+def _registry_key(snps: list[Any]) -> tuple:
+    return tuple(
+        (getattr(s, "id", None), getattr(s, "subscriber_id", None), s.domain_codes, s.geo_coverage,
+         s.commission_pct, s.rating, s.onboarding_support, s.languages_supported)
+        for s in snps
+    )
+
+
+_compiled_lock = threading.Lock()
+_compiled: tuple[tuple, SnpFeatures] | None = None
+
+
+def compile_snps(snps: list[Any]) -> SnpFeatures:
+    """SnpFeatures for `snps`, reused while the registry rows and the
+    capacity file are unchanged. The served registry is compiled once per
+    snapshot instead (services/snp_registry.py); this is for ad-hoc lists."""
+    global _compiled
+    stamp, capacity = capacity_file()
+    key = (stamp, _registry_key(snps))
+    cached = _compiled
+    if cached is not None and cached[0] == key:
+        return cached[1].rebind(snps)
+    features = SnpFeatures(snps, capacity)
+    with _compiled_lock:
+        _compiled = (key, features)
+    return features
+
+
+def score_matrix(mse: Any, features: SnpFeatures, predicted_domain: str | None) -> dict[str, np.ndarray]:
+    """All five factors and the composite for every compiled SNP."""
+    d = features.domain(predicted_domain)
+    g = features.geo(mse.state, mse.district)
+    c = features.commission
+    h = features.history
+    s = features.sentiment(mse.language)
+    composite = W_DOMAIN * d + W_GEO * g + W_COMMISSION * c + W_HISTORY * h + W_SENTIMENT * s
+    return {"domain": d, "geo": g, "commission": c, "history": h, "sentiment": s, "composite": composite}
+
+
+def top_k_indices(composite: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores, best first; ties keep input order
+    (the order sorted(..., reverse=True) gives)."""
+    n = len(composite)
+    if k >= n:
+        return np.argsort(-composite, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    kth = composite[np.argpartition(-composite, k - 1)[:k]].min()
+    candidates = np.flatnonzero(composite >= kth)  # every tie at the boundary, in input order
+    return candidates[np.argsort(-composite[candidates], kind="stable")][:k]
+
+
+def compute_match_scores(
+    mse: Any, snps: list[Any] | SnpFeatures, predicted_domain: str | None, top_k: int | None = None,
+) -> list[dict]:
+    """Score every SNP against the given MSE and return factor breakdowns.
+
+    `snps` is a list of SNP rows or an already compiled SnpFeatures (the
+    registry snapshot's). Without top_k: one entry per SNP, in input order.
+    With top_k: only the top_k best, best first — fit reasons are only
+    built for those.
+    """
+    if not len(snps):
+        return []
+    features = snps if isinstance(snps, SnpFeatures) else compile_snps(snps)
+    scores = score_matrix(mse, features, predicted_domain)
+    rows = range(len(features)) if top_k is None else top_k_indices(scores["composite"], top_k)
+    return _results(mse, features, scores, rows)
+
+
+def compute_match_scores_batch(
+    mses: list[Any], snps: list[Any] | SnpFeatures, predicted_domains: list[str | None], top_k: int,
+) -> list[list[dict]]:
+    """compute_match_scores(..., top_k) for many MSEs in one pass.
+
+    The factor vectors depend on the MSE only through its domain, (state,
+    district) and language, so each distinct value is scored once and the
+    (MSE x SNP) composite matrix is assembled by row lookup. Every row is
+    identical to the single-MSE result.
+    """
+    if not mses or not len(snps):
+        return [[] for _ in mses]
+    features = snps if isinstance(snps, SnpFeatures) else compile_snps(snps)
+
+    def stacked(keys: list, score) -> np.ndarray:
+        distinct = list(dict.fromkeys(keys))
+        vectors = np.stack([score(k) for k in distinct])
+        position = {k: i for i, k in enumerate(distinct)}
+        return vectors[[position[k] for k in keys]]
+
+    d = stacked(predicted_domains, features.domain)
+    g = stacked([(m.state, m.district) for m in mses], lambda k: features.geo(*k))
+    s = stacked([m.language for m in mses], features.sentiment)
+    c, h = features.commission, features.history
+    composite = W_DOMAIN * d + W_GEO * g + W_COMMISSION * c + W_HISTORY * h + W_SENTIMENT * s
+
+    out = []
+    for i, mse in enumerate(mses):
+        scores = {"domain": d[i], "geo": g[i], "commission": c, "history": h,
+                  "sentiment": s[i], "composite": composite[i]}
+        out.append(_results(mse, features, scores, top_k_indices(composite[i], top_k)))
+    return out
+
+
+def stored_match(mse: Any, snp: Any, domain: float, geo: float, commission: float,
+                 history: float, sentiment: float, composite: float) -> dict:
+    """A compute_match_scores entry rebuilt from persisted factor scores."""
+    return {"snp": snp, "domain": domain, "geo": geo, "commission": commission, "history": history,
+            "sentiment": sentiment, "composite": composite, "fit_reasons": _fit_reasons(mse, snp, domain, geo)}
+
+
+def _results(mse: Any, features: SnpFeatures, scores: dict[str, np.ndarray], rows) -> list[dict]:
     results = []
-
-    for snp in snps:
-        d = _domain_score(predicted_domain, snp.domain_codes)
-        g = _geo_score(mse.state, mse.district, snp.geo_coverage)
-        c = _commission_score(snp.commission_pct)
-        h = _history_score(snp)
-        s = _sentiment_score(snp.onboarding_support, snp.languages_supported, mse.language)
-
-        composite = W_DOMAIN * d + W_GEO * g + W_COMMISSION * c + W_HISTORY * h + W_SENTIMENT * s
-
+    for i in rows:
+        snp = features.snps[i]
+        d, g = float(scores["domain"][i]), float(scores["geo"][i])
         results.append({
             "snp": snp,
             "domain": d,
             "geo": g,
-            "commission": c,
-            "history": h,
-            "sentiment": s,
-            "composite": composite,
+            "commission": float(scores["commission"][i]),
+            "history": float(scores["history"][i]),
+            "sentiment": float(scores["sentiment"][i]),
+            "composite": float(scores["composite"][i]),
             "fit_reasons": _fit_reasons(mse, snp, d, g),
         })
-
     return results
 
 
@@ -93,7 +318,7 @@ def _fit_reasons(mse: Any, snp: Any, d: float, g: float) -> list[str]:
         reasons.append(f"Serves {mse.district}")
     elif g >= 0.6 and mse.state:
         reasons.append(f"Serves {mse.state}")
-    elif snp.geo_coverage and "pan" in snp.geo_coverage.lower():
+    elif PAN_INDIA in coverage_tokens(snp.geo_coverage):
         reasons.append("Pan-India reach")
     if (snp.commission_pct or 0) <= 4:
         reasons.append("Low commission")
@@ -157,19 +382,19 @@ def _domain_score(predicted_domain: str | None, snp_domains: str | None) -> floa
     return 0.15
 
 
-_PAN_INDIA_RE = re.compile(r"\bpan[\s-]?india\b|\ball[\s-]?india\b|\bnational\b|\ball\b")
-
-
 def _geo_score(mse_state: str | None, mse_district: str | None, snp_coverage: str | None) -> float:
-    """Geographic overlap: 1.0 = district match, 0.6 = state match, 0.4 = pan-India."""
+    """Geographic overlap: 1.0 = district match, 0.6 = state match, 0.4 = pan-India.
+
+    Matches canonical coverage tokens (services/geo.py), not substrings.
+    """
     if not snp_coverage or not snp_coverage.strip():
         return 0.3  # coverage undisclosed — assume national reach
-    coverage = snp_coverage.lower()
-    if mse_district and mse_district.lower() in coverage:
+    tokens = coverage_tokens(snp_coverage)
+    if mse_district and district_token(mse_district) in tokens:
         return 1.0
-    if mse_state and mse_state.lower() in coverage:
+    if mse_state and state_token(mse_state) in tokens:
         return 0.6
-    if _PAN_INDIA_RE.search(coverage):
+    if PAN_INDIA in tokens:
         return 0.4
     return 0.2
 
@@ -183,13 +408,14 @@ def _commission_score(commission_pct: float) -> float:
     return 1.0 - (commission_pct / 15.0)
 
 
-def _history_score(snp: Any) -> float:
+def _history_score(snp: Any, capacity: dict | None = None) -> float:
     """Historical performance with Bayesian smoothing and capacity blend.
 
     The SNP's rating is shrunk toward the network prior so thin evidence
     can't dominate; unrated SNPs get the prior (cold-start exploration
     boost). Where capacity data exists, blends in capacity headroom and
     onboarding speed (synthetic-disclosed pending TEAM-portal data).
+    `capacity` defaults to the current snp_capacity.json.
     """
     rating = snp.rating or 0.0
     if rating <= 0:
@@ -198,7 +424,9 @@ def _history_score(snp: Any) -> float:
         smoothed = RATING_OBS_WEIGHT * rating + (1.0 - RATING_OBS_WEIGHT) * RATING_PRIOR
     base = min(max(smoothed / 5.0, 0.0), 1.0)
 
-    cap = _capacity_data().get(getattr(snp, "subscriber_id", None) or "")
+    if capacity is None:
+        capacity = _capacity_data()
+    cap = capacity.get(getattr(snp, "subscriber_id", None) or "")
     if cap:
         capacity, days = float(cap[0]), float(cap[1] or 15)
         speed = 1.0 - min(max(days / 30.0, 0.0), 1.0)
@@ -208,8 +436,7 @@ def _history_score(snp: Any) -> float:
 
 def _sentiment_score(support_level: str | None, languages: str | None, mse_lang: str) -> float:
     """Combine onboarding support quality and language match."""
-    support_map = {"full": 1.0, "partial": 0.5, "none": 0.1}
-    support = support_map.get(support_level or "none", 0.1)
+    support = _SUPPORT.get(support_level or "none", 0.1)
 
     lang_match = 0.5
     if languages and mse_lang:
@@ -0,0 +1,299 @@
+"""Classify-chain instrumentation: stage latency, engine outcomes, token cost.
+
+The drift view on /model-health counts which engine answered from the
+stored classification rows; it cannot say how long each stage took or what
+an answer cost. This module keeps per-worker, in-memory counters:
+
+  - stage timers       `with metrics.stage("tfidf"):` around each chain stage
+                       (cache lookup, tfidf, leaf resolver, sarvam, muril, keyword)
+  - request outcomes   one record per classification: the engine that
+                       answered, whether it came from the cache, end-to-end
+                       latency and the Sarvam tokens it consumed
+  - Sarvam usage       prompt/completion tokens from the `usage` field of
+                       every chat completion (classify and NER)
+
+Tokens are attributed to the request that made the call through a
+ContextVar set by start_request(); tasks the chain spawns inherit it. A
+single-flight follower makes no call and is charged nothing.
+
+Everything is exposed twice: as JSON for /model-health (stats()) and in the
+Prometheus text format for /model-health/metrics (render_prometheus()).
+
+Env:
+  SARVAM_INR_PER_1K_INPUT_TOKENS    price for cost estimates (default 0: report tokens only)
+  SARVAM_INR_PER_1K_OUTPUT_TOKENS
+"""
+
+import bisect
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Iterator, Optional, Sequence
+
+INR_PER_1K_INPUT = float(os.getenv("SARVAM_INR_PER_1K_INPUT_TOKENS", "0"))
+INR_PER_1K_OUTPUT = float(os.getenv("SARVAM_INR_PER_1K_OUTPUT_TOKENS", "0"))
+
+LATENCY_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000, 40000)
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+class Histogram:
+    """Fixed-bucket histogram (counts per upper bound, plus an overflow bucket)."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate, interpolating linearly inside the bucket (the
+        Prometheus histogram_quantile rule; the overflow bucket reports its
+        lower bound)."""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lo = self.bounds[i - 1] if i else 0.0
+                if i == len(self.bounds):
+                    return lo
+                return lo + (self.bounds[i] - lo) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{b:g}" for b in self.bounds] + ["overflow"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.total,
+            "mean": round(self.sum / self.total, 3) if self.total else None,
+        }
+
+    def summary(self) -> dict:
+        """Count, mean and p50/p95/p99 estimates."""
+        out = {"count": self.total, "mean": round(self.sum / self.total, 3) if self.total else None}
+        for q in (0.5, 0.95, 0.99):
+            v = self.quantile(q)
+            out[f"p{int(q * 100)}"] = round(v, 3) if v is not None else None
+        return out
+
+    def prometheus(self, name: str, labels: str = "", scale: float = 1.0) -> list[str]:
+        """Exposition lines; `scale` converts units (e.g. 0.001 for ms -> s)."""
+        sep = "," if labels else ""
+        lines, cumulative = [], 0
+        for bound, n in zip(self.bounds, self.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound * scale:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.total}')
+        tail = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{tail} {self.sum * scale:g}")
+        lines.append(f"{name}_count{tail} {self.total}")
+        return lines
+
+
+class _Request:
+    __slots__ = ("tokens_in", "tokens_out", "sarvam_calls")
+
+    def __init__(self) -> None:
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.sarvam_calls = 0
+
+
+class _EngineStats:
+    __slots__ = ("chain", "cache", "latency_ms", "tokens_in", "tokens_out", "sarvam_calls")
+
+    def __init__(self) -> None:
+        self.chain = 0
+        self.cache = 0
+        self.latency_ms = Histogram(LATENCY_MS_BUCKETS)
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.sarvam_calls = 0
+
+
+_current: ContextVar[Optional[_Request]] = ContextVar("vargbot_request", default=None)
+_stages: dict[str, Histogram] = defaultdict(lambda: Histogram(LATENCY_MS_BUCKETS))
+_engines: dict[str, _EngineStats] = defaultdict(_EngineStats)
+_usage: dict[tuple[str, str], dict] = defaultdict(
+    lambda: {"calls": 0, "without_usage": 0, "prompt_tokens": 0, "completion_tokens": 0,
+             "tokens_per_call": Histogram(TOKEN_BUCKETS)}
+)
+
+
+def _cost(tokens_in: int, tokens_out: int) -> float:
+    return tokens_in / 1000 * INR_PER_1K_INPUT + tokens_out / 1000 * INR_PER_1K_OUTPUT
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time one chain stage (wall clock, including awaits)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stages[name].observe((time.perf_counter() - t0) * 1000)
+
+
+def start_request() -> tuple[_Request, Token]:
+    """Open the token accumulator for one classification."""
+    req = _Request()
+    return req, _current.set(req)
+
+
+def finish_request(
+    req: _Request, token: Optional[Token], engine: Optional[str], latency_ms: float, cached: bool = False,
+) -> None:
+    """Record the outcome of one classification and close its accumulator."""
+    if token is not None:
+        try:
+            _current.reset(token)
+        except ValueError:
+            _current.set(None)  # closed from another context (abandoned stream)
+    if engine is None:
+        return
+    e = _engines[engine]
+    if cached:
+        e.cache += 1
+    else:
+        e.chain += 1
+    e.latency_ms.observe(latency_ms)
+    e.tokens_in += req.tokens_in
+    e.tokens_out += req.tokens_out
+    e.sarvam_calls += req.sarvam_calls
+
+
+def record_usage(service: str, model: str, usage: Optional[dict]) -> None:
+    """Tokens from an OpenAI-style `usage` object of a Sarvam response."""
+    u = _usage[(service, model)]
+    u["calls"] += 1
+    req = _current.get()
+    if req is not None:
+        req.sarvam_calls += 1
+    if not isinstance(usage, dict):
+        u["without_usage"] += 1
+        return
+    tokens_in = int(usage.get("prompt_tokens") or 0)
+    tokens_out = int(usage.get("completion_tokens") or 0)
+    u["prompt_tokens"] += tokens_in
+    u["completion_tokens"] += tokens_out
+    u["tokens_per_call"].observe(tokens_in + tokens_out)
+    if req is not None:
+        req.tokens_in += tokens_in
+        req.tokens_out += tokens_out
+
+
+def engine_summary(engine: str) -> Optional[dict]:
+    """Live latency / cost dimension for one engine stamp (None if unseen here)."""
+    e = _engines.get(engine)
+    if e is None:
+        return None
+    n = e.chain + e.cache
+    lat = e.latency_ms.summary()
+    return {
+        "requests": n,
+        "from_cache": e.cache,
+        "p50_ms": lat["p50"],
+        "p95_ms": lat["p95"],
+        "p99_ms": lat["p99"],
+        "sarvam_calls": e.sarvam_calls,
+        "tokens_per_request": round((e.tokens_in + e.tokens_out) / n, 1) if n else None,
+        "cost_inr_per_request": round(_cost(e.tokens_in, e.tokens_out) / n, 5) if n else None,
+    }
+
+
+def stats() -> dict:
+    """Per-worker chain instrumentation (surfaced on /model-health)."""
+    usage = {}
+    for (service, model), u in sorted(_usage.items()):
+        usage[f"{service}:{model}"] = {
+            "calls": u["calls"],
+            "without_usage": u["without_usage"],
+            "prompt_tokens": u["prompt_tokens"],
+            "completion_tokens": u["completion_tokens"],
+            "tokens_per_call": u["tokens_per_call"].summary(),
+            "cost_inr": round(_cost(u["prompt_tokens"], u["completion_tokens"]), 4),
+        }
+    return {
+        "stages_ms": {name: h.summary() for name, h in sorted(_stages.items())},
+        "engines": {name: engine_summary(name) for name in sorted(_engines)},
+        "sarvam_usage": usage,
+        "pricing_inr_per_1k": {"input": INR_PER_1K_INPUT, "output": INR_PER_1K_OUTPUT},
+    }
+
+
+def _esc(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(cache: Optional[dict] = None, batchers: Optional[dict] = None) -> str:
+    """Prometheus text exposition (format 0.0.4) of this worker's counters.
+    `cache` is classify_cache.stats(); `batchers` maps name -> MicroBatcher."""
+    out: list[str] = []
+
+    out += ["# HELP vargbot_classify_stage_seconds Wall time of one classify-chain stage.",
+            "# TYPE vargbot_classify_stage_seconds histogram"]
+    for name, h in sorted(_stages.items()):
+        out += h.prometheus("vargbot_classify_stage_seconds", f'stage="{_esc(name)}"', 0.001)
+
+    out += ["# HELP vargbot_classify_request_seconds End-to-end classification latency by answering engine.",
+            "# TYPE vargbot_classify_request_seconds histogram"]
+    for name, e in sorted(_engines.items()):
+        out += e.latency_ms.prometheus("vargbot_classify_request_seconds", f'engine="{_esc(name)}"', 0.001)
+
+    out += ["# HELP vargbot_classify_requests_total Classifications by answering engine and source.",
+            "# TYPE vargbot_classify_requests_total counter"]
+    for name, e in sorted(_engines.items()):
+        out.append(f'vargbot_classify_requests_total{{engine="{_esc(name)}",source="chain"}} {e.chain}')
+        out.append(f'vargbot_classify_requests_total{{engine="{_esc(name)}",source="cache"}} {e.cache}')
+
+    out += ["# HELP vargbot_classify_tokens_total Sarvam tokens consumed, by answering engine.",
+            "# TYPE vargbot_classify_tokens_total counter"]
+    for name, e in sorted(_engines.items()):
+        out.append(f'vargbot_classify_tokens_total{{engine="{_esc(name)}",kind="prompt"}} {e.tokens_in}')
+        out.append(f'vargbot_classify_tokens_total{{engine="{_esc(name)}",kind="completion"}} {e.tokens_out}')
+
+    out += ["# HELP vargbot_sarvam_calls_total Sarvam chat completions made.",
+            "# TYPE vargbot_sarvam_calls_total counter"]
+    for (service, model), u in sorted(_usage.items()):
+        out.append(f'vargbot_sarvam_calls_total{{service="{service}",model="{_esc(model)}"}} {u["calls"]}')
+    out += ["# HELP vargbot_sarvam_tokens_total Sarvam tokens from response usage.",
+            "# TYPE vargbot_sarvam_tokens_total counter"]
+    for (service, model), u in sorted(_usage.items()):
+        labels = f'service="{service}",model="{_esc(model)}"'
+        out.append(f'vargbot_sarvam_tokens_total{{{labels},kind="prompt"}} {u["prompt_tokens"]}')
+        out.append(f'vargbot_sarvam_tokens_total{{{labels},kind="completion"}} {u["completion_tokens"]}')
+
+    if cache is not None:
+        out += ["# HELP vargbot_classify_cache_lookups_total Classification cache lookups by result.",
+                "# TYPE vargbot_classify_cache_lookups_total counter"]
+        for result in ("hits_local", "hits_redis", "misses"):
+            out.append(f'vargbot_classify_cache_lookups_total{{result="{result}"}} {cache.get(result, 0)}')
+
+    if batchers:
+        out += ["# HELP vargbot_micro_batch_size Items per transformer micro-batch.",
+                "# TYPE vargbot_micro_batch_size histogram"]
+        for name, b in sorted(batchers.items()):
+            out += b.batch_sizes.prometheus("vargbot_micro_batch_size", f'batcher="{_esc(name)}"')
+        out += ["# HELP vargbot_micro_batch_queue_seconds Wait before an item's batch dispatched.",
+                "# TYPE vargbot_micro_batch_queue_seconds histogram"]
+        for name, b in sorted(batchers.items()):
+            out += b.queue_delay_ms.prometheus("vargbot_micro_batch_queue_seconds", f'batcher="{_esc(name)}"', 0.001)
+
+    return "\n".join(out) + "\n"
+
+
+def reset() -> None:
+    """Drop all counters (tests, benchmarks)."""
+    _stages.clear()
+    _engines.clear()
+    _usage.clear()
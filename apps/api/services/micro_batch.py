@@ -0,0 +1,143 @@
+"""Dynamic micro-batching for transformer inference.
+
+Concurrent /classify requests (and the rows of a catalogue upload, which
+classify_batch_async fans out concurrently) each used to run their own
+batch-size-1 MuRIL forward pass. On CPU one padded batch of B inputs costs
+far less than B single passes — the matmuls get wide enough to use the
+cores' vector units and the per-call framework overhead is paid once.
+
+A MicroBatcher collects submitted items and runs them as ONE call of its
+batch function on the engine pool (services/engine_pool.py):
+
+  - a batch closes at max_batch items or max_delay_ms after its first item,
+    whichever comes first
+  - while the engine's workers are all busy, new items keep accumulating
+    instead of queueing as more small batches — the next batch starts the
+    moment a worker frees up, as large as the backlog allows
+  - each awaiting coroutine gets its own result back; an engine error (or
+    EngineSaturated) is raised in every caller of that batch
+  - a caller that gives up (deadline, cancellation) is dropped from the
+    batch if it has not been dispatched yet
+
+Batch-size and queue-delay histograms per batcher are surfaced on
+/model-health.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from services import engine_pool
+from services.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+QUEUE_DELAY_MS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item calls into batched calls of fn.
+
+    fn takes a list of items and returns a list of results in the same order;
+    it runs on engine_pool under `name`.
+    """
+
+    def __init__(self, name: str, fn: Callable[[list], list], max_batch: int, max_delay_ms: float):
+        self.name = name
+        self.fn = fn
+        self.max_batch = max(1, max_batch)
+        self.max_delay_s = max(0.0, max_delay_ms) / 1000
+        self.max_inflight = max(1, engine_pool.ENGINE_WORKERS.get(name, 1))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: list[tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight = 0
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_delay_ms = Histogram(QUEUE_DELAY_MS_BUCKETS)
+        _batchers[name] = self
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and await its result from the batch it lands in."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (app reload, tests): earlier
+            # state belongs to a loop that no longer runs.
+            self._loop, self._pending, self._timer, self._inflight = loop, [], None, 0
+        fut = loop.create_future()
+        self._pending.append((item, fut, time.perf_counter()))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay_s, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._pending = [p for p in self._pending if not p[1].done()]
+        if not self._pending or self._inflight >= self.max_inflight:
+            return  # nothing to do, or _run's completion will flush the backlog
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if self._pending:
+            self._timer = self._loop.call_later(self.max_delay_s, self._flush)
+
+        now = time.perf_counter()
+        for _, _, queued in batch:
+            self.queue_delay_ms.observe((now - queued) * 1000)
+        self.batch_sizes.observe(len(batch))
+        self.batches += 1
+        self.items += len(batch)
+        self._inflight += 1
+        task = self._loop.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[Any, asyncio.Future, float]]) -> None:
+        try:
+            results = await engine_pool.run(self.name, self.fn, [item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name} returned {len(results)} results for {len(batch)} items")
+        except BaseException as e:
+            for _, fut, _ in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            for (_, fut, _), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+        finally:
+            self._inflight -= 1
+            if self._pending and self._timer is None:
+                self._flush()
+
+    def stats(self) -> dict:
+        return {
+            "max_batch": self.max_batch,
+            "max_delay_ms": round(self.max_delay_s * 1000, 3),
+            "batches": self.batches,
+            "items": self.items,
+            "queued": len(self._pending),
+            "in_flight_batches": self._inflight,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_delay_ms": self.queue_delay_ms.snapshot(),
+        }
+
+
+_batchers: dict[str, MicroBatcher] = {}
+
+
+def batchers() -> dict[str, MicroBatcher]:
+    return dict(_batchers)
+
+
+def stats() -> dict:
+    """Per-batcher batch-size and queue-delay histograms (surfaced on /model-health)."""
+    return {name: b.stats() for name, b in sorted(_batchers.items())}
@@ -0,0 +1,400 @@
+"""Zero-downtime TF-IDF model hot-swap with shadow scoring.
+
+Replacing the served TF-IDF artifact used to mean a redeploy: every worker
+restarted, dropping in-flight requests and warm per-worker state. A new
+artifact now goes through three steps inside the running workers:
+
+  1. stage    POST /model-health/registry/stage — or the configured artifact
+              changing on disk (VARGBOT_MODEL_WATCH, checked by the classifier's
+              watcher thread every VARGBOT_MODEL_WATCH_POLL_S, its own
+              interval — VARGBOT_TAXONOMY_POLL_S does not gate it) — loads the
+              candidate on a background thread. The incumbent keeps serving.
+  2. shadow   SHADOW_SAMPLE_RATE of live classifications are re-scored by
+              candidate and incumbent together, after the request's own
+              TF-IDF stage, on a dedicated single-thread engine pool and at
+              most SHADOW_MAX_INFLIGHT at a time — a full pool skips the
+              sample, it never delays a request. Top-1 agreement, agreement
+              on the confidence gate and both models' latency are reported
+              on /model-health under registry.swap.
+  3. promote  POST /model-health/registry/promote installs the candidate in
+              one assignment (classifier.install_tfidf). A request in flight
+              finishes on the artifact it started with; the engine version,
+              and with it the cache key, moves with the artifact. The
+              replaced artifact is kept for POST /registry/rollback.
+
+Admin actions are published on MODEL_CHANNEL so every worker follows the
+one the call landed on; each worker shadow-scores its own traffic. State is
+per worker process.
+
+Env:
+  VARGBOT_SHADOW_SAMPLE_RATE    share of requests shadow-scored (default 0.1)
+  VARGBOT_SHADOW_MAX_INFLIGHT   concurrent shadow jobs per worker (default 4)
+  VARGBOT_PROMOTE_MIN_SAMPLES   shadow samples before promote without force (default 200)
+  VARGBOT_MODEL_WATCH           stage the configured artifact when it changes on disk (default true)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from services import engine_pool
+from services.metrics import LATENCY_MS_BUCKETS, Histogram
+
+logger = logging.getLogger(__name__)
+
+SHADOW_SAMPLE_RATE = float(os.getenv("VARGBOT_SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_MAX_INFLIGHT = int(os.getenv("VARGBOT_SHADOW_MAX_INFLIGHT", "4"))
+PROMOTE_MIN_SAMPLES = int(os.getenv("VARGBOT_PROMOTE_MIN_SAMPLES", "200"))
+MODEL_WATCH = os.getenv("VARGBOT_MODEL_WATCH", "true").lower() == "true"
+MODEL_WATCH_POLL_S = int(os.getenv("VARGBOT_MODEL_WATCH_POLL_S", "300"))
+MODEL_CHANNEL = "vargbot:model"
+SHADOW_POOL = "shadow"  # engine_pool name; unknown names get one worker
+
+IDLE, LOADING, SHADOWING, FAILED = "idle", "loading", "shadowing", "failed"
+_WORKER = uuid.uuid4().hex  # tells this worker's own broadcasts apart
+
+
+class SwapError(RuntimeError):
+    """The requested stage / promote / rollback is not possible right now."""
+
+
+class _Shadow:
+    """Candidate-vs-incumbent comparison over sampled live traffic."""
+
+    def __init__(self) -> None:
+        self.samples = 0
+        self.compared = 0        # samples with an incumbent to compare against
+        self.agree_top1 = 0
+        self.agree_gate = 0      # both above, or both below, the confidence gate
+        self.conf_delta = 0.0    # sum of |candidate - incumbent| top-1 confidence
+        self.skipped = 0
+        self.errors = 0
+        self.incumbent_ms = Histogram(LATENCY_MS_BUCKETS)
+        self.candidate_ms = Histogram(LATENCY_MS_BUCKETS)
+        self.disagreements: deque[dict] = deque(maxlen=10)
+
+    def stats(self) -> dict:
+        n = self.compared
+        return {
+            "samples": self.samples,
+            "agreement": round(self.agree_top1 / n, 4) if n else None,
+            "gate_agreement": round(self.agree_gate / n, 4) if n else None,
+            "mean_abs_confidence_delta": round(self.conf_delta / n, 4) if n else None,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "latency_ms": {
+                "incumbent": self.incumbent_ms.summary(),
+                "candidate": self.candidate_ms.summary(),
+            },
+            "recent_disagreements": list(self.disagreements),
+        }
+
+
+_lock = threading.Lock()
+_status = IDLE
+_error: Optional[str] = None
+_failed_fingerprint: Optional[str] = None  # the watcher does not retry a broken file
+_loading_path: Optional[str] = None
+_load_ms: Optional[float] = None
+_candidate = None   # classifier.TfidfArtifact
+_previous = None    # what the last promotion replaced — the rollback target
+_shadow = _Shadow()
+_history: deque[dict] = deque(maxlen=10)
+_tasks: set[asyncio.Task] = set()
+_rng = random.Random()
+
+
+def _describe(art) -> Optional[dict]:
+    if art is None:
+        return None
+    return {
+        "engine": art.engine,
+        "variant": art.variant,
+        "path": art.path,
+        "fingerprint": art.fingerprint,
+        "domains": len(art.classes),
+    }
+
+
+def resolve_path(path: Optional[str]) -> Path:
+    """The configured artifact, or `path` (relative names are taken from the
+    models directory). Only .joblib artifacts inside that directory load:
+    joblib files are pickles, so an arbitrary path would run arbitrary code."""
+    from services import classifier as clf
+
+    configured = clf.tfidf_artifact_path()
+    if not path:
+        return configured
+    models_dir = configured.parent.resolve()
+    target = (models_dir / path).resolve()
+    if target.suffix != ".joblib" or not target.is_relative_to(models_dir):
+        raise SwapError(f"artifact must be a .joblib file in {models_dir}")
+    return target
+
+
+# ── Stage ──────────────────────────────────────────────────────────────
+
+def _load(path: Path) -> bool:
+    """Load `path` as the candidate (blocking). Returns True when staged."""
+    global _status, _error, _failed_fingerprint, _loading_path, _load_ms, _candidate, _shadow
+    from services import classifier as clf
+
+    t0 = time.perf_counter()
+    art = clf.load_tfidf_artifact(path)
+    elapsed = round((time.perf_counter() - t0) * 1000, 1)
+    error = None
+    if art is None:
+        error = f"no loadable TF-IDF artifact at {path}"
+    else:
+        serving = clf.serving_tfidf()
+        dropped = set(serving.classes) - set(art.classes) if serving is not None else set()
+        if dropped:
+            error = f"candidate no longer predicts {sorted(dropped)}, which the serving model does"
+        elif serving is not None and art.fingerprint == serving.fingerprint and art.path == serving.path:
+            error = "candidate is the artifact already serving"
+    with _lock:
+        _loading_path, _load_ms = None, elapsed
+        if error:
+            # an earlier candidate, if any, stays staged
+            _status, _error = (SHADOWING if _candidate is not None else FAILED), error
+            _failed_fingerprint = clf.tfidf_fingerprint(path)
+            logger.warning(f"Model swap: stage of {path} failed — {error}")
+            return False
+        _status, _error, _candidate, _shadow = SHADOWING, None, art, _Shadow()
+    logger.info(
+        f"Model swap: staged {art.engine}:{art.variant} ({art.fingerprint}) in {elapsed} ms — shadowing"
+    )
+    return True
+
+
+def stage(path: Path, wait: bool = False) -> bool:
+    """Start loading `path` as the candidate on a background thread (or in
+    this thread, with wait). False if a load is already running."""
+    global _status, _error, _loading_path
+    with _lock:
+        if _status == LOADING:
+            return False
+        _status, _error, _loading_path = LOADING, None, str(path)
+    if wait:
+        _load(path)
+    else:
+        threading.Thread(target=_load, args=(path,), name="vargbot-model-stage", daemon=True).start()
+    return True
+
+
+def watch_artifact() -> bool:
+    """Stage the configured artifact if it changed on disk since it was
+    loaded (called from the taxonomy watcher thread). True when staged."""
+    from services import classifier as clf
+
+    if not MODEL_WATCH:
+        return False
+    path = clf.tfidf_artifact_path()
+    fingerprint = clf.tfidf_fingerprint(path)
+    serving = clf.serving_tfidf()
+    if not fingerprint or fingerprint == _failed_fingerprint:
+        return False
+    if serving is not None and (serving.path != str(path) or serving.fingerprint == fingerprint):
+        return False
+    if _candidate is not None and _candidate.fingerprint == fingerprint:
+        return False
+    logger.info(f"Model swap: {path.name} changed on disk — staging it")
+    return stage(path, wait=True) and _candidate is not None
+
+
+def discard() -> None:
+    """Drop the candidate (and its shadow numbers)."""
+    global _status, _error, _candidate
+    with _lock:
+        if _status == LOADING:
+            raise SwapError("a candidate is still loading")
+        _status, _error, _candidate = IDLE, None, None
+
+
+# ── Shadow scoring ─────────────────────────────────────────────────────
+
+def _compare(candidate, incumbent, description: str) -> None:
+    """Score one description with both artifacts (shadow pool thread)."""
+    from services import classifier as clf
+
+    t0 = time.perf_counter()
+    cand = clf._classify_with_tfidf_many([description], candidate)[0]
+    t1 = time.perf_counter()
+    inc = clf._classify_with_tfidf_many([description], incumbent)[0] if incumbent is not None else None
+    t2 = time.perf_counter()
+    with _lock:
+        if _candidate is not candidate:
+            return  # promoted or discarded meanwhile: keep the numbers clean
+        sh = _shadow
+        sh.samples += 1
+        sh.candidate_ms.observe((t1 - t0) * 1000)
+        if incumbent is None or not cand or not inc:
+            return
+        sh.compared += 1
+        sh.incumbent_ms.observe((t2 - t1) * 1000)
+        c, i = cand[0], inc[0]
+        sh.agree_top1 += c["domain"] == i["domain"]
+        sh.agree_gate += (c["confidence"] >= clf.TFIDF_MIN_CONF) == (i["confidence"] >= clf.TFIDF_MIN_CONF)
+        sh.conf_delta += abs(c["confidence"] - i["confidence"])
+        if c["domain"] != i["domain"]:
+            sh.disagreements.append({
+                "text": description[:120],
+                "incumbent": f"{i['domain']} @ {i['confidence']}",
+                "candidate": f"{c['domain']} @ {c['confidence']}",
+            })
+
+
+async def _score(candidate, incumbent, description: str) -> None:
+    try:
+        await engine_pool.run(SHADOW_POOL, _compare, candidate, incumbent, description)
+    except engine_pool.EngineSaturated:
+        _shadow.skipped += 1
+    except Exception as e:
+        _shadow.errors += 1
+        logger.warning(f"Model swap: shadow scoring failed: {e}")
+
+
+def shadow(description: str) -> None:
+    """Sample this request for shadow scoring, if a candidate is staged.
+    Never blocks: the comparison runs in the background."""
+    from services import classifier as clf
+
+    candidate = _candidate
+    if candidate is None or _rng.random() >= SHADOW_SAMPLE_RATE:
+        return
+    if len(_tasks) >= SHADOW_MAX_INFLIGHT:
+        _shadow.skipped += 1
+        return
+    task = asyncio.get_running_loop().create_task(_score(candidate, clf.serving_tfidf(), description))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+# ── Promote / rollback ─────────────────────────────────────────────────
+
+def _record(action: str, replaced, installed, **extra) -> None:
+    _history.appendleft({
+        "action": action,
+        "at": datetime.now(timezone.utc).isoformat(),
+        "from": _describe(replaced),
+        "to": _describe(installed),
+        **extra,
+    })
+
+
+def promote(force: bool = False) -> dict:
+    """Make the candidate the serving artifact. Without force, needs
+    PROMOTE_MIN_SAMPLES shadow samples first."""
+    global _status, _candidate, _previous
+    from services import classifier as clf
+
+    with _lock:
+        candidate = _candidate
+        if candidate is None:
+            raise SwapError("no candidate staged")
+        if not force and _shadow.samples < PROMOTE_MIN_SAMPLES:
+            raise SwapError(
+                f"only {_shadow.samples}/{PROMOTE_MIN_SAMPLES} shadow samples — "
+                "wait for more traffic or promote with force"
+            )
+        shadow_stats = _shadow.stats()
+        replaced = clf.install_tfidf(candidate)
+        _previous, _candidate, _status = replaced, None, IDLE
+        _record("promote", replaced, candidate, forced=force,
+                samples=shadow_stats["samples"], agreement=shadow_stats["agreement"])
+    logger.info(
+        f"Model swap: promoted {candidate.engine}:{candidate.variant} ({candidate.fingerprint}), "
+        f"replacing {replaced.engine if replaced else None} — "
+        f"{shadow_stats['samples']} shadow samples, agreement {shadow_stats['agreement']}"
+    )
+    return _describe(candidate)
+
+
+def rollback() -> dict:
+    """Reinstall the artifact the last promotion replaced."""
+    global _previous
+    from services import classifier as clf
+
+    with _lock:
+        if _previous is None:
+            raise SwapError("nothing to roll back to")
+        target = _previous
+        replaced = clf.install_tfidf(target)
+        _previous = replaced
+        _record("rollback", replaced, target)
+    logger.warning(f"Model swap: rolled back to {target.engine}:{target.variant} ({target.fingerprint})")
+    return _describe(target)
+
+
+# ── Cross-worker propagation ───────────────────────────────────────────
+
+def publish(action: str, **fields) -> bool:
+    """Tell the other workers to follow an admin action."""
+    from redis_client import get_redis
+    r = get_redis()
+    if r is None:
+        return False
+    try:
+        r.publish(MODEL_CHANNEL, json.dumps({"action": action, "origin": _WORKER, **fields}))
+        return True
+    except Exception as e:
+        logger.warning(f"Model swap publish failed: {e}")
+        return False
+
+
+def handle_message(data) -> None:
+    """Apply another worker's admin action (taxonomy watcher thread)."""
+    from services import classifier as clf
+
+    try:
+        msg = json.loads(data)
+    except (TypeError, ValueError):
+        logger.warning(f"Model swap: ignoring malformed message {data!r}")
+        return
+    if msg.get("origin") == _WORKER:
+        return
+    action = msg.get("action")
+    try:
+        if action == "stage":
+            stage(Path(msg["path"]), wait=True)
+        elif action == "promote":
+            if _candidate is None or _candidate.fingerprint != msg.get("fingerprint"):
+                # this worker never staged it (or staged something else): load it now
+                stage(Path(msg["path"]), wait=True)
+            if _candidate is not None and _candidate.fingerprint == msg.get("fingerprint"):
+                promote(force=True)
+            else:
+                logger.warning(f"Model swap: could not follow promotion of {msg.get('path')}")
+        elif action == "rollback":
+            serving = clf.serving_tfidf()
+            if serving is not None and serving.fingerprint == msg.get("from_fingerprint"):
+                rollback()
+        elif action == "discard":
+            discard()
+    except (SwapError, KeyError) as e:
+        logger.warning(f"Model swap: could not follow {action}: {e!r}")
+
+
+def stats() -> dict:
+    return {
+        "status": _status,
+        "error": _error,
+        "loading": _loading_path,
+        "load_ms": _load_ms,
+        "candidate": _describe(_candidate),
+        "rollback_to": _describe(_previous),
+        "sample_rate": SHADOW_SAMPLE_RATE,
+        "min_samples_to_promote": PROMOTE_MIN_SAMPLES,
+        "watch": MODEL_WATCH,
+        "shadow": _shadow.stats() if _candidate is not None else None,
+        "history": list(_history),
+    }
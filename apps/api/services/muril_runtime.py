@@ -0,0 +1,94 @@
+"""ONNX Runtime backend for the VargBot MuRIL + LoRA domain classifier.
+
+The torch path loads google/muril-base-cased, wraps it in a PeftModel, and
+runs the unmerged LoRA layers in fp32 on every call. Our servers are
+CPU-only, so that forward pass dominates the MuRIL stage. ml/export_vargbot_
+muril_onnx.py folds the adapter into the base weights (merge_and_unload),
+exports the merged model to ONNX with dynamic batch and sequence axes, and
+quantizes the linear layers to int8 (dynamic quantization; activations stay
+fp32). OnnxMuril serves that artifact:
+
+  - dynamic padding — a batch is padded to its longest member (truncated at
+    MAX_LENGTH), never to a fixed 128 tokens; a 10-token description costs
+    a 10-token forward pass
+  - ONNX Runtime CPU provider with full graph optimisation (attention and
+    GELU fusion) and a bounded intra-op thread pool
+  - no torch or peft import on the serving path — onnxruntime plus the
+    tokenizer only
+
+Artifact layout, under VARGBOT_MODEL_DIR:
+
+  onnx/model.int8.onnx     merged, quantized graph (inputs: input_ids,
+                           attention_mask[, token_type_ids]; output: logits)
+  onnx/tokenizer files     saved from the adapter directory
+  onnx/export_meta.json    FORMAT, model file, label order, base model,
+                           quantization, parity measured at export time
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "vargbot-muril-onnx/1"
+ONNX_SUBDIR = "onnx"
+META_FILE = "export_meta.json"
+MAX_LENGTH = 128
+
+
+def onnx_dir_for(model_dir: str | Path) -> Path:
+    """<VARGBOT_MODEL_DIR>/onnx"""
+    return Path(model_dir) / ONNX_SUBDIR
+
+
+class OnnxMuril:
+    """Merged, int8-quantized MuRIL classifier on ONNX Runtime."""
+
+    def __init__(self, path: str | Path, threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        path = Path(path)
+        self.meta = json.loads((path / META_FILE).read_text(encoding="utf-8"))
+        if self.meta.get("format") != FORMAT:
+            raise ValueError(f"unsupported MuRIL export format {self.meta.get('format')!r}")
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.inter_op_num_threads = 1
+        if threads > 0:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(path / self.meta["model"]), opts, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(str(path))
+        self.labels: list[str] = list(self.meta["labels"])
+        self.variant = f"onnx-{self.meta.get('quantization', 'fp32')}"
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def predict_proba(self, texts: list[str], max_length: Optional[int] = None) -> np.ndarray:
+        """(n_texts, n_labels) softmax probabilities, columns in self.labels order."""
+        enc = self.tokenizer(
+            list(texts),
+            truncation=True,
+            max_length=max_length or self.meta.get("max_length", MAX_LENGTH),
+            padding="longest",
+            return_tensors="np",
+        )
+        feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self._inputs}
+        logits = self.session.run(None, feeds)[0].astype(np.float64)
+        logits -= logits.max(axis=1, keepdims=True)
+        np.exp(logits, out=logits)
+        return logits / logits.sum(axis=1, keepdims=True)
+
+
+def load_onnx(model_dir: str | Path, threads: int = 0) -> Optional[OnnxMuril]:
+    """OnnxMuril for <model_dir>/onnx, or None when no export is present."""
+    path = onnx_dir_for(model_dir)
+    if not (path / META_FILE).exists():
+        return None
+    return OnnxMuril(path, threads=threads)
@@ -16,7 +16,9 @@ from pathlib import Path
 from typing import Optional
 
 from dotenv import load_dotenv
-import httpx
+
+from services import http_pool, metrics, resilience, single_flight
+from services.classify_cache import normalize_description
 
 # Ensure .env is loaded before reading keys
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
@@ -24,7 +26,7 @@ load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 logger = logging.getLogger(__name__)
 
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY", "")
-SARVAM_BASE_URL = "https://api.sarvam.ai/v1"
+SARVAM_BASE_URL = os.getenv("SARVAM_BASE_URL", "https://api.sarvam.ai/v1")  # chat API; overridable for local stand-ins
 SARVAM_CHAT_MODEL = os.getenv("SARVAM_CHAT_MODEL", "sarvam-30b")
 
 _ner_chain = []
@@ -295,40 +297,50 @@ _BREVITY_SUFFIX = (
 
 
 async def _extract_sarvam(text: str) -> Optional[dict]:
-    """Extract fields using the Sarvam chat completion API (sovereign)."""
-    if not SARVAM_API_KEY:
+    """Extract fields using the Sarvam chat completion API (sovereign).
+
+    Concurrent calls with the same normalised text share one upstream call
+    (and one unit of the daily quota) — see services/single_flight.py.
+    """
+    if not SARVAM_API_KEY or resilience.is_open("ner"):
         return None
+    key = single_flight.flight_key("ner", normalize_description(text), SARVAM_CHAT_MODEL)
+    return await single_flight.do(key, lambda: _sarvam_ner_call(text))
+
+
+async def _sarvam_ner_call(text: str) -> Optional[dict]:
     if not _limiter.can_call():
         logger.warning(f"Sarvam rate limit hit ({_limiter.calls_today}/{MAX_DAILY})")
         return None
 
     try:
         _limiter.record_call()
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(
-                f"{SARVAM_BASE_URL}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {SARVAM_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": SARVAM_CHAT_MODEL,
-                    "temperature": 0.1,
-                    "max_tokens": 4096,
-                    "messages": [
-                        {"role": "system", "content": SYSTEM_PROMPT + _BREVITY_SUFFIX},
-                        {"role": "user", "content": text},
-                    ],
-                },
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            content = data["choices"][0]["message"].get("content") or ""
-            parsed = _parse_llm_json(content)
-            if parsed:
-                logger.info(f"{SARVAM_CHAT_MODEL} NER extracted {len(parsed)} fields")
-                return _clean_llm_result(parsed)
-            return None
+        resp = await http_pool.post(
+            "ner",
+            f"{SARVAM_BASE_URL}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {SARVAM_API_KEY}",
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": SARVAM_CHAT_MODEL,
+                "temperature": 0.1,
+                "max_tokens": 4096,
+                "messages": [
+                    {"role": "system", "content": SYSTEM_PROMPT + _BREVITY_SUFFIX},
+                    {"role": "user", "content": text},
+                ],
+            },
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        metrics.record_usage("ner", SARVAM_CHAT_MODEL, data.get("usage"))
+        content = data["choices"][0]["message"].get("content") or ""
+        parsed = _parse_llm_json(content)
+        if parsed:
+            logger.info(f"{SARVAM_CHAT_MODEL} NER extracted {len(parsed)} fields")
+            return _clean_llm_result(parsed)
+        return None
     except Exception as e:
         logger.error(f"{SARVAM_CHAT_MODEL} NER error: {e}")
         return None
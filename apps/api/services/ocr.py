@@ -18,6 +18,8 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from services import http_pool
+
 # Ensure .env is loaded regardless of module import order
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 
@@ -395,32 +397,32 @@ def _docint_ocr_sync(file_bytes: bytes, filename: str, language: str) -> str:
 
 async def _extract_fallback_ocr(file_bytes: bytes) -> dict:
     """Secondary OCR engine (prebuilt-read REST): analyze, poll, extract text."""
-    import httpx
-
-    async with httpx.AsyncClient(timeout=90.0) as client:
-        resp = await client.post(
-            f"{OCR_FALLBACK_ENDPOINT}/documentintelligence/documentModels/"
-            f"prebuilt-read:analyze?api-version=2024-11-30",
-            headers={
-                "Ocp-Apim-Subscription-Key": OCR_FALLBACK_KEY,
-                "Content-Type": "application/octet-stream",
-            },
-            content=file_bytes,
-        )
-        resp.raise_for_status()
-        poll_url = resp.headers["Operation-Location"]
-
-        text = ""
-        for _ in range(45):  # ≤ 90s of polling
-            await asyncio.sleep(2)
-            status = (await client.get(
-                poll_url, headers={"Ocp-Apim-Subscription-Key": OCR_FALLBACK_KEY},
-            )).json()
-            if status.get("status") == "succeeded":
-                text = status.get("analyzeResult", {}).get("content", "")
-                break
-            if status.get("status") == "failed":
-                raise ValueError("fallback OCR job failed")
+    resp = await http_pool.post(
+        "ocr_fallback",
+        f"{OCR_FALLBACK_ENDPOINT}/documentintelligence/documentModels/"
+        f"prebuilt-read:analyze?api-version=2024-11-30",
+        headers={
+            "Ocp-Apim-Subscription-Key": OCR_FALLBACK_KEY,
+            "Content-Type": "application/octet-stream",
+        },
+        content=file_bytes,
+    )
+    resp.raise_for_status()
+    poll_url = resp.headers["Operation-Location"]
+
+    # Polls reuse the pooled keep-alive connection instead of re-handshaking.
+    text = ""
+    for _ in range(45):  # ≤ 90s of polling
+        await asyncio.sleep(2)
+        status = (await http_pool.get(
+            "ocr_fallback", poll_url,
+            headers={"Ocp-Apim-Subscription-Key": OCR_FALLBACK_KEY},
+        )).json()
+        if status.get("status") == "succeeded":
+            text = status.get("analyzeResult", {}).get("content", "")
+            break
+        if status.get("status") == "failed":
+            raise ValueError("fallback OCR job failed")
 
     if len(text.strip()) < 40:
         raise ValueError("fallback OCR returned no text")
@@ -466,17 +468,15 @@ async def _extract_sarvam(
     language: str,
 ) -> dict:
     """Call Sarvam Vision 3B API (production path)."""
-    import httpx
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(
-            "https://api.sarvam.ai/vision/extract",
-            headers={"api-subscription-key": SARVAM_API_KEY},
-            files={"file": (filename, file_bytes, "image/jpeg")},
-            data={"language": language, "doc_type": "business_certificate"},
-        )
-        resp.raise_for_status()
-        result = resp.json()
+    resp = await http_pool.post(
+        "ocr",
+        "https://api.sarvam.ai/vision/extract",
+        headers={"api-subscription-key": SARVAM_API_KEY},
+        files={"file": (filename, file_bytes, "image/jpeg")},
+        data={"language": language, "doc_type": "business_certificate"},
+    )
+    resp.raise_for_status()
+    result = resp.json()
 
     return {
         "extracted_fields": result.get("fields", {}),
@@ -0,0 +1,370 @@
+"""Circuit breaking, adaptive concurrency and retries for outbound AI calls.
+
+When Sarvam degrades, every classify / NER / STT / TTS / OCR request used to
+wait out its full 30–45 s read timeout before the service fell back to its
+local engine. Every http_pool request now goes through this layer, keyed by
+upstream ENDPOINT (classify and NER share the Sarvam chat endpoint, so they
+share its health):
+
+  - circuit breaker — CLOSED until BREAKER_FAILURES consecutive failures, or
+    a failure rate >= BREAKER_FAILURE_RATE over the last BREAKER_WINDOW
+    calls (5xx, 429, timeouts, connection errors; other 4xx are the caller's
+    fault and count as healthy). OPEN then fails every call immediately with
+    CircuitOpen for BREAKER_OPEN_S — or longer, if the upstream sent a longer
+    Retry-After. After that one HALF-OPEN probe is let through: success
+    closes the circuit, failure re-opens it.
+  - AIMD concurrency — each endpoint has a concurrency limit that grows by
+    ~1 per limit-many healthy calls and halves on a 429, a 5xx, a timeout or
+    a connection error — and, where AIMD_LATENCY_TARGETS sets one for the
+    endpoint, on a call slower than that target. Latency alone is no
+    congestion signal by default: a 20 s+ sarvam-30b completion is normal.
+    Calls over the limit wait up to AIMD_QUEUE_S for a slot, then fail with
+    ConcurrencyLimited.
+  - retries — connection failures, 429 and 502/503/504 are retried up to
+    RETRY_MAX times with full-jitter exponential backoff; a Retry-After of
+    up to RETRY_AFTER_MAX_S is honoured (plus jitter), a longer one is not
+    waited out — it opens the circuit instead. Read timeouts are never
+    retried: the time is already spent.
+
+CircuitOpen and ConcurrencyLimited are RuntimeErrors raised from
+http_pool.request, so every service's existing `except Exception` fallback
+handles them — an upstream incident now costs milliseconds per request.
+State is per worker process; breaker state is surfaced on /model-health.
+
+Env:
+  BREAKER_FAILURES        consecutive failures that open a circuit (default 5)
+  BREAKER_FAILURE_RATE    failure share over the window that opens it (default 0.5)
+  BREAKER_WINDOW          recent calls considered for the rate (default 20)
+  BREAKER_OPEN_S          how long a circuit stays open (default 30)
+  AIMD_INITIAL_LIMIT      starting concurrency per endpoint (default 8)
+  AIMD_MAX_LIMIT          concurrency ceiling per endpoint (default 64)
+  AIMD_QUEUE_S            wait for a concurrency slot before failing (default 2)
+  AIMD_LATENCY_TARGETS    per-endpoint latency targets, "endpoint=seconds,..."
+                          e.g. "sarvam-tts=8,sarvam-stt=15" (default none)
+  RETRY_MAX               retries per request (default 2)
+  RETRY_AFTER_MAX_S       longest Retry-After still waited out (default 5)
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = 10  # the rate rule needs this many outcomes first
+BREAKER_OPEN_S = float(os.getenv("BREAKER_OPEN_S", "30"))
+
+AIMD_INITIAL_LIMIT = float(os.getenv("AIMD_INITIAL_LIMIT", "8"))
+AIMD_MIN_LIMIT = 1.0
+AIMD_MAX_LIMIT = float(os.getenv("AIMD_MAX_LIMIT", "64"))
+AIMD_QUEUE_S = float(os.getenv("AIMD_QUEUE_S", "2"))
+
+RETRY_MAX = int(os.getenv("RETRY_MAX", "2"))
+RETRY_BASE_S = 0.25
+RETRY_CAP_S = 4.0
+RETRY_AFTER_MAX_S = float(os.getenv("RETRY_AFTER_MAX_S", "5"))
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+_RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+# http_pool service tag -> upstream endpoint
+SERVICE_ENDPOINTS = {
+    "classify": "sarvam-chat",
+    "ner": "sarvam-chat",
+    "stt": "sarvam-stt",
+    "tts": "sarvam-tts",
+    "ocr": "sarvam-vision",
+    "stt_fallback": "azure-speech",
+    "ocr_fallback": "azure-docintel",
+}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def _parse_latency_targets(raw: str) -> dict[str, float]:
+    targets: dict[str, float] = {}
+    for item in raw.split(","):
+        name, _, seconds = item.partition("=")
+        try:
+            targets[name.strip()] = float(seconds)
+        except ValueError:
+            if item.strip():
+                logger.warning(f"Ignoring AIMD latency target {item.strip()!r}")
+    return targets
+
+
+AIMD_LATENCY_TARGETS = _parse_latency_targets(os.getenv("AIMD_LATENCY_TARGETS", ""))
+
+
+class UpstreamUnavailable(RuntimeError):
+    """The endpoint was not called — use the local fallback."""
+
+
+class CircuitOpen(UpstreamUnavailable):
+    pass
+
+
+class ConcurrencyLimited(UpstreamUnavailable):
+    pass
+
+
+def endpoint_for(service: str) -> str:
+    return SERVICE_ENDPOINTS.get(service, service)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds from now (delta-seconds or HTTP-date form)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _Endpoint:
+    def __init__(self, name: str):
+        self.name = name
+        # breaker
+        self.state = CLOSED
+        self.outcomes: deque[bool] = deque(maxlen=BREAKER_WINDOW)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.probing = False
+        self.times_opened = 0
+        self.fast_failed = 0
+        # AIMD
+        self.limit = AIMD_INITIAL_LIMIT
+        self.in_flight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.limited = 0
+        self.throttled = 0
+        # retries
+        self.retries = 0
+
+    # ── breaker ──
+
+    def admit(self) -> bool:
+        """Raise CircuitOpen unless a call may go out; True if it is the probe."""
+        if self.state == OPEN:
+            if time.monotonic() < self.open_until:
+                self.fast_failed += 1
+                raise CircuitOpen(f"{self.name} circuit open ({self.open_until - time.monotonic():.0f}s left)")
+            self.state = HALF_OPEN
+            logger.info(f"Circuit {self.name} half-open — probing")
+        if self.state == HALF_OPEN:
+            if self.probing:
+                self.fast_failed += 1
+                raise CircuitOpen(f"{self.name} circuit half-open, probe in flight")
+            self.probing = True
+            return True
+        return False
+
+    def record(self, ok: bool, probe: bool, retry_after: Optional[float] = None) -> None:
+        if probe:
+            self.probing = False
+        self.outcomes.append(ok)
+        if ok:
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self.outcomes.clear()
+                logger.info(f"Circuit {self.name} closed")
+            return
+        self.consecutive_failures += 1
+        failures = self.outcomes.count(False)
+        tripped = (
+            self.state == HALF_OPEN
+            or self.consecutive_failures >= BREAKER_FAILURES
+            or (len(self.outcomes) >= BREAKER_MIN_CALLS
+                and failures / len(self.outcomes) >= BREAKER_FAILURE_RATE)
+            or (retry_after is not None and retry_after > RETRY_AFTER_MAX_S)
+        )
+        if tripped:
+            self.trip(max(BREAKER_OPEN_S, retry_after or 0.0))
+
+    def trip(self, open_s: float) -> None:
+        if self.state != OPEN:
+            self.times_opened += 1
+        self.state = OPEN
+        self.open_until = max(self.open_until, time.monotonic() + open_s)
+        logger.warning(f"Circuit {self.name} OPEN for {open_s:.0f}s — failing fast to local fallbacks")
+
+    def release_probe(self) -> None:
+        """A probe that ended without an outcome (cancelled) frees the slot."""
+        self.probing = False
+
+    # ── AIMD concurrency ──
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop, self.in_flight, self.waiters = loop, 0, deque()
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+        fut = loop.create_future()
+        self.waiters.append(fut)
+        try:
+            await asyncio.wait((fut,), timeout=AIMD_QUEUE_S)
+        except asyncio.CancelledError:
+            # release() may already have handed this waiter a slot
+            if fut.done():
+                self.release()
+            else:
+                fut.cancel()
+            raise
+        if not fut.done():
+            fut.cancel()
+            self.limited += 1
+            raise ConcurrencyLimited(
+                f"{self.name} at its concurrency limit ({int(self.limit)}) for {AIMD_QUEUE_S}s"
+            )
+
+    def release(self) -> None:
+        self.in_flight = max(0, self.in_flight - 1)
+        while self.waiters and self.in_flight < int(self.limit):
+            fut = self.waiters.popleft()
+            if not fut.done():
+                self.in_flight += 1
+                fut.set_result(None)
+
+    def adapt(self, congested: bool) -> None:
+        if congested:
+            self.limit = max(AIMD_MIN_LIMIT, self.limit / 2)
+        else:
+            self.limit = min(AIMD_MAX_LIMIT, self.limit + 1 / self.limit)
+
+    def stats(self) -> dict:
+        failures = self.outcomes.count(False)
+        return {
+            "state": self.state,
+            "open_for_s": round(max(0.0, self.open_until - time.monotonic()), 1) if self.state == OPEN else 0.0,
+            "times_opened": self.times_opened,
+            "fast_failed": self.fast_failed,
+            "consecutive_failures": self.consecutive_failures,
+            "window_failure_rate": round(failures / len(self.outcomes), 4) if self.outcomes else None,
+            "concurrency_limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "concurrency_limited": self.limited,
+            "throttled_429": self.throttled,
+            "retries": self.retries,
+        }
+
+
+_endpoints: dict[str, _Endpoint] = {}
+
+
+def _endpoint(name: str) -> _Endpoint:
+    ep = _endpoints.get(name)
+    if ep is None:
+        ep = _endpoints.setdefault(name, _Endpoint(name))
+    return ep
+
+
+def is_open(service: str) -> bool:
+    """True while the service's circuit is open and still cooling down —
+    callers can skip straight to their local fallback."""
+    ep = _endpoints.get(endpoint_for(service))
+    return ep is not None and ep.state == OPEN and time.monotonic() < ep.open_until
+
+
+def _backoff(attempt: int) -> float:
+    """Full jitter: uniform over [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(RETRY_CAP_S, RETRY_BASE_S * 2 ** attempt))
+
+
+async def call(
+    service: str,
+    send: Callable[[], Awaitable[httpx.Response]],
+) -> httpx.Response:
+    """Send through the endpoint's breaker, concurrency limit and retry policy.
+
+    Returns the final response (possibly an error status — callers keep their
+    raise_for_status handling) or raises the final transport error,
+    CircuitOpen or ConcurrencyLimited.
+    """
+    ep = _endpoint(endpoint_for(service))
+    attempt = 0
+    while True:
+        probe = ep.admit()
+        try:
+            await ep.acquire()
+        except BaseException:
+            if probe:
+                ep.release_probe()
+            raise
+        started = time.monotonic()
+        resp: Optional[httpx.Response] = None
+        error: Optional[Exception] = None
+        try:
+            resp = await send()
+        except Exception as e:
+            error = e
+        except BaseException:
+            if probe:
+                ep.release_probe()
+            raise
+        finally:
+            ep.release()
+        elapsed = time.monotonic() - started
+
+        retry_after = None
+        if error is not None:
+            ok = False
+            congested = True  # timeout or connection failure
+            retryable = isinstance(error, _RETRY_ERRORS)
+        else:
+            throttled = resp.status_code == 429
+            ep.throttled += throttled
+            ok = resp.status_code < 500 and not throttled
+            target = AIMD_LATENCY_TARGETS.get(ep.name)
+            congested = not ok or (target is not None and elapsed > target)
+            retryable = resp.status_code in RETRY_STATUSES
+            if resp.status_code in (429, 503):
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+        ep.record(ok, probe, retry_after)
+        ep.adapt(congested)
+
+        if ok or not retryable or attempt >= RETRY_MAX or ep.state != CLOSED:
+            if error is not None:
+                raise error
+            return resp
+        if retry_after is not None:
+            if retry_after > RETRY_AFTER_MAX_S:
+                return resp
+            delay = retry_after + random.uniform(0, RETRY_BASE_S)
+        else:
+            delay = _backoff(attempt)
+        attempt += 1
+        ep.retries += 1
+        logger.info(f"{ep.name}: retry {attempt}/{RETRY_MAX} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+
+def stats() -> dict:
+    """Breaker / concurrency / retry state per endpoint (surfaced on /model-health)."""
+    return {
+        "endpoints": {name: ep.stats() for name, ep in sorted(_endpoints.items())},
+        "open": sorted(name for name, ep in _endpoints.items() if ep.state == OPEN),
+        "config": {
+            "breaker_failures": BREAKER_FAILURES,
+            "breaker_failure_rate": BREAKER_FAILURE_RATE,
+            "breaker_open_s": BREAKER_OPEN_S,
+            "aimd_max_limit": int(AIMD_MAX_LIMIT),
+            "retry_max": RETRY_MAX,
+        },
+    }
@@ -0,0 +1,198 @@
+"""Single-flight coalescing for identical in-flight Sarvam calls.
+
+An officer and the MSE owner opening the same profile, or a client retrying
+a slow request, sends the same description to Sarvam several times at once.
+Each copy waits the same 5–40 s and burns quota (ner.MAX_DAILY). Here the
+first caller for a key becomes the LEADER and makes the call; everyone else
+with the same key waits for the leader's result instead:
+
+  1. In-process — followers in the same worker await the leader's future.
+  2. Across workers — the leader holds a short Redis lease
+     (SET NX EX) and publishes its result under a result key. A worker that
+     finds the lease taken polls for that result until the lease ends, then
+     runs the call itself if no result appeared (leader crashed or timed out).
+     A leader whose call fails, is cancelled or returns None (the Sarvam
+     helpers' soft failure) releases the lease at once without publishing.
+
+Fails soft: without Redis only the in-process tier applies. Results travel
+as JSON, so every follower gets its own copy to mutate.
+
+Env:
+  SINGLE_FLIGHT_LEASE_S   lease / result lifetime, must exceed the slowest
+                          upstream timeout (default 45)
+  SINGLE_FLIGHT_POLL_MS   cross-worker result poll interval (default 200)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+LEASE_S = int(os.getenv("SINGLE_FLIGHT_LEASE_S", "45"))
+POLL_S = int(os.getenv("SINGLE_FLIGHT_POLL_MS", "200")) / 1000
+_PREFIX = "sf:"
+
+_inflight: dict[str, asyncio.Future] = {}
+_stats = {"leaders": 0, "local_joins": 0, "remote_joins": 0, "lease_expired": 0, "redis_errors": 0}
+
+
+def flight_key(namespace: str, *parts: str) -> str:
+    raw = "\x1f".join(parts)
+    return f"{namespace}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+# ── Redis lease (sync client, called via asyncio.to_thread) ──────────
+
+def _acquire_lease(key: str) -> Optional[bool]:
+    """True if this worker holds the lease, False if another does, None without Redis."""
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        return bool(r.set(f"{_PREFIX}lease:{key}", "1", nx=True, ex=LEASE_S))
+    except Exception as e:
+        _stats["redis_errors"] += 1
+        logger.warning(f"Single-flight lease failed: {e}")
+        return None
+
+
+def _publish(key: str, raw: str) -> None:
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        pipe = r.pipeline()
+        pipe.set(f"{_PREFIX}result:{key}", raw, ex=LEASE_S)
+        pipe.delete(f"{_PREFIX}lease:{key}")
+        pipe.execute()
+    except Exception as e:
+        _stats["redis_errors"] += 1
+        logger.warning(f"Single-flight publish failed: {e}")
+
+
+def _release_lease(key: str) -> None:
+    """Drop the lease after a failed or cancelled call, so other workers'
+    followers stop waiting for a result that will never come."""
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        r.delete(f"{_PREFIX}lease:{key}")
+    except Exception as e:
+        _stats["redis_errors"] += 1
+        logger.warning(f"Single-flight lease release failed: {e}")
+
+
+def _peek(key: str) -> tuple[Optional[str], bool]:
+    """(published result or None, lease still held)."""
+    r = get_redis()
+    if r is None:
+        return None, False
+    try:
+        pipe = r.pipeline()
+        pipe.get(f"{_PREFIX}result:{key}")
+        pipe.exists(f"{_PREFIX}lease:{key}")
+        raw, held = pipe.execute()
+        return raw, bool(held)
+    except Exception as e:
+        _stats["redis_errors"] += 1
+        logger.warning(f"Single-flight poll failed: {e}")
+        return None, False
+
+
+async def _await_remote(key: str) -> Optional[str]:
+    """Wait for another worker's result; None if its lease ends without one."""
+    deadline = time.monotonic() + LEASE_S
+    while time.monotonic() < deadline:
+        await asyncio.sleep(POLL_S)
+        raw, held = await asyncio.to_thread(_peek, key)
+        if raw is not None:
+            return raw
+        if not held:
+            break
+    _stats["lease_expired"] += 1
+    return None
+
+
+# ── Public entry point ────────────────────────────────────────────────
+
+async def do(
+    key: str,
+    fn: Callable[[], Awaitable[Any]],
+    encode: Callable[[Any], Any] = lambda v: v,
+    decode: Callable[[Any], Any] = lambda v: v,
+) -> Any:
+    """Run fn() once per key across concurrent callers and return its result.
+
+    encode/decode map the result to and from a JSON-serialisable form (tuples
+    and TypedDicts need it); every caller receives a decoded fresh copy.
+    """
+    loop = asyncio.get_running_loop()
+    fut = _inflight.get(key)
+    if fut is not None and fut.get_loop() is loop:
+        _stats["local_joins"] += 1
+        try:
+            raw = await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            if fut.cancelled():  # the leader was cancelled, not us — take over
+                return await do(key, fn, encode, decode)
+            raise
+        return decode(json.loads(raw))
+
+    fut = loop.create_future()
+    _inflight[key] = fut
+    leased = False
+    try:
+        raw = None
+        leased = await asyncio.to_thread(_acquire_lease, key)
+        if leased is False:
+            raw = await _await_remote(key)
+            if raw is not None:
+                _stats["remote_joins"] += 1
+        if raw is None:
+            _stats["leaders"] += 1
+            value = await fn()
+            raw = json.dumps(encode(value), ensure_ascii=False)
+            if value is None:
+                # a soft failure (quota, upstream error): remote followers make
+                # their own call or take their local chain, not our None
+                await asyncio.to_thread(_release_lease, key)
+            else:
+                await asyncio.to_thread(_publish, key, raw)
+        fut.set_result(raw)
+        return decode(json.loads(raw))
+    except asyncio.CancelledError:
+        fut.cancel()
+        if leased:
+            # shielded: the release still runs if this task is cancelled again
+            await asyncio.shield(asyncio.to_thread(_release_lease, key))
+        raise
+    except Exception as e:
+        if leased:
+            await asyncio.to_thread(_release_lease, key)
+        if not fut.done():
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved — followers may not exist
+        raise
+    finally:
+        if _inflight.get(key) is fut:
+            del _inflight[key]
+
+
+def stats() -> dict:
+    """Coalescing counters for this worker (surfaced on /model-health)."""
+    joins = _stats["local_joins"] + _stats["remote_joins"]
+    calls = _stats["leaders"] + joins
+    return {
+        **_stats,
+        "in_flight": len(_inflight),
+        "calls_saved_ratio": round(joins / calls, 4) if calls else None,
+        "lease_s": LEASE_S,
+    }
@@ -0,0 +1,248 @@
+"""SNP registry snapshot — the seller registry every consumer reads.
+
+/match loaded every `snps` row as a full ORM object on each call, the
+clusters insight rescanned snps.geo_coverage per request, and capacity came
+from a separate file cache. The registry now lives in one immutable
+RegistrySnapshot per worker: compact __slots__ SnpRecords, the capacity
+map, the compiled SnpFeatures the matcher scores (services/matcher.py) with
+its inverted geo-coverage index (services/geo.py), and a content-hash
+version. Requests read the installed snapshot — no registry query on the
+request path.
+
+A new snapshot is built off the request path and installed with a single
+assignment, so a request sees one registry version throughout. It is
+rebuilt when:
+  - a writer publishes a change (publish_change, or POST
+    /model-health/snp-registry/reload): every worker rebuilds on the Redis
+    notice, received by the classifier's watcher thread;
+  - the registry's content digest moves — edits made straight in the DB
+    (seed scripts, Supabase console) — checked every SNP_REGISTRY_POLL_S
+    by the same watcher thread, on its own interval (the taxonomy poll
+    being disabled does not stop it; <= 0 disables this check only);
+  - snp_capacity.json changes: checked by stat on every read and applied
+    to the installed rows without a DB round-trip.
+
+Fails soft: a failed rebuild keeps serving the previous snapshot.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+from services.matcher import SnpFeatures, capacity_file
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_CHANNEL = "jodak:snp-registry"
+POLL_S = int(os.getenv("SNP_REGISTRY_POLL_S", "300"))
+
+_FIELDS = ("id", "name", "subscriber_id", "domain_codes", "geo_coverage", "commission_pct",
+           "min_order_value", "languages_supported", "rating", "onboarding_support")
+
+
+class SnpRecord:
+    """One registry row, detached from any session. Carries the SNP model's
+    scored and displayed columns, so the matcher, explainer and claim rules
+    take it in place of an ORM row."""
+
+    __slots__ = _FIELDS
+
+    def __init__(self, **values: Any):
+        for name in _FIELDS:
+            setattr(self, name, values.get(name))
+
+    def astuple(self) -> tuple:
+        return tuple(getattr(self, name) for name in _FIELDS)
+
+    def __repr__(self) -> str:
+        return f"SnpRecord(id={self.id}, subscriber_id={self.subscriber_id!r})"
+
+
+@dataclass(frozen=True)
+class RegistrySnapshot:
+    version: str                          # content hash of rows + capacity
+    fingerprint: Optional[tuple]          # (row count, content digest)
+    capacity_stamp: tuple                 # snp_capacity.json (mtime, size)
+    records: tuple[SnpRecord, ...]        # ordered by id
+    by_id: Mapping[int, SnpRecord]
+    rows: Mapping[int, int]               # SNP id -> position in records / features
+    capacity: Mapping[str, list]          # subscriber_id -> [capacity, onboarding days]
+    features: SnpFeatures                 # scoring arrays, row-aligned with records
+    built_at: float
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, snp_id: Optional[int]) -> Optional[SnpRecord]:
+        return self.by_id.get(snp_id)
+
+    def serving_state(self, state: Optional[str]) -> list[SnpRecord]:
+        """SNPs whose declared coverage includes the state (named, or pan-India)."""
+        return [self.records[i] for i in sorted(self.features.coverage.serving_state(state))]
+
+    def serves_state(self, snp_id: Optional[int], state: Optional[str]) -> Optional[bool]:
+        """Whether the SNP's declared coverage includes the state; None for
+        an SNP this snapshot does not hold."""
+        row = self.rows.get(snp_id)
+        if row is None:
+            return None
+        return row in self.features.coverage.serving_state(state)
+
+
+_snapshot: Optional[RegistrySnapshot] = None
+_lock = threading.Lock()
+_stats = {"builds": 0, "capacity_reloads": 0, "refresh_errors": 0}
+
+
+def _fingerprint(db) -> tuple:
+    """Content digest of every scored or displayed column — same-length
+    edits included (RET10 → RET12)."""
+    from database import SNP, content_fingerprint
+
+    return content_fingerprint(db, [getattr(SNP, name) for name in _FIELDS], SNP.id)
+
+
+def _make_snapshot(
+    records: tuple[SnpRecord, ...], fingerprint: Optional[tuple], stamp: tuple, capacity: dict,
+) -> RegistrySnapshot:
+    digest = hashlib.sha256(json.dumps([r.astuple() for r in records], default=str).encode("utf-8"))
+    digest.update(json.dumps(capacity, sort_keys=True, default=str).encode("utf-8"))
+    _stats["builds"] += 1
+    return RegistrySnapshot(
+        version=digest.hexdigest()[:12],
+        fingerprint=fingerprint,
+        capacity_stamp=stamp,
+        records=records,
+        by_id=MappingProxyType({r.id: r for r in records}),
+        rows=MappingProxyType({r.id: i for i, r in enumerate(records)}),
+        capacity=MappingProxyType(capacity),
+        features=SnpFeatures(list(records), capacity),
+        built_at=time.time(),
+    )
+
+
+def _load(db) -> RegistrySnapshot:
+    """Read the registry with a column query (no ORM objects) and compile it."""
+    from database import SNP
+
+    fingerprint = _fingerprint(db)
+    rows = db.query(*(getattr(SNP, name) for name in _FIELDS)).order_by(SNP.id).all()
+    stamp, capacity = capacity_file()
+    snap = _make_snapshot(tuple(SnpRecord(**row._mapping) for row in rows), fingerprint, stamp, capacity)
+    logger.info(f"SNP registry loaded: {len(snap)} SNPs (version {snap.version})")
+    return snap
+
+
+def _load_fresh() -> RegistrySnapshot:
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return _load(db)
+    finally:
+        db.close()
+
+
+def current(db=None) -> RegistrySnapshot:
+    """The installed snapshot, built on first use (from `db` when given —
+    the request's session — otherwise a fresh one)."""
+    global _snapshot
+    snap = _snapshot
+    if snap is None:
+        with _lock:
+            if _snapshot is None:
+                _snapshot = _load(db) if db is not None else _load_fresh()
+            snap = _snapshot
+    stamp, capacity = capacity_file()
+    if stamp != snap.capacity_stamp:
+        fresh = _make_snapshot(snap.records, snap.fingerprint, stamp, capacity)
+        with _lock:
+            if _snapshot is snap:
+                _snapshot = fresh
+                _stats["capacity_reloads"] += 1
+                logger.info(f"SNP registry capacity reloaded: {snap.version} → {fresh.version}")
+            snap = _snapshot
+    return snap
+
+
+def refresh(force: bool = False) -> bool:
+    """Rebuild and swap the snapshot if the registry changed (or always,
+    with force). A worker that has not served the registry yet builds it on
+    first read instead. Returns True when a new version was installed."""
+    global _snapshot
+    installed = _snapshot
+    if installed is None and not force:
+        return False
+    try:
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            if not force and _fingerprint(db) == installed.fingerprint:
+                return False
+            fresh = _load(db)
+        finally:
+            db.close()
+    except Exception as e:
+        _stats["refresh_errors"] += 1
+        logger.warning(f"SNP registry refresh failed ({e}) — keeping {installed.version if installed else None}")
+        return False
+    with _lock:
+        _snapshot = fresh  # also records a moved fingerprint with unchanged content
+    if installed is not None and fresh.version == installed.version:
+        return False
+    logger.info(f"SNP registry swapped: {installed.version if installed else None} → {fresh.version}")
+    return True
+
+
+def invalidate() -> None:
+    """Drop the snapshot; the next read rebuilds it."""
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+def publish_change() -> bool:
+    """Tell every worker to rebuild now instead of at its next poll."""
+    from redis_client import get_redis
+    r = get_redis()
+    if r is None:
+        return False
+    try:
+        snap = _snapshot
+        r.publish(REGISTRY_CHANNEL, snap.version if snap else "")
+        return True
+    except Exception as e:
+        logger.warning(f"SNP registry change publish failed: {e}")
+        return False
+
+
+def handle_message(data) -> None:
+    """A change notice from another worker (taxonomy watcher thread)."""
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    snap = _snapshot
+    if snap is not None and data != snap.version:
+        refresh(force=True)
+
+
+def stats() -> dict:
+    snap = _snapshot
+    if snap is None:
+        return {"loaded": False, **_stats}
+    return {
+        "loaded": True,
+        "version": snap.version,
+        "snps": len(snap),
+        "capacity_entries": len(snap.capacity),
+        "coverage_tokens": len(snap.features.coverage),
+        "built_at": datetime.utcfromtimestamp(snap.built_at).isoformat(),
+        **_stats,
+    }
@@ -8,6 +8,8 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from services import http_pool
+
 # Ensure .env is loaded before reading keys
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 
@@ -254,8 +256,6 @@ async def _transcribe_sarvam(
     content_type: str = "audio/webm",
 ) -> dict:
     """Call Sarvam Saras STT API."""
-    import httpx
-
     lang_map = {
         "en": "en-IN", "hi": "hi-IN", "ta": "ta-IN", "te": "te-IN",
         "kn": "kn-IN", "bn": "bn-IN", "mr": "mr-IN", "gu": "gu-IN",
@@ -276,20 +276,20 @@ async def _transcribe_sarvam(
         send_type = content_type
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(
-                "https://api.sarvam.ai/speech-to-text",
-                headers={"api-subscription-key": SARVAM_API_KEY},
-                files={"file": (send_name, send_bytes, send_type)},
-                data={
-                    "language_code": lang_code,
-                    "model": "saarika:v2.5",
-                },
-            )
-            if resp.status_code != 200:
-                logger.error(f"Sarvam STT HTTP {resp.status_code}: {resp.text[:500]}")
-                resp.raise_for_status()
-            result = resp.json()
+        resp = await http_pool.post(
+            "stt",
+            "https://api.sarvam.ai/speech-to-text",
+            headers={"api-subscription-key": SARVAM_API_KEY},
+            files={"file": (send_name, send_bytes, send_type)},
+            data={
+                "language_code": lang_code,
+                "model": "saarika:v2.5",
+            },
+        )
+        if resp.status_code != 200:
+            logger.error(f"Sarvam STT HTTP {resp.status_code}: {resp.text[:500]}")
+            resp.raise_for_status()
+        result = resp.json()
 
         transcript = result.get("transcript", "")
         logger.info(f"Sarvam STT result: '{transcript[:100]}' (confidence={result.get('confidence', 0)})")
@@ -317,8 +317,6 @@ async def _transcribe_fallback(
     """Secondary STT engine (fast-transcription REST). Returns None on failure."""
     import json
 
-    import httpx
-
     lang_map = {
         "en": "en-IN", "hi": "hi-IN", "ta": "ta-IN", "te": "te-IN",
         "kn": "kn-IN", "bn": "bn-IN", "mr": "mr-IN", "gu": "gu-IN",
@@ -326,18 +324,18 @@ async def _transcribe_fallback(
     locale = lang_map.get(language, "en-IN")
 
     try:
-        async with httpx.AsyncClient(timeout=45.0) as client:
-            resp = await client.post(
-                f"https://{STT_FALLBACK_REGION}.api.cognitive.microsoft.com"
-                f"/speechtotext/transcriptions:transcribe?api-version=2024-11-15",
-                headers={"Ocp-Apim-Subscription-Key": STT_FALLBACK_KEY},
-                files={
-                    "audio": (filename, audio_bytes, content_type),
-                    "definition": (None, json.dumps({"locales": [locale]}), "application/json"),
-                },
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await http_pool.post(
+            "stt_fallback",
+            f"https://{STT_FALLBACK_REGION}.api.cognitive.microsoft.com"
+            f"/speechtotext/transcriptions:transcribe?api-version=2024-11-15",
+            headers={"Ocp-Apim-Subscription-Key": STT_FALLBACK_KEY},
+            files={
+                "audio": (filename, audio_bytes, content_type),
+                "definition": (None, json.dumps({"locales": [locale]}), "application/json"),
+            },
+        )
+        resp.raise_for_status()
+        data = resp.json()
         text = " ".join(p.get("text", "") for p in data.get("combinedPhrases", [])).strip()
         if not text:
             return None
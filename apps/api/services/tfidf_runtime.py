@@ -0,0 +1,400 @@
+"""Lean runtime for the VargBot TF-IDF + LogisticRegression domain model.
+
+The served joblib is a sklearn Pipeline (v1: one word TfidfVectorizer; v2: a
+word + char_wb FeatureUnion) feeding a LogisticRegression. At batch size 1
+most of predict_proba is sklearn machinery rather than arithmetic: input
+validation, a CountVectorizer -> TfidfTransformer pass per vectorizer,
+sparse-matrix construction, hstack, then a dense decision function.
+
+export_lean() flattens the fitted pipeline into plain arrays: for each
+vectorizer, its vocabulary (in column order) and idf weights, plus the
+coefficient matrix transposed so that one feature's weights across all
+classes sit in one contiguous row. LeanTfidf reproduces each vectorizer's
+analyzer exactly, scores a description by gathering only the rows of the
+n-grams it contains, and applies the same softmax. Probabilities match
+the joblib model to floating-point precision (tests/test_services/
+test_tfidf_runtime.py checks this).
+
+Artifact: <model>.lean.npz next to the joblib, produced by
+ml/export_vargbot_tfidf_lean.py.
+"""
+
+import json
+import hashlib
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+FORMAT = "vargbot-tfidf-lean/1"
+
+# sklearn's internal whitespace folding for char_wb (text._white_spaces)
+_WHITE_SPACES = re.compile(r"\s\s+")
+
+
+# ── Export (needs sklearn; runs at build time, never on the request path) ──
+
+def _vectorizers(pipeline) -> list:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.pipeline import FeatureUnion
+
+    features = pipeline.steps[0][1]
+    if isinstance(features, TfidfVectorizer):
+        return [features]
+    if isinstance(features, FeatureUnion):
+        if features.transformer_weights:
+            raise ValueError("FeatureUnion transformer_weights are not supported")
+        return [v for _, v in features.transformer_list]
+    raise ValueError(f"unsupported feature step: {type(features).__name__}")
+
+
+def _block_config(vec) -> dict:
+    unsupported = {
+        "preprocessor": vec.preprocessor, "tokenizer": vec.tokenizer,
+        "stop_words": vec.stop_words, "strip_accents": vec.strip_accents,
+    }
+    for name, value in unsupported.items():
+        if value is not None:
+            raise ValueError(f"TfidfVectorizer.{name}={value!r} is not supported")
+    if vec.analyzer not in ("word", "char_wb", "char") or vec.binary:
+        raise ValueError(f"unsupported analyzer {vec.analyzer!r} / binary={vec.binary}")
+    if vec.norm not in ("l2", None):
+        raise ValueError(f"unsupported norm {vec.norm!r}")
+    return {
+        "analyzer": vec.analyzer,
+        "ngram_range": list(vec.ngram_range),
+        "lowercase": bool(vec.lowercase),
+        "token_pattern": vec.token_pattern,
+        "sublinear_tf": bool(vec.sublinear_tf),
+        "use_idf": bool(vec.use_idf),
+        "norm": vec.norm,
+    }
+
+
+def export_lean(pipeline, path: Path) -> Path:
+    """Write the fitted pipeline's arrays to an .npz the runtime can load."""
+    clf = pipeline.steps[-1][1]
+    blocks = _vectorizers(pipeline)
+    arrays: dict[str, np.ndarray] = {}
+    configs = []
+    for i, vec in enumerate(blocks):
+        configs.append(_block_config(vec))
+        terms = np.empty(len(vec.vocabulary_), dtype=object)
+        for term, col in vec.vocabulary_.items():
+            terms[col] = term
+        arrays[f"b{i}_terms"] = terms.astype(str)
+        arrays[f"b{i}_idf"] = (
+            np.asarray(vec.idf_, dtype=np.float64) if vec.use_idf
+            else np.ones(len(terms), dtype=np.float64)
+        )
+    coef = np.asarray(clf.coef_, dtype=np.float64)
+    meta = {
+        "format": FORMAT,
+        "classes": [str(c) for c in clf.classes_],
+        "blocks": configs,
+        "binary": coef.shape[0] == 1,
+    }
+    arrays["coef_t"] = np.ascontiguousarray(coef.T)
+    arrays["intercept"] = np.asarray(clf.intercept_, dtype=np.float64)
+    arrays["meta"] = np.array(json.dumps(meta))
+    path = Path(path)
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+    return path
+
+
+# ── Runtime (numpy only) ─────────────────────────────────────────────
+
+class _Analyzer:
+    """Exactly sklearn's build_analyzer() output for one vectorizer config."""
+    __slots__ = ("analyzer", "min_n", "max_n", "lowercase", "token_re", "sublinear", "norm")
+
+    def __init__(self, cfg: dict):
+        self.analyzer = cfg["analyzer"]
+        self.min_n, self.max_n = cfg["ngram_range"]
+        self.lowercase = cfg["lowercase"]
+        self.token_re = re.compile(cfg["token_pattern"]) if cfg["analyzer"] == "word" else None
+        self.sublinear = cfg["sublinear_tf"]
+        self.norm = cfg["norm"]
+
+    def ngrams(self, text: str) -> list[str]:
+        if self.lowercase:
+            text = text.lower()
+        min_n, max_n = self.min_n, self.max_n
+        if self.analyzer == "word":
+            tokens = self.token_re.findall(text)
+            if max_n == 1:
+                return tokens
+            grams = list(tokens) if min_n == 1 else []
+            n_tok = len(tokens)
+            for n in range(max(min_n, 2), min(max_n + 1, n_tok + 1)):
+                for i in range(n_tok - n + 1):
+                    grams.append(" ".join(tokens[i:i + n]))
+            return grams
+
+        text = _WHITE_SPACES.sub(" ", text)
+        grams = []
+        if self.analyzer == "char":
+            text_len = len(text)
+            if min_n == 1:
+                grams = list(text)
+                min_n += 1
+            for n in range(min_n, min(max_n + 1, text_len + 1)):
+                for i in range(text_len - n + 1):
+                    grams.append(text[i:i + n])
+            return grams
+
+        for w in text.split():  # char_wb
+            w = f" {w} "
+            w_len = len(w)
+            for n in range(min_n, max_n + 1):
+                offset = 0
+                grams.append(w[offset:offset + n])
+                while offset + n < w_len:
+                    offset += 1
+                    grams.append(w[offset:offset + n])
+                if offset == 0:  # short word counted once
+                    break
+        return grams
+
+    def weigh(self, counts: np.ndarray, idf: np.ndarray) -> np.ndarray:
+        """Raw term counts -> the vectorizer's normalised tf-idf weights."""
+        vals = counts.astype(np.float64)
+        if self.sublinear:
+            vals = np.log(vals) + 1.0
+        vals *= idf
+        if self.norm == "l2":
+            vals /= np.sqrt(np.dot(vals, vals))
+        return vals
+
+
+def _softmax_proba(decision: np.ndarray, binary: bool) -> np.ndarray:
+    if binary:
+        p1 = 1.0 / (1.0 + np.exp(-decision[0]))
+        return np.array([1.0 - p1, p1])
+    decision = decision - decision.max()
+    np.exp(decision, out=decision)
+    decision /= decision.sum()
+    return decision
+
+
+class _Block:
+    __slots__ = ("analyzer", "vocab", "idf", "offset")
+
+    def __init__(self, cfg: dict, terms: np.ndarray, idf: np.ndarray, offset: int):
+        self.analyzer = _Analyzer(cfg)
+        self.vocab = {t: i for i, t in enumerate(terms.tolist())}
+        self.idf = idf
+        self.offset = offset
+
+    def features(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+        """(global column indices, tf-idf weights) of one document."""
+        counts = Counter()
+        vocab = self.vocab
+        for g in self.analyzer.ngrams(text):
+            col = vocab.get(g)
+            if col is not None:
+                counts[col] += 1
+        if not counts:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+        cols = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        return cols + self.offset, self.analyzer.weigh(tf, self.idf[cols])
+
+
+class LeanTfidf:
+    """Single-description scorer equivalent to the exported pipeline."""
+
+    def __init__(self, path: Path):
+        with np.load(Path(path), allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            if meta.get("format") != FORMAT:
+                raise ValueError(f"unknown artifact format {meta.get('format')!r}")
+            self.classes_ = np.array(meta["classes"])
+            self._binary = meta["binary"]
+            self._coef_t = z["coef_t"]
+            self._intercept = z["intercept"]
+            self._blocks = []
+            offset = 0
+            for i, cfg in enumerate(meta["blocks"]):
+                terms = z[f"b{i}_terms"]
+                self._blocks.append(_Block(cfg, terms, z[f"b{i}_idf"], offset))
+                offset += len(terms)
+        if offset != self._coef_t.shape[0]:
+            raise ValueError(f"vocabulary size {offset} != coefficient rows {self._coef_t.shape[0]}")
+
+    def predict_proba_one(self, text: str) -> np.ndarray:
+        decision = self._intercept.copy()
+        for block in self._blocks:
+            cols, vals = block.features(text)
+            if len(cols):
+                decision += vals @ self._coef_t[cols]
+        return _softmax_proba(decision, self._binary)
+
+    def predict_proba(self, texts: list[str]) -> np.ndarray:
+        return np.vstack([self.predict_proba_one(t) for t in texts])
+
+
+def lean_path_for(joblib_path: Path) -> Path:
+    """models/vargbot_tfidf_v2.joblib -> models/vargbot_tfidf_v2.lean.npz"""
+    return joblib_path.with_suffix(".lean.npz")
+
+
+def load_lean(path: Path) -> Optional[LeanTfidf]:
+    return LeanTfidf(path) if Path(path).exists() else None
+
+
+# ── Memory-mapped, pruned artifact ───────────────────────────────────
+#
+# The lean .npz still becomes a Python dict of every n-gram string in each
+# worker (the char 3–5-gram vocabulary dominates). The mmap format stores
+# nothing per-term that needs unpickling or hashing at load:
+#
+#   <model>.mmap/meta.json        classes, analyzer configs, pruning record
+#   <model>.mmap/b{i}_hash.npy    uint64, sorted — 64-bit hash of each term
+#   <model>.mmap/b{i}_idf.npy     float32, aligned with the hashes
+#   <model>.mmap/b{i}_row.npy     int32 coefficient row, -1 if pruned
+#   <model>.mmap/coef_t.npy       float32 (kept features x classes)
+#   <model>.mmap/intercept.npy    float64
+#
+# Every .npy is opened with mmap_mode="r", so workers share one read-only
+# copy through the page cache and "loading" is a few syscalls. Lookup
+# hashes a document's n-grams and binary-searches them in one vectorised
+# searchsorted per vectorizer.
+#
+# Pruning drops coefficient ROWS only (low-importance features), never the
+# hash/idf entries: a pruned term still counts toward the document's l2 norm,
+# so the surviving weights — and the confidence the serving gate reads —
+# keep their unpruned scale.
+
+MMAP_FORMAT = "vargbot-tfidf-mmap/2"  # /2: blake2b term hashes (/1 used CRC32)
+
+
+def term_hash(term: str) -> int:
+    """Process-independent 64-bit term hash (8-byte blake2b digest).
+
+    Not CRC32: CRC is affine in its seed, so two seeded CRC32s carry only
+    32 bits and a char n-gram vocabulary collides within a length class."""
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _hashes(terms) -> np.ndarray:
+    return np.fromiter((term_hash(t) for t in terms), dtype=np.uint64)
+
+
+def feature_importance(pipeline) -> np.ndarray:
+    """Coefficient magnitude per feature: max |coef| over classes."""
+    return np.abs(np.asarray(pipeline.steps[-1][1].coef_)).max(axis=0)
+
+
+def export_mmap(pipeline, out_dir: Path, keep: float = 1.0,
+                importance: Optional[np.ndarray] = None, prune_by: str = "coef") -> Path:
+    """Write the fitted pipeline as a memory-mappable artifact directory.
+
+    keep is the fraction of features whose coefficient rows are kept, ranked
+    by importance (default: coefficient magnitude; pass chi² scores from the
+    training data for chi² pruning and say so in prune_by).
+    """
+    clf = pipeline.steps[-1][1]
+    coef = np.asarray(clf.coef_, dtype=np.float64)
+    n_features = coef.shape[1]
+    scores = feature_importance(pipeline) if importance is None else np.asarray(importance)
+    scores = np.nan_to_num(scores, nan=0.0)
+    n_keep = max(1, int(round(n_features * keep)))
+    kept = np.zeros(n_features, dtype=bool)
+    kept[np.argsort(-scores, kind="stable")[:n_keep]] = True
+    rows = np.full(n_features, -1, dtype=np.int32)
+    rows[kept] = np.arange(n_keep, dtype=np.int32)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    configs = []
+    offset = 0
+    for i, vec in enumerate(_vectorizers(pipeline)):
+        configs.append(_block_config(vec))
+        n = len(vec.vocabulary_)
+        terms = [None] * n
+        for term, col in vec.vocabulary_.items():
+            terms[col] = term
+        h = _hashes(terms)
+        order = np.argsort(h, kind="stable")
+        if len(h) and (np.diff(h[order]) == 0).any():
+            raise ValueError(f"64-bit hash collision in vectorizer {i} — cannot export")
+        idf = vec.idf_ if vec.use_idf else np.ones(n)
+        np.save(out_dir / f"b{i}_hash.npy", h[order])
+        np.save(out_dir / f"b{i}_idf.npy", np.asarray(idf, dtype=np.float32)[order])
+        np.save(out_dir / f"b{i}_row.npy", rows[offset:offset + n][order])
+        offset += n
+
+    np.save(out_dir / "coef_t.npy", np.ascontiguousarray(coef.T[kept], dtype=np.float32))
+    np.save(out_dir / "intercept.npy", np.asarray(clf.intercept_, dtype=np.float64))
+    meta = {
+        "format": MMAP_FORMAT,
+        "classes": [str(c) for c in clf.classes_],
+        "blocks": configs,
+        "binary": coef.shape[0] == 1,
+        "n_features": n_features,
+        "n_kept": n_keep,
+        "keep": keep,
+        "prune_by": prune_by,
+    }
+    (out_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return out_dir
+
+
+class MmapTfidf:
+    """Scorer over a memory-mapped artifact (see export_mmap). Provides the
+    classes_ / predict_proba surface the classifier uses from the joblib
+    pipeline, plus predict_proba_one."""
+
+    def __init__(self, path: Path):
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("format") != MMAP_FORMAT:
+            raise ValueError(f"unknown artifact format {meta.get('format')!r}")
+        self.meta = meta
+        self.classes_ = np.array(meta["classes"])
+        self._binary = meta["binary"]
+        self._coef_t = np.load(path / "coef_t.npy", mmap_mode="r")
+        self._intercept = np.load(path / "intercept.npy")
+        self._blocks = [
+            (
+                _Analyzer(cfg),
+                np.load(path / f"b{i}_hash.npy", mmap_mode="r"),
+                np.load(path / f"b{i}_idf.npy", mmap_mode="r"),
+                np.load(path / f"b{i}_row.npy", mmap_mode="r"),
+            )
+            for i, cfg in enumerate(meta["blocks"])
+        ]
+        if self._coef_t.shape != (meta["n_kept"], len(self.classes_) if not self._binary else 1):
+            raise ValueError(f"coefficient matrix shape {self._coef_t.shape} does not match meta")
+
+    def predict_proba_one(self, text: str) -> np.ndarray:
+        decision = self._intercept.copy()
+        for analyzer, hashes, idf, rows in self._blocks:
+            grams = analyzer.ngrams(text)
+            if not grams or not len(hashes):
+                continue
+            uniq, tf = np.unique(_hashes(grams), return_counts=True)
+            pos = np.searchsorted(hashes, uniq)
+            pos[pos == len(hashes)] = 0
+            found = hashes[pos] == uniq
+            if not found.any():
+                continue
+            pos = pos[found]
+            vals = analyzer.weigh(tf[found], idf[pos].astype(np.float64))
+            r = rows[pos]
+            live = r >= 0
+            if live.any():
+                decision += vals[live] @ self._coef_t[r[live]]
+        return _softmax_proba(decision, self._binary)
+
+    def predict_proba(self, texts: list[str]) -> np.ndarray:
+        return np.vstack([self.predict_proba_one(t) for t in texts])
+
+
+def mmap_path_for(joblib_path: Path) -> Path:
+    """models/vargbot_tfidf_v2.joblib -> models/vargbot_tfidf_v2.mmap/"""
+    return joblib_path.with_suffix(".mmap")
@@ -3,6 +3,8 @@
 import logging
 import os
 
+from services import http_pool
+
 logger = logging.getLogger(__name__)
 
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY", "")
@@ -40,23 +42,21 @@ def _synthesize_mock(text: str, language: str) -> dict:
 
 async def _synthesize_sarvam(text: str, language: str) -> dict:
     """Call Sarvam Bulbul V3 TTS API (production path)."""
-    import httpx
-
     target_lang = LANG_MAP.get(language, "en-IN")
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(
-            "https://api.sarvam.ai/text-to-speech",
-            headers={"api-subscription-key": SARVAM_API_KEY},
-            json={
-                "text": text,
-                "target_language_code": target_lang,
-                "speaker": "ritu",
-                "model": "bulbul:v3",
-            },
-        )
-        resp.raise_for_status()
-        result = resp.json()
+    resp = await http_pool.post(
+        "tts",
+        "https://api.sarvam.ai/text-to-speech",
+        headers={"api-subscription-key": SARVAM_API_KEY},
+        json={
+            "text": text,
+            "target_language_code": target_lang,
+            "speaker": "ritu",
+            "model": "bulbul:v3",
+        },
+    )
+    resp.raise_for_status()
+    result = resp.json()
 
     audios = result.get("audios", [])
     audio_b64 = audios[0] if audios else None
@@ -47,13 +47,14 @@ def db_session(test_engine):
     Session = sessionmaker(bind=connection)
     session = Session()
 
-    # Nested transaction so app code can call session.commit()
-    session.begin_nested()
+    # Nested transaction so app code can call session.commit(). Only this
+    # savepoint is restarted — app code may open (and end) its own.
+    savepoint = [session.begin_nested()]
 
     @event.listens_for(session, "after_transaction_end")
     def restart_savepoint(sess, trans):
-        if trans.nested and not trans._parent.nested:
-            sess.begin_nested()
+        if trans is savepoint[0]:
+            savepoint[0] = sess.begin_nested()
 
     yield session
 
@@ -67,6 +68,14 @@ def client(db_session):
     """FastAPI TestClient with get_db overridden to use test session."""
     from main import app
     from database import get_db
+    from services import ratelimit, snp_registry
+
+    # The limiter is per-process memory; without a reset, request counts
+    # accumulate across tests and later ones start failing with 429.
+    ratelimit._hits.clear()
+    # Likewise the SNP registry snapshot: each test seeds its own rows in a
+    # rolled-back transaction, so the next request must rebuild from them.
+    snp_registry.invalidate()
 
     def override_get_db():
         try:
@@ -1,5 +1,7 @@
 """Tests for classification routes (/classify)."""
 
+import pytest
+
 from database import AuditLog, ClassificationResult
 
 
@@ -51,6 +53,103 @@ def test_classify_creates_audit_log(mse_client, seed_mse, db_session):
     ), f"unrecognised engine stamp: {log.performed_by}"
 
 
+# ── POST /classify/stream ────────────────────────────────────────────
+
+
+class _StreamSession:
+    """The test session handed to the stream as its own SessionLocal();
+    counts closes instead of closing."""
+
+    def __init__(self, session):
+        self._session = session
+        self.closed = 0
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def close(self):
+        self.closed += 1
+
+
+@pytest.fixture
+def stream_session(db_session, monkeypatch):
+    session = _StreamSession(db_session)
+    monkeypatch.setattr("routes.classify.SessionLocal", lambda: session)
+    return session
+
+
+def _confident_tfidf_then_sarvam(monkeypatch):
+    import json
+
+    import services.classifier as clf
+
+    async def no_cache(key):
+        return None
+
+    async def tfidf(descriptions, art=None):
+        return [[
+            {"domain": "RET12", "confidence": 0.93, "category": None,
+             "category_name": None, "explanation": None},
+            {"domain": "RET10", "confidence": 0.04, "category": None,
+             "category_name": None, "explanation": None},
+            {"domain": "RET16", "confidence": 0.03, "category": None,
+             "category_name": None, "explanation": None},
+        ] for _ in descriptions]
+
+    async def sarvam(description, domain_hint=None):
+        return [{"domain": "RET12", "confidence": 0.9, "category": "RET12-1",
+                 "category_name": "Sarees", "explanation": "handloom sarees"}], {"fabric": "silk"}
+
+    monkeypatch.setattr(clf.classify_cache, "get", no_cache)
+    monkeypatch.setattr(clf, "_tfidf_off_loop", tfidf)
+    monkeypatch.setattr(clf, "_classify_with_sarvam", sarvam)
+    monkeypatch.setattr(clf, "SARVAM_API_KEY", "test-key")
+    return json
+
+
+def test_classify_stream_sends_trained_answer_then_enrichment(
+    mse_client, seed_mse, db_session, stream_session, monkeypatch,
+):
+    json = _confident_tfidf_then_sarvam(monkeypatch)
+    audits = db_session.query(AuditLog).filter(
+        AuditLog.action == "mse_classified", AuditLog.entity_id == seed_mse.id)
+    rows = db_session.query(ClassificationResult).filter(
+        ClassificationResult.mse_id == seed_mse.id)
+    audits_before, rows_before = audits.count(), rows.count()
+
+    resp = mse_client.post("/classify/stream", json={"mse_id": seed_mse.id})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in resp.text.splitlines()]
+
+    assert [e["event"] for e in events] == ["provisional", "final"]
+    first, final = events
+    assert first["selected_domain"] == "RET12" and first["selected_category"] is None
+    assert final["selected_category_name"] == "Sarees"
+    assert final["attributes"] == {"fabric": "silk"}
+    assert first["result_id"] == final["result_id"]
+
+    assert rows.count() == rows_before + 1  # updated in place, not a second row
+    row = db_session.get(ClassificationResult, final["result_id"])
+    assert row.predicted_category == "RET12-1"
+    assert row.model_version.endswith("+sarvam-30b")
+    assert audits.count() == audits_before + 1
+    assert stream_session.closed == 1  # the stream's own session, released at the end
+
+
+def test_classify_stream_without_confident_model_sends_final_only(mse_client, seed_mse, stream_session):
+    import json
+
+    resp = mse_client.post("/classify/stream", json={"mse_id": seed_mse.id})
+    events = [json.loads(line) for line in resp.text.splitlines()]
+    assert [e["event"] for e in events] == ["final"]
+    assert events[0]["result_id"]
+
+
+def test_classify_stream_mse_not_found(mse_client):
+    assert mse_client.post("/classify/stream", json={"mse_id": 99999}).status_code == 404
+
+
 # ── POST /classify/text ──────────────────────────────────────────────
 
 
@@ -125,3 +224,62 @@ def test_classify_history_empty(mse_client, seed_mse):
 def test_classify_requires_authentication(client, seed_mse):
     resp = client.post("/classify/", json={"mse_id": seed_mse.id})
     assert resp.status_code in (401, 403)
+
+
+# ── POST /classify/batch ─────────────────────────────────────────────
+
+
+def test_classify_batch_descriptions_in_input_order(admin_client):
+    payload = {"descriptions": [
+        {"description": "Traditional silk saree weaving and kurta garments"},
+        {"description": "We sell rice, dal, atta and spices wholesale"},
+        {"description": "   "},
+        {"description": "Mobile phone repair and laptop computer service center"},
+    ]}
+    resp = admin_client.post("/classify/batch", json=payload)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total"] == 4
+    assert data["classified"] == 3
+    assert data["persisted"] == 0
+    assert [i["index"] for i in data["items"]] == [0, 1, 2, 3]
+    assert data["items"][0]["selected_domain"] == "RET12"
+    assert data["items"][1]["selected_domain"] == "RET10"
+    assert data["items"][2]["error"]
+    assert data["items"][3]["selected_domain"] == "RET14"
+
+
+def test_classify_batch_mse_ids_persists_rows(admin_client, seed_mse, db_session):
+    before = (
+        db_session.query(ClassificationResult)
+        .filter(ClassificationResult.mse_id == seed_mse.id)
+        .count()
+    )
+    resp = admin_client.post(
+        "/classify/batch", json={"mse_ids": [seed_mse.id, 99999, seed_mse.id]})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["persisted"] == 2
+    assert data["items"][1]["error"] == "MSE not found"
+    assert data["items"][0]["result_id"] != data["items"][2]["result_id"]
+
+    after = (
+        db_session.query(ClassificationResult)
+        .filter(ClassificationResult.mse_id == seed_mse.id)
+        .count()
+    )
+    assert after == before + 2
+
+
+def test_classify_batch_rejects_mixed_and_oversized(admin_client):
+    mixed = admin_client.post("/classify/batch", json={
+        "descriptions": [{"description": "rice"}], "mse_ids": [1]})
+    assert mixed.status_code == 422
+    big = admin_client.post("/classify/batch", json={"mse_ids": list(range(501))})
+    assert big.status_code == 422
+
+
+def test_classify_batch_is_admin_only(mse_client):
+    resp = mse_client.post(
+        "/classify/batch", json={"descriptions": [{"description": "rice"}]})
+    assert resp.status_code in (401, 403)
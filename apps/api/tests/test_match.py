@@ -1,8 +1,10 @@
 """Tests for match routes (/match)."""
 
+import json
+
 import pytest
 
-from database import AuditLog, MatchResult
+from database import AuditLog, ClassificationResult, MatchResult, MatchRun
 from services.matcher import W_DOMAIN, W_GEO, W_COMMISSION, W_HISTORY, W_SENTIMENT
 
 
@@ -66,6 +68,95 @@ def test_match_creates_audit_log(mse_client, seed_mse, seed_snps, seed_classific
     assert log is not None
 
 
+def _counts(db_session, mse_id):
+    return (
+        db_session.query(MatchResult).filter(MatchResult.mse_id == mse_id).count(),
+        db_session.query(MatchRun).filter(MatchRun.mse_id == mse_id).count(),
+        db_session.query(AuditLog).filter(AuditLog.action == "mse_matched", AuditLog.entity_id == mse_id).count(),
+    )
+
+
+def test_match_repeat_is_served_from_the_stored_run(
+    mse_client, seed_mse, seed_snps, seed_classification, db_session,
+):
+    first = mse_client.post("/match/", json={"mse_id": seed_mse.id, "top_k": 3}).json()
+    assert not first["reused"]
+    counts = _counts(db_session, seed_mse.id)
+
+    again = mse_client.post("/match/", json={"mse_id": seed_mse.id, "top_k": 3}).json()
+    assert again["reused"] and again["run_id"] == first["run_id"]
+    assert {**again, "reused": False} == first
+    fewer = mse_client.post("/match/", json={"mse_id": seed_mse.id, "top_k": 2}).json()
+    assert fewer["reused"] and fewer["matches"] == first["matches"][:2]
+    assert _counts(db_session, seed_mse.id) == counts  # nothing written
+
+    more = mse_client.post("/match/", json={"mse_id": seed_mse.id, "top_k": 5}).json()
+    assert not more["reused"] and more["run_id"] != first["run_id"]
+    assert len(more["matches"]) == 5
+
+
+def test_match_new_run_replaces_the_current_set(
+    mse_client, seed_mse, seed_snps, seed_classification, db_session,
+):
+    first = mse_client.post("/match/", json={"mse_id": seed_mse.id, "top_k": 3}).json()
+
+    db_session.add(ClassificationResult(mse_id=seed_mse.id, predicted_domain="RET12", confidence=0.8))
+    db_session.flush()
+    second = mse_client.post("/match/", json={"mse_id": seed_mse.id, "top_k": 3}).json()
+    assert not second["reused"] and second["predicted_domain"] == "RET12"
+
+    old, new = db_session.get(MatchRun, first["run_id"]), db_session.get(MatchRun, second["run_id"])
+    db_session.refresh(old)
+    assert not old.is_current and new.is_current
+    assert json.loads(new.ranking)[0][0] == new.top_snp_id == second["matches"][0]["snp_id"]
+    rows = db_session.query(MatchResult).filter(MatchResult.mse_id == seed_mse.id).all()
+    assert len(rows) == 3 and {r.run_id for r in rows} == {new.id}
+
+    # Editing a scored profile field starts a new run too
+    seed_mse.district = "Nagpur"
+    db_session.flush()
+    third = mse_client.post("/match/", json={"mse_id": seed_mse.id, "top_k": 3}).json()
+    assert not third["reused"] and third["run_id"] != new.id
+
+
+def test_match_concurrent_new_run_does_not_fail(
+    mse_client, seed_mse, seed_snps, seed_classification, db_session,
+):
+    from sqlalchemy import event
+
+    first = mse_client.post("/match/", json={"mse_id": seed_mse.id, "top_k": 3}).json()
+    seed_mse.district = "Thane"  # new key: this call will replace the run
+    db_session.flush()
+
+    # Another request retires `first` and installs its own current run after
+    # this one has read `first` as current, just before it writes (SAVEPOINT).
+    conn = db_session.connection()
+    fired = []
+
+    def competing_request(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SAVEPOINT") and not fired:
+            fired.append(True)
+            winner = conn.connection.cursor()
+            winner.execute(f"UPDATE match_runs SET is_current = FALSE WHERE mse_id = {seed_mse.id}")
+            winner.execute(
+                "INSERT INTO match_runs (mse_id, profile_hash, registry_version, model_version, top_k, is_current)"
+                f" VALUES ({seed_mse.id}, 'other', 'other', 'other', 3, TRUE)"
+            )
+
+    event.listen(conn, "before_cursor_execute", competing_request)
+    try:
+        resp = mse_client.post("/match/", json={"mse_id": seed_mse.id, "top_k": 3})
+    finally:
+        event.remove(conn, "before_cursor_execute", competing_request)
+    assert fired and resp.status_code == 200
+    run_id = resp.json()["run_id"]
+    assert run_id != first["run_id"]
+    current = db_session.query(MatchRun).filter(MatchRun.mse_id == seed_mse.id, MatchRun.is_current.is_(True)).all()
+    assert [r.id for r in current] == [run_id]
+    rows = db_session.query(MatchResult).filter(MatchResult.mse_id == seed_mse.id).all()
+    assert len(rows) == 3 and {r.run_id for r in rows} == {run_id}
+
+
 def test_match_scores_sorted_descending(mse_client, seed_mse, seed_snps, seed_classification):
     resp = mse_client.post("/match/", json={"mse_id": seed_mse.id})
     matches = resp.json()["matches"]
@@ -134,3 +225,51 @@ def test_match_hides_raw_factors_from_mse_users(
     for m in resp.json()["matches"]:
         assert "factors" not in m, "raw factor scores leaked to an MSE user"
         assert "factor_bands" in m
+
+
+# ── POST /match/batch ────────────────────────────────────────────────
+
+
+def test_match_batch_equals_single_matches(admin_client, seed_mse, seed_snps, seed_classification, db_session):
+    resp = admin_client.post("/match/batch", json={"mse_ids": [seed_mse.id], "top_k": 3})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert (data["total"], data["matched"], data["reused"], data["persisted"]) == (1, 1, 0, 3)
+    item = data["items"][0]
+    assert item["predicted_domain"] == "RET10"
+    assert db_session.query(MatchResult).filter(MatchResult.run_id == item["run_id"]).count() == 3
+    assert db_session.query(AuditLog).filter(AuditLog.action == "mse_batch_matched").count() >= 1
+
+    # The batch run is the MSE's current run: /match serves it as is
+    single = admin_client.post("/match/", json={"mse_id": seed_mse.id, "top_k": 3}).json()
+    assert single["reused"] and single["run_id"] == item["run_id"]
+    assert single["matches"] == item["matches"]
+
+
+def test_match_batch_reuses_unchanged_runs(admin_client, seed_mse, seed_snps, seed_classification, db_session):
+    first = admin_client.post("/match/", json={"mse_id": seed_mse.id}).json()
+    rows = db_session.query(MatchResult).count()
+
+    data = admin_client.post("/match/batch", json={"mse_ids": [seed_mse.id], "top_k": 2}).json()
+    assert (data["reused"], data["persisted"]) == (1, 0)
+    assert data["items"][0]["run_id"] == first["run_id"]
+    assert data["items"][0]["matches"] == first["matches"][:2]
+    assert db_session.query(MatchResult).count() == rows
+
+
+def test_match_batch_reports_unknown_and_repeated_ids(admin_client, seed_mse, seed_snps):
+    resp = admin_client.post("/match/batch", json={"mse_ids": [seed_mse.id, 99999, seed_mse.id]})
+    items = resp.json()["items"]
+    assert [i.get("error") for i in items] == [None, "MSE not found", "Duplicate mse_id"]
+    assert len(items[0]["matches"]) == 5 and items[1]["matches"] == []
+
+
+def test_match_batch_limits(admin_client, seed_snps):
+    assert admin_client.post("/match/batch", json={"mse_ids": []}).status_code == 422
+    too_many = list(range(1, 400))
+    assert admin_client.post("/match/batch", json={"mse_ids": too_many}).status_code == 422
+
+
+def test_match_batch_is_admin_only(mse_client, seed_mse):
+    resp = mse_client.post("/match/batch", json={"mse_ids": [seed_mse.id]})
+    assert resp.status_code == 403
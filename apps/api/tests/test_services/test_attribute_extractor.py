@@ -0,0 +1,71 @@
+"""Unit tests for the gazetteer attribute extractor."""
+
+import time
+
+from services import attribute_extractor as ax
+
+
+def test_fashion_description_yields_catalogue_attributes():
+    attrs = ax.extract(
+        "Handloom cotton and silk sarees with zari work for weddings, red and maroon", "RET12",
+    )
+    assert attrs == {
+        "colour": "red, maroon",
+        "fabric": "cotton, silk",
+        "ornamentation": "zari",
+        "occasion": "wedding",
+        "craft_type": "handloom",
+    }
+
+
+def test_domain_scopes_the_vocabulary():
+    assert ax.extract("brass diya, handcrafted, for festive pooja", "RET16") == {
+        "material": "brass", "occasion": "festive", "craft_type": "handcrafted",
+    }
+    # Grocery has no colour attribute: "red chilli" is not a colour there
+    assert "colour" not in ax.extract("red chilli powder", "RET10")
+
+
+def test_quantities_and_longest_phrase_win():
+    assert ax.extract("Non-veg pickles 500 g and 1.5 kg jars", "RET10") == {
+        "net_weight": "500 g, 1.5 kg", "veg_nonveg": "non-veg",
+    }
+    assert ax.extract("60 capsules of ashwagandha", "RET18")["net_quantity"] == "60 capsules"
+
+
+def test_merge_keeps_local_values_and_fills_gaps_from_the_llm():
+    merged = ax.merge({"fabric": "silk"}, {"fabric": "cotton", "target_market": "brides"})
+    assert merged == {"fabric": "silk", "target_market": "brides"}
+    assert len(ax.merge({}, {str(i): "x" for i in range(10)})) == ax.MAX_ATTRIBUTES
+
+
+def test_extraction_is_sub_millisecond():
+    text = "Block printed cotton kurtas in blue and green, sizes XL and XXL, handmade in Jaipur"
+    ax.extract(text, "RET12")  # compile
+    t0 = time.perf_counter()
+    for _ in range(200):
+        ax.extract(text, "RET12")
+    assert (time.perf_counter() - t0) / 200 < 0.001
+
+
+async def test_local_engine_answers_carry_attributes(monkeypatch):
+    import services.classifier as clf
+
+    async def no_sarvam(description, domain_hint=None):
+        return None
+
+    monkeypatch.setattr(clf, "_classify_with_sarvam", no_sarvam)
+    _, engine, attrs = await clf._classify_chain("cotton saree weaving, handloom", None)
+    assert engine == "keyword-fallback"
+    assert attrs["fabric"] == "cotton" and attrs["craft_type"] == "handloom"
+
+
+def test_words_outside_their_attribute_sense_are_skipped():
+    assert ax.extract("Kurta for boys, net weight 200 g", "RET12") == {"gender": "boy"}
+    assert "fabric" not in ax.extract("net profit from kurta sales", "RET12")
+    assert "colour" not in ax.extract("Gold plated silver jewellery", "RET12")
+    assert ax.extract("Gold plated silver jewellery", "RET16") == {"material": "silver"}
+    # the same words in their attribute sense still count
+    assert ax.extract("net saree in gold and silver, zari border", "RET12") == {
+        "colour": "gold, silver", "fabric": "net", "ornamentation": "zari",
+    }
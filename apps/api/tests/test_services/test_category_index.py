@@ -0,0 +1,50 @@
+"""Unit tests for the ONDC leaf-category index."""
+
+from services.category_index import CategoryIndex
+
+LEAVES = {
+    "RET10": [("RET10-001", "Staples & Grains"), ("RET10-002", "Masala & Spices"),
+              ("RET10-003", "Dairy & Eggs")],
+    "RET16": [("RET16-001", "Kitchen Utensils"), ("RET16-002", "Home Decor")],
+}
+
+
+def test_exact_name_match_ignores_case_and_ampersand():
+    index = CategoryIndex(LEAVES)
+    assert index.resolve("staples and grains", "RET10") == "RET10-001"
+    assert index.candidates("Staples & Grains", "RET10")[0].score == 1.0
+
+
+def test_reordered_and_paraphrased_names_resolve():
+    index = CategoryIndex(LEAVES)
+    assert index.resolve("Spices & Masala", "RET10") == "RET10-002"
+    assert index.resolve("Utensils", "RET16") == "RET16-001"
+    assert index.resolve("kitchen utensil", "RET16") == "RET16-001"
+
+
+def test_resolution_stays_within_the_requested_domain():
+    index = CategoryIndex(LEAVES)
+    assert index.resolve("Kitchen Utensils", "RET10") is None
+    # Without a domain every leaf is a candidate
+    assert index.candidates("Kitchen Utensils")[0].code == "RET16-001"
+
+
+def test_unrelated_name_is_rejected_not_guessed():
+    index = CategoryIndex(LEAVES)
+    assert index.resolve("Mobile phone accessories", "RET10") is None
+    assert index.resolve("", "RET10") is None
+
+
+def test_candidates_are_ranked_best_first():
+    index = CategoryIndex(LEAVES)
+    ranked = index.candidates("dairy grains", "RET10")
+    scores = [m.score for m in ranked]
+    assert scores == sorted(scores, reverse=True)
+    assert {m.code for m in ranked} >= {"RET10-001", "RET10-003"}
+
+
+def test_lookup_by_code():
+    index = CategoryIndex(LEAVES)
+    leaf = index.lookup("RET16-002")
+    assert leaf.domain == "RET16" and leaf.name == "Home Decor"
+    assert index.lookup("RET99-001") is None
@@ -54,3 +54,174 @@ def test_classify_mse_description_returns_predictions():
     predictions = classify_mse_description("We sell spices and dal wholesale", "en")
     assert len(predictions) == 3
     assert predictions[0]["domain"] in ("RET10", "RET12", "RET14", "RET16", "RET18")
+
+
+def test_taxonomy_snapshot_prebuilds_prompts_and_leaf_map():
+    from services.classifier import _make_snapshot
+
+    snap = _make_snapshot(
+        "db", (1,), {"RET10": "Grocery", "RET16": "Home & Kitchen"},
+        {"RET10": [("RET10-001", "Staples"), ("RET10-002", "Spices")],
+         "RET16": [("RET16-001", "Cookware")]},
+    )
+    assert snap.valid_domains == {"RET10", "RET16"}
+    assert snap.category_name_to_code["RET10|spices"] == "RET10-002"
+    assert "Cookware" in snap.system_prompt and "Staples" in snap.system_prompt
+    # A domain-hinted prompt lists only that domain's leaves
+    assert "Spices" in snap.hint_prompts["RET10"]
+    assert "Cookware" not in snap.hint_prompts["RET10"]
+
+
+def test_taxonomy_version_follows_content():
+    from services.classifier import _make_snapshot
+
+    def build(leaf_name):
+        return _make_snapshot("db", None, {"RET10": "Grocery"}, {"RET10": [("RET10-001", leaf_name)]})
+
+    assert build("Staples").version == build("Staples").version
+    assert build("Staples").version != build("Staples & Grains").version
+
+
+def test_refresh_taxonomy_swaps_snapshot_only_on_change(monkeypatch):
+    import services.classifier as clf
+
+    old = clf._make_snapshot("db", None, {"RET10": "Grocery"}, {"RET10": [("RET10-001", "Staples")]})
+    new = clf._make_snapshot("db", None, {"RET10": "Grocery"}, {"RET10": [("RET10-001", "Pulses")]})
+    monkeypatch.setattr(clf, "_snapshot", old)
+
+    monkeypatch.setattr(clf, "_build_snapshot", lambda: old)
+    assert clf.refresh_taxonomy(force=True) is False
+    assert clf._taxonomy() is old
+
+    monkeypatch.setattr(clf, "_build_snapshot", lambda: new)
+    assert clf.refresh_taxonomy(force=True) is True
+    assert clf._taxonomy() is new
+
+
+def test_keyword_engine_credits_prefix_keywords_once():
+    from services.classifier import _keyword_engine
+
+    # "ayurvedic" starts with "ayurved"; a repeated word counts once
+    counts = dict(zip(_keyword_engine.domains,
+                      _keyword_engine.hit_counts("ayurvedic herbal herbal tea")))
+    assert counts["RET18"] == 2
+
+
+def test_keyword_batch_matches_single_item():
+    from services.classifier import _classify_with_keywords_many
+
+    texts = ["Brass diya and pooja thali", "Cotton kurta stitching", ""]
+    assert _classify_with_keywords_many(texts) == [_classify_with_keywords(t) for t in texts]
+
+
+async def test_slow_llm_is_cut_off_at_the_latency_budget(monkeypatch):
+    import asyncio
+
+    import services.classifier as clf
+
+    late = []
+
+    async def slow_sarvam(description, domain_hint=None):
+        await asyncio.sleep(0.3)
+        return [{"domain": "RET12", "confidence": 0.9, "category": None,
+                 "category_name": None, "explanation": None}], {}
+
+    async def record(result):
+        late.append(result)
+
+    monkeypatch.setattr(clf, "_classify_with_sarvam", slow_sarvam)
+    loop = asyncio.get_running_loop()
+
+    preds, engine, _ = await clf._classify_chain(
+        "Cotton kurta stitching", None, deadline=loop.time() + 0.05, on_late=record,
+    )
+    assert engine == "keyword-fallback+deadline"
+    assert preds[0]["domain"] == "RET12"
+    assert not clf._is_cacheable(engine)
+
+    # The LLM call was not abandoned — its answer is handed over when it lands
+    await asyncio.sleep(0.4)
+    assert late and late[0][1] == "sarvam-llm"
+
+
+async def test_llm_answer_within_budget_is_used(monkeypatch):
+    import asyncio
+
+    import services.classifier as clf
+
+    async def quick_sarvam(description, domain_hint=None):
+        return [{"domain": "RET16", "confidence": 0.8, "category": None,
+                 "category_name": None, "explanation": None}], {"material": "brass"}
+
+    monkeypatch.setattr(clf, "_classify_with_sarvam", quick_sarvam)
+    loop = asyncio.get_running_loop()
+    preds, engine, attrs = await clf._classify_chain(
+        "brass diya", None, deadline=loop.time() + 1.0,
+    )
+    assert engine == "sarvam-llm"
+    assert attrs == {"material": "brass"}
+
+
+# ── MuRIL backends ───────────────────────────────────────────────────
+
+def test_muril_onnx_backend_absent_without_export(tmp_path, monkeypatch):
+    import services.classifier as clf
+
+    monkeypatch.setattr(clf, "_use_muril", False)
+    assert clf._load_muril_onnx(str(tmp_path)) is False
+    assert clf._use_muril is False and clf._muril_onnx is None
+
+
+def test_muril_top3_from_served_backend(monkeypatch):
+    import numpy as np
+
+    import services.classifier as clf
+
+    class _Served:  # shape of services.muril_runtime.OnnxMuril
+        def predict_proba(self, texts):
+            return np.array([[0.05, 0.70, 0.05, 0.15, 0.05]] * len(texts))
+
+    monkeypatch.setattr(clf, "_muril_onnx", _Served())
+    preds = clf._classify_with_muril("Cotton kurta stitching")
+    assert [p["domain"] for p in preds] == ["RET12", "RET16", "RET10"]
+    assert preds[0]["confidence"] == 0.7
+
+
+def test_taxonomy_fingerprint_moves_on_a_same_length_rename(db_session, seed_domains):
+    from database import OndcCategory
+    from services.classifier import _taxonomy_fingerprint
+
+    before = _taxonomy_fingerprint(db_session)
+    leaf = db_session.query(OndcCategory).filter_by(code="RET16-001").one()
+    leaf.name = leaf.name.replace("Utensils", "Cookware")  # same length
+    db_session.flush()
+    assert _taxonomy_fingerprint(db_session) != before
+
+
+def test_registry_poll_runs_with_taxonomy_polling_disabled(monkeypatch):
+    """The SNP registry and artifact checks keep their own schedule:
+    VARGBOT_TAXONOMY_POLL_S=0 switches off the taxonomy poll only."""
+    import threading
+    import redis_client
+    import services.classifier as clf
+    from services import model_swap, snp_registry
+
+    stop = threading.Event()
+    calls = []
+    monkeypatch.setattr(redis_client, "get_redis", lambda: None)
+    monkeypatch.setattr(clf, "TAXONOMY_POLL_S", 0)
+    monkeypatch.setattr(model_swap, "MODEL_WATCH", False)
+    monkeypatch.setattr(snp_registry, "POLL_S", 1)
+    monkeypatch.setattr(clf, "refresh_leaf_resolver", lambda: None)
+    monkeypatch.setattr(clf, "refresh_taxonomy", lambda force=False: calls.append("taxonomy"))
+
+    def registry_refresh(force=False):
+        calls.append("registry")
+        stop.set()
+
+    monkeypatch.setattr(snp_registry, "refresh", registry_refresh)
+    thread = threading.Thread(target=clf._watch_taxonomy, args=(stop,), daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert calls == ["registry"]
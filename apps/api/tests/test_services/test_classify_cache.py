@@ -0,0 +1,64 @@
+"""Unit tests for the classification result cache (local tier — no Redis in tests)."""
+
+import services.classifier as clf
+from services import classify_cache
+from services.classify_cache import cache_key, normalize_description
+
+
+def test_normalize_folds_case_and_whitespace():
+    assert normalize_description("  We SELL\trice \n and  dal ") == normalize_description(
+        "we sell rice and dal"
+    )
+
+
+def test_key_changes_with_language_taxonomy_and_engine():
+    base = cache_key("rice and dal", "en", "tax1", "eng1")
+    assert cache_key("Rice  and DAL", "en", "tax1", "eng1") == base
+    assert cache_key("rice and dal", "hi", "tax1", "eng1") != base
+    assert cache_key("rice and dal", "en", "tax2", "eng1") != base
+    assert cache_key("rice and dal", "en", "tax1", "eng2") != base
+
+
+async def test_put_then_get_returns_an_independent_copy():
+    classify_cache.clear()
+    key = cache_key("brass diya", "en", "t", "e")
+    preds = [{"domain": "RET16", "confidence": 0.9, "category": None,
+              "category_name": None, "explanation": None}]
+    await classify_cache.put(key, preds, "keyword-fallback", {"material": "brass"})
+
+    got_preds, engine, attrs = await classify_cache.get(key)
+    assert engine == "keyword-fallback"
+    assert attrs == {"material": "brass"}
+    got_preds[0]["domain"] = "MUTATED"
+
+    again, _, _ = await classify_cache.get(key)
+    assert again[0]["domain"] == "RET16"
+
+
+def test_lru_evicts_oldest_beyond_capacity():
+    lru = classify_cache._LRU(max_entries=2, ttl_s=60)
+    lru.put("a", "1")
+    lru.put("b", "2")
+    lru.get("a")          # a is now most recent
+    lru.put("c", "3")
+    assert lru.get("b") is None
+    assert lru.get("a") == "1"
+    assert lru.evictions == 1
+
+
+def test_lru_expires_entries_after_ttl():
+    lru = classify_cache._LRU(max_entries=4, ttl_s=-1)
+    lru.put("a", "1")
+    assert lru.get("a") is None
+
+
+async def test_repeat_classification_is_served_from_cache():
+    classify_cache.clear()
+    before = classify_cache.stats()
+    first = await clf.classify_mse_description_async("We sell turmeric and cumin", "en")
+    second = await clf.classify_mse_description_async("we sell   TURMERIC and cumin", "en")
+    after = classify_cache.stats()
+
+    assert first == second
+    assert after["hits_local"] == before["hits_local"] + 1
+    assert after["misses"] == before["misses"] + 1
@@ -0,0 +1,81 @@
+"""Unit tests for the off-loop CPU engine pools."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services import engine_pool
+
+
+async def test_blocking_work_does_not_stall_the_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    t = asyncio.create_task(ticker())
+    await engine_pool.run("test-loop", time.sleep, 0.2)
+    t.cancel()
+    assert ticks >= 5
+
+
+async def test_per_engine_concurrency_is_bounded(monkeypatch):
+    monkeypatch.setitem(engine_pool.ENGINE_WORKERS, "test-bounded", 1)
+    active = peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+
+    await asyncio.gather(*(engine_pool.run("test-bounded", work) for _ in range(4)))
+    assert peak == 1
+    eng = engine_pool.stats()["engines"]["test-bounded"]
+    assert eng["completed"] == 4
+    assert eng["queue_wait_ms_max"] > 0
+
+
+async def test_full_queue_fails_fast(monkeypatch):
+    monkeypatch.setitem(engine_pool.ENGINE_WORKERS, "test-full", 1)
+    monkeypatch.setattr(engine_pool, "ENGINE_QUEUE_MAX", 1)
+    release = threading.Event()
+
+    running = asyncio.create_task(engine_pool.run("test-full", release.wait, 5))
+    await asyncio.sleep(0.05)  # first job occupies the only worker
+    queued = asyncio.create_task(engine_pool.run("test-full", lambda: None))
+    await asyncio.sleep(0)
+    with pytest.raises(engine_pool.EngineSaturated):
+        await engine_pool.run("test-full", lambda: None)
+    release.set()
+    await asyncio.gather(running, queued)
+    assert engine_pool.stats()["engines"]["test-full"]["rejected"] == 1
+
+
+async def test_cancelled_queued_job_leaves_the_queue(monkeypatch):
+    monkeypatch.setitem(engine_pool.ENGINE_WORKERS, "test-cancel", 1)
+    release = threading.Event()
+    ran = []
+
+    running = asyncio.create_task(engine_pool.run("test-cancel", release.wait, 5))
+    await asyncio.sleep(0.05)  # the only worker is busy
+    queued = [asyncio.create_task(engine_pool.run("test-cancel", ran.append, i)) for i in range(3)]
+    await asyncio.sleep(0)
+    assert engine_pool.stats()["engines"]["test-cancel"]["waiting"] == 3
+
+    for task in queued:
+        task.cancel()  # e.g. a deadline or a losing hedge
+    await asyncio.gather(*queued, return_exceptions=True)
+    assert engine_pool.stats()["engines"]["test-cancel"]["waiting"] == 0
+    release.set()
+    await running
+    assert ran == []
@@ -0,0 +1,40 @@
+"""Unit tests for SNP coverage parsing and the inverted coverage index."""
+
+from services.geo import PAN_INDIA, CoverageIndex, coverage_tokens, serves_state
+
+
+def test_coverage_tokens_are_canonical():
+    assert coverage_tokens("Pan India") == {PAN_INDIA}
+    assert coverage_tokens("GUJARAT|JAMMU & KASHMIR|UP") == {
+        "state:gujarat", "state:jammu and kashmir", "state:uttar pradesh",
+    }
+    assert coverage_tokens("Bengaluru & Mysore") == {"district:bengaluru", "district:mysuru"}
+    assert coverage_tokens("Delhi NCR") == {"state:delhi", "district:delhi"}
+    assert coverage_tokens("K.V. Rangareddy") == {"district:rangareddy"}
+    assert coverage_tokens("") == frozenset() == coverage_tokens(None)
+
+
+def test_serves_state_needs_the_state_itself_or_pan_india():
+    assert serves_state("Maharashtra,Gujarat", "maharashtra")
+    assert serves_state("Pan-India", "Kerala")
+    assert not serves_state("Goalpara", "Goa")
+    assert not serves_state("Mumbai", "Maharashtra")  # a city is not the whole state
+
+
+def test_only_whole_value_phrases_mean_pan_india():
+    for pan in ("Pan India", "pan-india", "All India", "Nationwide", "All States"):
+        assert coverage_tokens(pan) == {PAN_INDIA}, pan
+    assert PAN_INDIA not in coverage_tokens("All districts of Kerala")
+    assert PAN_INDIA not in coverage_tokens("National Capital Region")
+    assert not serves_state("All districts of Kerala", "Gujarat")
+
+
+def test_index_answers_lookups_as_sets():
+    index = CoverageIndex(["Pan India", "Pune|Mumbai", "", "Maharashtra", "Bangalore", None, "Goalpara"])
+    assert index.district("pune") == {1}
+    assert index.district("Bengaluru") == {4}
+    assert index.state("Maharashtra") == {3}
+    assert index.serving_state("Maharashtra") == {0, 3}
+    assert index.serving_state("Goa") == {0}
+    assert index.undisclosed == {2, 5}
+    assert index.district(None) == frozenset()
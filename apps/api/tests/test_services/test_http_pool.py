@@ -0,0 +1,52 @@
+"""Unit tests for the shared outbound HTTP pool (against a local server)."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from services import http_pool
+
+
+class _Echo(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real upstreams
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    srv = HTTPServer(("127.0.0.1", 0), _Echo)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+
+
+async def test_sequential_calls_reuse_one_connection(local_server):
+    await http_pool.aclose()
+    await http_pool.start()
+    http_pool._stats.pop("test", None)
+    try:
+        for _ in range(4):
+            resp = await http_pool.post("test", f"{local_server}/x", json={"a": 1})
+            assert resp.json() == {"ok": True}
+        s = http_pool.stats()["services"]["test"]
+        assert s["requests"] == 4
+        assert s["new_connections"] == 1
+        assert s["reuse_ratio"] == 0.75
+    finally:
+        await http_pool.aclose()
+
+
+def test_service_timeouts_match_previous_per_call_values():
+    assert http_pool.SERVICE_TIMEOUTS["classify"] == 40.0
+    assert http_pool.SERVICE_TIMEOUTS["ocr_fallback"] == 90.0
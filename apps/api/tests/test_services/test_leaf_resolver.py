@@ -0,0 +1,120 @@
+"""Unit tests for the local leaf-category resolver."""
+
+from services.leaf_resolver import MIN_GOLD_FOR_CALIBRATION, GoldLabel, LeafResolver
+
+LEAVES = {
+    "RET10": [
+        ("RET10-001", "Staples & Grains"),
+        ("RET10-002", "Spices & Condiments"),
+        ("RET10-003", "Cooking Oil & Ghee"),
+        ("RET10-004", "Beverages & Tea"),
+    ],
+    "RET12": [
+        ("RET12-001", "Sarees & Traditional Wear"),
+        ("RET12-002", "Menswear"),
+    ],
+}
+
+
+def _calibration_gold() -> list[GoldLabel]:
+    places = ["karnal", "panipat", "amritsar", "dehradun", "kota", "indore", "guntur", "erode",
+              "salem", "unjha", "nagpur", "jalgaon", "rajkot", "bikaner", "kochi", "mysuru"]
+    gold = []
+    for place in places:
+        gold.append(GoldLabel(f"basmati rice from {place}", "RET10", "RET10-001"))
+        gold.append(GoldLabel(f"sona masoori rice {place}", "RET10", "RET10-001"))
+        gold.append(GoldLabel(f"masala powder {place}", "RET10", "RET10-002"))
+    # Officers split "mixed" sellers across leaves: a low-precision region
+    for i, place in enumerate(places[:10]):
+        gold.append(GoldLabel(f"mixed provisions {place}", "RET10", ("RET10-001", "RET10-004")[i % 2]))
+    return gold
+
+
+def test_leaf_name_part_matches_within_the_domain():
+    r = LeafResolver(LEAVES)
+    leaf = r.match("We make pure desi ghee in Mathura", "RET10")
+    assert leaf is not None
+    assert (leaf.code, leaf.name, leaf.source) == ("RET10-003", "Cooking Oil & Ghee", "name")
+    # Same words, wrong domain: nothing to match
+    assert r.match("We make pure desi ghee in Mathura", "RET12") is None
+
+
+def test_uncalibrated_resolver_always_defers_to_the_llm():
+    r = LeafResolver(LEAVES)
+    assert not r.calibrated and r.stats()["threshold"] is None
+    assert r.match("We make pure desi ghee in Mathura", "RET10").raw == 1.0
+    assert r.resolve("We make pure desi ghee in Mathura", "RET10") is None
+
+
+def test_near_tie_is_discounted_and_unrelated_text_has_no_match():
+    r = LeafResolver(LEAVES)
+    assert r.match("spices and tea from Kerala", "RET10").raw == 0.5  # two leaves tie
+    assert r.match("general trading", "RET10") is None
+
+
+def test_gold_exemplars_resolve_text_with_no_name_overlap():
+    gold = [
+        GoldLabel("basmati rice wholesale", "RET10", "RET10-001"),
+        GoldLabel("rice and wheat atta mill", "RET10", "RET10-001"),
+        GoldLabel("groundnut oil expeller", "RET10", "RET10-003"),
+    ]
+    r = LeafResolver(LEAVES, gold)
+    assert not r.calibrated  # too few labels to gate on
+    leaf = r.match("basmati rice", "RET10")
+    assert leaf is not None and (leaf.code, leaf.source) == ("RET10-001", "gold")
+    # Labels pointing at unknown leaves or another domain's leaves are ignored
+    assert LeafResolver(LEAVES, [GoldLabel("rice", "RET10", "RET12-001")]).n_gold == 0
+
+
+def test_calibration_sets_threshold_from_gold_precision():
+    gold = _calibration_gold()
+    assert len(gold) >= MIN_GOLD_FOR_CALIBRATION
+    r = LeafResolver(LEAVES, gold, target_precision=0.9)
+
+    assert r.calibrated and r.loo_accuracy is not None
+    assert 0 < r.threshold <= 1
+    leaf = r.resolve("basmati rice", "RET10")
+    assert leaf is not None and leaf.code == "RET10-001" and leaf.score >= 0.9
+    assert r.resolve("mixed provisions", "RET10") is None
+    assert r.stats()["gold_labels"] == len(gold)
+
+
+async def test_confident_domain_with_local_leaf_skips_sarvam(monkeypatch):
+    import services.classifier as clf
+
+    calls = []
+
+    async def sarvam(description, domain_hint=None):
+        calls.append(domain_hint)
+        return None
+
+    monkeypatch.setattr(clf, "_classify_with_sarvam", sarvam)
+    monkeypatch.setattr(clf, "LEAF_LOCAL", True)
+    resolver = LeafResolver(LEAVES, _calibration_gold())
+    monkeypatch.setattr(clf, "_leaf_state", (clf._taxonomy().version, resolver))
+    tfidf = [{"domain": "RET10", "confidence": 0.95, "category": None,
+              "category_name": None, "explanation": None}]
+
+    preds, engine, _ = await clf._classify_chain("pure desi ghee", tfidf)
+    assert calls == []
+    assert engine == f"{clf._tfidf_engine()}+leaf-index"
+    assert preds[0]["category"] == "RET10-003"
+    assert tfidf[0]["category"] is None  # caller's predictions untouched
+    assert clf._is_cacheable(engine)
+
+    await clf._classify_chain("general trading", tfidf)
+    assert calls and calls[0][0] == "RET10"  # deferred: Sarvam resolves the leaf
+
+
+def test_taxonomy_change_keeps_serving_while_the_resolver_rebuilds(monkeypatch):
+    import services.classifier as clf
+
+    old = LeafResolver(LEAVES)
+    builds = []
+    monkeypatch.setattr(clf, "_rebuild_leaf_resolver_async", lambda: builds.append(True))
+    monkeypatch.setattr(clf, "_leaf_state", ("previous-version", old))
+    assert clf.leaf_resolver() is old  # no build on the request path
+    assert builds == [True]
+
+    monkeypatch.setattr(clf, "_leaf_state", None)
+    assert clf.leaf_resolver() is None  # not built yet: the chain defers to Sarvam
@@ -1,5 +1,6 @@
 """Unit tests for the matcher service (scoring functions)."""
 
+import random
 from types import SimpleNamespace
 
 from services.matcher import (
@@ -15,7 +16,9 @@ from services.matcher import (
     _geo_score,
     _history_score,
     _sentiment_score,
+    compile_snps,
     compute_match_scores,
+    compute_match_scores_batch,
 )
 
 
@@ -75,6 +78,19 @@ def test_geo_score_none_coverage():
     assert _geo_score("Maharashtra", "Pune", None) == 0.3
 
 
+def test_geo_score_names_inside_other_names_do_not_match():
+    # substring checks read the state Goa inside the Assam district Goalpara,
+    # and the district Dhar inside Dharwad
+    assert _geo_score("Goa", "North Goa", "Goalpara|Kamrup") == 0.2
+    assert _geo_score("Madhya Pradesh", "Dhar", "Dharwad") == 0.2
+
+
+def test_geo_score_spelling_variants_and_abbreviations():
+    assert _geo_score("Karnataka", "Bengaluru Urban", "Banglore|Delhi NCR") == 1.0
+    assert _geo_score("Uttar Pradesh", "Agra", "Delhi,UP") == 0.6
+    assert _geo_score("Delhi", "New Delhi", "Delhi NCR") == 0.6
+
+
 # ── _commission_score ────────────────────────────────────────────────
 
 
@@ -206,3 +222,78 @@ def test_compute_match_scores_domain_aligned_higher():
     snp_no_match = _make_snp(domain_codes="RET12", rating=4.0)
     results = compute_match_scores(mse, [snp_match, snp_no_match], "RET10")
     assert results[0]["composite"] > results[1]["composite"]
+
+
+def _legacy_scores(mse, snps, predicted_domain):
+    """The per-SNP loop the vectorised scorer replaced — the parity reference."""
+    out = []
+    for snp in snps:
+        d = _domain_score(predicted_domain, snp.domain_codes)
+        g = _geo_score(mse.state, mse.district, snp.geo_coverage)
+        c = _commission_score(snp.commission_pct)
+        h = _history_score(snp)
+        s = _sentiment_score(snp.onboarding_support, snp.languages_supported, mse.language)
+        out.append((snp, d, g, c, h, s,
+                    W_DOMAIN * d + W_GEO * g + W_COMMISSION * c + W_HISTORY * h + W_SENTIMENT * s))
+    return out
+
+
+def _random_registry(n, seed=3):
+    rng = random.Random(seed)
+    return [
+        _make_snp(
+            id=i,
+            subscriber_id=f"snp-{i}",
+            domain_codes=rng.choice(["RET10", "RET10,RET18", "RET12|RET16", "RET-MULTI", "", None, " , "]),
+            geo_coverage=rng.choice(["Pan India", "Maharashtra, Gujarat", "Pune,Mumbai", "Delhi",
+                                     "all india", "", None, "Karnataka", "Bangalore|Mysore",
+                                     "Delhi NCR|Pune", "MAHARASHTRA & GOA"]),
+            commission_pct=rng.choice([0.0, 2.5, 4.0, 7.5, 12.0, 20.0]),
+            rating=rng.choice([0.0, 3.2, 4.0, 4.5, 5.0]),
+            onboarding_support=rng.choice(["full", "partial", "none", None]),
+            languages_supported=rng.choice(["en,hi", "en|ta", "hi", "", None]),
+        )
+        for i in range(n)
+    ]
+
+
+def test_vectorised_scores_match_the_per_snp_loop_exactly():
+    snps = _random_registry(300)
+    for mse, domain in [
+        (_make_mse(), "RET10"), (_make_mse(language="ta", district="Mumbai"), "RET16"),
+        (_make_mse(state="Delhi", district=None, language=None), None), (_make_mse(), "ret18"),
+    ]:
+        got = compute_match_scores(mse, snps, domain)
+        for r, (snp, d, g, c, h, s, composite) in zip(got, _legacy_scores(mse, snps, domain)):
+            assert r["snp"] is snp
+            assert (r["domain"], r["geo"], r["commission"], r["history"], r["sentiment"], r["composite"]) \
+                == (d, g, c, h, s, composite)
+
+
+def test_top_k_matches_a_stable_sort_including_ties():
+    snps = _random_registry(300, seed=5)  # few distinct values: many exact ties
+    mse = _make_mse()
+    legacy = sorted(_legacy_scores(mse, snps, "RET10"), key=lambda x: x[-1], reverse=True)
+    for k in (1, 5, 17, 300, 400):
+        top = compute_match_scores(mse, snps, "RET10", top_k=k)
+        assert [r["snp"] for r in top] == [x[0] for x in legacy[:k]]
+        assert all(r["fit_reasons"] is not None for r in top)
+
+
+def test_compiled_registry_is_reused_for_equal_rows():
+    snps = _random_registry(20)
+    first = compile_snps(snps)
+    reloaded = [SimpleNamespace(**vars(s)) for s in snps]  # a fresh DB read: equal rows, new objects
+    again = compile_snps(reloaded)
+    assert again.domain_bits is first.domain_bits
+    assert again.snps[0] is reloaded[0]
+
+
+def test_batch_scoring_equals_one_call_per_mse():
+    snps = _random_registry(200, seed=11)
+    mses = [_make_mse(), _make_mse(state="Karnataka", district="Mysore", language="ta"),
+            _make_mse(), _make_mse(state="Delhi", district=None, language=None)]
+    domains = ["RET10", "RET16", None, "RET10"]
+    batch = compute_match_scores_batch(mses, snps, domains, top_k=7)
+    for mse, domain, got in zip(mses, domains, batch):
+        assert got == compute_match_scores(mse, snps, domain, top_k=7)
@@ -0,0 +1,92 @@
+"""Unit tests for the classify-chain instrumentation."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from services import metrics
+
+
+@pytest.fixture(autouse=True)
+def _fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    h = metrics.Histogram((10, 20, 40))
+    for v in [5] * 50 + [15] * 40 + [30] * 9 + [100]:
+        h.observe(v)
+    assert h.quantile(0.5) == pytest.approx(10.0)
+    assert 10 < h.quantile(0.9) <= 20
+    assert h.quantile(0.99) == pytest.approx(40.0)
+    assert h.quantile(1.0) == 40  # overflow reports its lower bound
+    assert metrics.Histogram((1,)).quantile(0.5) is None
+
+
+def test_prometheus_histogram_is_cumulative_with_inf_bucket():
+    h = metrics.Histogram((1, 10))
+    for v in (0.5, 5, 50):
+        h.observe(v)
+    lines = h.prometheus("x_seconds", 'stage="a"', scale=0.001)
+    assert lines == [
+        'x_seconds_bucket{stage="a",le="0.001"} 1',
+        'x_seconds_bucket{stage="a",le="0.01"} 2',
+        'x_seconds_bucket{stage="a",le="+Inf"} 3',
+        'x_seconds_sum{stage="a"} 0.0555',
+        'x_seconds_count{stage="a"} 3',
+    ]
+
+
+async def test_tokens_follow_the_request_into_spawned_tasks():
+    req, token = metrics.start_request()
+
+    async def upstream():
+        metrics.record_usage("classify", "sarvam-30b", {"prompt_tokens": 900, "completion_tokens": 100})
+
+    await asyncio.ensure_future(upstream())
+    metrics.finish_request(req, token, "sarvam-llm", 1200.0)
+    metrics.record_usage("classify", "sarvam-30b", None)  # outside any request
+
+    live = metrics.engine_summary("sarvam-llm")
+    assert live["requests"] == 1 and live["sarvam_calls"] == 1
+    assert live["tokens_per_request"] == 1000
+    usage = metrics.stats()["sarvam_usage"]["classify:sarvam-30b"]
+    assert usage["calls"] == 2 and usage["without_usage"] == 1
+    assert usage["prompt_tokens"] == 900
+
+
+async def test_classify_records_stages_engine_and_sarvam_usage(monkeypatch):
+    import services.classifier as clf
+
+    body = {
+        "choices": [{"message": {"content": (
+            '{"predictions": [{"domain": "RET16", "confidence": 0.9, "category_name": null,'
+            ' "explanation": "brass"}], "attributes": {}}'
+        )}}],
+        "usage": {"prompt_tokens": 1500, "completion_tokens": 200, "total_tokens": 1700},
+    }
+
+    async def fake_post(service, url, **kwargs):
+        return httpx.Response(200, json=body, request=httpx.Request("POST", url))
+
+    monkeypatch.setattr(clf, "SARVAM_API_KEY", "test-key")
+    monkeypatch.setattr(clf.http_pool, "post", fake_post)
+    monkeypatch.setattr(clf, "_use_muril", False)
+
+    preds, engine, _ = await clf.classify_mse_description_async(
+        "metrics test: hand-beaten brass urli for courtyards", budget_s=0,
+    )
+    assert engine == "sarvam-llm" and preds[0]["domain"] == "RET16"
+
+    live = metrics.engine_summary("sarvam-llm")
+    assert live["sarvam_calls"] == 1 and live["tokens_per_request"] == 1700
+    stages = metrics.stats()["stages_ms"]
+    assert {"cache", "tfidf", "sarvam_zero_shot"} <= set(stages)
+
+    text = metrics.render_prometheus({"hits_local": 0, "hits_redis": 0, "misses": 1})
+    assert 'vargbot_classify_requests_total{engine="sarvam-llm",source="chain"} 1' in text
+    assert 'vargbot_sarvam_tokens_total{service="classify",model="sarvam-30b",kind="prompt"} 1500' in text
+    assert 'vargbot_classify_cache_lookups_total{result="misses"} 1' in text
@@ -0,0 +1,74 @@
+"""Unit tests for the transformer micro-batcher."""
+
+import asyncio
+import time
+
+import pytest
+
+from services.micro_batch import MicroBatcher
+
+
+async def test_concurrent_submits_share_one_batch_and_keep_their_results():
+    calls = []
+
+    def double(items):
+        calls.append(list(items))
+        return [i * 2 for i in items]
+
+    b = MicroBatcher("test-mb-share", double, max_batch=8, max_delay_ms=20)
+    results = await asyncio.gather(*(b.submit(i) for i in range(5)))
+
+    assert results == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+    assert b.stats()["batch_size"]["buckets"]["le_8"] == 1
+    assert b.stats()["queue_delay_ms"]["count"] == 5
+
+
+async def test_full_batch_dispatches_without_waiting_for_the_delay():
+    b = MicroBatcher("test-mb-full", lambda items: items, max_batch=4, max_delay_ms=10_000)
+    t0 = time.perf_counter()
+    assert await asyncio.gather(*(b.submit(i) for i in range(4))) == [0, 1, 2, 3]
+    assert time.perf_counter() - t0 < 1
+
+
+async def test_backlog_accumulates_while_the_worker_is_busy():
+    sizes = []
+
+    def slow(items):
+        sizes.append(len(items))
+        time.sleep(0.1)
+        return items
+
+    b = MicroBatcher("test-mb-backlog", slow, max_batch=32, max_delay_ms=1)
+    first = asyncio.ensure_future(b.submit(0))
+    await asyncio.sleep(0.03)  # first batch is running on the single worker
+    rest = await asyncio.gather(*(b.submit(i) for i in range(1, 7)))
+    assert await first == 0 and rest == [1, 2, 3, 4, 5, 6]
+    assert sizes == [1, 6]
+
+
+async def test_engine_error_reaches_every_caller_in_the_batch():
+    def boom(items):
+        raise ValueError("model failed")
+
+    b = MicroBatcher("test-mb-error", boom, max_batch=8, max_delay_ms=5)
+    results = await asyncio.gather(b.submit("a"), b.submit("b"), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+async def test_cancelled_caller_is_dropped_before_dispatch():
+    seen = []
+
+    def record(items):
+        seen.extend(items)
+        return items
+
+    b = MicroBatcher("test-mb-cancel", record, max_batch=8, max_delay_ms=30)
+    gone = asyncio.ensure_future(b.submit("gone"))
+    kept = asyncio.ensure_future(b.submit("kept"))
+    await asyncio.sleep(0)
+    gone.cancel()
+    assert await kept == "kept"
+    with pytest.raises(asyncio.CancelledError):
+        await gone
+    assert seen == ["kept"]
@@ -0,0 +1,112 @@
+"""Unit tests for the TF-IDF hot-swap: stage, shadow-score, promote, roll back."""
+
+import asyncio
+
+import joblib
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+import services.classifier as clf
+from services import model_swap
+
+TRAIN = [
+    ("basmati rice and toor dal", "RET10"), ("atta flour and spices", "RET10"),
+    ("silk saree handloom", "RET12"), ("cotton kurta stitching", "RET12"),
+    ("mobile phone accessories", "RET14"), ("laptop repair service", "RET14"),
+    ("brass diya and pooja items", "RET16"), ("wooden furniture kitchen", "RET16"),
+] * 3
+
+
+def _artifact(path, train=TRAIN, c=1.0):
+    texts, labels = zip(*train)
+    joblib.dump(Pipeline([
+        ("tfidf", TfidfVectorizer()),
+        ("clf", LogisticRegression(C=c, max_iter=500)),
+    ]).fit(texts, labels), path)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def _isolated(monkeypatch, tmp_path):
+    monkeypatch.setenv("VARGBOT_TFIDF_PATH", str(tmp_path / "vargbot_tfidf_v2.joblib"))
+    monkeypatch.setattr(clf, "_tfidf", clf.load_tfidf_artifact(_artifact(tmp_path / "vargbot_tfidf_v2.joblib")))
+    for name, value in (("_status", model_swap.IDLE), ("_error", None), ("_candidate", None), ("_previous", None),
+                        ("_failed_fingerprint", None), ("_shadow", model_swap._Shadow())):
+        monkeypatch.setattr(model_swap, name, value)
+    monkeypatch.setattr(model_swap, "_history", model_swap.deque(maxlen=10))
+    monkeypatch.setattr(model_swap, "SHADOW_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(model_swap, "PROMOTE_MIN_SAMPLES", 3)
+
+
+async def _shadow_all(texts):
+    for t in texts:
+        model_swap.shadow(t)
+        await asyncio.gather(*list(model_swap._tasks))
+
+
+async def test_stage_shadow_promote_and_rollback(tmp_path):
+    incumbent = clf.serving_tfidf()
+    assert model_swap.stage(_artifact(tmp_path / "vargbot_tfidf_v3.joblib", c=10.0), wait=True)
+    stats = model_swap.stats()
+    assert stats["status"] == model_swap.SHADOWING and stats["candidate"]["engine"] == "vargbot-tfidf-v3"
+    assert clf.serving_tfidf() is incumbent  # staging never changes what serves
+
+    with pytest.raises(model_swap.SwapError):
+        model_swap.promote()  # no shadow samples yet
+    await _shadow_all(["basmati rice", "silk saree", "laptop repair"])
+    shadow = model_swap.stats()["shadow"]
+    assert shadow["samples"] == 3 and shadow["agreement"] == 1.0
+    assert shadow["latency_ms"]["candidate"]["count"] == 3
+
+    version_before = clf._engine_version()
+    model_swap.promote()
+    assert clf.serving_tfidf().engine == "vargbot-tfidf-v3"
+    assert clf._engine_version() != version_before  # new cache key space
+    assert model_swap.stats()["history"][0]["agreement"] == 1.0
+
+    model_swap.rollback()
+    assert clf.serving_tfidf() is incumbent
+
+
+async def test_in_flight_request_keeps_the_artifact_it_started_with(tmp_path, monkeypatch):
+    model_swap.stage(_artifact(tmp_path / "vargbot_tfidf_v3.joblib"), wait=True)
+    started = clf.serving_tfidf()
+    tfidf_preds = clf._classify_with_tfidf_many(["brass diya and pooja items"], started)[0]
+
+    model_swap.promote(force=True)  # swap lands between the TF-IDF stage and the answer
+
+    async def no_sarvam(description, domain_hint=None):
+        return None
+
+    monkeypatch.setattr(clf, "_classify_with_sarvam", no_sarvam)
+    _, engine, _ = await clf._classify_chain("brass diya and pooja items", tfidf_preds, tfidf=started)
+    assert engine.split("+")[0] == started.engine == "vargbot-tfidf-v2"
+    assert clf.serving_tfidf().engine == "vargbot-tfidf-v3"
+
+
+def test_candidate_that_drops_a_domain_is_rejected(tmp_path):
+    bad = _artifact(tmp_path / "vargbot_tfidf_v9.joblib", train=[r for r in TRAIN if r[1] != "RET16"])
+    assert model_swap.stage(bad, wait=True)
+    stats = model_swap.stats()
+    assert stats["status"] == model_swap.FAILED and "RET16" in stats["error"]
+    with pytest.raises(model_swap.SwapError):
+        model_swap.promote(force=True)
+
+
+def test_changed_artifact_on_disk_is_staged_once(tmp_path):
+    path = clf.tfidf_artifact_path()
+    assert not model_swap.watch_artifact()  # unchanged
+    _artifact(path, c=5.0)  # replaced in place
+    assert model_swap.watch_artifact()
+    assert model_swap.stats()["candidate"]["path"] == str(path)
+    assert not model_swap.watch_artifact()  # already the candidate
+
+
+def test_only_artifacts_in_the_models_directory_load(tmp_path):
+    assert model_swap.resolve_path(None) == clf.tfidf_artifact_path()
+    assert model_swap.resolve_path("vargbot_tfidf_v3.joblib") == tmp_path.resolve() / "vargbot_tfidf_v3.joblib"
+    for bad in ("../elsewhere/model.joblib", "/etc/passwd", "vargbot_tfidf_v3.pkl"):
+        with pytest.raises(model_swap.SwapError):
+            model_swap.resolve_path(bad)
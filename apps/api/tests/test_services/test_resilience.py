@@ -0,0 +1,168 @@
+"""Unit tests for the outbound circuit breaker / AIMD / retry layer."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from services import resilience
+from services.resilience import CircuitOpen, ConcurrencyLimited
+
+
+@pytest.fixture(autouse=True)
+def _fast_policy(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_BASE_S", 0.001)
+    monkeypatch.setattr(resilience, "RETRY_MAX", 0)
+    monkeypatch.setattr(resilience, "_endpoints", {})
+
+
+def _responder(*statuses, headers=None):
+    calls = []
+
+    async def send():
+        calls.append(time.monotonic())
+        status = statuses[min(len(calls), len(statuses)) - 1]
+        return httpx.Response(status, headers=headers or {})
+    return send, calls
+
+
+async def test_breaker_opens_after_consecutive_failures_and_fails_fast():
+    send, calls = _responder(500)
+    for _ in range(resilience.BREAKER_FAILURES):
+        assert (await resilience.call("tts", send)).status_code == 500
+
+    t0 = time.perf_counter()
+    with pytest.raises(CircuitOpen):
+        await resilience.call("tts", send)
+    assert time.perf_counter() - t0 < 0.01
+    assert len(calls) == resilience.BREAKER_FAILURES  # upstream not called while open
+    assert resilience.is_open("tts")
+    assert resilience.stats()["open"] == ["sarvam-tts"]
+
+
+async def test_half_open_probe_success_closes_the_circuit(monkeypatch):
+    monkeypatch.setattr(resilience, "BREAKER_OPEN_S", 0.05)
+    failing, _ = _responder(503)
+    for _ in range(resilience.BREAKER_FAILURES):
+        await resilience.call("ocr", failing)
+    assert resilience.is_open("ocr")
+
+    await asyncio.sleep(0.06)
+    healthy, _ = _responder(200)
+    assert (await resilience.call("ocr", healthy)).status_code == 200
+    assert resilience.stats()["endpoints"]["sarvam-vision"]["state"] == "closed"
+
+
+async def test_classify_and_ner_share_the_sarvam_chat_breaker():
+    failing, _ = _responder(502)
+    for _ in range(resilience.BREAKER_FAILURES):
+        await resilience.call("classify", failing)
+    assert resilience.is_open("ner")
+
+
+async def test_client_errors_do_not_trip_the_breaker():
+    send, _ = _responder(400)
+    for _ in range(resilience.BREAKER_FAILURES * 2):
+        await resilience.call("stt", send)
+    assert not resilience.is_open("stt")
+
+
+async def test_short_retry_after_is_honoured_then_retried(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_MAX", 2)
+    send, calls = _responder(429, 200, headers={"Retry-After": "0"})
+    resp = await resilience.call("classify", send)
+    assert resp.status_code == 200 and len(calls) == 2
+    stats = resilience.stats()["endpoints"]["sarvam-chat"]
+    assert stats["retries"] == 1 and stats["throttled_429"] == 1
+
+
+async def test_long_retry_after_opens_the_circuit_instead_of_waiting(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_MAX", 2)
+    send, calls = _responder(429, headers={"Retry-After": "120"})
+    resp = await resilience.call("classify", send)
+    assert resp.status_code == 429 and len(calls) == 1
+    assert resilience.stats()["endpoints"]["sarvam-chat"]["open_for_s"] > 100
+
+
+async def test_read_timeouts_are_not_retried(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_MAX", 2)
+    calls = []
+
+    async def send():
+        calls.append(1)
+        raise httpx.ReadTimeout("slow")
+
+    with pytest.raises(httpx.ReadTimeout):
+        await resilience.call("tts", send)
+    assert len(calls) == 1
+
+
+async def test_aimd_halves_on_throttling_and_grows_on_health():
+    throttled, _ = _responder(429)
+    await resilience.call("tts", throttled)
+    limit = resilience.stats()["endpoints"]["sarvam-tts"]["concurrency_limit"]
+    assert limit == int(resilience.AIMD_INITIAL_LIMIT / 2)
+
+    healthy, _ = _responder(200)
+    for _ in range(3 * limit):
+        await resilience.call("tts", healthy)
+    assert resilience.stats()["endpoints"]["sarvam-tts"]["concurrency_limit"] > limit
+
+
+async def test_calls_over_the_concurrency_limit_fail_after_the_queue_wait(monkeypatch):
+    monkeypatch.setattr(resilience, "AIMD_INITIAL_LIMIT", 1)
+    monkeypatch.setattr(resilience, "AIMD_QUEUE_S", 0.05)
+    release = asyncio.Event()
+
+    async def held():
+        await release.wait()
+        return httpx.Response(200)
+
+    first = asyncio.ensure_future(resilience.call("stt", held))
+    await asyncio.sleep(0)
+    with pytest.raises(ConcurrencyLimited):
+        await resilience.call("stt", held)
+    release.set()
+    assert (await first).status_code == 200
+
+
+def test_retry_after_http_date():
+    assert resilience.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert resilience.parse_retry_after("7") == 7.0
+    assert resilience.parse_retry_after("soon") is None
+
+
+async def test_slow_healthy_calls_keep_the_limit_unless_a_target_is_set(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock[0])
+
+    async def slow():
+        clock[0] += 25  # a normal long sarvam-30b completion
+        return httpx.Response(200)
+
+    await resilience.call("classify", slow)
+    assert resilience.stats()["endpoints"]["sarvam-chat"]["concurrency_limit"] == int(resilience.AIMD_INITIAL_LIMIT)
+
+    monkeypatch.setattr(resilience, "AIMD_LATENCY_TARGETS", {"sarvam-chat": 20.0})
+    await resilience.call("classify", slow)
+    assert resilience.stats()["endpoints"]["sarvam-chat"]["concurrency_limit"] == int(resilience.AIMD_INITIAL_LIMIT / 2)
+
+
+def test_latency_targets_parse_per_endpoint():
+    assert resilience._parse_latency_targets("sarvam-tts=8, sarvam-stt=15,bad,") == {
+        "sarvam-tts": 8.0, "sarvam-stt": 15.0,
+    }
+
+
+async def test_waiter_cancelled_after_being_handed_a_slot_gives_it_back(monkeypatch):
+    monkeypatch.setattr(resilience, "AIMD_INITIAL_LIMIT", 1)
+    ep = resilience._endpoint("sarvam-stt")
+    await ep.acquire()
+    waiter = asyncio.ensure_future(ep.acquire())
+    await asyncio.sleep(0)
+    ep.release()      # hands the slot to the waiter...
+    waiter.cancel()   # ...which is cancelled before it resumes
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert ep.in_flight == 0
@@ -0,0 +1,157 @@
+"""Unit tests for single-flight coalescing (in-process tier; the Redis lease
+against a minimal in-memory stand-in)."""
+
+import asyncio
+
+import pytest
+
+from services import single_flight
+
+
+async def test_concurrent_identical_calls_share_one_upstream_call():
+    calls = 0
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"domain": "RET10"}
+
+    key = single_flight.flight_key("test", "same text")
+    results = await asyncio.gather(*(single_flight.do(key, upstream) for _ in range(5)))
+
+    assert calls == 1
+    assert all(r == {"domain": "RET10"} for r in results)
+    # Each caller owns its copy
+    results[0]["domain"] = "MUTATED"
+    assert results[1]["domain"] == "RET10"
+
+
+async def test_different_keys_do_not_coalesce():
+    calls = 0
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    await asyncio.gather(
+        single_flight.do(single_flight.flight_key("test", "a"), upstream),
+        single_flight.do(single_flight.flight_key("test", "b"), upstream),
+    )
+    assert calls == 2
+
+
+async def test_leader_error_reaches_followers_and_clears_the_key():
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    key = single_flight.flight_key("test", "boom")
+    results = await asyncio.gather(
+        *(single_flight.do(key, failing) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def ok():
+        return "recovered"
+
+    assert await single_flight.do(key, ok) == "recovered"
+
+
+async def test_cancelled_leader_hands_over_to_a_follower():
+    calls = 0
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "done"
+
+    key = single_flight.flight_key("test", "cancel")
+    leader = asyncio.create_task(single_flight.do(key, upstream))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(single_flight.do(key, upstream))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert await follower == "done"
+    assert calls == 2
+
+
+class _LeaseStore:
+    """The Redis calls a leader makes: SET NX EX and DELETE for its lease,
+    and the publish pipeline."""
+
+    def __init__(self):
+        self.keys = {}
+
+    def pipeline(self):
+        return _LeasePipeline(self)
+
+    def set(self, name, value, nx=False, ex=None):
+        if nx and name in self.keys:
+            return None
+        self.keys[name] = value
+        return True
+
+    def delete(self, name):
+        self.keys.pop(name, None)
+
+
+class _LeasePipeline:
+    def __init__(self, store):
+        self.store, self.ops = store, []
+
+    def set(self, *args, **kwargs):
+        self.ops.append(lambda: self.store.set(*args, **kwargs))
+
+    def delete(self, name):
+        self.ops.append(lambda: self.store.delete(name))
+
+    def execute(self):
+        return [op() for op in self.ops]
+
+
+@pytest.mark.parametrize("outcome", ["error", "cancel"])
+async def test_failed_leader_releases_its_redis_lease(monkeypatch, outcome):
+    store = _LeaseStore()
+    monkeypatch.setattr(single_flight, "get_redis", lambda: store)
+    started = asyncio.Event()
+
+    async def upstream():
+        started.set()
+        await asyncio.sleep(0.05 if outcome == "error" else 10)
+        raise RuntimeError("upstream down")
+
+    key = single_flight.flight_key("test", f"lease-{outcome}")
+    leader = asyncio.create_task(single_flight.do(key, upstream))
+    await started.wait()
+    assert f"sf:lease:{key}" in store.keys
+    if outcome == "cancel":
+        leader.cancel()
+    with pytest.raises((RuntimeError, asyncio.CancelledError)):
+        await leader
+    assert f"sf:lease:{key}" not in store.keys  # other workers' followers stop waiting
+
+
+async def test_leader_does_not_publish_a_soft_failure(monkeypatch):
+    store = _LeaseStore()
+    monkeypatch.setattr(single_flight, "get_redis", lambda: store)
+
+    async def upstream():
+        return None  # quota exhausted / upstream error, swallowed by the helper
+
+    key = single_flight.flight_key("test", "soft-failure")
+    assert await single_flight.do(key, upstream) is None
+    assert f"sf:result:{key}" not in store.keys  # followers elsewhere make their own call
+    assert f"sf:lease:{key}" not in store.keys
+
+    async def answer():
+        return {"ok": True}
+
+    key = single_flight.flight_key("test", "answer")
+    assert await single_flight.do(key, answer) == {"ok": True}
+    assert store.keys[f"sf:result:{key}"] == '{"ok": true}'
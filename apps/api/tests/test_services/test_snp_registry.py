@@ -0,0 +1,89 @@
+"""Unit tests for the SNP registry snapshot: build, capacity reload, change detection."""
+
+import json
+
+import pytest
+
+from services import matcher, snp_registry
+
+
+class _Borrowed:
+    """The test session handed out as a SessionLocal() (close is a no-op)."""
+
+    def __init__(self, session):
+        self._session = session
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def _isolated(monkeypatch, tmp_path, db_session):
+    capacity = tmp_path / "snp_capacity.json"
+    capacity.write_text(json.dumps({"snp-test-001": [0.9, 5]}), encoding="utf-8")
+    monkeypatch.setattr(matcher, "_CAPACITY_PATH", capacity)
+    monkeypatch.setattr(matcher, "_capacity_cache", None)
+    monkeypatch.setattr("database.SessionLocal", lambda: _Borrowed(db_session))
+    snp_registry.invalidate()
+    yield capacity
+    snp_registry.invalidate()
+
+
+def test_snapshot_is_built_once_and_aligned_with_the_features(db_session, seed_snps):
+    snap = snp_registry.current(db_session)
+    assert snp_registry.current() is snap  # served from memory, no session needed
+    assert [r.id for r in snap.records] == sorted(r.id for r in snap.records)
+    assert snap.features.snps == list(snap.records)
+
+    grocery = snap.get(seed_snps[0].id)
+    assert isinstance(grocery, snp_registry.SnpRecord)
+    assert (grocery.name, grocery.geo_coverage) == ("GroceryMart India", "Pan-India")
+    row = snap.records.index(grocery)
+    assert snap.features.history[row] == matcher._history_score(grocery, {"snp-test-001": [0.9, 5]})
+
+
+def test_capacity_file_change_rebuilds_without_the_db(db_session, seed_snps, _isolated, monkeypatch):
+    snap = snp_registry.current(db_session)
+    row = snap.records.index(snap.get(seed_snps[0].id))
+
+    _isolated.write_text(json.dumps({"snp-test-001": [0.1, 30]}), encoding="utf-8")
+    monkeypatch.setattr("database.SessionLocal", None)  # a DB read would fail
+    fresh = snp_registry.current()
+    assert fresh.version != snap.version and fresh.records is snap.records
+    assert fresh.features.history[row] < snap.features.history[row]
+
+
+def test_row_edit_is_picked_up_by_refresh(db_session, seed_snps):
+    snap = snp_registry.current(db_session)
+    assert not snp_registry.refresh()  # unchanged
+
+    seed_snps[3].geo_coverage = "Delhi,Uttar Pradesh"
+    db_session.flush()
+    assert snp_registry.refresh()
+    fresh = snp_registry.current()
+    assert fresh.version != snap.version
+    assert fresh.get(seed_snps[3].id).geo_coverage == "Delhi,Uttar Pradesh"
+    assert not snp_registry.refresh()
+
+
+def test_same_length_edit_is_picked_up_by_refresh(db_session, seed_snps):
+    snap = snp_registry.current(db_session)
+    row = seed_snps[0]
+    assert row.domain_codes.startswith("RET10")
+    row.domain_codes = row.domain_codes.replace("RET10", "RET12", 1)
+    db_session.flush()
+    assert snp_registry.refresh()
+    assert snp_registry.current().version != snap.version
+
+
+def test_change_notice_rebuilds_only_a_different_version(db_session, seed_snps, monkeypatch):
+    snap = snp_registry.current(db_session)
+    calls = []
+    monkeypatch.setattr(snp_registry, "refresh", lambda force=False: calls.append(force))
+    snp_registry.handle_message(snap.version)  # our own notice
+    assert calls == []
+    snp_registry.handle_message("0123456789ab")
+    assert calls == [True]
@@ -0,0 +1,126 @@
+"""Parity tests: the lean TF-IDF runtime must reproduce the sklearn pipeline."""
+
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import FeatureUnion, Pipeline
+
+from services.tfidf_runtime import (LeanTfidf, MmapTfidf, export_lean, export_mmap,
+                                    mmap_path_for, term_hash)
+
+V1 = Path(__file__).resolve().parents[2] / "models" / "vargbot_tfidf_v1.joblib"
+
+PROBES = [
+    "", "   ", "We sell rice, dal and atta in bulk",
+    "Handloom silk SAREES  and cotton kurta — wholesale",
+    "mobile phone repair, laptop & LED bulbs",
+    "हम हल्दी और मसाले बेचते हैं", "brass diya pooja thali urli",
+    "ayurvedic herbal honey 500g", "x", "a b c d e f",
+]
+
+TRAIN = [
+    ("basmati rice and toor dal", "RET10"), ("atta flour and spices", "RET10"),
+    ("silk saree handloom", "RET12"), ("cotton kurta stitching", "RET12"),
+    ("mobile phone accessories", "RET14"), ("laptop repair service", "RET14"),
+    ("brass diya and pooja items", "RET16"), ("wooden furniture kitchen", "RET16"),
+] * 3
+
+
+def _union_model():
+    texts, labels = zip(*TRAIN)
+    return Pipeline([
+        ("tfidf", FeatureUnion([
+            ("word", TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)),
+            ("char", TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 5), sublinear_tf=True)),
+        ])),
+        ("clf", LogisticRegression(max_iter=500)),
+    ]).fit(texts, labels)
+
+
+def _assert_parity(model, tmp_path):
+    lean = LeanTfidf(export_lean(model, tmp_path / "model.lean.npz"))
+    assert list(lean.classes_) == list(model.classes_)
+    expected = model.predict_proba(PROBES)
+    np.testing.assert_allclose(lean.predict_proba(PROBES), expected, rtol=0, atol=1e-12)
+    for text, row in zip(PROBES, expected):
+        got = lean.predict_proba_one(text)
+        assert list(np.argsort(-got, kind="stable")[:3]) == list(np.argsort(-row, kind="stable")[:3])
+
+
+def test_parity_word_and_char_wb_union(tmp_path):
+    _assert_parity(_union_model(), tmp_path)
+
+
+def test_parity_char_analyzer_without_sublinear_tf(tmp_path):
+    texts, labels = zip(*TRAIN)
+    model = Pipeline([
+        ("tfidf", TfidfVectorizer(analyzer="char", ngram_range=(1, 3))),
+        ("clf", LogisticRegression(max_iter=500)),
+    ]).fit(texts, labels)
+    _assert_parity(model, tmp_path)
+
+
+@pytest.mark.skipif(not V1.exists(), reason="v1 artifact not shipped")
+def test_parity_shipped_v1_artifact(tmp_path):
+    _assert_parity(joblib.load(V1), tmp_path)
+
+
+def test_unsupported_pipeline_is_refused(tmp_path):
+    texts, labels = zip(*TRAIN)
+    model = Pipeline([
+        ("tfidf", TfidfVectorizer(stop_words="english")),
+        ("clf", LogisticRegression(max_iter=500)),
+    ]).fit(texts, labels)
+    with pytest.raises(ValueError):
+        export_lean(model, tmp_path / "model.lean.npz")
+
+
+# ── Memory-mapped artifact ──────────────────────────────────────────
+
+def test_term_hash_is_process_independent():
+    # Python's hash() is salted per process; the artifact's term ids must not be
+    import subprocess
+    import sys
+
+    code = "from services.tfidf_runtime import term_hash; print(term_hash('चावल rice'))"
+    other = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert int(other.stdout) == term_hash("चावल rice")
+    assert term_hash("rice") != term_hash("rice ")
+
+
+def test_term_hash_halves_are_independent():
+    # Two seeded CRC32s differ by a per-length constant — only 32 real bits
+    hashes = [term_hash(t) for t in ("rice", "dal ", "atta", "ghee")]
+    assert len({(h >> 32) ^ (h & 0xFFFFFFFF) for h in hashes}) == 4
+
+
+def test_unpruned_mmap_matches_pipeline_to_float32_precision(tmp_path):
+    model = _union_model()
+    art = MmapTfidf(export_mmap(model, tmp_path / "m.mmap"))
+    np.testing.assert_allclose(art.predict_proba(PROBES), model.predict_proba(PROBES), atol=1e-5)
+    assert art.meta["n_kept"] == art.meta["n_features"]
+
+
+def test_pruned_mmap_keeps_top_predictions_on_training_text(tmp_path):
+    model = _union_model()
+    texts = [t for t, _ in TRAIN[:8]]
+    art = MmapTfidf(export_mmap(model, tmp_path / "m.mmap", keep=0.3))
+    assert art.meta["n_kept"] < art.meta["n_features"]
+    assert list(art.predict_proba(texts).argmax(1)) == list(model.predict_proba(texts).argmax(1))
+
+
+def test_classifier_serves_from_mmap_artifact(tmp_path, monkeypatch):
+    import services.classifier as clf
+
+    joblib_path = tmp_path / "vargbot_tfidf_vx.joblib"   # never written: mmap only
+    export_mmap(_union_model(), mmap_path_for(joblib_path))
+    art = clf._load_tfidf_mmap(joblib_path)
+    assert art is not None and art.variant == "mmap-k1.0"
+    monkeypatch.setattr(clf, "_tfidf", art)
+    preds = clf._classify_with_tfidf("basmati rice and toor dal")
+    assert preds[0]["domain"] == "RET10"
+    assert clf._engine_version().startswith(f"vargbot-tfidf-vx:mmap-k1.0:{art.fingerprint}")
@@ -0,0 +1,155 @@
+"""Local stand-in for the Sarvam chat-completions endpoint.
+
+Serves POST /chat/completions in the OpenAI shape the classifier and NER
+parse, from a background thread on 127.0.0.1, so the served chain can be
+benchmarked with no key, quota or network. Per-call behaviour is drawn
+from a seeded RNG:
+
+  - latency   lognormal around `latency_ms` (median) with shape `sigma`
+  - errors    `error_rate` share of calls answer `error_status` (503 by
+              default; 429 also sends Retry-After)
+  - answer    `canned` JSON if given, otherwise a classification built from
+              the request: a domain-hinted call echoes the hint, a zero-shot
+              call answers the oracle label for the description with
+              probability `accuracy` and a wrong domain otherwise
+
+`usage` is estimated at ~4 characters per token so token accounting
+(services/metrics.py) has realistic numbers.
+
+    fake = FakeSarvam(latency_ms=400, oracle={"brass diya": "RET16"})
+    base_url = fake.start()       # -> SARVAM_BASE_URL
+    fake.configure(error_rate=1.0)
+    fake.stop()
+"""
+
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+DOMAINS = ("RET10", "RET12", "RET14", "RET16", "RET18")  # services/classifier.LABEL2ID
+_DESCRIPTION = re.compile(r"Classify this business:\n\n(.*?)(?:\n\nNote: |\Z)", re.DOTALL)
+_HINT = re.compile(r"with high confidence: (\w+) \(")
+
+
+class FakeSarvam:
+    def __init__(
+        self,
+        latency_ms: float = 400.0,
+        sigma: float = 0.35,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        accuracy: float = 0.95,
+        oracle: Optional[dict[str, str]] = None,
+        canned: Optional[dict] = None,
+        seed: int = 7,
+    ):
+        self.oracle = oracle or {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.calls = 0
+        self.errors = 0
+        self.configure(latency_ms=latency_ms, sigma=sigma, error_rate=error_rate,
+                       error_status=error_status, accuracy=accuracy, canned=canned)
+
+    def configure(self, **settings) -> None:
+        """Change behaviour between scenarios without restarting the server."""
+        for key, value in settings.items():
+            if key not in ("latency_ms", "sigma", "error_rate", "error_status", "accuracy", "canned"):
+                raise TypeError(f"unknown setting {key!r}")
+            setattr(self, key, value)
+
+    def start(self) -> str:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                status, payload, headers = fake._respond(body)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # ── one call ───────────────────────────────────────────────────────
+
+    def _respond(self, body: bytes) -> tuple[int, dict, dict]:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency_ms * math.exp(self.sigma * self._rng.gauss(0, 1)) / 1000
+            fail = self._rng.random() < self.error_rate
+            correct = self._rng.random() < self.accuracy
+            wrong = self._rng.choice(DOMAINS)
+            if fail:
+                self.errors += 1
+        time.sleep(delay)
+        if fail:
+            headers = {"Retry-After": "1"} if self.error_status == 429 else {}
+            return self.error_status, {"error": {"message": "fake upstream error"}}, headers
+
+        try:
+            messages = json.loads(body)["messages"]
+        except (ValueError, KeyError, TypeError):
+            return 400, {"error": {"message": "bad request"}}, {}
+        prompt = "".join(m.get("content") or "" for m in messages)
+        user = messages[-1].get("content") or ""
+
+        if self.canned is not None:
+            content = json.dumps(self.canned)
+        else:
+            hint = _HINT.search(user)
+            m = _DESCRIPTION.search(user)
+            label = self.oracle.get(m.group(1).strip() if m else "")
+            if hint:
+                domain = hint.group(1)
+            elif label and correct:
+                domain = label
+            else:
+                domain = wrong if wrong != label else DOMAINS[(DOMAINS.index(wrong) + 1) % len(DOMAINS)]
+            others = [d for d in DOMAINS if d != domain][:2]
+            content = json.dumps({
+                "predictions": [
+                    {"domain": domain, "confidence": 0.86, "category_name": None,
+                     "explanation": "fake sarvam"},
+                    {"domain": others[0], "confidence": 0.08, "category_name": None,
+                     "explanation": ""},
+                    {"domain": others[1], "confidence": 0.04, "category_name": None,
+                     "explanation": ""},
+                ],
+                "attributes": {},
+            })
+
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+        return 200, {
+            "id": f"fake-{self.calls}",
+            "object": "chat.completion",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }, {}
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""VargBot served-chain benchmark against a local Sarvam stand-in.
+
+evaluate_vargbot_robustness.py and bench_keyword_engine.py time single
+engines. This runs the whole serving path — classify_mse_description_async
+with TF-IDF gate, leaf resolver, Sarvam (ml/benchmarks/fake_sarvam.py),
+MuRIL if configured, keyword fallback, resilience layer, micro-batching and
+the latency budget — over a seeded sample of the labelled product corpus,
+once per scenario:
+
+  local_only   no Sarvam key: trained model / leaf resolver / keywords only
+  healthy      Sarvam at ~400 ms median
+  burst        healthy upstream, 4x the client concurrency
+  slow_llm     Sarvam slower than the 1 s budget: deadline answers
+  flaky        10% of Sarvam calls fail with 503 (retried)
+  outage       every Sarvam call fails: the breaker must open
+
+Per scenario: throughput, p50/p95/p99 latency, accuracy against the corpus
+label, engine mix and upstream call counts. The response cache is off so
+every request walks the chain.
+
+Regression gate: each scenario is compared with ml/benchmarks/baseline.json
+— throughput down or p95 up by more than --tolerance (default 25%), or
+accuracy down by more than 2 points, exits 1. Numbers are machine-specific:
+refresh the baseline on the machine that gates (--update-baseline) whenever
+a change is expected to move them, and commit it with that change.
+
+Corpus: data/processed/product_category_pairs.csv, falling back to
+mepma_product_pairs.csv (labelled by `corpus` in the report).
+
+Report: ml/reports/chain_bench.json
+Run:    python ml/benchmarks/run_chain_bench.py [--scenarios healthy,outage]
+        [--requests 300] [--canned answer.json] [--update-baseline]
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "apps" / "api"))
+
+MODELS = ROOT / "apps" / "api" / "models"
+CORPORA = [
+    ROOT / "data" / "processed" / "product_category_pairs.csv",
+    ROOT / "data" / "processed" / "mepma_product_pairs.csv",
+]
+REPORT = ROOT / "ml" / "reports" / "chain_bench.json"
+BASELINE = ROOT / "ml" / "benchmarks" / "baseline.json"
+ACCURACY_TOLERANCE = 0.02
+P95_SLACK_MS = 5.0  # below this, p95 differences are scheduler noise
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    llm: bool = True               # Sarvam key configured
+    latency_ms: float = 400.0      # upstream median
+    sigma: float = 0.35            # lognormal shape of upstream latency
+    error_rate: float = 0.0
+    error_status: int = 503
+    concurrency: int = 16
+    budget_s: float = 20.0
+
+
+SCENARIOS = [
+    Scenario("local_only", llm=False),
+    Scenario("healthy"),
+    Scenario("burst", concurrency=64),
+    Scenario("slow_llm", latency_ms=1500.0, sigma=0.5, budget_s=1.0),
+    Scenario("flaky", error_rate=0.1),
+    Scenario("outage", error_rate=1.0),
+]
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--scenarios", default=",".join(s.name for s in SCENARIOS))
+    p.add_argument("--requests", type=int, default=300, help="descriptions per scenario")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--tolerance", type=float, default=0.25)
+    p.add_argument("--canned", type=Path, help="JSON content every Sarvam call answers with")
+    p.add_argument("--update-baseline", action="store_true")
+    p.add_argument("--verbose", action="store_true", help="keep service logging")
+    return p.parse_args()
+
+
+def load_sample(n: int, seed: int, domains: set[str]) -> tuple[Path, list[tuple[str, str]]]:
+    corpus = next((p for p in CORPORA if p.exists()), None)
+    if corpus is None:
+        sys.exit("no product corpus found — run scripts/build_product_category_pairs.py")
+    rows: dict[str, str] = {}
+    with open(corpus, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            name = (row.get("product_name") or "").strip()
+            desc = (row.get("description") or "").strip()[:600]
+            label = (row.get("ondc_domain") or "").strip()
+            if name and label in domains:
+                rows.setdefault(f"{name}. {desc}" if desc else name, label)
+    pairs = sorted(rows.items())
+    random.Random(seed).shuffle(pairs)
+    return corpus, pairs[:n]
+
+
+def _pct(a: np.ndarray, q: float) -> float:
+    return round(float(np.percentile(a, q)), 1)
+
+
+async def run_scenario(clf, sc: Scenario, fake, sample: list[tuple[str, str]]) -> dict:
+    from services import metrics, resilience
+
+    fake.configure(latency_ms=sc.latency_ms, sigma=sc.sigma,
+                   error_rate=sc.error_rate, error_status=sc.error_status)
+    clf.SARVAM_API_KEY = "bench" if sc.llm else ""
+    metrics.reset()
+    resilience._endpoints.clear()  # every scenario starts with closed breakers
+    calls0, errors0 = fake.calls, fake.errors
+
+    sem = asyncio.Semaphore(sc.concurrency)
+    latencies = np.empty(len(sample))
+    engines: list[str] = [""] * len(sample)
+    correct = 0
+
+    async def one(i: int, text: str, label: str) -> None:
+        nonlocal correct
+        async with sem:
+            t0 = time.perf_counter()
+            preds, engine, _ = await clf.classify_mse_description_async(text, budget_s=sc.budget_s)
+            latencies[i] = (time.perf_counter() - t0) * 1000
+        engines[i] = engine
+        correct += bool(preds) and preds[0]["domain"] == label
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i, t, lbl) for i, (t, lbl) in enumerate(sample)))
+    wall = time.perf_counter() - t0
+    # Sarvam answers that missed the budget finish off the clock
+    await asyncio.gather(*list(clf._late_tasks), return_exceptions=True)
+
+    mix: dict[str, int] = {}
+    for e in engines:
+        mix[e] = mix.get(e, 0) + 1
+    return {
+        "scenario": asdict(sc),
+        "requests": len(sample),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(sample) / wall, 1),
+        "latency_ms": {
+            "p50": _pct(latencies, 50), "p95": _pct(latencies, 95), "p99": _pct(latencies, 99),
+            "mean": round(float(latencies.mean()), 1),
+        },
+        "accuracy": round(correct / len(sample), 4),
+        "engine_mix": {e: round(c / len(sample), 4) for e, c in sorted(mix.items(), key=lambda x: -x[1])},
+        "sarvam_calls": fake.calls - calls0,
+        "sarvam_errors": fake.errors - errors0,
+        "breaker": resilience.stats()["open"],
+    }
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    out = []
+    for name, r in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        if r["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            out.append(f"{name}: throughput {r['throughput_rps']} rps < baseline {base['throughput_rps']}")
+        if r["latency_ms"]["p95"] > base["p95_ms"] * (1 + tolerance) + P95_SLACK_MS:
+            out.append(f"{name}: p95 {r['latency_ms']['p95']} ms > baseline {base['p95_ms']}")
+        if r["accuracy"] < base["accuracy"] - ACCURACY_TOLERANCE:
+            out.append(f"{name}: accuracy {r['accuracy']} < baseline {base['accuracy']}")
+    return out
+
+
+async def main(args: argparse.Namespace) -> int:
+    from ml.benchmarks.fake_sarvam import FakeSarvam
+    import services.classifier as clf
+    from services import http_pool
+
+    wanted = [s for s in SCENARIOS if s.name in args.scenarios.split(",")]
+    if not wanted:
+        sys.exit(f"no such scenario: {args.scenarios}")
+
+    clf.init_classifier()
+    corpus, sample = load_sample(args.requests, args.seed, set(clf.LABEL2ID))
+    print(f"corpus: {corpus.name} — {len(sample)} descriptions per scenario")
+
+    canned = json.loads(args.canned.read_text(encoding="utf-8")) if args.canned else None
+    fake = FakeSarvam(oracle={t: lbl for t, lbl in sample}, canned=canned, seed=args.seed)
+    clf.SARVAM_BASE_URL = fake.start()
+    try:
+        # warm-up: model loads, gazetteer compile, leaf index, connection pool
+        await run_scenario(clf, Scenario("warmup", latency_ms=1.0), fake, sample[:20])
+        results = {}
+        for sc in wanted:
+            r = await run_scenario(clf, sc, fake, sample)
+            results[sc.name] = r
+            lat = r["latency_ms"]
+            print(f"  {sc.name:11s} {r['throughput_rps']:7.1f} rps  p50 {lat['p50']:7.1f}  "
+                  f"p95 {lat['p95']:7.1f}  p99 {lat['p99']:7.1f} ms  acc {r['accuracy']:.3f}  "
+                  f"{r['engine_mix']}")
+        engine_version = clf._engine_version()
+    finally:
+        fake.stop()
+        await http_pool.aclose()
+
+    baseline = json.loads(BASELINE.read_text(encoding="utf-8")) if BASELINE.exists() else {}
+    failed = regressions(results, baseline, args.tolerance)
+    report = {
+        "meta": {
+            "date": date.today().isoformat(),
+            "corpus": corpus.name,
+            "requests_per_scenario": len(sample),
+            "seed": args.seed,
+            "engine_version": engine_version,
+            "canned": str(args.canned) if args.canned else None,
+            "baseline": baseline.get("meta", {}).get("date"),
+            "tolerance": args.tolerance,
+        },
+        "scenarios": results,
+        "regressions": failed,
+    }
+    REPORT.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"report -> {REPORT.relative_to(ROOT)}")
+
+    if args.update_baseline:
+        BASELINE.write_text(json.dumps({
+            "meta": {k: report["meta"][k] for k in ("date", "corpus", "requests_per_scenario",
+                                                    "seed", "engine_version")},
+            "scenarios": {
+                name: {"throughput_rps": r["throughput_rps"], "p95_ms": r["latency_ms"]["p95"],
+                       "accuracy": r["accuracy"], "engine_mix": r["engine_mix"]}
+                for name, r in results.items()
+            },
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"baseline -> {BASELINE.relative_to(ROOT)}")
+        return 0
+    if not baseline:
+        print("no baseline yet — run with --update-baseline to record one")
+        return 0
+    for line in failed:
+        print(f"REGRESSION {line}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.verbose:
+        logging.disable(logging.ERROR)
+    # Configure the services before they are imported: no response cache (every
+    # request walks the chain), a throwaway database, the shipped TF-IDF model.
+    os.environ["VARGBOT_CACHE"] = "false"
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.gettempdir()) / 'vargbot_bench.db'}")
+    tfidf = next((p for p in (MODELS / "vargbot_tfidf_v2.joblib", MODELS / "vargbot_tfidf_v1.joblib")
+                  if p.exists()), None)
+    if tfidf is not None:
+        os.environ.setdefault("VARGBOT_TFIDF_PATH", str(tfidf))
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""VargBot keyword fallback — compiled engine vs per-keyword regex.
+
+The serving fallback (_classify_with_keywords) used to run one
+re.search(rf"\\b{kw}") per keyword per domain per call. It now scans each
+text once with a single precompiled alternation (apps/api/services/
+classifier.py, _KeywordEngine). This script proves two things on the
+product corpus:
+
+  A. Parity — the compiled engine returns the same top-3 domains and
+     confidences as the original loop for EVERY row.
+  B. Speed — per-call latency (p50/p95) and corpus throughput, single-item
+     and through the batch entry point the catalogue upload uses.
+
+Corpus: data/processed/product_category_pairs.csv (19.6K pairs). When that
+file is not built locally, falls back to mepma_product_pairs.csv and says so
+in the report.
+
+Report: ml/reports/keyword_engine_bench.json
+Run:    python ml/evaluation/bench_keyword_engine.py
+"""
+
+import csv
+import json
+import re
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT / "apps" / "api"))
+from services.classifier import (ONDC_DOMAINS, _classify_with_keywords,  # noqa: E402
+                                 _classify_with_keywords_many)
+
+CORPORA = [
+    ROOT / "data" / "processed" / "product_category_pairs.csv",
+    ROOT / "data" / "processed" / "mepma_product_pairs.csv",
+]
+REPORT = ROOT / "ml" / "reports" / "keyword_engine_bench.json"
+REPEATS = 3
+
+
+def legacy_keywords(description: str) -> list[tuple[str, float]]:
+    """The pre-compiled-engine implementation, verbatim, as the reference."""
+    text = description.lower()
+    scores: dict[str, float] = {}
+    for domain, keywords in ONDC_DOMAINS.items():
+        hits = sum(1 for kw in keywords if re.search(rf"\b{kw}", text))
+        scores[domain] = hits / len(keywords) if keywords else 0.0
+    total = sum(scores.values()) or 1.0
+    normalised = {d: s / total for d, s in scores.items()}
+    ranked = sorted(normalised.items(), key=lambda x: x[1], reverse=True)
+    if ranked[0][1] < 0.10:
+        ranked[0] = (ranked[0][0], 0.10)
+    return [(d, round(c, 4)) for d, c in ranked[:3]]
+
+
+def _per_call_us(fn, texts: list[str]) -> np.ndarray:
+    out = np.empty(len(texts))
+    for i, t in enumerate(texts):
+        t0 = time.perf_counter()
+        fn(t)
+        out[i] = (time.perf_counter() - t0) * 1e6
+    return out
+
+
+# ── Load corpus ────────────────────────────────────────────────────────
+corpus = next((p for p in CORPORA if p.exists()), None)
+if corpus is None:
+    sys.exit("no product corpus found — run scripts/build_product_category_pairs.py")
+texts = []
+with open(corpus, encoding="utf-8", newline="") as f:
+    for row in csv.DictReader(f):
+        name = (row.get("product_name") or "").strip()
+        desc = (row.get("description") or "").strip()[:600]
+        if name:
+            texts.append(f"{name}. {desc}" if desc else name)
+print(f"corpus: {corpus.name} — {len(texts)} rows")
+
+# ── A. Parity ──────────────────────────────────────────────────────────
+mismatches = [
+    t for t in texts
+    if legacy_keywords(t) != [(p["domain"], p["confidence"]) for p in _classify_with_keywords(t)]
+]
+print(f"parity: {len(texts) - len(mismatches)}/{len(texts)} identical")
+
+# ── B. Speed ───────────────────────────────────────────────────────────
+results = {}
+for label, fn in (("legacy_per_keyword_regex", legacy_keywords),
+                  ("compiled_engine", _classify_with_keywords)):
+    runs = [_per_call_us(fn, texts) for _ in range(REPEATS)]
+    best = min(runs, key=lambda r: r.sum())
+    results[label] = {
+        "p50_us": round(float(np.percentile(best, 50)), 2),
+        "p95_us": round(float(np.percentile(best, 95)), 2),
+        "corpus_s": round(float(best.sum()) / 1e6, 4),
+        "rows_per_s": round(len(texts) / (best.sum() / 1e6)),
+    }
+
+batch_runs = []
+for _ in range(REPEATS):
+    t0 = time.perf_counter()
+    _classify_with_keywords_many(texts)
+    batch_runs.append(time.perf_counter() - t0)
+batch_s = min(batch_runs)
+results["compiled_engine_batch"] = {
+    "corpus_s": round(batch_s, 4),
+    "rows_per_s": round(len(texts) / batch_s),
+}
+speedup = round(
+    results["legacy_per_keyword_regex"]["corpus_s"] / results["compiled_engine"]["corpus_s"], 2)
+
+for k, v in results.items():
+    print(f"  {k:28s} {v}")
+print(f"speedup (single-item, corpus total): {speedup}x")
+
+report = {
+    "meta": {
+        "date": date.today().isoformat(),
+        "corpus": corpus.name,
+        "rows": len(texts),
+        "keywords": sum(len(v) for v in ONDC_DOMAINS.values()),
+        "repeats": REPEATS,
+        "note": ("product_category_pairs.csv (19.6K) is the intended corpus; "
+                 "numbers from any other corpus are labelled by `corpus`."),
+    },
+    "parity": {"identical": len(texts) - len(mismatches), "mismatched": len(mismatches),
+               "examples": mismatches[:5]},
+    "latency": results,
+    "speedup_single_item": speedup,
+}
+REPORT.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+print(f"report -> {REPORT.relative_to(ROOT)}")
+if mismatches:
+    sys.exit(1)
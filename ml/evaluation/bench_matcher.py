@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""JodakAI matcher — vectorised scorer vs the per-SNP loop.
+
+compute_match_scores used to score SNPs one at a time in Python: regex
+splits of domain_codes and languages_supported, substring checks on
+geo_coverage and fit reasons for every SNP. It now scores a compiled
+SnpFeatures matrix in a few NumPy operations, selects the top-k with
+argpartition and builds fit reasons only for those (apps/api/services/
+matcher.py). This script proves, on the real registry and MSE profiles:
+
+  A. Parity — every factor and composite identical to the loop (exact
+     float equality) for every (MSE, SNP) pair, and the same top-k order.
+  B. Speed — per-/match latency (p50/p95) at the real registry size and at
+     a registry scaled up SCALE times (the registry keeps growing).
+
+Report: ml/reports/matcher_bench.json
+Run:    python ml/evaluation/bench_matcher.py
+"""
+
+import csv
+import json
+import random
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT / "apps" / "api"))
+from services.matcher import (W_COMMISSION, W_DOMAIN, W_GEO, W_HISTORY,  # noqa: E402
+                              W_SENTIMENT, _commission_score, _domain_score, _fit_reasons,
+                              _geo_score, _history_score, _sentiment_score, compute_match_scores)
+
+REPORT = ROOT / "ml" / "reports" / "matcher_bench.json"
+SEED = 20260710
+N_QUERIES = 300
+TOP_K = 5
+SCALE = 20
+
+
+def legacy_top_k(mse, snps, predicted_domain, k):
+    """The pre-vectorisation route path, verbatim: score every SNP with the
+    scalar factors, build every fit reason, sort, slice."""
+    results = []
+    for snp in snps:
+        d = _domain_score(predicted_domain, snp.domain_codes)
+        g = _geo_score(mse.state, mse.district, snp.geo_coverage)
+        c = _commission_score(snp.commission_pct)
+        h = _history_score(snp)
+        s = _sentiment_score(snp.onboarding_support, snp.languages_supported, mse.language)
+        composite = W_DOMAIN * d + W_GEO * g + W_COMMISSION * c + W_HISTORY * h + W_SENTIMENT * s
+        results.append({"snp": snp, "domain": d, "geo": g, "commission": c, "history": h,
+                        "sentiment": s, "composite": composite,
+                        "fit_reasons": _fit_reasons(mse, snp, d, g)})
+    return sorted(results, key=lambda r: r["composite"], reverse=True)[:k]
+
+
+def _per_call_ms(fn, queries) -> np.ndarray:
+    out = np.empty(len(queries))
+    for i, (mse, dom) in enumerate(queries):
+        t0 = time.perf_counter()
+        fn(mse, dom)
+        out[i] = (time.perf_counter() - t0) * 1000
+    return out
+
+
+# ── Load registry + queries ────────────────────────────────────────────
+snps = []
+with open(ROOT / "data" / "processed" / "snp_profiles.csv", encoding="utf-8", newline="") as f:
+    for i, row in enumerate(csv.DictReader(f), 1):
+        snps.append(SimpleNamespace(
+            id=i,
+            subscriber_id=row["snp_id"].strip(),
+            name=row["name"].strip(),
+            domain_codes=(row.get("domain_codes") or "").strip(),
+            geo_coverage=(row.get("geo_coverage") or "").strip(),
+            commission_pct=float(row.get("commission_pct") or 0),
+            rating=float(row.get("rating") or 0),
+            onboarding_support=(row.get("onboarding_support") or "none").strip(),
+            languages_supported=(row.get("languages_supported") or "").replace("|", ","),
+        ))
+rng = random.Random(SEED)
+with open(ROOT / "data" / "processed" / "mse_profiles_5k.csv", encoding="utf-8", newline="") as f:
+    rows = list(csv.DictReader(f))
+queries = [
+    (SimpleNamespace(state=(r.get("state") or "").strip(), district=(r.get("district") or "").strip(),
+                     language=(r.get("language") or "en").strip()),
+     (r.get("ondc_domain") or "").strip() or None)
+    for r in rng.sample(rows, N_QUERIES)
+]
+print(f"SNPs: {len(snps)} | queries: {len(queries)} (seed {SEED})")
+
+# ── A. Parity ──────────────────────────────────────────────────────────
+FIELDS = ("domain", "geo", "commission", "history", "sentiment", "composite")
+pairs = mismatched_pairs = topk_mismatches = 0
+for mse, dom in queries:
+    full = compute_match_scores(mse, snps, dom)
+    ref = legacy_top_k(mse, snps, dom, len(snps))
+    by_snp = {id(r["snp"]): r for r in ref}
+    for r in full:
+        pairs += 1
+        mismatched_pairs += any(r[f] != by_snp[id(r["snp"])][f] for f in FIELDS)
+    top = compute_match_scores(mse, snps, dom, top_k=TOP_K)
+    topk_mismatches += [(id(r["snp"]), r["fit_reasons"]) for r in top] != \
+        [(id(r["snp"]), r["fit_reasons"]) for r in ref[:TOP_K]]
+print(f"parity: {pairs - mismatched_pairs}/{pairs} pairs identical, "
+      f"top-{TOP_K} identical for {len(queries) - topk_mismatches}/{len(queries)} queries")
+
+# ── B. Speed ───────────────────────────────────────────────────────────
+scaled = [SimpleNamespace(**{**vars(s), "id": s.id + k * len(snps), "subscriber_id": f"{s.subscriber_id}#{k}"})
+          for k in range(SCALE) for s in snps]
+latency = {}
+for label, registry in ((f"registry_{len(snps)}", snps), (f"registry_{len(scaled)}", scaled)):
+    compute_match_scores(queries[0][0], registry, queries[0][1], top_k=TOP_K)  # compile
+    legacy = _per_call_ms(lambda m, d: legacy_top_k(m, registry, d, TOP_K), queries)
+    vector = _per_call_ms(lambda m, d: compute_match_scores(m, registry, d, top_k=TOP_K), queries)
+    latency[label] = {
+        name: {"p50_ms": round(float(np.percentile(a, 50)), 3),
+               "p95_ms": round(float(np.percentile(a, 95)), 3)}
+        for name, a in (("legacy_loop", legacy), ("vectorised", vector))
+    }
+    latency[label]["speedup_p50"] = round(
+        latency[label]["legacy_loop"]["p50_ms"] / latency[label]["vectorised"]["p50_ms"], 1)
+    print(f"  {label:14s} {latency[label]}")
+
+report = {
+    "meta": {
+        "date": date.today().isoformat(),
+        "snps": len(snps),
+        "scaled_snps": len(scaled),
+        "queries": len(queries),
+        "top_k": TOP_K,
+        "seed": SEED,
+        "note": "latency includes the registry-key check; compilation happens once per registry change",
+    },
+    "parity": {"pairs": pairs, "mismatched_pairs": mismatched_pairs,
+               "queries": len(queries), "topk_mismatched_queries": topk_mismatches},
+    "latency": latency,
+}
+REPORT.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+print(f"report -> {REPORT.relative_to(ROOT)}")
+if mismatched_pairs or topk_mismatches:
+    sys.exit(1)
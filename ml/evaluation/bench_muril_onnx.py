@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""VargBot MuRIL — int8 ONNX backend vs the torch + LoRA path, on CPU.
+
+Scores the same held-out test set (<model_dir>/test_set.json, saved by
+ml/pipelines/train_vargbot.py) with three backends:
+
+  torch_max_length  PeftModel, fp32, every input padded to 128 tokens — the
+                    path served before the ONNX backend existed
+  torch_dynamic     PeftModel, fp32, no padding for single items — the torch
+                    path as served now
+  onnx_int8         merged LoRA, int8 ONNX Runtime, dynamic padding
+                    (apps/api/services/muril_runtime.py)
+
+and reports, per backend: accuracy and macro-F1, top-1 agreement with
+torch_max_length, single-item latency p50/p95/p99 (one call per text, the
+way /classify invokes MuRIL) and batched throughput (batch 32, the
+catalogue path). Exits non-zero if onnx_int8 loses more than MAX_ACC_LOSS
+accuracy against torch_max_length.
+
+Needs: ml/requirements.txt plus onnxruntime, and an export from
+ml/export_vargbot_muril_onnx.py.
+
+Report: ml/reports/vargbot_muril_onnx_eval.json
+Run:    python ml/evaluation/bench_muril_onnx.py [--model_dir ml/models/vargbot-muril-lora]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT / "ml"))
+from evaluation.metrics import classification_metrics  # noqa: E402
+
+sys.path.insert(0, str(ROOT / "apps" / "api"))
+from services.muril_runtime import MAX_LENGTH, load_onnx  # noqa: E402
+
+REPORT = ROOT / "ml" / "reports" / "vargbot_muril_onnx_eval.json"
+LATENCY_ROWS = 500
+BATCH_SIZE = 32
+MAX_ACC_LOSS = 0.005
+
+
+def load_torch(model_dir: Path):
+    from peft import PeftModel
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    from pipelines.train_vargbot import ID2LABEL, LABEL2ID
+
+    adapter = model_dir / "adapter"
+    config = json.loads((adapter / "adapter_config.json").read_text())
+    base = AutoModelForSequenceClassification.from_pretrained(
+        config.get("base_model_name_or_path", "google/muril-base-cased"),
+        num_labels=len(LABEL2ID), id2label=ID2LABEL, label2id=LABEL2ID,
+    )
+    model = PeftModel.from_pretrained(base, str(adapter))
+    model.eval()
+    return model, AutoTokenizer.from_pretrained(str(adapter))
+
+
+def torch_backend(model, tokenizer, pad_to_max: bool):
+    import torch
+
+    def predict(texts: list[str]) -> np.ndarray:
+        padding = "max_length" if pad_to_max else ("longest" if len(texts) > 1 else False)
+        enc = tokenizer(texts, truncation=True, max_length=MAX_LENGTH,
+                        padding=padding, return_tensors="pt")
+        with torch.no_grad():
+            return torch.softmax(model(**enc).logits, dim=-1).numpy()
+    return predict
+
+
+def measure(predict, texts: list[str], labels: list[int]) -> tuple[dict, np.ndarray]:
+    probs = np.concatenate([predict(texts[i:i + BATCH_SIZE])
+                            for i in range(0, len(texts), BATCH_SIZE)])
+    m = classification_metrics(labels, probs.argmax(1).tolist())
+
+    single = np.empty(min(LATENCY_ROWS, len(texts)))
+    for i in range(len(single)):
+        t0 = time.perf_counter()
+        predict([texts[i]])
+        single[i] = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    for i in range(0, len(texts), BATCH_SIZE):
+        predict(texts[i:i + BATCH_SIZE])
+    batch_s = time.perf_counter() - t0
+
+    return {
+        "accuracy": round(m["accuracy"], 4),
+        "f1_macro": round(m["f1_macro"], 4),
+        "single_item_ms": {q: round(float(np.percentile(single, p)), 2)
+                           for q, p in (("p50", 50), ("p95", 95), ("p99", 99))},
+        "batch_rows_per_s": round(len(texts) / batch_s, 1),
+    }, probs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MuRIL torch vs int8 ONNX on CPU")
+    parser.add_argument("--model_dir", default=str(ROOT / "ml" / "models" / "vargbot-muril-lora"))
+    args = parser.parse_args()
+    model_dir = Path(args.model_dir)
+
+    test = json.loads((model_dir / "test_set.json").read_text(encoding="utf-8"))
+    texts, labels = test["texts"], test["labels"]
+    onnx = load_onnx(model_dir)
+    if onnx is None:
+        sys.exit(f"no ONNX export under {model_dir} — run ml/export_vargbot_muril_onnx.py")
+    model, tokenizer = load_torch(model_dir)
+
+    backends = {
+        "torch_max_length": torch_backend(model, tokenizer, pad_to_max=True),
+        "torch_dynamic": torch_backend(model, tokenizer, pad_to_max=False),
+        "onnx_int8": onnx.predict_proba,
+    }
+    results, probs = {}, {}
+    for name, predict in backends.items():
+        results[name], probs[name] = measure(predict, texts, labels)
+        print(f"  {name:18s} {results[name]}")
+
+    reference = probs["torch_max_length"].argmax(1)
+    for name in backends:
+        results[name]["top1_agreement_vs_torch"] = round(
+            float((probs[name].argmax(1) == reference).mean()), 4)
+    speedup = round(results["torch_max_length"]["single_item_ms"]["p50"]
+                    / results["onnx_int8"]["single_item_ms"]["p50"], 2)
+    acc_loss = results["torch_max_length"]["accuracy"] - results["onnx_int8"]["accuracy"]
+    print(f"onnx_int8 single-item p50 speedup: {speedup}x | accuracy delta {-acc_loss:+.4f}")
+
+    report = {
+        "meta": {
+            "date": date.today().isoformat(),
+            "model_dir": str(model_dir),
+            "test_rows": len(texts),
+            "latency_rows": min(LATENCY_ROWS, len(texts)),
+            "batch_size": BATCH_SIZE,
+            "cpu_count": os.cpu_count(),
+            "onnx_export": {k: onnx.meta.get(k) for k in ("model", "quantization", "opset", "exported")},
+        },
+        "backends": results,
+        "onnx_int8_single_item_speedup": speedup,
+    }
+    REPORT.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"report -> {REPORT.relative_to(ROOT)}")
+    if acc_loss > MAX_ACC_LOSS:
+        sys.exit(f"onnx_int8 accuracy loss {acc_loss:.4f} exceeds {MAX_ACC_LOSS}")
+
+
+if __name__ == "__main__":
+    main()
@@ -37,6 +37,9 @@ from sklearn.preprocessing import label_binarize
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 from evaluation.metrics import classification_metrics  # noqa: E402
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "apps" / "api"))
+from services.tfidf_runtime import LeanTfidf, lean_path_for  # noqa: E402
+
 sys.stdout.reconfigure(encoding="utf-8", errors="replace")
 ROOT = Path(__file__).resolve().parent.parent.parent
 
@@ -155,6 +158,18 @@ batch_total_s = time.perf_counter() - t0
 mean_ms = float(np.mean(singles))
 batch_ms = batch_total_s * 1000.0 / len(X_te)
 
+# Same model through the lean serving runtime (ml/export_vargbot_tfidf_lean.py),
+# which is what /classify actually runs at batch size 1 when the export ships.
+lean_singles = []
+LEAN_ARTIFACT = lean_path_for(ARTIFACT)
+if LEAN_ARTIFACT.exists():
+    lean = LeanTfidf(LEAN_ARTIFACT)
+    for text in sample:
+        t0 = time.perf_counter()
+        lean.predict_proba_one(text)
+        lean_singles.append((time.perf_counter() - t0) * 1000.0)
+    lean_singles.sort()
+
 # Cost follows from occupied compute time; the trained model itself makes no
 # paid API call. Above the gate the chain also fires one Sarvam-30B leaf call,
 # which is billed per token and is NOT included in the figure below.
@@ -169,6 +184,13 @@ latency = {
         "p99": pct(singles, 0.99),
         "n_samples": len(singles),
     },
+    "single_item_ms_lean_runtime": {
+        "mean": round(float(np.mean(lean_singles)), 3),
+        "p50": pct(lean_singles, 0.50),
+        "p95": pct(lean_singles, 0.95),
+        "p99": pct(lean_singles, 0.99),
+        "n_samples": len(lean_singles),
+    } if lean_singles else None,
     "batched_ms_per_item": round(batch_ms, 4),
     "batch_throughput_items_per_s": round(len(X_te) / batch_total_s, 1),
     "cost_model": {
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""Export the VargBot MuRIL + LoRA classifier to an int8 ONNX serving model.
+
+Reads <model_dir>/adapter (written by ml/pipelines/train_vargbot.py), merges
+the LoRA weights into google/muril-base-cased (merge_and_unload), exports
+the merged model to ONNX with dynamic batch and sequence axes, and applies
+ONNX Runtime dynamic int8 quantization to the MatMul weights. Output goes to
+<model_dir>/onnx/ together with the tokenizer and export_meta.json — the
+layout apps/api/services/muril_runtime.py serves.
+
+The export is refused unless the quantized model agrees with the torch
+adapter on the held-out test set (<model_dir>/test_set.json, saved by
+training): top-1 agreement >= MIN_AGREEMENT and accuracy within
+MAX_ACC_LOSS. The measured numbers are written into export_meta.json.
+Latency and accuracy against the torch path: ml/evaluation/bench_muril_onnx.py.
+
+Run: python ml/export_vargbot_muril_onnx.py [--model_dir ml/models/vargbot-muril-lora]
+"""
+
+import argparse
+import json
+import shutil
+import sys
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "apps" / "api"))
+from services.muril_runtime import FORMAT, MAX_LENGTH, META_FILE, OnnxMuril, onnx_dir_for  # noqa: E402
+
+OPSET = 17
+MIN_AGREEMENT = 0.99
+MAX_ACC_LOSS = 0.005
+PARITY_ROWS = 2000
+
+
+def load_merged(adapter_path: Path):
+    """Base model with the LoRA adapter folded into its weights (plain HF model)."""
+    from peft import PeftModel
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    config = json.loads((adapter_path / "adapter_config.json").read_text())
+    base_name = config.get("base_model_name_or_path", "google/muril-base-cased")
+    tokenizer = AutoTokenizer.from_pretrained(str(adapter_path))
+    sys.path.insert(0, str(ROOT))
+    from ml.pipelines.train_vargbot import ID2LABEL, LABEL2ID
+    base = AutoModelForSequenceClassification.from_pretrained(
+        base_name, num_labels=len(LABEL2ID), id2label=ID2LABEL, label2id=LABEL2ID,
+    )
+    model = PeftModel.from_pretrained(base, str(adapter_path)).merge_and_unload()
+    model.eval()
+    return model, tokenizer, base_name
+
+
+def torch_proba(model, tokenizer, texts: list[str], batch_size: int = 32) -> np.ndarray:
+    import torch
+
+    out = []
+    for i in range(0, len(texts), batch_size):
+        enc = tokenizer(texts[i:i + batch_size], truncation=True, max_length=MAX_LENGTH,
+                        padding="longest", return_tensors="pt")
+        with torch.no_grad():
+            out.append(torch.softmax(model(**enc).logits, dim=-1).numpy())
+    return np.concatenate(out)
+
+
+def export_onnx(model, tokenizer, path: Path) -> list[str]:
+    import torch
+
+    sample = tokenizer(["हम साड़ी बेचते हैं", "We sell rice, dal & atta"],
+                       padding="longest", return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    axes = {n: {0: "batch", 1: "sequence"} for n in names}
+    axes["logits"] = {0: "batch"}
+    torch.onnx.export(
+        model, tuple(sample[n] for n in names), str(path),
+        input_names=names, output_names=["logits"], dynamic_axes=axes,
+        opset_version=OPSET, do_constant_folding=True,
+    )
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export MuRIL + LoRA to int8 ONNX")
+    parser.add_argument("--model_dir", default=str(ROOT / "ml" / "models" / "vargbot-muril-lora"))
+    parser.add_argument("--keep_fp32", action="store_true", help="Keep the unquantized model.onnx")
+    args = parser.parse_args()
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    model_dir = Path(args.model_dir)
+    out = onnx_dir_for(model_dir)
+    shutil.rmtree(out, ignore_errors=True)
+    out.mkdir(parents=True)
+
+    model, tokenizer, base_name = load_merged(model_dir / "adapter")
+    labels = [model.config.id2label[i] for i in range(model.config.num_labels)]
+    fp32 = out / "model.onnx"
+    inputs = export_onnx(model, tokenizer, fp32)
+    quantize_dynamic(str(fp32), str(out / "model.int8.onnx"), weight_type=QuantType.QInt8)
+    if not args.keep_fp32:
+        fp32.unlink()
+    tokenizer.save_pretrained(str(out))
+
+    meta = {
+        "format": FORMAT,
+        "model": "model.int8.onnx",
+        "labels": labels,
+        "inputs": inputs,
+        "base_model": base_name,
+        "quantization": "int8",
+        "opset": OPSET,
+        "max_length": MAX_LENGTH,
+        "exported": date.today().isoformat(),
+    }
+    (out / META_FILE).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    # ── Parity gate on the held-out test set ──────────────────────────
+    test_path = model_dir / "test_set.json"
+    if not test_path.exists():
+        shutil.rmtree(out)
+        sys.exit(f"{test_path} not found — train with ml/pipelines/train_vargbot.py first")
+    test = json.loads(test_path.read_text(encoding="utf-8"))
+    texts, y = test["texts"][:PARITY_ROWS], np.array(test["labels"][:PARITY_ROWS])
+
+    p_torch = torch_proba(model, tokenizer, texts)
+    p_onnx = OnnxMuril(out).predict_proba(texts)
+    agreement = float((p_torch.argmax(1) == p_onnx.argmax(1)).mean())
+    acc_torch = float((p_torch.argmax(1) == y).mean())
+    acc_onnx = float((p_onnx.argmax(1) == y).mean())
+    meta["parity"] = {
+        "rows": len(texts),
+        "top1_agreement": round(agreement, 4),
+        "max_abs_dp": round(float(np.abs(p_torch - p_onnx).max()), 4),
+        "accuracy_torch_merged": round(acc_torch, 4),
+        "accuracy_onnx_int8": round(acc_onnx, 4),
+    }
+    (out / META_FILE).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    size_mb = (out / meta["model"]).stat().st_size / 1e6
+    print(f"{model_dir.name}/adapter -> {out.relative_to(model_dir)}/{meta['model']} ({size_mb:.0f} MB)")
+    print(f"parity on {len(texts)} held-out texts: {meta['parity']}")
+    if agreement < MIN_AGREEMENT or acc_torch - acc_onnx > MAX_ACC_LOSS:
+        shutil.rmtree(out)
+        sys.exit(f"int8 export diverges from the adapter (agreement {agreement:.4f}, "
+                 f"accuracy {acc_torch:.4f} -> {acc_onnx:.4f}) — not shipped")
+
+
+if __name__ == "__main__":
+    main()
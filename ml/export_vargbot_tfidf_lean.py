@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Export the trained VargBot TF-IDF pipeline to the lean serving format.
+
+Reads ml/models/vargbot_tfidf_v2.joblib and writes
+ml/models/vargbot_tfidf_v2.lean.npz (vocabularies, idf weights, transposed
+coefficients — see apps/api/services/tfidf_runtime.py). The export is refused
+unless the lean runtime reproduces the pipeline's predict_proba on a
+corpus sample, so a shipped .lean.npz is always equivalent to its joblib.
+
+Run: python ml/export_vargbot_tfidf_lean.py [path/to/model.joblib]
+"""
+
+import csv
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "apps" / "api"))
+from services.tfidf_runtime import LeanTfidf, export_lean, lean_path_for  # noqa: E402
+
+ARTIFACT = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "ml" / "models" / "vargbot_tfidf_v2.joblib"
+CORPUS = ROOT / "data" / "processed" / "training_corpus_v2.csv"
+PARITY_ROWS = 2000
+TOLERANCE = 1e-9
+
+model = joblib.load(ARTIFACT)
+out = export_lean(model, lean_path_for(ARTIFACT))
+lean = LeanTfidf(out)
+
+sample = ["", "   ", "We sell rice, dal & atta", "हम साड़ी बेचते हैं", "Brass diya — pooja thali"]
+if CORPUS.exists():
+    with open(CORPUS, encoding="utf-8", newline="") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            if i >= PARITY_ROWS:
+                break
+            sample.append((row.get("text") or "").strip())
+
+diff = float(np.abs(model.predict_proba(sample) - lean.predict_proba(sample)).max())
+print(f"{ARTIFACT.name} -> {out.name} ({out.stat().st_size / 1e6:.1f} MB) | "
+      f"parity on {len(sample)} texts: max |Δp| = {diff:.2e}")
+if diff > TOLERANCE:
+    out.unlink()
+    sys.exit(f"lean export diverges from the pipeline (max |Δp| {diff:.2e} > {TOLERANCE})")
@@ -92,27 +92,39 @@ class MatchEngine:
 
     def embed(self, text: str) -> np.ndarray:
         """Get mean-pooled embedding for a text string."""
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: list[str], batch_size: int = 32) -> np.ndarray:
+        """(n, dim) L2-normalised mean-pooled embeddings, one padded forward
+        pass per batch_size texts instead of one pass per text."""
         self._load_model()
 
         if self._model == "mock":
-            rng = np.random.default_rng(hash(text) % (2**31))
-            vec = rng.standard_normal(768).astype(np.float32)
-            return vec / np.linalg.norm(vec)
+            vecs = []
+            for text in texts:
+                rng = np.random.default_rng(hash(text) % (2**31))
+                vec = rng.standard_normal(768).astype(np.float32)
+                vecs.append(vec / np.linalg.norm(vec))
+            return np.stack(vecs)
 
         import torch
 
-        inputs = self._tokenizer(
-            text, return_tensors="pt", truncation=True, max_length=128, padding=True
-        ).to(self._device)
+        out = []
+        for i in range(0, len(texts), batch_size):
+            inputs = self._tokenizer(
+                texts[i:i + batch_size], return_tensors="pt", truncation=True, max_length=128,
+                padding=True,
+            ).to(self._device)
 
-        with torch.no_grad():
-            outputs = self._model(**inputs)
+            with torch.no_grad():
+                outputs = self._model(**inputs)
 
-        # Mean pooling over token dimension
-        mask = inputs["attention_mask"].unsqueeze(-1).float()
-        pooled = (outputs.last_hidden_state * mask).sum(dim=1) / mask.sum(dim=1)
-        vec = pooled.squeeze().cpu().numpy()
-        return vec / np.linalg.norm(vec)
+            # Mean pooling over token dimension (padding masked out)
+            mask = inputs["attention_mask"].unsqueeze(-1).float()
+            pooled = (outputs.last_hidden_state * mask).sum(dim=1) / mask.sum(dim=1)
+            out.append(pooled.cpu().numpy())
+        vecs = np.concatenate(out)
+        return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
 
     def cosine_similarity(self, a: np.ndarray, b: np.ndarray) -> float:
         return float(np.dot(a, b))
@@ -123,11 +135,18 @@ class MatchEngine:
         mse_state: str,
         mse_lang: str,
         snp: SNPProfile,
+        mse_emb: np.ndarray | None = None,
+        snp_emb: np.ndarray | None = None,
     ) -> MatchScore:
-        """Compute the multi-factor match score for one MSE–SNP pair."""
+        """Compute the multi-factor match score for one MSE–SNP pair.
+
+        mse_emb / snp_emb: precomputed embeddings (rank() batches them).
+        """
         # D — Domain alignment via embedding similarity
-        mse_emb = self.embed(mse_text)
-        snp_emb = self.embed(snp.description)
+        if mse_emb is None:
+            mse_emb = self.embed(mse_text)
+        if snp_emb is None:
+            snp_emb = self.embed(snp.description)
         d = max(self.cosine_similarity(mse_emb, snp_emb), 0.0)
 
         # G — Geographic proximity
@@ -175,7 +194,11 @@ class MatchEngine:
         top_k: int = 5,
     ) -> list[MatchScore]:
         """Score and rank all SNPs for a given MSE, return top-k."""
-        scores = [self.score(mse_text, mse_state, mse_lang, snp) for snp in snps]
+        embs = self.embed_many([mse_text] + [snp.description for snp in snps])
+        scores = [
+            self.score(mse_text, mse_state, mse_lang, snp, mse_emb=embs[0], snp_emb=emb)
+            for snp, emb in zip(snps, embs[1:])
+        ]
         scores.sort(key=lambda s: s.composite, reverse=True)
         return scores[:top_k]
 
@@ -18,11 +18,21 @@ Protocol unchanged from v1: stratified 80/10/10, C-grid on val macro-F1,
 5-fold CV on train+val, held-out test. Artifact: ml/models/vargbot_tfidf_v2.joblib
 Report: ml/reports/vargbot_tfidf_v2_eval.json
 
+Serving artifact: ml/models/vargbot_tfidf_v2.mmap/ — hashed vocabulary and
+float32 coefficients, memory-mapped by the API instead of joblib.load (see
+apps/api/services/tfidf_runtime.py). Coefficient rows are pruned by
+coefficient magnitude or chi², whichever keeps fewer features within
+PRUNE_MAX_ACC_LOSS accuracy and PRUNE_MIN_AGREEMENT top-1 agreement with the
+unpruned model — selected on the validation split with the train-only model,
+then applied to the final model and reported once on test. Pruning report:
+ml/reports/vargbot_tfidf_v2_pruning.json
+
 Run: python ml/train_vargbot_tfidf_v2.py
 """
 
 import csv
 import json
+import shutil
 import sys
 from collections import Counter
 from datetime import date
@@ -31,6 +41,7 @@ from pathlib import Path
 import joblib
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_selection import chi2
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import (accuracy_score, confusion_matrix, f1_score,
                              precision_recall_fscore_support)
@@ -41,6 +52,13 @@ from sklearn.pipeline import FeatureUnion, Pipeline
 sys.stdout.reconfigure(encoding="utf-8", errors="replace")
 ROOT = Path(__file__).resolve().parent.parent
 SEED = 20260708
+sys.path.insert(0, str(ROOT / "apps" / "api"))
+from services.tfidf_runtime import MmapTfidf, export_mmap, feature_importance  # noqa: E402
+
+# Pruning tolerances for the serving artifact
+PRUNE_KEEP_GRID = (1.0, 0.5, 0.25, 0.1, 0.05)
+PRUNE_MAX_ACC_LOSS = 0.002
+PRUNE_MIN_AGREEMENT = 0.995
 
 # ── Load corpus ────────────────────────────────────────────────────────
 texts, labels, sources = [], [], []
@@ -202,3 +220,86 @@ out = {
 joblib.dump(final, ROOT / "ml" / "models" / "vargbot_tfidf_v2.joblib", compress=3)
 size_mb = (ROOT / "ml" / "models" / "vargbot_tfidf_v2.joblib").stat().st_size / 1e6
 print(f"saved vargbot_tfidf_v2.joblib ({size_mb:.1f} MB) + vargbot_tfidf_v2_eval.json")
+
+
+# ── Memory-mapped serving artifact: pruning sweep on validation ───────
+# keep / prune_by are chosen on the validation split with the train-only
+# model (val_pipe), so the test set stays out of model selection; only the
+# chosen artifact, exported from `final`, is scored on test.
+def _rankings(pipe, X, y) -> dict:
+    return {
+        "coef": feature_importance(pipe),
+        "chi2": chi2(pipe.named_steps["tfidf"].transform(X), y)[0],
+    }
+
+
+val_full_acc = float((val_pred == y_val_arr).mean())
+val_full_top1 = val_proba.argmax(axis=1)
+val_rankings = _rankings(val_pipe, X_tr, y_tr)
+MMAP_DIR = ROOT / "ml" / "models" / "vargbot_tfidf_v2.mmap"
+scratch = ROOT / "ml" / "models" / ".prune_scratch"
+sweep = []
+chosen = None
+for prune_by, scores in val_rankings.items():
+    for keep in PRUNE_KEEP_GRID:
+        art = MmapTfidf(export_mmap(val_pipe, scratch, keep=keep, importance=scores,
+                                    prune_by=prune_by))
+        proba = art.predict_proba(X_val)
+        p_acc = float((art.classes_[proba.argmax(axis=1)] == y_val_arr).mean())
+        row = {
+            "prune_by": prune_by,
+            "keep": keep,
+            "features_kept": art.meta["n_kept"],
+            "size_mb": round(sum(f.stat().st_size for f in scratch.iterdir()) / 1e6, 2),
+            "val_accuracy": round(p_acc, 4),
+            "accuracy_loss": round(val_full_acc - p_acc, 4),
+            "top1_agreement": round(float((proba.argmax(axis=1) == val_full_top1).mean()), 4),
+            "max_abs_proba_diff": round(float(np.abs(proba - val_proba).max()), 4),
+        }
+        sweep.append(row)
+        print(f"  prune {prune_by} keep={keep}: val acc {row['val_accuracy']} "
+              f"(loss {row['accuracy_loss']}), agreement {row['top1_agreement']}")
+        within = (row["accuracy_loss"] <= PRUNE_MAX_ACC_LOSS
+                  and row["top1_agreement"] >= PRUNE_MIN_AGREEMENT)
+        if within and (chosen is None or keep < chosen["keep"]):
+            chosen = row
+shutil.rmtree(scratch, ignore_errors=True)
+
+chosen = chosen or next(r for r in sweep if r["keep"] == 1.0)
+if MMAP_DIR.exists():
+    shutil.rmtree(MMAP_DIR)
+export_mmap(final, MMAP_DIR, keep=chosen["keep"],
+            importance=_rankings(final, X_trval, y_trval)[chosen["prune_by"]], prune_by=chosen["prune_by"])
+
+# The one test-set number for the pruned artifact
+served = MmapTfidf(MMAP_DIR)
+served_proba = served.predict_proba(X_te)
+served_pred = served.classes_[served_proba.argmax(axis=1)]
+served_test = {
+    "features_kept": served.meta["n_kept"],
+    "size_mb": round(sum(f.stat().st_size for f in MMAP_DIR.iterdir()) / 1e6, 2),
+    "test_accuracy": round(float((served_pred == np.array(y_te)).mean()), 4),
+    "test_macro_f1": round(float(f1_score(y_te, served_pred, average="macro")), 4),
+    "top1_agreement_with_full": round(float((served_proba.argmax(axis=1)
+                                             == final.predict_proba(X_te).argmax(axis=1)).mean()), 4),
+}
+print(f"TEST pruned artifact: acc {served_test['test_accuracy']} "
+      f"(full model {acc:.4f}), agreement {served_test['top1_agreement_with_full']}")
+(ROOT / "ml" / "reports" / "vargbot_tfidf_v2_pruning.json").write_text(json.dumps({
+    "meta": {
+        "trained": date.today().isoformat(),
+        "selected_on": (f"validation split (n={len(y_val)}), train-only model — "
+                        "the test set is not used for selection"),
+        "full_model_val_accuracy": round(val_full_acc, 4),
+        "full_model_test_accuracy": round(acc, 4),
+        "max_accuracy_loss": PRUNE_MAX_ACC_LOSS,
+        "min_top1_agreement": PRUNE_MIN_AGREEMENT,
+        "note": ("Pruning removes coefficient rows only; every term keeps its "
+                 "hash and idf so document norms match the full model."),
+    },
+    "sweep": sweep,
+    "selected": chosen,
+    "selected_test": served_test,
+}, indent=2), encoding="utf-8")
+print(f"saved vargbot_tfidf_v2.mmap (prune_by={chosen['prune_by']}, keep={chosen['keep']}, "
+      f"{served_test['size_mb']} MB) + vargbot_tfidf_v2_pruning.json")
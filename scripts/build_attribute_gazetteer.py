@@ -0,0 +1,77 @@
+"""Build the attribute gazetteer the API extracts sectoral attributes with.
+
+Source: data/processed/ondc_taxonomy.json `attribute_enums` (ONDC retail
+attribute enums, see scripts/build_ondc_taxonomy.py). Only fields that are
+inferable from free-text business descriptions are kept, and enum values
+that are placeholders ("alpha") or that read as ordinary words in a
+description ("rice", "water", "others") are dropped.
+
+The catalogue template vocabularies (routes/catalogue.REFERENCE_VALUES,
+DOMAIN_COLUMNS) are merged in at load time by services/attribute_extractor.py,
+so they are not duplicated here.
+
+Output ships with the API: apps/api/data/attribute_gazetteer.json
+Run from repo root: python scripts/build_attribute_gazetteer.py
+"""
+
+import json
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "data" / "processed" / "ondc_taxonomy.json"
+OUT = ROOT / "apps" / "api" / "data" / "attribute_gazetteer.json"
+
+# enum name -> attribute key in the API's flat attribute dict
+FIELDS = {
+    "fabric": "fabric",
+    "pattern": "pattern",
+    "ornamentation": "ornamentation",
+    "occasion": "occasion",
+    "material": "material",
+    "base_metal": "material",
+    "jewellery_type": "jewellery_type",
+    "gender": "gender",
+    "formulation": "formulation",
+    "skin_type": "skin_type",
+}
+
+PLACEHOLDERS = {"alpha", "alphanumeric", "others"}
+DROP = {
+    "material": {"battery", "carbon", "expanded", "foamed", "grey", "rice", "sand", "stainless",
+                 "thermo", "water", "ethylene", "styrene", "cellulose", "textile", "metal", "PU"},
+    "pattern": {"animal", "faded", "mesh", "perforations", "quirky", "temple", "textured"},
+    "ornamentation": {"patch", "mirror"},
+    "skin_type": {"all", "normal"},
+    "formulation": {"bar", "butter", "solid", "stick"},
+    "jewellery_type": {"statement", "stone", "tasse"},
+}
+
+
+def main() -> None:
+    enums = json.loads(SRC.read_text(encoding="utf-8"))["attribute_enums"]
+    fields: dict[str, list[str]] = {}
+    for enum, key in FIELDS.items():
+        drop = DROP.get(enum, set())
+        values = fields.setdefault(key, [])
+        for v in enums.get(enum, []):
+            if v in PLACEHOLDERS or v in drop:
+                continue
+            v = v.replace("_", " ").strip().lower()
+            if v and v not in values:
+                values.append(v)
+
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    OUT.write_text(json.dumps({
+        "meta": {
+            "source": "data/processed/ondc_taxonomy.json attribute_enums",
+            "enums": FIELDS,
+        },
+        "fields": fields,
+    }, indent=2, ensure_ascii=False))
+    for key, values in fields.items():
+        print(f"  {key}: {len(values)} values")
+    print(f"wrote {OUT}")
+
+
+if __name__ == "__main__":
+    main()